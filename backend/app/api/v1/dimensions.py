@@ -14,6 +14,7 @@ from pydantic import BaseModel, Field
 from loguru import logger
 
 from app.core.database import db_pool
+from app.services.analysis.analysis_context_cache import analysis_context_cache
 
 router = APIRouter()
 
@@ -175,6 +176,7 @@ async def create_dimension_group(group: DimensionGroupCreate):
                 group.max_primary_dimensions, group.display_order, group.color_hex, group.icon,
                 group.metadata, group.is_active
             )
+            analysis_context_cache.invalidate(reason="dimension group created")
             
             return DimensionGroup(
                 id=row['id'],
@@ -449,6 +451,8 @@ async def create_dimension(dimension: DimensionCreate):
                             updated_at=group_row['updated_at']
                         ))
             
+            analysis_context_cache.invalidate(reason="dimension created")
+            
             return Dimension(
                 id=row['id'],
                 client_id=row['client_id'],
@@ -499,6 +503,7 @@ async def delete_dimension(dimension_id: str):
                 SET is_active = false, updated_at = CURRENT_TIMESTAMP
                 WHERE dimension_id = $1
             """, dimension_id)
+            analysis_context_cache.invalidate(reason="dimension deleted")
             
     except HTTPException:
         raise
@@ -328,8 +328,8 @@ async def resend_webhook(
     try:
         logger.info(f"📨 Resending webhook for batch {batch_id}, result set {result_set_id}")
         
-        # Initialize Scale SERP client
-        import httpx
+        # Shared Scale SERP client
+        from app.core.http_clients import http_clients
         from app.core.config import get_settings
         settings = get_settings()
         
@@ -337,7 +337,7 @@ async def resend_webhook(
             raise HTTPException(status_code=500, detail="Scale SERP API key not configured")
         
         # Make the request to Scale SERP to resend webhook
-        async with httpx.AsyncClient() as client:
+        async with http_clients.session('scaleserp') as client:
             response = await client.get(
                 f"https://api.scaleserp.com/batches/{batch_id}/results/{result_set_id}/resendwebhook",
                 params={"api_key": settings.SCALE_SERP_API_KEY},
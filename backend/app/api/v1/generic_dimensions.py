@@ -18,6 +18,7 @@ from sqlalchemy.orm import Session
 from app.core.auth import get_current_user
 from app.core.database import get_db
 from app.models.auth import User
+from app.services.analysis.analysis_context_cache import analysis_context_cache
 from app.models.generic_dimensions import (
     GenericCustomDimension,
     GenericDimensionRequest,
@@ -101,6 +102,7 @@ async def create_generic_dimension(
         )
         
         db.commit()
+        analysis_context_cache.invalidate(reason="dimension created")
         
         # Return the created dimension
         result = db.execute(
@@ -288,6 +290,7 @@ async def update_generic_dimension(
         
         db.execute(text(query), params)
         db.commit()
+        analysis_context_cache.invalidate(reason="dimension updated")
         
         # Return updated dimension
         result = db.execute(
@@ -366,6 +369,7 @@ async def delete_generic_dimension(
             )
         
         db.commit()
+        analysis_context_cache.invalidate(reason="dimension deleted")
         return JSONResponse(
             status_code=status.HTTP_204_NO_CONTENT,
             content=None
@@ -459,6 +463,7 @@ async def bulk_create_generic_dimensions(
             created_dimensions.append(_row_to_dimension_model(result))
         
         db.commit()
+        analysis_context_cache.invalidate(reason="dimensions bulk created")
         return created_dimensions
         
     except HTTPException:
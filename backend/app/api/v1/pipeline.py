@@ -1,7 +1,7 @@
 """
 Pipeline Management API Endpoints
 """
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 from uuid import UUID
 
@@ -47,7 +47,11 @@ class PipelineStartRequest(BaseModel):
     enable_content_analysis: bool = True
     enable_historical_tracking: bool = True
     enable_landscape_dsi: bool = Field(True, description="Calculate DSI metrics for all active digital landscapes")
+    enable_streaming_dataflow: bool = Field(False, description="Stream SERP results into enrichment, scraping and analysis instead of running phases sequentially")
     force_refresh: bool = Field(False, description="Force refresh of existing data")
+    content_refresh: Literal['skip', 'revalidate', 'force'] = Field(
+        'skip', description="Already-scraped pages: keep them, re-scrape only those that changed, or re-scrape all"
+    )
     
     # Testing mode configuration
     testing_mode: bool = Field(False, description="Enable testing mode to force full pipeline run")
@@ -249,7 +253,9 @@ async def start_pipeline(
             enable_video_enrichment=request.enable_video_enrichment,
             enable_content_analysis=request.enable_content_analysis,
             enable_historical_tracking=request.enable_historical_tracking,
+            enable_streaming_dataflow=request.enable_streaming_dataflow,
             force_refresh=request.force_refresh,
+            content_refresh=request.content_refresh,
             schedule_id=schedule_data['id'] if schedule_data else None,
             reuse_serp_from_pipeline_id=reuse_serp_uuid
         )
@@ -0,0 +1,344 @@
+"""
+Adaptive concurrency limits
+One AIMD limiter per external provider. The limit grows additively while the
+provider keeps answering and shrinks multiplicatively on 429/5xx, timeouts,
+exhausted rate-limit headers and (for providers with steady latency) rising
+latency. The shared HTTP clients feed every provider response and timeout in;
+callers hold a permit around provider work instead of a fixed semaphore.
+"""
+import asyncio
+import re
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Deque, Dict, Mapping, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+@dataclass(frozen=True)
+class LimiterConfig:
+    """Bounds and reaction factors for one provider"""
+    initial: int
+    min_limit: int = 1
+    max_limit: int = 100
+    throttle_backoff: float = 0.7   # 429 / 503 with Retry-After
+    error_backoff: float = 0.9      # other 5xx and timeouts
+    latency_backoff: float = 0.95   # median recent latency above baseline × latency_tolerance
+    latency_tolerance: float = 2.0
+    latency_floor: float = 0.5      # Seconds; the baseline never counts as faster than this
+    latency_signal: bool = True     # False where latency follows the work size, not provider load
+    max_pause: float = 60.0         # Longest Retry-After / reset pause honoured
+
+
+# provider -> (setting holding the starting limit, default start, ceiling, latency signal)
+# Ceilings match the provider's HTTP pool (app.core.http_clients); permits past it would only queue there.
+# OpenAI time to headers is the whole generation and ScrapingBee mixes static fetches with JS/stealth
+# renders, so their latency spread says nothing about load; they back off on 429/5xx/timeouts/headers only.
+PROVIDER_LIMITS: Dict[str, tuple] = {
+    'scrapingbee': ('DEFAULT_SCRAPER_CONCURRENT_LIMIT', 50, 100, False),
+    'openai': ('DEFAULT_ANALYZER_CONCURRENT_LIMIT', 50, 100, False),
+    'cognism': ('DEFAULT_ENRICHMENT_CONCURRENT_LIMIT', 15, 40, True),
+}
+
+LATENCY_WINDOW = 20  # Recent responses whose median is compared against the baseline
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limiter whose limit follows the provider's observed capacity.
+
+    - FIFO permits (`async with limiter:`), like asyncio.Semaphore
+    - Additive increase (+1 per `limit` fast successes while the limit is in use)
+    - Multiplicative decrease on throttling, errors, timeouts and (if enabled)
+      latency growth, at most once per latency window so one burst of 429s counts once
+    - Retry-After / rate-limit reset headers pause new permits until the reset
+    """
+
+    def __init__(self, name: str, config: LimiterConfig, adaptive: bool = True):
+        self.name = name
+        self.config = config
+        self.adaptive = adaptive
+        self._limit = float(min(max(config.initial, config.min_limit), config.max_limit))
+        self._inflight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._paused_until = 0.0
+        self._resume_handle: Optional[asyncio.TimerHandle] = None
+        self._recent_latency: Optional[float] = None
+        self._latency_window: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._baseline_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._counters = {'responses': 0, 'throttled': 0, 'errors': 0, 'timeouts': 0, 'increases': 0, 'decreases': 0}
+
+    @property
+    def limit(self) -> int:
+        return max(self.config.min_limit, int(self._limit))
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if not self._waiters and self._can_admit():
+            self._inflight += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self._wake_waiters()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # A permit was handed over just before cancellation
+            else:
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self) -> None:
+        self._inflight = max(0, self._inflight - 1)
+        self._wake_waiters()
+
+    async def __aenter__(self) -> 'AdaptiveLimiter':
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        # Timeouts are reported by the HTTP client layer (callers usually swallow them)
+        self.release()
+
+    def on_response(self, status_code: int, latency: float, headers: Mapping[str, str]) -> None:
+        """Feed one provider response (status, seconds to headers, response headers)"""
+        now = time.monotonic()
+        self._counters['responses'] += 1
+        retry_after = _retry_after_seconds(headers)
+
+        if status_code == 429 or (status_code == 503 and retry_after):
+            self._counters['throttled'] += 1
+            self._decrease(self.config.throttle_backoff, now, 'throttled')
+            self._pause(retry_after or _reset_seconds(headers))
+            return
+        if status_code >= 500:
+            self._counters['errors'] += 1
+            self._decrease(self.config.error_backoff, now, f"HTTP {status_code}")
+            return
+
+        self._observe_latency(latency)
+        remaining = _remaining_requests(headers)
+        if remaining is not None and remaining <= 0:
+            self._pause(_reset_seconds(headers))
+            return
+        if self._latency_degraded():
+            self._decrease(self.config.latency_backoff, now, 'latency')
+            return
+        if remaining is not None and remaining < self.limit:
+            return  # Provider reports less headroom than we would use
+        # Only grow while the current limit is actually being used
+        if self._inflight >= self.limit - 1:
+            self._set_limit(self._limit + 1.0 / self._limit)
+
+    def record_timeout(self) -> None:
+        self._counters['timeouts'] += 1
+        self._decrease(self.config.error_backoff, time.monotonic(), 'timeout')
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit, queue depth and signal counters"""
+        return {
+            'limit': self.limit,
+            'inflight': self._inflight,
+            'queued': len(self._waiters),
+            'min_limit': self.config.min_limit,
+            'max_limit': self.config.max_limit,
+            'adaptive': self.adaptive,
+            'paused_for_s': round(max(self._paused_until - time.monotonic(), 0.0), 2),
+            'latency_ms': round(self._recent_latency * 1000, 1) if self._recent_latency is not None else None,
+            'baseline_latency_ms': round(self._baseline_latency * 1000, 1) if self._baseline_latency is not None else None,
+            **self._counters,
+        }
+
+    def _can_admit(self) -> bool:
+        return self._inflight < self.limit and time.monotonic() >= self._paused_until
+
+    def _wake_waiters(self) -> None:
+        while self._waiters and self._can_admit():
+            future = self._waiters.popleft()
+            if not future.done():
+                self._inflight += 1
+                future.set_result(None)
+        self._schedule_resume()
+
+    def _schedule_resume(self) -> None:
+        # Waiters parked by a pause have nothing else to release them
+        delay = self._paused_until - time.monotonic()
+        if self._waiters and delay > 0 and self._resume_handle is None:
+            self._resume_handle = asyncio.get_running_loop().call_later(delay, self._resume)
+
+    def _resume(self) -> None:
+        self._resume_handle = None
+        self._wake_waiters()
+
+    def _pause(self, seconds: Optional[float]) -> None:
+        if not seconds or seconds <= 0:
+            return
+        seconds = min(seconds, self.config.max_pause)
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        logger.warning(f"⏸️ {self.name}: rate limit reached, pausing new requests for {seconds:.1f}s")
+        self._schedule_resume()
+
+    def _observe_latency(self, latency: float) -> None:
+        if latency is None or latency < 0:
+            return
+        self._latency_window.append(latency)
+        if self._recent_latency is None:
+            self._recent_latency = self._baseline_latency = latency
+            return
+        self._recent_latency += 0.2 * (latency - self._recent_latency)
+        # Long symmetric window: the baseline is the usual latency, not the fastest responses
+        self._baseline_latency += 0.01 * (latency - self._baseline_latency)
+
+    def _latency_degraded(self) -> bool:
+        if not self.config.latency_signal or len(self._latency_window) < LATENCY_WINDOW:
+            return False
+        # A median is not moved by the occasional slow response of a normally spread provider
+        baseline = max(self._baseline_latency, self.config.latency_floor)
+        return statistics.median(self._latency_window) > baseline * self.config.latency_tolerance
+
+    def _decrease(self, factor: float, now: float, reason: str) -> None:
+        window = max(self._recent_latency or 0.0, 1.0)
+        if now - self._last_decrease < window:
+            return
+        self._last_decrease = now
+        before = self.limit
+        self._set_limit(self._limit * factor)
+        if self.limit < before:
+            logger.info(f"📉 {self.name}: concurrency {before} → {self.limit} ({reason})")
+
+    def _set_limit(self, value: float) -> None:
+        if not self.adaptive:
+            return
+        before = self.limit
+        self._limit = min(max(value, float(self.config.min_limit)), float(self.config.max_limit))
+        if self.limit > before:
+            self._counters['increases'] += 1
+            logger.debug(f"📈 {self.name}: concurrency {before} → {self.limit}")
+            self._wake_waiters()
+        elif self.limit < before:
+            self._counters['decreases'] += 1
+
+
+class AdaptiveLimiterRegistry:
+    """One adaptive limiter per provider, created on first use"""
+
+    def __init__(self):
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+
+    def get(self, provider: str) -> AdaptiveLimiter:
+        limiter = self._limiters.get(provider)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                provider,
+                self._config(provider),
+                adaptive=getattr(settings, 'ADAPTIVE_CONCURRENCY_ENABLED', True)
+            )
+            self._limiters[provider] = limiter
+            logger.info(f"Adaptive concurrency for {provider}: start {limiter.limit}, max {limiter.config.max_limit}")
+        return limiter
+
+    def observe(self, provider: str, status_code: int, latency: float, headers: Mapping[str, str]) -> None:
+        """Feed a response to the provider's limiter (no-op until someone limits that provider)"""
+        limiter = self._limiters.get(provider)
+        if limiter is not None:
+            limiter.on_response(status_code, latency, headers)
+
+    def observe_timeout(self, provider: str) -> None:
+        """Feed a request timeout to the provider's limiter"""
+        limiter = self._limiters.get(provider)
+        if limiter is not None:
+            limiter.record_timeout()
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        return {provider: limiter.snapshot() for provider, limiter in self._limiters.items()}
+
+    @staticmethod
+    def _config(provider: str) -> LimiterConfig:
+        setting, default, ceiling, latency_signal = PROVIDER_LIMITS.get(provider, (None, 10, 50, True))
+        try:
+            initial = int(getattr(settings, setting, default) or default) if setting else default
+        except (TypeError, ValueError):
+            initial = default
+        return LimiterConfig(initial=initial, max_limit=max(ceiling, initial), latency_signal=latency_signal)
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    for name in names:
+        value = headers.get(name)
+        if value:
+            return value
+    return None
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Seconds from '20', '1.5', '6m0s' or '250ms'"""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    value = _header(headers, 'retry-after-ms', 'retry-after')
+    if not value:
+        return None
+    if headers.get('retry-after-ms'):
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            return None
+    seconds = _parse_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _remaining_requests(headers: Mapping[str, str]) -> Optional[int]:
+    value = _header(headers, 'x-ratelimit-remaining-requests', 'x-ratelimit-remaining', 'ratelimit-remaining')
+    try:
+        return int(float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _reset_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    value = _header(headers, 'x-ratelimit-reset-requests', 'x-ratelimit-reset', 'ratelimit-reset')
+    if not value:
+        return None
+    seconds = _parse_duration(value)
+    if seconds is not None and seconds > 1e9:
+        seconds -= time.time()  # Epoch timestamp
+    return seconds
+
+
+# Global adaptive limiter registry
+adaptive_limits = AdaptiveLimiterRegistry()
@@ -0,0 +1,135 @@
+"""
+Bounded streaming runner
+Producer/consumer replacement for "one coroutine per item + asyncio.gather":
+a producer pulls items from a (sync or async) iterable into a bounded queue
+and a fixed set of consumers works through it, so memory and pending tasks
+stay constant however many items a phase has. Callers get streaming counters
+and a capped error sample instead of full result lists.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, Iterable, List, Optional, TypeVar, Union
+
+from loguru import logger
+
+
+T = TypeVar('T')
+
+MAX_ERROR_SAMPLE = 200  # Errors kept verbatim per run; the rest are only counted
+
+_DONE = object()
+
+
+@dataclass
+class RunStats:
+    """Streaming counters for one bounded run"""
+    processed: int = 0
+    succeeded: int = 0   # Worker returned a truthy result
+    empty: int = 0       # Worker returned a falsy result
+    failed: int = 0      # Worker raised
+    max_inflight: int = 0
+    duration_seconds: float = 0.0
+    errors: List[str] = field(default_factory=list)
+    errors_total: int = 0
+
+    def record_error(self, message: str) -> None:
+        self.errors_total += 1
+        if len(self.errors) < MAX_ERROR_SAMPLE:
+            self.errors.append(message)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'empty': self.empty,
+            'failed': self.failed,
+            'max_inflight': self.max_inflight,
+            'duration_seconds': round(self.duration_seconds, 2),
+            'errors_total': self.errors_total,
+        }
+
+
+async def run_bounded(
+    source: Union[Iterable[T], AsyncIterable[T]],
+    worker: Callable[[T], Awaitable[Any]],
+    concurrency: int,
+    queue_size: Optional[int] = None,
+    on_result: Optional[Callable[[T, Any], Any]] = None,
+    name: str = 'run',
+    stats: Optional[RunStats] = None
+) -> RunStats:
+    """
+    Run worker(item) for every item of source with `concurrency` consumers.
+
+    - At most `queue_size` (default 2 × concurrency) items are buffered ahead of the consumers
+    - A worker exception is counted and sampled, never propagated
+    - on_result(item, result) sees each result as it arrives (sync or async); results are not retained
+    - Cancelling the caller cancels the producer and every consumer
+    """
+    stats = stats or RunStats()
+    concurrency = max(1, int(concurrency))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or concurrency * 2)
+    started = time.monotonic()
+    inflight = 0
+
+    async def produce() -> None:
+        try:
+            if hasattr(source, '__aiter__'):
+                async for item in source:
+                    await queue.put(item)
+            else:
+                for item in source:
+                    await queue.put(item)
+        finally:
+            for _ in range(concurrency):
+                await queue.put(_DONE)
+
+    async def consume() -> None:
+        nonlocal inflight
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            inflight += 1
+            stats.max_inflight = max(stats.max_inflight, inflight)
+            try:
+                result = await worker(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stats.failed += 1
+                label = str(item)[:200]
+                stats.record_error(f"{label}: {e}")
+                logger.debug(f"{name}: worker failed for {label}: {e}")
+                result = None
+            else:
+                if result:
+                    stats.succeeded += 1
+                else:
+                    stats.empty += 1
+                if on_result is not None:
+                    outcome = on_result(item, result)
+                    if asyncio.iscoroutine(outcome):
+                        await outcome
+            finally:
+                inflight -= 1
+                stats.processed += 1
+
+    producer = asyncio.create_task(produce())
+    consumers = [asyncio.create_task(consume()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(producer, *consumers)
+    except BaseException:
+        for task in (producer, *consumers):
+            task.cancel()
+        await asyncio.gather(producer, *consumers, return_exceptions=True)
+        raise
+    finally:
+        stats.duration_seconds = time.monotonic() - started
+
+    logger.info(
+        f"🔁 {name}: {stats.processed} items ({stats.succeeded} ok, {stats.empty} empty, {stats.failed} failed) "
+        f"in {stats.duration_seconds:.1f}s, peak {stats.max_inflight} in flight"
+    )
+    return stats
@@ -42,10 +42,39 @@ class Settings(BaseSettings):
     DEFAULT_SERP_DAILY_LIMIT: int = Field(2000, env="DEFAULT_SERP_DAILY_LIMIT")
     DEFAULT_SCRAPER_CONCURRENT_LIMIT: int = Field(50, env="DEFAULT_SCRAPER_CONCURRENT_LIMIT")
     DEFAULT_ANALYZER_CONCURRENT_LIMIT: int = Field(50, env="DEFAULT_ANALYZER_CONCURRENT_LIMIT")  # OpenAI limits are generous (10K RPM)
+    DEFAULT_ENRICHMENT_CONCURRENT_LIMIT: int = Field(15, env="DEFAULT_ENRICHMENT_CONCURRENT_LIMIT")  # Cognism
+    ADAPTIVE_CONCURRENCY_ENABLED: bool = Field(True, env="ADAPTIVE_CONCURRENCY_ENABLED")  # DEFAULT_*_CONCURRENT_LIMIT are starting points tuned by 429s, 5xx and latency
     
     # SERP result caps and limits
     SERP_MAX_RESULTS_PER_TYPE: int = Field(150, env="SERP_MAX_RESULTS_PER_TYPE")
     SERP_MAX_RESULTS_TOTAL_PER_KEYWORD: int = Field(500, env="SERP_MAX_RESULTS_TOTAL_PER_KEYWORD")
+    SERP_BULK_WRITE_CHUNK_SIZE: int = Field(5000, env="SERP_BULK_WRITE_CHUNK_SIZE")  # Rows per COPY + merge into serp_results
+    SERP_STORAGE_CONCURRENCY: int = Field(4, env="SERP_STORAGE_CONCURRENCY")  # Concurrent chunk writers per SERP batch
+    SERP_PROGRESS_EVERY_CHUNKS: int = Field(5, env="SERP_PROGRESS_EVERY_CHUNKS")  # Emit storage progress every N chunks
+    SERP_STREAM_DOWNLOADS: bool = Field(True, env="SERP_STREAM_DOWNLOADS")  # Parse result pages incrementally while downloading
+    SERP_STREAM_CHUNK_BYTES: int = Field(65536, env="SERP_STREAM_CHUNK_BYTES")  # Read size for streamed result pages
+    
+    # Shared HTTP clients
+    HTTP2_ENABLED: bool = Field(True, env="HTTP2_ENABLED")  # Negotiate HTTP/2 for providers that support it (needs h2)
+    
+    # Circuit breakers
+    CIRCUIT_BREAKER_FLUSH_INTERVAL_S: int = Field(5, env="CIRCUIT_BREAKER_FLUSH_INTERVAL_S")  # Batched writes of breaker counters to circuit_breakers
+    CIRCUIT_BREAKER_LISTEN_ENABLED: bool = Field(True, env="CIRCUIT_BREAKER_LISTEN_ENABLED")  # Follow other processes' transitions via LISTEN/NOTIFY
+    
+    # Pipeline state tracking
+    STATE_TRACKER_FLUSH_INTERVAL_MS: int = Field(250, env="STATE_TRACKER_FLUSH_INTERVAL_MS")  # Coalesce per-item transitions for this long
+    STATE_TRACKER_MAX_PENDING: int = Field(5000, env="STATE_TRACKER_MAX_PENDING")  # Flush early once this many items are buffered
+    
+    # DSI
+    DSI_INCREMENTAL_ENABLED: bool = Field(True, env="DSI_INCREMENTAL_ENABLED")  # Derive pipeline DSI from trigger-maintained aggregates
+    LANDSCAPE_DSI_BATCH_ENABLED: bool = Field(True, env="LANDSCAPE_DSI_BATCH_ENABLED")  # All landscapes from one SERP scan and one COPY
+    
+    # Content analysis dedup
+    ANALYSIS_DEDUP_ENABLED: bool = Field(True, env="ANALYSIS_DEDUP_ENABLED")  # Clone analyses of duplicate content instead of re-calling OpenAI
+    ANALYSIS_NEAR_DUP_MAX_DISTANCE: int = Field(3, env="ANALYSIS_NEAR_DUP_MAX_DISTANCE")  # Max SimHash Hamming distance for near duplicates (0 = exact only)
+    ANALYSIS_DEDUP_MIN_TOKENS: int = Field(150, env="ANALYSIS_DEDUP_MIN_TOKENS")  # Shorter pages are always analyzed
+    ANALYSIS_PROMPT_TIER: str = Field("balanced", env="ANALYSIS_PROMPT_TIER")  # Content token budget tier: economy | balanced | thorough | max
+    ANALYSIS_MAX_CONTENT_TOKENS: int = Field(0, env="ANALYSIS_MAX_CONTENT_TOKENS")  # Explicit content token budget (0 = use tier)
 
     # Webhook/Coordinator controls
     WEBHOOK_STARTS_PIPELINE: bool = Field(False, env="WEBHOOK_STARTS_PIPELINE")
@@ -57,6 +86,11 @@ class Settings(BaseSettings):
     # In production, these are stored encrypted per deployment
     OPENAI_API_KEY: Optional[str] = Field(None, env="OPENAI_API_KEY")
     OPENAI_PROJECT_ID: Optional[str] = Field(None, env="OPENAI_PROJECT_ID")
+    OPENAI_BASE_URL: str = Field("https://api.openai.com/v1", env="OPENAI_BASE_URL")  # Point at a local fake server for batch testing
+    OPENAI_BATCH_POLL_INTERVAL_S: int = Field(60, env="OPENAI_BATCH_POLL_INTERVAL_S")
+    OPENAI_BATCH_COMPLETION_WINDOW: str = Field("24h", env="OPENAI_BATCH_COMPLETION_WINDOW")
+    OPENAI_BATCH_MAX_REQUESTS: int = Field(50000, env="OPENAI_BATCH_MAX_REQUESTS")  # Provider limit per batch
+    OPENAI_BATCH_MAX_FILE_MB: int = Field(180, env="OPENAI_BATCH_MAX_FILE_MB")  # Stay under the 200 MB input file limit
     SCALE_SERP_API_KEY: Optional[str] = Field(None, env="SCALE_SERP_API_KEY")
     SCRAPINGBEE_API_KEY: Optional[str] = Field(None, env="SCRAPINGBEE_API_KEY")
     COGNISM_API_KEY: Optional[str] = Field(None, env="COGNISM_API_KEY")
@@ -64,6 +98,18 @@ class Settings(BaseSettings):
     # Scraping configuration
     scrapingbee_only: bool = Field(True, env="SCRAPINGBEE_ONLY")  # Use ScrapingBee for all scrapes
     scrapingbee_enabled: bool = Field(True, env="SCRAPINGBEE_ENABLED")
+    SCRAPER_EXTRACTION_WORKERS: Optional[int] = Field(None, env="SCRAPER_EXTRACTION_WORKERS")  # HTML extraction processes (default: CPU count)
+    SCRAPER_EXTRACTION_QUEUE_DEPTH: Optional[int] = Field(None, env="SCRAPER_EXTRACTION_QUEUE_DEPTH")  # Pages submitted to the pool at once (default: 4 x workers)
+    SCRAPER_EXTRACTION_TIMEOUT: float = Field(30.0, env="SCRAPER_EXTRACTION_TIMEOUT")  # Seconds one page may spend in a worker before the pool is replaced
+    SCRAPE_PROFILES_ENABLED: bool = Field(True, env="SCRAPE_PROFILES_ENABLED")  # Start ScrapingBee at the cheapest proxy tier / render mode known to work per domain
+    SCRAPE_PROFILE_PROBE_AFTER: int = Field(20, env="SCRAPE_PROFILE_PROBE_AFTER")  # Straight successes before trying one cheaper request shape
+    SCRAPE_PROFILE_FLUSH_INTERVAL_S: float = Field(10.0, env="SCRAPE_PROFILE_FLUSH_INTERVAL_S")  # Seconds between batched writes of changed domain profiles
+    SCRAPER_REDIS_TIMEOUT_S: float = Field(1.0, env="SCRAPER_REDIS_TIMEOUT_S")  # Connect/read timeout of the scraper's Redis client (breaker and cache)
+    SCRAPER_HOST_CONCURRENCY: int = Field(4, env="SCRAPER_HOST_CONCURRENCY")  # Scrapes in flight per host
+    SCRAPER_HOST_RATE_PER_SECOND: float = Field(2.0, env="SCRAPER_HOST_RATE_PER_SECOND")  # Token bucket refill per host
+    SCRAPER_HOST_BURST: int = Field(4, env="SCRAPER_HOST_BURST")  # Token bucket capacity per host
+    CONTENT_REVALIDATE_AFTER_DAYS: int = Field(7, env="CONTENT_REVALIDATE_AFTER_DAYS")  # content_refresh=revalidate only checks pages scraped/revalidated longer ago
+    CONTENT_REVALIDATION_CONCURRENCY: int = Field(20, env="CONTENT_REVALIDATION_CONCURRENCY")  # Conditional direct requests in flight
     YOUTUBE_API_KEY: Optional[str] = Field(None, env="YOUTUBE_API_KEY")
     # YouTube enrichment toggles
     VIDEO_ENRICHER_ENABLE_CHANNEL_AI: bool = Field(False, env="VIDEO_ENRICHER_ENABLE_CHANNEL_AI")
@@ -0,0 +1,228 @@
+"""
+Shared HTTP client registry
+One long-lived, pooled httpx client per external provider
+"""
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from http.cookiejar import CookieJar
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, Any, Optional
+
+import httpx
+from loguru import logger
+
+from app.core.adaptive_limiter import adaptive_limits
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+@dataclass(frozen=True)
+class ProviderHTTPConfig:
+    """Connection pool and timeout settings for one provider"""
+    max_connections: int
+    max_keepalive_connections: int
+    timeout: float
+    connect_timeout: float = 10.0
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    follow_redirects: bool = False
+    persist_cookies: bool = True
+
+
+# Defaults sized for the pipeline's concurrency (see DEFAULT_*_CONCURRENT_LIMIT and the
+# adaptive ceilings in app.core.adaptive_limiter.PROVIDER_LIMITS)
+PROVIDER_CONFIGS: Dict[str, ProviderHTTPConfig] = {
+    'scrapingbee': ProviderHTTPConfig(max_connections=100, max_keepalive_connections=50, timeout=60.0),
+    'cognism': ProviderHTTPConfig(max_connections=40, max_keepalive_connections=20, timeout=30.0, http2=True),
+    'openai': ProviderHTTPConfig(max_connections=100, max_keepalive_connections=50, timeout=120.0, http2=True),
+    'scaleserp': ProviderHTTPConfig(max_connections=20, max_keepalive_connections=10, timeout=30.0, http2=True),
+    'dataforseo': ProviderHTTPConfig(max_connections=20, max_keepalive_connections=10, timeout=30.0, http2=True),
+    # Direct fetches of arbitrary sites (documents, direct scraping, logo/site probes)
+    'direct': ProviderHTTPConfig(max_connections=100, max_keepalive_connections=20, timeout=30.0,
+                                 keepalive_expiry=15.0, follow_redirects=True, persist_cookies=False),
+}
+
+
+class HTTPClientRegistry:
+    """Manages one pooled httpx.AsyncClient per provider"""
+
+    def __init__(self, configs: Optional[Dict[str, ProviderHTTPConfig]] = None):
+        self.configs = dict(configs or PROVIDER_CONFIGS)
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._lock = asyncio.Lock()
+
+    async def initialize(self):
+        """Create clients for every configured provider"""
+        async with self._lock:
+            for provider in self.configs:
+                if provider not in self._clients:
+                    self._clients[provider] = self._create_client(provider)
+            logger.info(
+                f"HTTP client registry initialized ({len(self._clients)} providers, "
+                f"http2={'on' if self._http2_enabled() else 'off'})"
+            )
+
+    async def close(self):
+        """Close all provider clients"""
+        async with self._lock:
+            clients, self._clients = self._clients, {}
+            for provider, client in clients.items():
+                try:
+                    await client.aclose()
+                except Exception as e:
+                    logger.warning(f"Error closing HTTP client for {provider}: {e}")
+            if clients:
+                logger.info(f"HTTP client registry closed: {self.metrics()}")
+
+    def get(self, provider: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for a provider.
+
+        Clients are created lazily so scripts and workers that never run the
+        application lifespan still share connections.
+        """
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            client = self._create_client(provider)
+            self._clients[provider] = client
+        return client
+
+    @asynccontextmanager
+    async def session(self, provider: str) -> AsyncGenerator[httpx.AsyncClient, None]:
+        """Drop-in for `async with httpx.AsyncClient() as client` that keeps the pooled client open"""
+        yield self.get(provider)
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Per-provider request and connection counters"""
+        result = {}
+        for provider, counters in self._metrics.items():
+            requests = counters['requests']
+            connections = counters['connections_opened']
+            result[provider] = {
+                **counters,
+                'connections_reused': max(requests - connections, 0),
+                'reuse_ratio': round(max(requests - connections, 0) / requests, 3) if requests else 0.0,
+            }
+        return result
+
+    def _http2_enabled(self) -> bool:
+        return HTTP2_AVAILABLE and getattr(settings, 'HTTP2_ENABLED', True)
+
+    def _create_client(self, provider: str) -> httpx.AsyncClient:
+        config = self.configs.get(provider)
+        if config is None:
+            raise ValueError(f"Unknown HTTP client provider: {provider}")
+
+        counters = self._metrics.setdefault(provider, {
+            'requests': 0,
+            'connections_opened': 0,
+            'tls_handshakes': 0,
+            'errors': 0,
+            'timeouts': 0,
+        })
+
+        def trace(event_name: str, info: Dict[str, Any]):
+            # httpcore trace events reveal whether a request needed a new connection
+            if event_name == 'connection.connect_tcp.complete':
+                counters['connections_opened'] += 1
+            elif event_name == 'connection.start_tls.complete':
+                counters['tls_handshakes'] += 1
+
+        async def on_request(request: httpx.Request):
+            counters['requests'] += 1
+            request.extensions['trace'] = _async_trace(trace)
+            request.extensions['started_at'] = time.monotonic()
+
+        async def on_response(response: httpx.Response):
+            if response.status_code >= 500:
+                counters['errors'] += 1
+            # Status, time to headers and rate-limit headers drive the provider's adaptive limit
+            started_at = response.request.extensions.get('started_at')
+            latency = time.monotonic() - started_at if started_at is not None else None
+            adaptive_limits.observe(provider, response.status_code, latency, response.headers)
+
+        def on_timeout():
+            counters['timeouts'] += 1
+            adaptive_limits.observe_timeout(provider)
+
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            http2=config.http2 and self._http2_enabled(),
+        )
+        return httpx.AsyncClient(
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            # Timeouts reach the adaptive limiter here: callers usually catch them long before a limiter sees them
+            transport=_TimeoutObservingTransport(transport, on_timeout),
+            follow_redirects=config.follow_redirects,
+            # One client serves every origin; a shared jar would replay one site's cookies to the next request
+            cookies=None if config.persist_cookies else _NoCookieJar(),
+            event_hooks={'request': [on_request], 'response': [on_response]},
+        )
+
+
+class _TimeoutObservingTransport(httpx.AsyncBaseTransport):
+    """Reports timeouts while waiting for headers or reading the body, then re-raises them"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, on_timeout: Callable[[], None]):
+        self._transport = transport
+        self._on_timeout = on_timeout
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            response = await self._transport.handle_async_request(request)
+        except httpx.TimeoutException:
+            self._on_timeout()
+            raise
+        response.stream = _TimeoutObservingStream(response.stream, self._on_timeout)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _TimeoutObservingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, on_timeout: Callable[[], None]):
+        self._stream = stream
+        self._on_timeout = on_timeout
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        try:
+            async for chunk in self._stream:
+                yield chunk
+        except httpx.TimeoutException:
+            self._on_timeout()
+            raise
+
+    async def aclose(self) -> None:
+        await self._stream.aclose()
+
+
+class _NoCookieJar(CookieJar):
+    """Cookie jar that never stores anything"""
+
+    def set_cookie(self, cookie):
+        pass
+
+    def extract_cookies(self, response, request):
+        pass
+
+
+def _async_trace(callback):
+    async def trace(event_name: str, info: Dict[str, Any]):
+        callback(event_name, info)
+    return trace
+
+
+# Global HTTP client registry
+http_clients = HTTPClientRegistry()
@@ -10,6 +10,8 @@ import asyncio
 
 from app.core.config import settings
 from app.core.database import db_pool
+from app.core.http_clients import http_clients
+from app.core.adaptive_limiter import adaptive_limits
 from app.api.v1 import api_router
 from app.core.exceptions import setup_exception_handlers
 from app.core.websocket import router as websocket_router
@@ -35,6 +37,9 @@ async def lifespan(app: FastAPI):
     
     logger.info("Database connection verified")
     
+    # Shared pooled HTTP clients (one per external provider)
+    await http_clients.initialize()
+    
     # Start pipeline monitor
     try:
         from app.services.robustness.pipeline_monitor import pipeline_monitor
@@ -86,6 +91,28 @@ async def lifespan(app: FastAPI):
     except Exception:
         pass
     
+    # Write outstanding circuit breaker counters before the pool goes away
+    try:
+        from app.services.robustness.circuit_breaker import circuit_breaker_store
+        await circuit_breaker_store.stop()
+    except Exception as e:
+        logger.error(f"Error stopping circuit breaker sync: {e}")
+    
+    # Write outstanding ScrapingBee domain profiles
+    try:
+        from app.services.scraping.scrape_profiles import scrape_profiles
+        await scrape_profiles.stop()
+    except Exception as e:
+        logger.error(f"Error stopping scrape profile sync: {e}")
+    
+    # Stop HTML extraction workers
+    try:
+        from app.services.scraping.html_extractor import html_extraction_pool
+        html_extraction_pool.close()
+    except Exception as e:
+        logger.error(f"Error stopping HTML extraction pool: {e}")
+    
+    await http_clients.close()
     await db_pool.close()
 
 
@@ -130,6 +157,32 @@ async def health_check():
         "environment": settings.ENVIRONMENT
     }
 
+# Shared HTTP client metrics (requests, connections opened, reuse ratio per provider)
+@app.get("/health/http-clients")
+async def http_client_metrics():
+    """HTTP client pool metrics"""
+    return http_clients.metrics()
+
+# Adaptive provider concurrency (current limit, in flight, queue depth, 429/5xx counters)
+@app.get("/health/concurrency")
+async def concurrency_metrics():
+    """Adaptive concurrency limiter state per provider"""
+    return adaptive_limits.metrics()
+
+# HTML extraction pool (workers, queue depth, per-page extraction timings)
+@app.get("/health/extraction")
+async def extraction_metrics():
+    """HTML extraction worker pool state and timings"""
+    from app.services.scraping.html_extractor import html_extraction_pool
+    return html_extraction_pool.snapshot()
+
+# ScrapingBee domain profiles (credits per page, p50 latency, learned request shapes)
+@app.get("/health/scrape-profiles")
+async def scrape_profile_metrics():
+    """Learned ScrapingBee request shapes and their cost"""
+    from app.services.scraping.scrape_profiles import scrape_profiles
+    return scrape_profiles.snapshot()
+
 # Root endpoint
 @app.get("/")
 async def root():
@@ -6,6 +6,7 @@ import json
 
 from app.core.database import db_pool
 from app.models.analysis_config import AnalysisConfig
+from app.services.analysis.analysis_context_cache import analysis_context_cache
 
 
 class AnalysisConfigService:
@@ -89,6 +90,7 @@ class AnalysisConfigService:
             
             values.append(existing)
             result = await conn.fetchrow(query, *values)
+            analysis_context_cache.invalidate(reason="analysis config updated")
             
             data = dict(result)
             # Parse JSON fields
@@ -0,0 +1,139 @@
+"""
+Analysis Context Cache
+
+Holds everything OptimizedUnifiedAnalyzer needs per project that does not
+depend on the page being analyzed: dimensions, their validation result,
+company/competitor info, the prebuilt dimension-instruction block, the JSON
+response schema and the dimension groups used for primary selection.
+
+Contexts are loaded once and shared by every analysis of a pipeline run.
+Writes through the dimension/config APIs call invalidate(), which bumps the
+cache generation so the next lookup reloads.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+ALL_PROJECTS = object()  # invalidate() scope covering every cached project
+
+
+@dataclass
+class AnalysisContext:
+    """Per-project analysis inputs shared across pages"""
+    project_id: Optional[str]
+    generation: int
+    dimension_set_version: str
+    dimensions: List[Dict[str, Any]]
+    validation: Dict[str, Any]
+    company_context: str
+    company_info: Dict[str, Any]
+    dimension_instructions: str
+    response_schema: Dict[str, Any]
+    dimension_groups: List[Dict[str, Any]] = field(default_factory=list)
+    group_uuids: Dict[str, Any] = field(default_factory=dict)
+    dimension_queries: Dict[str, List[str]] = field(default_factory=dict)
+    loaded_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def is_valid(self) -> bool:
+        return bool(self.validation.get('valid'))
+
+
+def dimension_set_version(dimensions: List[Dict[str, Any]]) -> str:
+    """Stable content hash of a dimension set (changes whenever any dimension changes)"""
+    payload = json.dumps(dimensions, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class AnalysisContextCache:
+    """Versioned per-project cache of AnalysisContext objects"""
+
+    def __init__(self, ttl_seconds: float = 900.0):
+        self.ttl_seconds = ttl_seconds
+        self._generation = 0
+        self._project_generations: Dict[str, int] = {}
+        self._contexts: Dict[str, AnalysisContext] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    async def get(
+        self,
+        project_id: Optional[str],
+        loader: Callable[[Optional[str], int], Awaitable[AnalysisContext]]
+    ) -> AnalysisContext:
+        """Return the cached context for a project, loading it at most once concurrently"""
+        key = self._key(project_id)
+        context = self._contexts.get(key)
+        if self._is_fresh(context):
+            self.hits += 1
+            return context
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            # Another task may have loaded it while we waited
+            context = self._contexts.get(key)
+            if self._is_fresh(context):
+                self.hits += 1
+                return context
+
+            self.misses += 1
+            generation = self._generation
+            project_generation = self._project_generations.get(key, 0)
+            context = await loader(project_id, generation)
+            # Only keep it if nothing was invalidated while loading
+            if generation == self._generation and project_generation == self._project_generations.get(key, 0):
+                self._contexts[key] = context
+            logger.info(
+                f"Loaded analysis context for project {key}: {len(context.dimensions)} dimensions, "
+                f"version {context.dimension_set_version} (generation {generation})"
+            )
+            return context
+
+    def invalidate(self, project_id: Any = ALL_PROJECTS, reason: str = "") -> None:
+        """Drop cached contexts: every project by default, else one project (None is the default project)"""
+        if project_id is ALL_PROJECTS:
+            self._generation += 1
+            self._contexts.clear()
+            scope = ""
+        else:
+            key = self._key(project_id)
+            self._drop(key)
+            scope = f" for project {key}"
+        logger.info(f"Analysis context cache invalidated{scope}{f' ({reason})' if reason else ''}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'generation': self._generation,
+            'cached_projects': len(self._contexts),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    @staticmethod
+    def _key(project_id: Optional[str]) -> str:
+        return str(project_id or 'default')
+
+    def _drop(self, key: str) -> None:
+        self._project_generations[key] = self._project_generations.get(key, 0) + 1
+        self._contexts.pop(key, None)
+
+    def _is_fresh(self, context: Optional[AnalysisContext]) -> bool:
+        if context is None or context.generation != self._generation:
+            return False
+        return (time.monotonic() - context.loaded_at) < self.ttl_seconds
+
+
+# Global analysis context cache
+analysis_context_cache = AnalysisContextCache()
@@ -1,24 +1,165 @@
 """
 Concurrent Content Analysis Service
 
-This service monitors the database for content that has been scraped and enriched
-but not yet analyzed, and processes it immediately without waiting for all
-scraping to complete.
+This service analyzes content that has been scraped and enriched as soon as it
+lands, without waiting for all scraping to complete.
+
+Pages are claimed straight from scraped_content: a lease column
+(analysis_state / analysis_lease_until) replaces the in-memory exclusion list,
+claims walk the pipeline's pages in url keyset order with SKIP LOCKED, and
+_store_scraped_content wakes the feeder with pg_notify instead of a polling
+interval.
 """
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional
 from uuid import UUID
 import json
 
+import asyncpg
 from loguru import logger
 from asyncpg.pool import Pool
 
+from app.core.adaptive_limiter import adaptive_limits
 from app.core.database import db_pool
 from app.services.analysis.optimized_unified_analyzer import OptimizedUnifiedAnalyzer
 
 
+CONTENT_READY_CHANNEL = "scraped_content_ready"
+
+ANALYSIS_LEASE_SECONDS = 600  # Claims of a crashed worker become claimable again after this
+ANALYSIS_LEASE_RENEW_SECONDS = ANALYSIS_LEASE_SECONDS / 3  # Live batches extend their pending claims this often
+MAX_ANALYSIS_ATTEMPTS = 3
+
+ANALYSIS_CLAIM_SCHEMA_SQL = """
+ALTER TABLE scraped_content
+    ADD COLUMN IF NOT EXISTS analysis_state VARCHAR(20),
+    ADD COLUMN IF NOT EXISTS analysis_lease_until TIMESTAMPTZ,
+    ADD COLUMN IF NOT EXISTS analysis_attempts INTEGER NOT NULL DEFAULT 0;
+
+-- Content fingerprints (maintained by content_dedup) decide whether an existing analysis still applies
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Claimable pages of a run in keyset order; analyzed pages drop out of the index
+CREATE INDEX IF NOT EXISTS idx_scraped_content_analysis_queue
+    ON scraped_content (pipeline_execution_id, url)
+    WHERE status = 'completed' AND analysis_state IS DISTINCT FROM 'done';
+
+-- New content or a new owning pipeline makes a page claimable again
+CREATE OR REPLACE FUNCTION scraped_content_reset_analysis_claim() RETURNS trigger AS $$
+BEGIN
+    NEW.analysis_state := NULL;
+    NEW.analysis_lease_until := NULL;
+    NEW.analysis_attempts := 0;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+BEGIN
+    IF NOT EXISTS (
+        SELECT 1 FROM pg_trigger
+        WHERE tgname = 'scraped_content_reset_analysis_claim'
+          AND tgrelid = 'scraped_content'::regclass
+    ) THEN
+        CREATE TRIGGER scraped_content_reset_analysis_claim
+            BEFORE UPDATE OF content, pipeline_execution_id ON scraped_content
+            FOR EACH ROW
+            WHEN (OLD.content IS DISTINCT FROM NEW.content
+                  OR OLD.pipeline_execution_id IS DISTINCT FROM NEW.pipeline_execution_id)
+            EXECUTE FUNCTION scraped_content_reset_analysis_claim();
+    END IF;
+END $$;
+"""
+
+# $1 pipeline, $2 keyset cursor (last url seen), $3 batch size, $4 lease seconds,
+# $5 fresh analysis, $6 max attempts. Pages that already have an analysis of their
+# current content are marked done in the same statement (outside fresh mode) and
+# not returned as claimed.
+_CLAIM_READY_CONTENT_SQL = """
+    WITH candidates AS (
+        SELECT sc.url
+        FROM scraped_content sc
+        WHERE sc.pipeline_execution_id = $1
+          AND sc.status = 'completed'
+          AND sc.analysis_state IS DISTINCT FROM 'done'
+          AND sc.url > $2
+          AND (sc.analysis_state IS NULL OR sc.analysis_lease_until < NOW())
+          AND sc.analysis_attempts < $6
+          AND sc.content IS NOT NULL
+          AND LENGTH(sc.content) > 100
+        ORDER BY sc.url
+        LIMIT $3
+        FOR UPDATE SKIP LOCKED
+    ),
+    claimed AS (
+        UPDATE scraped_content sc
+        SET analysis_state = CASE
+                WHEN NOT $5 AND EXISTS (
+                    SELECT 1 FROM optimized_content_analysis oca
+                    WHERE oca.url = sc.url AND oca.project_id IS NULL
+                      -- A re-scraped page whose content changed needs a new analysis
+                      AND (oca.content_hash IS NULL OR sc.content_hash IS NULL OR oca.content_hash = sc.content_hash)
+                ) THEN 'done'
+                ELSE 'claimed'
+            END,
+            analysis_lease_until = NOW() + make_interval(secs => $4),
+            analysis_attempts = sc.analysis_attempts + 1
+        FROM candidates c
+        WHERE sc.url = c.url
+        RETURNING sc.url, sc.title, sc.content, sc.meta_description, sc.domain, sc.analysis_state
+    )
+    SELECT
+        claimed.url,
+        claimed.title,
+        claimed.content,
+        claimed.meta_description,
+        claimed.domain,
+        claimed.analysis_state,
+        -- Company name from enriched data or fallback to domain
+        COALESCE(company.company_name, claimed.domain) as company_name,
+        COALESCE(company.domain, claimed.domain) as company_domain,
+        company.industry,
+        company.employee_count as company_size,
+        COALESCE(company.source, 'domain_fallback') as source_type
+    FROM claimed
+    LEFT JOIN LATERAL (
+        SELECT cp.company_name, cp.domain, cp.industry, cp.employee_count, cp.source
+        FROM company_domains cd
+        JOIN company_profiles cp ON cp.id = cd.company_id
+        WHERE cd.domain = claimed.domain
+        LIMIT 1
+    ) company ON claimed.analysis_state = 'claimed'
+    ORDER BY claimed.url
+"""
+
+# $1 every url of the batch, $2 the successfully analyzed ones; failures are
+# released for a retry on the next keyset pass (until MAX_ANALYSIS_ATTEMPTS)
+_RELEASE_CLAIMS_SQL = """
+    UPDATE scraped_content
+    SET analysis_state = CASE WHEN url = ANY($2::text[]) THEN 'done' END,
+        analysis_lease_until = NULL
+    WHERE url = ANY($1::text[])
+      AND analysis_state = 'claimed'
+"""
+
+# $1 urls of a batch still being analyzed, $2 lease seconds
+_RENEW_CLAIMS_SQL = """
+    UPDATE scraped_content
+    SET analysis_lease_until = NOW() + make_interval(secs => $2)
+    WHERE url = ANY($1::text[])
+      AND analysis_state = 'claimed'
+"""
+
+
+async def notify_content_ready(conn, pipeline_id) -> None:
+    """Wake the analyzer feeder of a pipeline (delivered on commit)"""
+    if pipeline_id:
+        await conn.execute("SELECT pg_notify($1, $2)", CONTENT_READY_CHANNEL, str(pipeline_id))
+
+
 class ConcurrentContentAnalyzer:
     """
     Monitors and analyzes content as soon as it's ready (scraped + enriched)
@@ -30,18 +171,25 @@ class ConcurrentContentAnalyzer:
         self.analyzer = OptimizedUnifiedAnalyzer(settings, db)
         self.is_running = False
         self._monitor_task = None
-        self._processed_urls: Set[str] = set()
+        self._processed_count = 0
         self._batch_size = 50  # Increased batch size for faster processing
-        self._check_interval = 5  # Check for new content every 5 seconds
-        self._concurrent_limit = getattr(settings, 'DEFAULT_ANALYZER_CONCURRENT_LIMIT', 50)  # OpenAI limits support high concurrency
-        # Global semaphore to limit total concurrent API calls across all batches
-        self._global_semaphore = asyncio.Semaphore(self._concurrent_limit)
+        self._check_interval = 5  # Fallback poll when the LISTEN connection is unavailable
+        self._idle_poll_seconds = 30  # Safety-net poll while listening (missed notifications, expired leases)
+        # Adaptive OpenAI limiter shared by all batches (starts at DEFAULT_ANALYZER_CONCURRENT_LIMIT)
+        self._limiter = adaptive_limits.get('openai')
+        # Claim enough batches to keep the limiter busy at its ceiling
+        self._concurrent_limit = self._limiter.config.max_limit
         # Ensure attribute exists even before start_monitoring is called
         self.pipeline_id: Optional[UUID] = None
         self.project_id: Optional[str] = None
         self._start_time: Optional[float] = None
         # Fresh analysis flag - when True, reprocess all content regardless of previous analysis
         self._fresh_analysis: bool = False
+        # Keyset cursor: last url claimed (or skipped) in the current pass
+        self._cursor = ''
+        self._wake: Optional[asyncio.Event] = None
+        self._listener: Optional[asyncpg.Connection] = None
+        self._schema_ready = False
         
     async def start_monitoring(self, pipeline_id: UUID, project_id: Optional[str] = None, fresh_analysis: bool = False):
         """Start monitoring for new content to analyze"""
@@ -49,33 +197,42 @@ class ConcurrentContentAnalyzer:
             logger.warning("Concurrent content analyzer already running")
             return
         
-        # Validate analyzer is properly configured
-        test_dimensions = await self.analyzer._load_all_dimensions_as_generic(project_id)
+        # Validate analyzer is properly configured (loads the shared per-project analysis context)
+        context = await self.analyzer.get_analysis_context(project_id)
+        test_dimensions = context.dimensions
         if not test_dimensions:
             logger.error(f"Cannot start content analyzer for pipeline {pipeline_id}: No dimensions configured")
             return
         
-        validation_result = await self.analyzer._validate_dimensions(test_dimensions, project_id)
+        validation_result = context.validation
         if not validation_result['valid']:
             logger.error(f"Cannot start content analyzer: {validation_result['message']}")
             return
+        
+        await self._ensure_claim_schema()
             
         self.is_running = True
         self.pipeline_id = pipeline_id
         self.project_id = project_id
-        self._processed_urls = set()
+        self._processed_count = 0
+        self._cursor = ''
         self._start_time = asyncio.get_event_loop().time()
         self._fresh_analysis = fresh_analysis
         
-        # Clear processed URLs cache if doing fresh analysis
+        # Release every claim of this run so all of its content is analyzed again
         if fresh_analysis:
-            self._total_processed = 0  # Initialize counter for fresh analysis
-            self._fresh_analysis_offset = 0  # Track offset for fresh analysis progression
+            async with self.db.acquire() as conn:
+                await conn.execute("""
+                    UPDATE scraped_content
+                    SET analysis_state = NULL, analysis_lease_until = NULL, analysis_attempts = 0
+                    WHERE pipeline_execution_id = $1
+                      AND (analysis_state IS NOT NULL OR analysis_attempts > 0)
+                """, self.pipeline_id)
             logger.info(f"🧹 FRESH ANALYSIS MODE: Will reprocess all content, ignoring previous analysis")
         
         logger.info(f"Starting concurrent content analysis for pipeline {pipeline_id}, project_id={project_id} (fresh_analysis: {fresh_analysis})")
-        logger.info(f"Analyzer configured with {len(test_dimensions)} dimensions")
-        logger.info(f"Concurrency: {self._concurrent_limit} total, batch size: {self._batch_size}")
+        logger.info(f"Analyzer configured with {len(test_dimensions)} dimensions (dimension set {context.dimension_set_version})")
+        logger.info(f"Concurrency: adaptive, starting at {self._limiter.limit} (max {self._concurrent_limit}), batch size: {self._batch_size}")
         self._monitor_task = asyncio.create_task(self._monitor_loop())
         
     async def stop_monitoring(self):
@@ -88,11 +245,20 @@ class ConcurrentContentAnalyzer:
             except asyncio.CancelledError:
                 pass
         logger.info("Stopped concurrent content analysis monitoring")
+    
+    async def _ensure_claim_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                # Serialize with other workers adding the same columns and trigger
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('scraped_content_analysis_claims'))")
+                await conn.execute(ANALYSIS_CLAIM_SCHEMA_SQL)
+        self._schema_ready = True
         
     async def _monitor_loop(self):
-        """Main monitoring loop with concurrent batch processing"""
+        """Main monitoring loop with concurrent batch processing, woken by new content and finished batches"""
         logger.info(f"Monitor loop started for pipeline {self.pipeline_id}")
-        iterations = 0
         
         # Track active batch tasks
         active_batches = set()
@@ -100,182 +266,182 @@ class ConcurrentContentAnalyzer:
         
         logger.info(f"Concurrent batch processing enabled: {max_concurrent_batches} batches × {self._batch_size} items = {max_concurrent_batches * self._batch_size} concurrent analyses")
         
-        while self.is_running:
-            try:
-                iterations += 1
-                if iterations % 6 == 1:  # Log every 30 seconds (6 * 5s)
-                    logger.info(f"Monitor loop iteration {iterations}, active batches: {len(active_batches)}")
-                
-                # Debug: Log is_running status periodically
-                if iterations % 3 == 1:  # Every 15 seconds
-                    logger.debug(f"Monitor loop debug: is_running={self.is_running}, pipeline_id={self.pipeline_id}")
-                
-                # Clean up completed batches
-                if active_batches:
-                    done_batches = {task for task in active_batches if task.done()}
-                    for task in done_batches:
-                        try:
-                            await task  # Retrieve any exceptions
-                        except Exception as e:
-                            logger.error(f"Batch processing error: {e}")
-                    active_batches -= done_batches
-                
-                # Launch new batches if under limit
-                while len(active_batches) < max_concurrent_batches:
-                    logger.debug(f"🔍 Checking for ready content (iteration {iterations})")
-                    ready_content = await self._get_ready_content()
-                    logger.debug(f"🔍 Found {len(ready_content) if ready_content else 0} items ready for analysis")
+        self._wake = asyncio.Event()
+        await self._start_listener()
+        idle_timeout = self._idle_poll_seconds if self._listener is not None else self._check_interval
+        last_status_log = 0.0
+        
+        try:
+            while self.is_running:
+                try:
+                    # Cleared before claiming: a notification that arrives meanwhile triggers another pass
+                    self._wake.clear()
+                    
+                    # Clean up completed batches
+                    if active_batches:
+                        done_batches = {task for task in active_batches if task.done()}
+                        for task in done_batches:
+                            try:
+                                await task  # Retrieve any exceptions
+                            except Exception as e:
+                                logger.error(f"Batch processing error: {e}")
+                        active_batches -= done_batches
                     
-                    if ready_content:
+                    # Launch new batches if under limit
+                    while len(active_batches) < max_concurrent_batches:
+                        ready_content = await self._get_ready_content()
+                        if not ready_content:
+                            break
+                        
                         sample = [c.get('url') for c in ready_content[:3]]
                         logger.info(f"Starting batch {len(active_batches)+1}/{max_concurrent_batches} with {len(ready_content)} items; sample={sample}")
                         
-                        # Launch batch processing as background task
+                        # Launch batch processing as background task; a finished batch frees a slot immediately
                         batch_task = asyncio.create_task(self._process_batch(ready_content))
+                        batch_task.add_done_callback(lambda _: self._wake.set())
                         active_batches.add(batch_task)
-                        logger.debug(f"✅ Batch task created and added to active_batches")
-                    else:
-                        # No more content available
-                        logger.debug(f"❌ No ready content found, breaking from batch creation loop")
-                        break
-                
-                # Log status periodically
-                if iterations % 12 == 1 and active_batches:  # Every minute
-                    elapsed_minutes = (asyncio.get_event_loop().time() - self._start_time) / 60
-                    items_per_minute = len(self._processed_urls) / elapsed_minutes if elapsed_minutes > 0 else 0
-                    logger.info(f"Concurrent batch status: {len(active_batches)} active batches | ~{len(active_batches) * self._batch_size} items in flight | Rate: {items_per_minute:.1f} items/min")
-                
-                # Wait before checking again
-                await asyncio.sleep(self._check_interval)
-                
-            except asyncio.CancelledError:
-                break
+                    
+                    # Log status periodically
+                    now = asyncio.get_event_loop().time()
+                    if active_batches and now - last_status_log >= 60:
+                        last_status_log = now
+                        elapsed_minutes = (now - self._start_time) / 60
+                        items_per_minute = self._processed_count / elapsed_minutes if elapsed_minutes > 0 else 0
+                        logger.info(f"Concurrent batch status: {len(active_batches)} active batches | ~{len(active_batches) * self._batch_size} items in flight | Rate: {items_per_minute:.1f} items/min")
+                    
+                    # Sleep until content lands, a batch finishes, or the safety-net poll
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), timeout=idle_timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    
+                except asyncio.CancelledError:
+                    break
+                except Exception as e:
+                    logger.error(f"Error in content monitor loop: {e}")
+                    await asyncio.sleep(self._check_interval)
+        finally:
+            await self._stop_listener()
+    
+    async def _start_listener(self):
+        """Dedicated LISTEN connection (outside the pool) for pages landing in scraped_content"""
+        try:
+            self._listener = await asyncpg.connect(self.settings.DATABASE_URL)
+            await self._listener.add_listener(CONTENT_READY_CHANNEL, self._on_notify)
+        except Exception as e:
+            self._listener = None
+            logger.warning(f"Content analysis listener unavailable, polling every {self._check_interval}s instead: {e}")
+    
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload == str(self.pipeline_id) and self._wake:
+            self._wake.set()
+    
+    async def _stop_listener(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.is_closed():
+            try:
+                await listener.close()
             except Exception as e:
-                logger.error(f"Error in content monitor loop: {e}")
-                await asyncio.sleep(self._check_interval)
+                logger.debug(f"Error closing content analysis listener: {e}")
                 
     async def _get_ready_content(self) -> List[Dict]:
         """
-        Get content that:
+        Claim the next batch of content that:
         1. Has been successfully scraped
-        2. Has company enrichment data (REQUIRED - only enriched pages are analyzed)
-        3. Has not been analyzed yet
-        4. Has not been processed in this session
+        2. Has not been analyzed yet (unless doing fresh analysis)
+        3. Is not claimed by a live lease
+        
+        Claims continue from the keyset cursor; when a pass runs dry it starts
+        over once from the beginning to pick up late arrivals and expired leases.
         """
         # If not initialized yet, nothing to process
         if not self.pipeline_id:
             logger.warning("_get_ready_content called but pipeline_id is None")
             return []
 
-        logger.debug(f"Checking for ready content: pipeline_id={self.pipeline_id}")
+        wrapped = False
         async with self.db.acquire() as conn:
-            # Allow content analysis to proceed even if company enrichment phase isn't complete,
-            # but only analyze pages that have been successfully enriched with company data
-            enrichment_complete = await conn.fetchval("""
-                SELECT EXISTS(
-                    SELECT 1 FROM pipeline_phase_status
-                    WHERE pipeline_execution_id = $1
-                    AND phase_name = 'company_enrichment_serp'
-                    AND status = 'completed'
+            while True:
+                rows = await conn.fetch(
+                    _CLAIM_READY_CONTENT_SQL,
+                    self.pipeline_id,
+                    self._cursor,
+                    self._batch_size,
+                    ANALYSIS_LEASE_SECONDS,
+                    self._fresh_analysis,
+                    MAX_ANALYSIS_ATTEMPTS
                 )
-            """, self.pipeline_id)
-            
-            if not enrichment_complete:
-                logger.info("Company enrichment not complete, but proceeding with content analysis for already enriched pages")
-            
-            # Build URL filter for already processed items (unless doing fresh analysis)
-            url_filter = ""
-            if self._processed_urls and not self._fresh_analysis:
-                # Use parameterized query to avoid SQL injection/syntax errors
-                url_filter = f"AND sc.url NOT IN (SELECT unnest($2::text[]))"
-            
-            # Content analysis matches pipeline service approach - process all scraped content
-            # Get company data based on domain extracted from URL when available
-            query = f"""
-                SELECT DISTINCT
-                    sc.url,
-                    sc.title,
-                    sc.content,
-                    sc.meta_description,
-                    sc.domain,
-                    -- Company name from enriched data or fallback to domain
-                    COALESCE(cp.company_name, sc.domain) as company_name,
-                    COALESCE(cp.domain, sc.domain) as company_domain,
-                    cp.industry,
-                    cp.employee_count as company_size,
-                    COALESCE(cp.source, 'domain_fallback') as source_type
-                FROM scraped_content sc
-                LEFT JOIN company_domains cd ON cd.domain = sc.domain
-                LEFT JOIN company_profiles cp ON cp.id = cd.company_id
-                LEFT JOIN optimized_content_analysis oca ON oca.url = sc.url AND oca.project_id IS NULL
-                WHERE sc.pipeline_execution_id = $1
-                    AND sc.status = 'completed'
-                    AND sc.content IS NOT NULL
-                    AND LENGTH(sc.content) > 100
-                    {self._get_analysis_filter()}
-                    {url_filter}
-                ORDER BY sc.url  -- Ensure consistent ordering for progression
-                LIMIT {self._batch_size}
-                {f"OFFSET {self._fresh_analysis_offset}" if self._fresh_analysis else ""}
-            """
-
-            # Execute query with proper parameters
-            if url_filter:
-                # When url_filter is present, we have 2 parameters
-                results = await conn.fetch(query, self.pipeline_id, list(self._processed_urls))
-            else:
-                # When no url_filter, only pipeline_id parameter
-                results = await conn.fetch(query, self.pipeline_id)
-            return [dict(row) for row in results]
-    
-    def _get_analysis_filter(self) -> str:
-        """Get SQL filter condition based on fresh analysis mode"""
-        if self._fresh_analysis:
-            # Fresh analysis: process ALL content regardless of previous analysis
-            logger.debug("Fresh analysis mode: including all content")
-            return ""  # No filter - include all content
-        else:
-            # Normal mode: only process content that hasn't been analyzed yet
-            return "AND oca.id IS NULL"
+                if not rows:
+                    if self._cursor and not wrapped:
+                        self._cursor = ''
+                        wrapped = True
+                        continue
+                    return []
+                
+                self._cursor = rows[-1]['url']
+                # Pages analyzed elsewhere were marked done by the claim; keep paging past them
+                ready = [dict(row) for row in rows if row['analysis_state'] == 'claimed']
+                if ready:
+                    return ready
             
     async def _process_batch(self, content_batch: List[Dict]):
         """Process a batch of content concurrently using global semaphore"""
+        pending = {c['url'] for c in content_batch}
         
         async def analyze_with_semaphore(content_data: Dict):
-            async with self._global_semaphore:
-                return await self._analyze_single_content(content_data)
+            try:
+                async with self._limiter:
+                    return await self._analyze_single_content(content_data)
+            finally:
+                pending.discard(content_data['url'])
                 
-        tasks = [analyze_with_semaphore(content) for content in content_batch]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        # Pages can wait on the limiter longer than the lease; keep their claims alive meanwhile
+        renewer = asyncio.create_task(self._renew_claims(pending))
+        try:
+            tasks = [analyze_with_semaphore(content) for content in content_batch]
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            renewer.cancel()
+            try:
+                await renewer
+            except asyncio.CancelledError:
+                pass
+        
+        succeeded = [
+            content_batch[i]['url'] for i, result in enumerate(results)
+            if result and not isinstance(result, Exception)
+        ]
         
-        # Track successfully processed URLs (but not in fresh analysis mode)
-        if not self._fresh_analysis:
-            for i, result in enumerate(results):
-                if result and not isinstance(result, Exception):
-                    self._processed_urls.add(content_batch[i]['url'])
+        # Successful pages are done; failures go back to the queue for another attempt
+        try:
+            async with self.db.acquire() as conn:
+                await conn.execute(_RELEASE_CLAIMS_SQL, [c['url'] for c in content_batch], succeeded)
+        except Exception as e:
+            logger.error(f"Failed to release analysis claims (leases expire in {ANALYSIS_LEASE_SECONDS}s): {e}")
                 
         # Log summary with performance metrics
-        success_count = sum(1 for r in results if r and not isinstance(r, Exception))
+        success_count = len(succeeded)
         error_count = sum(1 for r in results if isinstance(r, Exception))
-        
-        # Track total processed correctly for both modes
-        if self._fresh_analysis:
-            # In fresh analysis mode, increment a counter and offset for progression
-            if not hasattr(self, '_total_processed'):
-                self._total_processed = 0
-            if not hasattr(self, '_fresh_analysis_offset'):
-                self._fresh_analysis_offset = 0
-            self._total_processed += success_count
-            self._fresh_analysis_offset += len(content_batch)  # Move offset forward by batch size
-            total_processed = self._total_processed
-        else:
-            total_processed = len(self._processed_urls)
+        self._processed_count += success_count
+        total_processed = self._processed_count
         
         if error_count > 0:
             logger.info(f"Batch complete: {success_count}/{len(content_batch)} successful, {error_count} errors | Total processed: {total_processed}")
         else:
             logger.info(f"Batch complete: {success_count}/{len(content_batch)} successful | Total processed: {total_processed}")
         
+    async def _renew_claims(self, pending: set):
+        """Extend the leases of a batch's unfinished pages until the batch completes"""
+        while pending:
+            await asyncio.sleep(ANALYSIS_LEASE_RENEW_SECONDS)
+            if not pending:
+                return
+            try:
+                async with self.db.acquire() as conn:
+                    await conn.execute(_RENEW_CLAIMS_SQL, list(pending), ANALYSIS_LEASE_SECONDS)
+            except Exception as e:
+                logger.warning(f"Failed to renew analysis claims for {len(pending)} pages: {e}")
+        
     async def _analyze_single_content(self, content_data: Dict) -> Optional[Dict]:
         """Analyze a single piece of content"""
         try:
@@ -296,13 +462,16 @@ class ConcurrentContentAnalyzer:
                 'source_type': content_data.get('source_type')
             })
             
-            # Analyze content
+            # Analyze content (context is a cache hit unless dimensions/config changed mid-run)
+            context = await self.analyzer.get_analysis_context(self.project_id)
             result = await self.analyzer.analyze_content(
                 url=content_data['url'],
                 content=content_data['content'],
                 title=content_data.get('title', ''),
                 project_id=self.project_id,
-                metadata=metadata
+                metadata=metadata,
+                context=context,
+                pipeline_id=str(self.pipeline_id) if self.pipeline_id else None
             )
             
             if result:
@@ -339,8 +508,9 @@ class ConcurrentContentAnalyzer:
                 'total_enriched': 0,
                 'total_analyzed': 0,
                 'pending_analysis': 0,
-                'processed_this_session': len(self._processed_urls),
-                'is_running': self.is_running
+                'processed_this_session': self._processed_count,
+                'is_running': self.is_running,
+                'content_dedup': self.analyzer.deduplicator.pipeline_stats(None)
             }
 
         async with self.db.acquire() as conn:
@@ -370,6 +540,7 @@ class ConcurrentContentAnalyzer:
                 'total_enriched': stats['total_enriched'],
                 'total_analyzed': stats['total_analyzed'],
                 'pending_analysis': stats['pending_analysis'],
-                'processed_this_session': len(self._processed_urls),
-                'is_running': self.is_running
+                'processed_this_session': self._processed_count,
+                'is_running': self.is_running,
+                'content_dedup': self.analyzer.deduplicator.pipeline_stats(str(self.pipeline_id))
             }
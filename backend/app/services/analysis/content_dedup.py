@@ -0,0 +1,335 @@
+"""
+Content Deduplication for LLM Analysis
+Fingerprints normalized page content (exact SHA-256 plus a 64-bit SimHash)
+and reuses an existing optimized_content_analysis when the same or nearly the
+same content was already analyzed under the same dimension-set version.
+
+Syndicated press releases, mirrored docs and republished news then cost one
+OpenAI call instead of one per URL.
+"""
+
+import asyncio
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+# SimHash is split into 4 bands of 16 bits; two hashes within Hamming distance 3
+# always share at least one band, so band lookup finds every near duplicate.
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+SIMHASH_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+SHINGLE_SIZE = 3
+
+CONTENT_FINGERPRINT_SQL = """
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS content_simhash BIGINT;
+
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS content_hash TEXT;
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS content_simhash BIGINT;
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS simhash_bands INTEGER[];
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS dimension_set_version TEXT;
+ALTER TABLE optimized_content_analysis ADD COLUMN IF NOT EXISTS reused_from_url TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_scraped_content_hash ON scraped_content(content_hash);
+CREATE INDEX IF NOT EXISTS idx_oca_content_hash ON optimized_content_analysis(content_hash, dimension_set_version);
+CREATE INDEX IF NOT EXISTS idx_oca_simhash_bands ON optimized_content_analysis USING GIN (simhash_bands);
+"""
+
+_URL_RE = re.compile(r'https?://\S+|www\.\S+')
+_NON_WORD_RE = re.compile(r'[^\w\s]+')
+
+
+@dataclass(frozen=True)
+class ContentFingerprint:
+    """Exact and near-duplicate signatures of normalized content"""
+    content_hash: str
+    simhash: int
+    bands: List[int]
+    token_count: int
+
+
+def normalize_content(text: str) -> str:
+    """Case-fold, drop URLs and punctuation, collapse whitespace"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    text = _URL_RE.sub(' ', text)
+    text = _NON_WORD_RE.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def simhash64(tokens: List[str], shingle_size: int = SHINGLE_SIZE) -> int:
+    """64-bit SimHash over word shingles, returned as a signed int (fits BIGINT)"""
+    if not tokens:
+        return 0
+    if len(tokens) < shingle_size:
+        shingles = [' '.join(tokens)]
+    else:
+        shingles = [' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)]
+
+    # Column-wise bit counting over fixed-width binary strings keeps the
+    # per-bit work in C instead of a 64-step Python loop per shingle
+    bit_strings = [
+        format(int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+        for shingle in shingles
+    ]
+    half = len(bit_strings) / 2
+    fingerprint = 0
+    for position, column in enumerate(zip(*bit_strings)):
+        if column.count('1') > half:
+            fingerprint |= 1 << (SIMHASH_BITS - 1 - position)
+    return _to_signed64(fingerprint)
+
+
+def simhash_bands(simhash: int) -> List[int]:
+    """Band values tagged with their band index so equal values in different bands never collide"""
+    unsigned = simhash & ((1 << SIMHASH_BITS) - 1)
+    mask = (1 << SIMHASH_BAND_BITS) - 1
+    return [
+        (band << SIMHASH_BAND_BITS) | ((unsigned >> (band * SIMHASH_BAND_BITS)) & mask)
+        for band in range(SIMHASH_BANDS)
+    ]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count('1')
+
+
+def fingerprint_content(text: str) -> ContentFingerprint:
+    normalized = normalize_content(text)
+    tokens = normalized.split()
+    simhash = simhash64(tokens)
+    return ContentFingerprint(
+        content_hash=hashlib.sha256(normalized.encode('utf-8')).hexdigest(),
+        simhash=simhash,
+        bands=simhash_bands(simhash),
+        token_count=len(tokens)
+    )
+
+
+def _to_signed64(value: int) -> int:
+    return value - (1 << SIMHASH_BITS) if value >= (1 << (SIMHASH_BITS - 1)) else value
+
+
+class ContentDeduplicator:
+    """
+    Finds reusable analyses by content fingerprint and clones them.
+
+    Reuse is scoped to the same project and dimension-set version, so a change
+    to any dimension makes every page eligible for fresh analysis again.
+    """
+
+    def __init__(self, db, settings=None):
+        self.db = db
+        self.settings = settings
+        self.enabled = getattr(settings, 'ANALYSIS_DEDUP_ENABLED', True)
+        self.max_distance = getattr(settings, 'ANALYSIS_NEAR_DUP_MAX_DISTANCE', 3)
+        self.min_tokens = getattr(settings, 'ANALYSIS_DEDUP_MIN_TOKENS', 150)
+        self._schema_ready: Optional[bool] = None
+        self._pipeline_stats: Dict[str, Dict[str, int]] = {}
+
+    async def ensure_schema(self, conn=None) -> bool:
+        """Add the fingerprint columns once per process; False if that is not possible"""
+        if self._schema_ready is None:
+            try:
+                if conn is not None:
+                    await conn.execute(CONTENT_FINGERPRINT_SQL)
+                else:
+                    async with self.db.acquire() as conn:
+                        await conn.execute(CONTENT_FINGERPRINT_SQL)
+                self._schema_ready = True
+            except Exception as e:
+                logger.warning(f"Content fingerprint columns unavailable, dedup disabled: {e}")
+                self._schema_ready = False
+        return self._schema_ready
+
+    def eligible(self, fingerprint: ContentFingerprint) -> bool:
+        """Very short pages are mostly boilerplate; always analyze them"""
+        return self.enabled and fingerprint.token_count >= self.min_tokens
+
+    async def find_reusable(
+        self,
+        fingerprint: ContentFingerprint,
+        dimension_set_version: str,
+        url: str,
+        project_id: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Return {'url', 'match', 'distance'} of an analysis with the same or near-identical content"""
+        if not self.eligible(fingerprint) or not await self.ensure_schema():
+            return None
+
+        async with self.db.acquire() as conn:
+            exact = await conn.fetchval("""
+                SELECT url FROM optimized_content_analysis
+                WHERE content_hash = $1
+                  AND dimension_set_version = $2
+                  AND project_id IS NOT DISTINCT FROM $3
+                  AND url <> $4
+                ORDER BY analyzed_at DESC
+                LIMIT 1
+            """, fingerprint.content_hash, dimension_set_version, project_id, url)
+            if exact:
+                return {'url': exact, 'match': 'exact', 'distance': 0}
+
+            if self.max_distance <= 0:
+                return None
+
+            candidates = await conn.fetch("""
+                SELECT url, content_simhash FROM optimized_content_analysis
+                WHERE simhash_bands && $1::int[]
+                  AND dimension_set_version = $2
+                  AND project_id IS NOT DISTINCT FROM $3
+                  AND url <> $4
+                  AND content_simhash IS NOT NULL
+                LIMIT 200
+            """, fingerprint.bands, dimension_set_version, project_id, url)
+
+        best = None
+        for candidate in candidates:
+            distance = hamming_distance(fingerprint.simhash, candidate['content_simhash'])
+            if distance <= self.max_distance and (best is None or distance < best['distance']):
+                best = {'url': candidate['url'], 'match': 'near', 'distance': distance}
+        return best
+
+    async def clone_analysis(
+        self,
+        source_url: str,
+        url: str,
+        project_id: Optional[str],
+        fingerprint: ContentFingerprint
+    ) -> Optional[Dict[str, Any]]:
+        """Copy an analysis (with dimension and primary-dimension rows) to another URL"""
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                source = await conn.fetchrow("""
+                    SELECT * FROM optimized_content_analysis WHERE url = $1
+                """, source_url)
+                if not source:
+                    return None
+
+                existing_id = await conn.fetchval("""
+                    SELECT id FROM optimized_content_analysis WHERE url = $1
+                """, url)
+                if existing_id:
+                    await conn.execute("DELETE FROM optimized_dimension_analysis WHERE analysis_id = $1", existing_id)
+                    await conn.execute("DELETE FROM analysis_primary_dimensions WHERE analysis_id = $1", existing_id)
+                    analysis_id = await conn.fetchval("""
+                        UPDATE optimized_content_analysis
+                        SET overall_insights = $2, analyzer_version = $3, analyzed_at = NOW(),
+                            mentions = $4, overall_sentiment = $5, key_topics = $6,
+                            project_id = $7, content_hash = $8, content_simhash = $9,
+                            simhash_bands = $10, dimension_set_version = $11, reused_from_url = $12
+                        WHERE id = $1
+                        RETURNING id
+                    """,
+                        existing_id, source['overall_insights'], source['analyzer_version'],
+                        source['mentions'], source['overall_sentiment'], source['key_topics'],
+                        project_id, fingerprint.content_hash, fingerprint.simhash,
+                        fingerprint.bands, source['dimension_set_version'], source_url
+                    )
+                else:
+                    analysis_id = await conn.fetchval("""
+                        INSERT INTO optimized_content_analysis (
+                            url, project_id, overall_insights, analyzer_version, analyzed_at,
+                            mentions, overall_sentiment, key_topics,
+                            content_hash, content_simhash, simhash_bands,
+                            dimension_set_version, reused_from_url
+                        ) VALUES ($1, $2, $3, $4, NOW(), $5, $6, $7, $8, $9, $10, $11, $12)
+                        RETURNING id
+                    """,
+                        url, project_id, source['overall_insights'], source['analyzer_version'],
+                        source['mentions'], source['overall_sentiment'], source['key_topics'],
+                        fingerprint.content_hash, fingerprint.simhash, fingerprint.bands,
+                        source['dimension_set_version'], source_url
+                    )
+
+                dimensions = await conn.fetch("""
+                    INSERT INTO optimized_dimension_analysis (
+                        analysis_id, dimension_id, dimension_name, dimension_type,
+                        score, confidence, key_evidence, primary_signals, score_factors
+                    )
+                    SELECT $1, dimension_id, dimension_name, dimension_type,
+                           score, confidence, key_evidence, primary_signals, score_factors
+                    FROM optimized_dimension_analysis
+                    WHERE analysis_id = $2
+                    RETURNING dimension_id, dimension_name, dimension_type, score, confidence
+                """, analysis_id, source['id'])
+
+                await conn.execute("""
+                    INSERT INTO analysis_primary_dimensions (
+                        analysis_id, group_id, dimension_id,
+                        selection_reason, selection_score, project_id
+                    )
+                    SELECT $1, group_id, dimension_id, selection_reason, selection_score, $3
+                    FROM analysis_primary_dimensions
+                    WHERE analysis_id = $2
+                    ON CONFLICT (analysis_id, group_id) DO NOTHING
+                """, analysis_id, source['id'], project_id)
+
+        return {
+            'dimensions': {row['dimension_id']: dict(row) for row in dimensions},
+            'overall_insights': source['overall_insights'],
+            'overall_sentiment': source['overall_sentiment'],
+            'analyzer_version': source['analyzer_version'],
+            'reused_from': source_url,
+        }
+
+    async def record_fingerprint(
+        self,
+        conn,
+        analysis_id: Any,
+        fingerprint: Optional[ContentFingerprint],
+        dimension_set_version: Optional[str]
+    ) -> None:
+        """
+        Attach fingerprint and dimension-set version to a freshly stored analysis.
+        A None fingerprint clears them so a failed analysis is never reused.
+        """
+        if not self._schema_ready:
+            return
+        await conn.execute("""
+            UPDATE optimized_content_analysis
+            SET content_hash = $2, content_simhash = $3, simhash_bands = $4,
+                dimension_set_version = $5, reused_from_url = NULL
+            WHERE id = $1
+        """,
+            analysis_id,
+            fingerprint.content_hash if fingerprint else None,
+            fingerprint.simhash if fingerprint else None,
+            fingerprint.bands if fingerprint else None,
+            dimension_set_version if fingerprint else None
+        )
+
+    async def record_scraped_fingerprint(self, conn, url: str, content: str) -> None:
+        """Store the fingerprint next to the scraped_content row"""
+        if not self.enabled or not content or not await self.ensure_schema(conn):
+            return
+        try:
+            fingerprint = await asyncio.to_thread(fingerprint_content, content)
+            await conn.execute("""
+                UPDATE scraped_content SET content_hash = $2, content_simhash = $3 WHERE url = $1
+            """, url, fingerprint.content_hash, fingerprint.simhash)
+        except Exception as e:
+            logger.debug(f"Could not fingerprint scraped content for {url}: {e}")
+
+    def record_outcome(self, pipeline_id: Optional[str], outcome: str) -> None:
+        """Count one dedup decision ('exact', 'near', 'miss' or 'skipped') for a pipeline"""
+        stats = self._pipeline_stats.setdefault(str(pipeline_id or 'adhoc'), {
+            'checked': 0, 'exact': 0, 'near': 0, 'miss': 0, 'skipped': 0
+        })
+        stats[outcome] = stats.get(outcome, 0) + 1
+        if outcome != 'skipped':
+            stats['checked'] += 1
+
+    def pipeline_stats(self, pipeline_id: Optional[str]) -> Dict[str, Any]:
+        """Hit rates of the content dedup for one pipeline"""
+        stats = dict(self._pipeline_stats.get(str(pipeline_id or 'adhoc'), {
+            'checked': 0, 'exact': 0, 'near': 0, 'miss': 0, 'skipped': 0
+        }))
+        hits = stats['exact'] + stats['near']
+        stats['hits'] = hits
+        stats['hit_rate'] = round(hits / stats['checked'], 3) if stats['checked'] else 0.0
+        return stats
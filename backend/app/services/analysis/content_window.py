@@ -0,0 +1,363 @@
+"""
+Token-budgeted content windowing for analysis prompts
+Strips page boilerplate, splits content into passages and, when a page does
+not fit the token budget, keeps the passages that best match each
+dimension's signals (BM25), in original reading order.
+"""
+
+import json
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+
+# Content token budget per cost/latency tier (prompt instructions not included)
+CONTENT_TOKEN_TIERS: Dict[str, int] = {
+    'economy': 6000,
+    'balanced': 16000,
+    'thorough': 48000,
+    'max': 150000,
+}
+DEFAULT_TIER = 'balanced'
+
+# Leading passages kept regardless of relevance (title/intro frame the page)
+LEAD_PASSAGES = 2
+PASSAGE_TARGET_TOKENS = 180
+MENU_RUN_MIN_LINES = 4
+
+# Chrome wording; a short line containing it is dropped only in the leading/trailing chrome block
+_BOILERPLATE_RE = re.compile(
+    r'\b(?:cookies?|consent|privacy policy|terms of (?:use|service)|all rights reserved|copyright'
+    r'|subscribe to (?:our )?newsletter|sign up for|log ?in|sign ?in|skip to (?:main )?content'
+    r'|follow us|share (?:this|on)|back to top|accept all|manage preferences)\b|©',
+    re.IGNORECASE
+)
+# Lines that are nothing but a chrome phrase are dropped anywhere on the page
+_BOILERPLATE_LINE_RE = re.compile(
+    r'[\W_]*(?:cookie (?:settings|preferences|policy)|privacy policy|terms of (?:use|service)'
+    r'|terms (?:and|&) conditions|log ?in|log ?out|sign ?in|sign ?up|skip to (?:main )?content'
+    r'|back to top|accept(?: all)?(?: cookies)?|manage preferences|follow us|share this)[\W_]*',
+    re.IGNORECASE
+)
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have how in is it its of on or that the their this to was '
+    'we were what when where which who will with you your our not can'.split()
+)
+
+
+class TokenCounter:
+    """Local token counting; estimates ~4 chars per token when tiktoken is unavailable"""
+
+    def __init__(self, encoding_name: str = 'o200k_base'):
+        self._encoding = None
+        if TIKTOKEN_AVAILABLE:
+            try:
+                self._encoding = tiktoken.get_encoding(encoding_name)
+            except Exception:
+                try:
+                    self._encoding = tiktoken.get_encoding('cl100k_base')
+                except Exception as e:
+                    logger.warning(f"tiktoken encodings unavailable, estimating tokens: {e}")
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + 3) // 4
+
+
+@dataclass
+class ContentWindow:
+    """Text sent to the model plus what was dropped to get there"""
+    text: str
+    tokens_original: int
+    tokens_sent: int
+    passages_total: int
+    passages_sent: int
+    boilerplate_lines_removed: int
+    truncated: bool
+    budget: int
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'tokens_original': self.tokens_original,
+            'tokens_sent': self.tokens_sent,
+            'passages_total': self.passages_total,
+            'passages_sent': self.passages_sent,
+            'boilerplate_lines_removed': self.boilerplate_lines_removed,
+            'truncated': self.truncated,
+            'budget': self.budget,
+        }
+
+
+@dataclass
+class _Passage:
+    index: int
+    text: str
+    tokens: int
+    terms: Counter = field(default_factory=Counter)
+
+    @property
+    def length(self) -> int:
+        return sum(self.terms.values())
+
+
+def tokenize_terms(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or '').lower()) if t not in _STOPWORDS and len(t) > 1]
+
+
+def dimension_terms(dimension: Dict[str, Any]) -> List[str]:
+    """Query terms for a dimension: name, description, focus areas and positive signals"""
+    ai_context = _as_dict(dimension.get('ai_context'))
+    criteria = _as_dict(dimension.get('criteria'))
+    parts = [dimension.get('name') or '', dimension.get('description') or '']
+    if isinstance(ai_context, dict):
+        parts.extend(str(a) for a in ai_context.get('key_focus_areas', []) or [])
+        parts.append(str(ai_context.get('general_description') or ''))
+    if isinstance(criteria, dict):
+        parts.extend(str(s) for s in criteria.get('positive_signals', []) or [])
+        parts.extend(str(s) for s in criteria.get('what_counts', []) or [])
+    return sorted(set(tokenize_terms(' '.join(parts))))
+
+
+def _as_dict(value: Any) -> Dict[str, Any]:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return {}
+    return value if isinstance(value, dict) else {}
+
+
+class ContentWindower:
+    """Builds a ContentWindow for a page against a set of dimension queries"""
+
+    def __init__(self, settings=None, counter: Optional[TokenCounter] = None):
+        tier = getattr(settings, 'ANALYSIS_PROMPT_TIER', DEFAULT_TIER)
+        override = getattr(settings, 'ANALYSIS_MAX_CONTENT_TOKENS', 0)
+        self.budget = override or CONTENT_TOKEN_TIERS.get(tier, CONTENT_TOKEN_TIERS[DEFAULT_TIER])
+        self.counter = counter or TokenCounter()
+
+    def window(self, content: str, queries: Optional[Dict[str, List[str]]] = None) -> ContentWindow:
+        """
+        Fit content into the token budget.
+
+        queries maps dimension id -> query terms; passages are chosen round-robin
+        across dimensions by BM25 rank so every dimension keeps its best evidence.
+        """
+        content = content or ''
+        tokens_original = self.counter.count(content)
+        cleaned, removed = strip_boilerplate(content)
+        if not cleaned and content.strip():
+            # Everything looked like boilerplate; better to send the page than nothing
+            cleaned, removed = content.strip(), 0
+        passages = self._split_passages(cleaned)
+        cleaned_tokens = sum(p.tokens for p in passages)
+
+        if cleaned_tokens <= self.budget:
+            return ContentWindow(
+                text=cleaned, tokens_original=tokens_original, tokens_sent=cleaned_tokens,
+                passages_total=len(passages), passages_sent=len(passages),
+                boilerplate_lines_removed=removed, truncated=False, budget=self.budget
+            )
+
+        selected = self._select(passages, queries or {})
+        text = '\n\n'.join(passages[i].text for i in sorted(selected))
+        return ContentWindow(
+            text=text, tokens_original=tokens_original,
+            tokens_sent=sum(passages[i].tokens for i in selected),
+            passages_total=len(passages), passages_sent=len(selected),
+            boilerplate_lines_removed=removed, truncated=True, budget=self.budget
+        )
+
+    def _split_passages(self, text: str) -> List[_Passage]:
+        """Group paragraphs into passages of roughly PASSAGE_TARGET_TOKENS"""
+        passages: List[_Passage] = []
+        buffer: List[str] = []
+        buffer_tokens = 0
+
+        def flush():
+            nonlocal buffer, buffer_tokens
+            if buffer:
+                passage_text = '\n'.join(buffer)
+                passages.append(_Passage(
+                    index=len(passages), text=passage_text, tokens=buffer_tokens,
+                    terms=Counter(tokenize_terms(passage_text))
+                ))
+            buffer, buffer_tokens = [], 0
+
+        for paragraph in re.split(r'\n\s*\n|\n', text):
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            tokens = self.counter.count(paragraph)
+            if tokens > PASSAGE_TARGET_TOKENS * 4:
+                # Wall of text without line breaks: split on sentences
+                flush()
+                for sentence_group in _sentence_groups(paragraph, PASSAGE_TARGET_TOKENS * 4):
+                    buffer = [sentence_group]
+                    buffer_tokens = self.counter.count(sentence_group)
+                    flush()
+                continue
+            if buffer and buffer_tokens + tokens > PASSAGE_TARGET_TOKENS:
+                flush()
+            buffer.append(paragraph)
+            buffer_tokens += tokens
+        flush()
+        return passages
+
+    def _select(self, passages: List[_Passage], queries: Dict[str, List[str]]) -> List[int]:
+        budget = self.budget
+        selected: List[int] = []
+        used = 0
+
+        def take(index: int) -> bool:
+            nonlocal used
+            passage = passages[index]
+            if index in selected or used + passage.tokens > budget:
+                return False
+            selected.append(index)
+            used += passage.tokens
+            return True
+
+        for index in range(min(LEAD_PASSAGES, len(passages))):
+            take(index)
+
+        rankings = [r for r in (_bm25_rank(passages, terms) for terms in queries.values()) if r]
+        if not rankings:
+            # No dimension signals: fall back to document order
+            rankings = [list(range(len(passages)))]
+
+        # Round-robin over dimensions so no single dimension consumes the budget
+        cursors = [0] * len(rankings)
+        progress = True
+        while progress and used < budget:
+            progress = False
+            for r, ranking in enumerate(rankings):
+                while cursors[r] < len(ranking):
+                    index = ranking[cursors[r]]
+                    cursors[r] += 1
+                    if take(index):
+                        progress = True
+                        break
+        return selected
+
+
+def strip_boilerplate(text: str):
+    """
+    Drop page chrome while leaving body content alone; returns (text, lines_removed).
+
+    - Lines that are only a chrome phrase ("Privacy Policy", "Sign in")
+    - Short cookie/legal/login lines before the first or after the last prose line
+    - Repeats of a bare link label ("Learn more") after its first occurrence
+    - Runs of bare link labels before the first or after the last prose line
+      (header navigation and footer menus); lists inside the body are kept
+    """
+    lines = [line.strip() for line in (text or '').splitlines()]
+    drop = [False] * len(lines)
+    prose = []
+    chrome = []
+
+    for i, line in enumerate(lines):
+        if not line:
+            continue
+        if _BOILERPLATE_LINE_RE.fullmatch(line):
+            drop[i] = True
+        elif len(line.split()) <= 12 and _BOILERPLATE_RE.search(line):
+            chrome.append(i)
+        elif not _looks_like_menu_item(line):
+            prose.append(i)
+
+    first_prose = prose[0] if prose else len(lines)
+    last_prose = prose[-1] if prose else -1
+
+    # Cookie banners and legal lines only count as chrome outside the body; mid-document they are prose
+    for i in chrome:
+        if i < first_prose or i > last_prose:
+            drop[i] = True
+
+    # Navigation shows up as several consecutive one-to-three word labels at the page edges
+    run_start = None
+    for i in range(len(lines) + 1):
+        is_label = i < len(lines) and _looks_like_menu_item(lines[i])
+        if is_label and run_start is None:
+            run_start = i
+        elif not is_label and run_start is not None:
+            at_edge = i <= first_prose or run_start > last_prose
+            if at_edge and i - run_start >= MENU_RUN_MIN_LINES:
+                for j in range(run_start, i):
+                    drop[j] = True
+            run_start = None
+
+    # Repeated link labels ("Learn more") only need to appear once
+    seen_labels = set()
+    for i, line in enumerate(lines):
+        if drop[i] or not _looks_like_menu_item(line):
+            continue
+        if line.lower() in seen_labels:
+            drop[i] = True
+        seen_labels.add(line.lower())
+
+    kept = [line for line, dropped in zip(lines, drop) if not dropped]
+    removed = sum(1 for line, dropped in zip(lines, drop) if dropped and line)
+    return re.sub(r'\n{3,}', '\n\n', '\n'.join(kept)).strip(), removed
+
+
+def _looks_like_menu_item(line: str) -> bool:
+    # Bare link labels ("Products", "About Us", "Contact") carry no evidence
+    return (
+        bool(line)
+        and len(line) <= 30
+        and len(line.split()) <= 3
+        and not line.endswith(('.', ':', '?', '!'))
+        and not any(ch.isdigit() for ch in line)
+    )
+
+
+def _sentence_groups(paragraph: str, max_tokens: int) -> List[str]:
+    sentences = re.split(r'(?<=[.!?])\s+', paragraph)
+    groups: List[str] = []
+    current: List[str] = []
+    length = 0
+    # Character estimate is enough here; groups are re-counted by the caller
+    max_chars = max_tokens * 4
+    for sentence in sentences:
+        if current and length + len(sentence) > max_chars:
+            groups.append(' '.join(current))
+            current, length = [], 0
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        groups.append(' '.join(current))
+    return groups
+
+
+def _bm25_rank(passages: List[_Passage], query_terms: List[str], k1: float = 1.5, b: float = 0.75) -> List[int]:
+    """Passage indexes with a positive BM25 score for the query, best first"""
+    if not passages or not query_terms:
+        return []
+    n = len(passages)
+    lengths = [p.length for p in passages]
+    avg_len = (sum(lengths) / n) or 1.0
+    totals: Dict[int, float] = {}
+    for term in set(query_terms):
+        matches = [(i, p.terms[term]) for i, p in enumerate(passages) if term in p.terms]
+        if not matches:
+            continue
+        idf = math.log(1 + (n - len(matches) + 0.5) / (len(matches) + 0.5))
+        for i, tf in matches:
+            score = idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths[i] / avg_len))
+            totals[i] = totals.get(i, 0.0) + score
+    return [index for index, _ in sorted(totals.items(), key=lambda item: item[1], reverse=True)]
@@ -3,7 +3,8 @@ from docx import Document
 import io
 from typing import Dict, Optional
 from loguru import logger
-import httpx
+
+from app.core.http_clients import http_clients
 
 
 class DocumentParser:
@@ -13,8 +14,8 @@ class DocumentParser:
         """Download and parse document from URL"""
         try:
             # Download the document
-            async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
-                response = await client.get(url)
+            async with http_clients.session('direct') as client:
+                response = await client.get(url, timeout=30.0, follow_redirects=True)
                 response.raise_for_status()
                 
                 content_type = response.headers.get('content-type', '').lower()
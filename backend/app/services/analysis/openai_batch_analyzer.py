@@ -0,0 +1,398 @@
+"""
+OpenAI Batch API mode for bulk content analysis
+Prepares prompts with OptimizedUnifiedAnalyzer, submits them as JSONL through
+the provider's batch endpoint, polls until each batch finishes and stores the
+results through the analyzer's normal finalize path.
+
+Meant for overnight re-analysis: no per-request rate limiting or retry sleeps,
+and batch pricing. Set OPENAI_BASE_URL to run against a local fake server.
+"""
+
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from loguru import logger
+
+from app.core.http_clients import http_clients
+from app.services.analysis.optimized_unified_analyzer import OptimizedUnifiedAnalyzer, PreparedAnalysis
+
+
+BATCH_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS openai_analysis_batches (
+    batch_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    project_id TEXT,
+    pipeline_id TEXT,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    input_file_id TEXT,
+    output_file_id TEXT,
+    error_file_id TEXT,
+    request_urls JSONB NOT NULL DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_openai_analysis_batches_status ON openai_analysis_batches(status);
+"""
+
+TERMINAL_STATUSES = frozenset({'completed', 'failed', 'expired', 'cancelled'})
+CHAT_COMPLETIONS_ENDPOINT = '/v1/chat/completions'
+
+# Uploads and result downloads can be hundreds of MB
+TRANSFER_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+
+ResultCallback = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class OpenAIBatchAnalyzer:
+    """Runs OptimizedUnifiedAnalyzer over many pages through the OpenAI Batch API"""
+
+    def __init__(self, analyzer: OptimizedUnifiedAnalyzer, settings=None, db=None):
+        self.analyzer = analyzer
+        self.db = db or analyzer.db
+        settings = settings or analyzer.settings
+        self.poll_interval = getattr(settings, 'OPENAI_BATCH_POLL_INTERVAL_S', 60)
+        self.completion_window = getattr(settings, 'OPENAI_BATCH_COMPLETION_WINDOW', '24h')
+        self.max_requests = getattr(settings, 'OPENAI_BATCH_MAX_REQUESTS', 50000)
+        self.max_file_bytes = getattr(settings, 'OPENAI_BATCH_MAX_FILE_MB', 180) * 1024 * 1024
+        self.prepare_concurrency = 20
+        self.store_concurrency = 10
+        self._schema_ready = False
+
+    @property
+    def base_url(self) -> str:
+        return self.analyzer.openai_base_url
+
+    async def analyze_many(
+        self,
+        items: List[Dict[str, Any]],
+        project_id: Optional[str] = None,
+        pipeline_id: Optional[str] = None,
+        on_result: Optional[ResultCallback] = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze pages ({'url', 'content', 'title'?, 'metadata'?}) through batch jobs.
+
+        Duplicates are resolved by the content dedup before submission. on_result
+        is awaited with (url, result) for every reused or stored analysis.
+        """
+        started = time.monotonic()
+        await self._ensure_schema()
+        context = await self.analyzer.get_analysis_context(project_id)
+
+        stats = {'pages': len(items), 'submitted': 0, 'reused': 0, 'skipped': 0,
+                 'completed': 0, 'failed': 0, 'batches': [], 'failed_urls': []}
+        prepared: Dict[str, PreparedAnalysis] = {}
+        chunk: List[tuple] = []
+        chunk_bytes = 0
+        semaphore = asyncio.Semaphore(self.prepare_concurrency)
+
+        async def prepare(index: int, item: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    outcome = await self.analyzer.prepare_analysis(
+                        item['url'], item.get('content') or '', item.get('title') or '',
+                        project_id=project_id, metadata=item.get('metadata'),
+                        context=context, pipeline_id=pipeline_id
+                    )
+                except Exception as e:
+                    outcome = {'error': str(e)}
+            if isinstance(outcome, PreparedAnalysis):
+                return f"page-{index}", outcome
+            if outcome.get('reused_from'):
+                stats['reused'] += 1
+                if on_result:
+                    await on_result(item['url'], outcome)
+            else:
+                stats['skipped'] += 1
+                logger.debug(f"Batch analysis skipped {item.get('url')}: {outcome.get('error')}")
+            return None
+
+        async def submit_chunk():
+            nonlocal chunk, chunk_bytes
+            if chunk:
+                stats['batches'].append(await self._submit(chunk, project_id, pipeline_id))
+                stats['submitted'] += len(chunk)
+            chunk, chunk_bytes = [], 0
+
+        # Prepare in slices and submit each input file as soon as it is full,
+        # so at most one file worth of prompts is held in memory
+        slice_size = self.prepare_concurrency * 10
+        for start in range(0, len(items), slice_size):
+            outcomes = await asyncio.gather(*(
+                prepare(start + offset, item) for offset, item in enumerate(items[start:start + slice_size])
+            ))
+            for outcome in outcomes:
+                if outcome is None:
+                    continue
+                custom_id, item = outcome
+                line = self._request_line(custom_id, item)
+                if chunk and (len(chunk) >= self.max_requests or chunk_bytes + len(line) > self.max_file_bytes):
+                    await submit_chunk()
+                prepared[custom_id] = item
+                chunk.append((custom_id, item.url, line))
+                chunk_bytes += len(line)
+        await submit_chunk()
+
+        logger.info(
+            f"📦 Submitted {stats['submitted']} analysis requests in {len(stats['batches'])} batches "
+            f"({stats['reused']} reused duplicates, {stats['skipped']} skipped)"
+        )
+
+        for batch_id in stats['batches']:
+            batch = await self._wait(batch_id)
+            completed, failed_urls = await self._collect(batch, prepared, on_result)
+            stats['completed'] += completed
+            stats['failed'] += len(failed_urls)
+            stats['failed_urls'].extend(failed_urls)
+
+        stats['elapsed_seconds'] = round(time.monotonic() - started, 1)
+        logger.info(
+            f"📦 Batch analysis finished: {stats['completed']} stored, {stats['failed']} failed, "
+            f"{stats['reused']} reused in {stats['elapsed_seconds']}s"
+        )
+        return stats
+
+    async def resume(
+        self,
+        batch_id: str,
+        on_result: Optional[ResultCallback] = None
+    ) -> Dict[str, Any]:
+        """Finish a batch submitted by an earlier process (re-prepares pages from scraped_content)"""
+        await self._ensure_schema()
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow(
+                "SELECT project_id, pipeline_id, request_urls FROM openai_analysis_batches WHERE batch_id = $1",
+                batch_id
+            )
+            if not row:
+                raise ValueError(f"Unknown analysis batch {batch_id}")
+            request_urls = row['request_urls']
+            if isinstance(request_urls, str):
+                request_urls = json.loads(request_urls)
+            pages = await conn.fetch(
+                "SELECT url, title, content FROM scraped_content WHERE url = ANY($1::text[])",
+                list(request_urls.values())
+            )
+
+        project_id = row['project_id']
+        context = await self.analyzer.get_analysis_context(project_id)
+        pages_by_url = {page['url']: page for page in pages}
+        prepared: Dict[str, PreparedAnalysis] = {}
+        for custom_id, url in request_urls.items():
+            page = pages_by_url.get(url)
+            if not page:
+                continue
+            outcome = await self.analyzer.prepare_analysis(
+                url, page['content'] or '', page['title'] or '',
+                project_id=project_id, context=context, pipeline_id=row['pipeline_id']
+            )
+            if isinstance(outcome, PreparedAnalysis):
+                outcome.prompt = ''
+                outcome.window.text = ''
+                prepared[custom_id] = outcome
+
+        batch = await self._wait(batch_id)
+        completed, failed_urls = await self._collect(batch, prepared, on_result)
+        return {'batch_id': batch_id, 'completed': completed, 'failed': len(failed_urls), 'failed_urls': failed_urls}
+
+    def _request_line(self, custom_id: str, item: PreparedAnalysis) -> bytes:
+        """One JSONL request line; prompt and window text are dropped from the item once serialized"""
+        line = json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': CHAT_COMPLETIONS_ENDPOINT,
+            'body': self.analyzer.build_chat_request(item.prompt, item.context.response_schema),
+        }).encode('utf-8') + b'\n'
+        item.prompt = ''
+        item.window.text = ''
+        return line
+
+    async def _submit(self, chunk: List[tuple], project_id: Optional[str], pipeline_id: Optional[str]) -> str:
+        """Upload one JSONL file and create a batch for it"""
+        client = http_clients.get('openai')
+        payload = b''.join(line for _, _, line in chunk)
+
+        upload = await client.post(
+            f"{self.base_url}/files",
+            headers=self.analyzer.openai_headers(content_type=None),
+            data={'purpose': 'batch'},
+            files={'file': ('content_analysis.jsonl', payload, 'application/jsonl')},
+            timeout=TRANSFER_TIMEOUT
+        )
+        upload.raise_for_status()
+        input_file_id = upload.json()['id']
+
+        created = await client.post(
+            f"{self.base_url}/batches",
+            headers=self.analyzer.openai_headers(),
+            json={
+                'input_file_id': input_file_id,
+                'endpoint': CHAT_COMPLETIONS_ENDPOINT,
+                'completion_window': self.completion_window,
+                'metadata': {
+                    'job': 'content_analysis',
+                    'project_id': str(project_id or ''),
+                    'pipeline_id': str(pipeline_id or ''),
+                },
+            }
+        )
+        created.raise_for_status()
+        batch = created.json()
+        batch_id = batch['id']
+
+        request_urls = {custom_id: url for custom_id, url, _ in chunk}
+        async with self.db.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO openai_analysis_batches (
+                    batch_id, status, project_id, pipeline_id, request_count, input_file_id, request_urls
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+            """,
+                batch_id, batch.get('status', 'validating'),
+                str(project_id) if project_id else None,
+                str(pipeline_id) if pipeline_id else None,
+                len(chunk), input_file_id, json.dumps(request_urls)
+            )
+
+        logger.info(f"📦 Submitted analysis batch {batch_id}: {len(chunk)} requests, {len(payload) / 1048576:.1f} MB")
+        return batch_id
+
+    async def _wait(self, batch_id: str) -> Dict[str, Any]:
+        """Poll a batch until it reaches a terminal status"""
+        client = http_clients.get('openai')
+        last_status = None
+        while True:
+            response = await client.get(
+                f"{self.base_url}/batches/{batch_id}",
+                headers=self.analyzer.openai_headers()
+            )
+            response.raise_for_status()
+            batch = response.json()
+            status = batch.get('status')
+            counts = batch.get('request_counts') or {}
+            await self._update_batch(batch)
+            if status != last_status:
+                logger.info(
+                    f"📦 Batch {batch_id}: {status} "
+                    f"({counts.get('completed', 0)}/{counts.get('total', 0)} done, {counts.get('failed', 0)} failed)"
+                )
+                last_status = status
+            if status in TERMINAL_STATUSES:
+                return batch
+            await asyncio.sleep(self.poll_interval)
+
+    async def _collect(
+        self,
+        batch: Dict[str, Any],
+        prepared: Dict[str, PreparedAnalysis],
+        on_result: Optional[ResultCallback]
+    ) -> tuple:
+        """Stream the output file and finalize every successful response; returns (stored, failed_urls)"""
+        batch_id = batch['id']
+        expected = await self._batch_custom_ids(batch_id)
+        seen = set()
+        stored = 0
+        failed_urls: List[str] = []
+        semaphore = asyncio.Semaphore(self.store_concurrency)
+        tasks = set()
+
+        async def finalize(item: PreparedAnalysis, ai_response: Dict[str, Any]):
+            nonlocal stored
+            try:
+                result = await self.analyzer.finalize_analysis(item, ai_response)
+                stored += 1
+                if on_result:
+                    await on_result(item.url, result)
+            except Exception as e:
+                failed_urls.append(item.url)
+                logger.error(f"Failed to store batch analysis for {item.url}: {e}")
+            finally:
+                semaphore.release()
+
+        output_file_id = batch.get('output_file_id')
+        if output_file_id:
+            async for record in self._iter_file_lines(output_file_id):
+                custom_id = record.get('custom_id')
+                item = prepared.get(custom_id)
+                if item is None:
+                    continue
+                seen.add(custom_id)
+                response = record.get('response') or {}
+                try:
+                    if response.get('status_code') != 200:
+                        raise Exception(f"status {response.get('status_code')}: {record.get('error')}")
+                    ai_response = self.analyzer.extract_tool_arguments(response.get('body'))
+                except Exception as e:
+                    # Leave the page unanalyzed so a later run picks it up again
+                    failed_urls.append(item.url)
+                    logger.warning(f"Batch request {custom_id} ({item.url}) failed: {e}")
+                    continue
+                await semaphore.acquire()
+                task = asyncio.create_task(finalize(item, ai_response))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*list(tasks))
+
+        # Requests that errored (error file) or never ran (expired/cancelled batch)
+        for custom_id in expected - seen:
+            item = prepared.get(custom_id)
+            if item is not None:
+                failed_urls.append(item.url)
+
+        async with self.db.acquire() as conn:
+            await conn.execute("""
+                UPDATE openai_analysis_batches
+                SET completed_count = $2, failed_count = $3, updated_at = NOW()
+                WHERE batch_id = $1
+            """, batch_id, stored, len(failed_urls))
+
+        return stored, failed_urls
+
+    async def _iter_file_lines(self, file_id: str):
+        """Stream a JSONL result file line by line"""
+        client = http_clients.get('openai')
+        async with client.stream(
+            'GET',
+            f"{self.base_url}/files/{file_id}/content",
+            headers=self.analyzer.openai_headers(content_type=None),
+            timeout=TRANSFER_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping malformed line in batch output {file_id}")
+
+    async def _batch_custom_ids(self, batch_id: str) -> set:
+        async with self.db.acquire() as conn:
+            request_urls = await conn.fetchval(
+                "SELECT request_urls FROM openai_analysis_batches WHERE batch_id = $1", batch_id
+            )
+        if isinstance(request_urls, str):
+            request_urls = json.loads(request_urls)
+        return set((request_urls or {}).keys())
+
+    async def _update_batch(self, batch: Dict[str, Any]) -> None:
+        async with self.db.acquire() as conn:
+            await conn.execute("""
+                UPDATE openai_analysis_batches
+                SET status = $2, output_file_id = $3, error_file_id = $4, updated_at = NOW()
+                WHERE batch_id = $1
+            """, batch['id'], batch.get('status'), batch.get('output_file_id'), batch.get('error_file_id'))
+
+    async def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self.db.acquire() as conn:
+            await conn.execute(BATCH_TABLE_SQL)
+        self._schema_ready = True
@@ -3,7 +3,8 @@ Optimized Unified Content Analyzer
 Reduces verbosity while maintaining analysis quality
 """
 
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple, Union
+from dataclasses import dataclass
 from datetime import datetime
 from uuid import UUID
 import json
@@ -13,9 +14,26 @@ from loguru import logger
 
 from app.core.config import Settings
 from app.core.database import DatabasePool
+from app.core.http_clients import http_clients
+from app.services.analysis.analysis_context_cache import (
+    AnalysisContext, analysis_context_cache, dimension_set_version
+)
+from app.services.analysis.content_dedup import ContentDeduplicator, ContentFingerprint, fingerprint_content
+from app.services.analysis.content_window import ContentWindow, ContentWindower, dimension_terms
 # from app.models.generic_dimensions import GenericCustomDimension
 
 
+@dataclass
+class PreparedAnalysis:
+    """A page ready for the model call: prompt plus what finalize_analysis needs"""
+    url: str
+    project_id: Optional[str]
+    prompt: str
+    context: AnalysisContext
+    window: ContentWindow
+    fingerprint: Optional[ContentFingerprint] = None
+
+
 class OptimizedUnifiedAnalyzer:
     """Optimized analyzer with reduced verbosity and improved efficiency"""
     
@@ -24,6 +42,10 @@ class OptimizedUnifiedAnalyzer:
         self.db = db
         self.openai_api_key = settings.OPENAI_API_KEY
         self.openai_project_id = settings.OPENAI_PROJECT_ID
+        self.openai_base_url = (getattr(settings, 'OPENAI_BASE_URL', None) or "https://api.openai.com/v1").rstrip('/')
+        self.analysis_model = "gpt-4.1"  # Using GPT-4.1 with 1M token context window
+        self.deduplicator = ContentDeduplicator(db, settings)
+        self.content_windower = ContentWindower(settings)
         
     async def analyze_content(
         self, 
@@ -32,66 +54,36 @@ class OptimizedUnifiedAnalyzer:
         title: str = "",
         project_id: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
+        context: Optional[AnalysisContext] = None,
+        pipeline_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Analyze content with optimized output format"""
+        """Analyze content with optimized output format
+        
+        context: per-project analysis context; looked up in the shared
+        analysis context cache when not supplied.
+        pipeline_id: used to attribute content-dedup hits to a pipeline run.
+        """
         try:
-            # Validate inputs
-            if not isinstance(content, str):
-                logger.error(f"Content must be a string, got {type(content)} for {url}")
-                return {"error": f"Invalid content type: {type(content)}"}
-            
-            if not content or not content.strip():
-                logger.warning(f"Empty content for {url}")
-                return {"error": "Empty content"}
-            
-            # 1. Load all dimensions as generic
-            dimensions = await self._load_all_dimensions_as_generic(project_id)
-            if not dimensions:
-                logger.warning("No dimensions configured for analysis")
-                return {"error": "No analysis dimensions configured"}
-            
-            # Validate dimensions are properly configured
-            validation_result = await self._validate_dimensions(dimensions, project_id)
-            if not validation_result['valid']:
-                logger.warning(f"Dimension validation failed: {validation_result['message']}")
-                return {"error": validation_result['message']}
-            
-            # 2. Extract company and competitor names for mention analysis
-            company_info = await self._get_company_and_competitors(project_id)
-            
-            # 3. Build optimized prompt with more content and mention analysis
-            #    Include optional metadata if provided (light touch to avoid failures)
-            prompt = self._build_optimized_prompt(content, title, dimensions, company_info)
-            if metadata:
-                try:
-                    prompt = f"{prompt}\n\nAdditional context (metadata): {json.dumps(metadata)[:1500]}"
-                except Exception:
-                    # Best-effort enrichment; never fail prompt composition on metadata issues
-                    pass
+            prepared = await self.prepare_analysis(
+                url, content, title,
+                project_id=project_id, metadata=metadata, context=context, pipeline_id=pipeline_id
+            )
+            if not isinstance(prepared, PreparedAnalysis):
+                # Validation error or a reused analysis
+                return prepared
             
             # 4. Call OpenAI with simplified schema including mentions
             try:
-                ai_response = await self._call_openai_optimized(prompt, dimensions, include_mentions=True)
+                ai_response = await self._call_openai_optimized(
+                    prepared.prompt, prepared.context.dimensions,
+                    include_mentions=True, response_schema=prepared.context.response_schema
+                )
             except Exception as api_error:
                 logger.error(f"OpenAI API call failed for {url}: {str(api_error)}", exc_info=True)
                 # Return None to trigger the default analysis below
                 ai_response = None
             
-            # 5. Handle None response from OpenAI
-            if ai_response is None:
-                logger.warning(f"OpenAI API returned None for {url}, using default analysis")
-                ai_response = {"dimensions": {}, "overall_insights": "Content could not be analyzed"}
-            
-            # 6. Parse and enrich response
-            result = self._parse_optimized_response(ai_response, dimensions)
-            
-            # 7. Select primary dimensions per group
-            result = await self._select_primary_dimensions(result, project_id)
-            
-            # 8. Store optimized analysis
-            await self._store_optimized_analysis(url, result, project_id)
-            
-            return result
+            return await self.finalize_analysis(prepared, ai_response)
             
         except Exception as e:
             logger.error(f"Optimized analysis failed for {url}: {str(e)}", exc_info=True)
@@ -102,6 +94,225 @@ class OptimizedUnifiedAnalyzer:
             logger.error(f"Traceback: {traceback.format_exc()}")
             return {"error": str(e)}
     
+    async def prepare_analysis(
+        self,
+        url: str,
+        content: str,
+        title: str = "",
+        project_id: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        context: Optional[AnalysisContext] = None,
+        pipeline_id: Optional[str] = None,
+    ) -> Union["PreparedAnalysis", Dict[str, Any]]:
+        """Everything before the model call: validation, dedup, windowing and the prompt
+        
+        Returns a PreparedAnalysis, or a result dict when no model call is needed
+        (validation error or a reused duplicate analysis).
+        """
+        # Validate inputs
+        if not isinstance(content, str):
+            logger.error(f"Content must be a string, got {type(content)} for {url}")
+            return {"error": f"Invalid content type: {type(content)}"}
+        
+        if not content or not content.strip():
+            logger.warning(f"Empty content for {url}")
+            return {"error": "Empty content"}
+        
+        # 1. Dimensions, validation and company info come from the per-project context cache
+        if context is None:
+            context = await self.get_analysis_context(project_id)
+        dimensions = context.dimensions
+        if not dimensions:
+            logger.warning("No dimensions configured for analysis")
+            return {"error": "No analysis dimensions configured"}
+        
+        # Validate dimensions are properly configured
+        validation_result = context.validation
+        if not validation_result['valid']:
+            logger.warning(f"Dimension validation failed: {validation_result['message']}")
+            return {"error": validation_result['message']}
+        
+        # 1b. Reuse an existing analysis of the same or nearly the same content
+        fingerprint = None
+        if self.deduplicator.enabled:
+            fingerprint = await asyncio.to_thread(fingerprint_content, content)
+            reused = await self._reuse_existing_analysis(url, project_id, pipeline_id, fingerprint, context)
+            if reused:
+                return reused
+        
+        # 2. Extract company and competitor names for mention analysis
+        company_info = context.company_info
+        
+        # 3. Fit content into the token budget (boilerplate stripped, best passages per dimension)
+        window = await asyncio.to_thread(self.content_windower.window, content, context.dimension_queries)
+        if window.truncated:
+            logger.debug(
+                f"Content window for {url}: {window.tokens_sent}/{window.tokens_original} tokens, "
+                f"{window.passages_sent}/{window.passages_total} passages"
+            )
+        
+        #    Build optimized prompt with mention analysis
+        #    Include optional metadata if provided (light touch to avoid failures)
+        prompt = self._build_optimized_prompt(
+            content, title, dimensions, company_info,
+            dimension_instructions=context.dimension_instructions,
+            company_context=context.company_context,
+            content_preview=window.text
+        )
+        if metadata:
+            try:
+                prompt = f"{prompt}\n\nAdditional context (metadata): {json.dumps(metadata)[:1500]}"
+            except Exception:
+                # Best-effort enrichment; never fail prompt composition on metadata issues
+                pass
+        
+        return PreparedAnalysis(
+            url=url,
+            project_id=project_id,
+            prompt=prompt,
+            context=context,
+            window=window,
+            fingerprint=fingerprint
+        )
+    
+    async def finalize_analysis(
+        self,
+        prepared: "PreparedAnalysis",
+        ai_response: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Everything after the model call: parse, select primary dimensions and store"""
+        url = prepared.url
+        project_id = prepared.project_id
+        context = prepared.context
+        fingerprint = prepared.fingerprint
+        
+        # 5. Handle None response from OpenAI
+        if ai_response is None:
+            logger.warning(f"OpenAI API returned None for {url}, using default analysis")
+            ai_response = {"dimensions": {}, "overall_insights": "Content could not be analyzed"}
+            # Never offer the placeholder analysis for reuse
+            fingerprint = None
+        
+        # 6. Parse and enrich response
+        result = self._parse_optimized_response(ai_response, context.dimensions)
+        result['content_window'] = prepared.window.stats()
+        
+        # 7. Select primary dimensions per group
+        result = await self._select_primary_dimensions(
+            result, project_id, dimension_groups=context.dimension_groups
+        )
+        
+        # 8. Store optimized analysis
+        await self._store_optimized_analysis(
+            url, result, project_id,
+            group_uuids=context.group_uuids,
+            fingerprint=fingerprint,
+            dimension_set_version=context.dimension_set_version
+        )
+        
+        return result
+    
+    async def _reuse_existing_analysis(
+        self,
+        url: str,
+        project_id: Optional[str],
+        pipeline_id: Optional[str],
+        fingerprint: ContentFingerprint,
+        context: AnalysisContext
+    ) -> Optional[Dict[str, Any]]:
+        """Clone a stored analysis with a matching fingerprint instead of calling OpenAI"""
+        if not self.deduplicator.eligible(fingerprint):
+            self.deduplicator.record_outcome(pipeline_id, 'skipped')
+            return None
+        
+        try:
+            match = await self.deduplicator.find_reusable(
+                fingerprint, context.dimension_set_version, url, project_id
+            )
+            if match:
+                cloned = await self.deduplicator.clone_analysis(match['url'], url, project_id, fingerprint)
+                if cloned:
+                    self.deduplicator.record_outcome(pipeline_id, match['match'])
+                    logger.info(
+                        f"♻️ Reused {match['match']} duplicate analysis for {url} "
+                        f"from {match['url']} (distance {match['distance']})"
+                    )
+                    return cloned
+        except Exception as e:
+            logger.warning(f"Content dedup lookup failed for {url}, analyzing normally: {e}")
+        
+        self.deduplicator.record_outcome(pipeline_id, 'miss')
+        return None
+    
+    async def get_analysis_context(self, project_id: Optional[str] = None) -> AnalysisContext:
+        """Return the cached analysis context for a project (loaded once per generation)"""
+        return await analysis_context_cache.get(project_id, self._load_analysis_context)
+    
+    async def _load_analysis_context(self, project_id: Optional[str], generation: int) -> AnalysisContext:
+        """Load dimensions, validation, company info and prebuilt prompt/schema parts for a project"""
+        dimensions = await self._load_all_dimensions_as_generic(project_id)
+        company_context = getattr(self, '_current_company_context', '')
+        if dimensions:
+            validation = await self._validate_dimensions(dimensions, project_id)
+        else:
+            validation = {"valid": False, "message": "No analysis dimensions configured"}
+        company_info = await self._get_company_and_competitors(project_id)
+        dimension_groups = await self._load_dimension_groups() if project_id else []
+        
+        return AnalysisContext(
+            project_id=project_id,
+            generation=generation,
+            dimension_set_version=dimension_set_version(dimensions),
+            dimensions=dimensions,
+            validation=validation,
+            company_context=company_context,
+            company_info=company_info,
+            dimension_instructions=self._build_dimension_instructions(dimensions),
+            response_schema=self._build_response_schema(dimensions, include_mentions=True),
+            dimension_groups=dimension_groups,
+            group_uuids={group['group_id']: group['id'] for group in dimension_groups},
+            dimension_queries={
+                dim.get('dimension_id', f'unknown_{i}'): dimension_terms(dim)
+                for i, dim in enumerate(dimensions)
+            }
+        )
+    
+    async def _load_dimension_groups(self) -> List[Dict[str, Any]]:
+        """Active dimension groups in display order, each with its members"""
+        async with self.db.acquire() as conn:
+            groups = await conn.fetch("""
+                SELECT DISTINCT 
+                    dg.id,
+                    dg.group_id,
+                    dg.name,
+                    dg.selection_strategy,
+                    dg.max_primary_dimensions,
+                    dg.display_order
+                FROM dimension_groups dg
+                WHERE dg.is_active = TRUE
+                ORDER BY dg.display_order
+            """)
+            if not groups:
+                return []
+            
+            members = await conn.fetch("""
+                SELECT dgm.group_id, dgm.dimension_id, dgm.priority
+                FROM dimension_group_members dgm
+                WHERE dgm.group_id = ANY($1)
+            """, [group['id'] for group in groups])
+        
+        members_by_group: Dict[Any, List[Dict[str, Any]]] = {}
+        for member in members:
+            members_by_group.setdefault(member['group_id'], []).append({
+                'dimension_id': member['dimension_id'],
+                'priority': member['priority']
+            })
+        
+        return [
+            {**dict(group), 'members': members_by_group.get(group['id'], [])}
+            for group in groups
+        ]
+    
     async def _validate_dimensions(self, dimensions: List[Dict[str, Any]], project_id: Optional[str] = None) -> Dict[str, Any]:
         """Validate dimensions configuration"""
         if not dimensions:
@@ -385,41 +596,30 @@ class OptimizedUnifiedAnalyzer:
                 "competitor_names": competitor_names
             }
     
-    def _build_optimized_prompt(self, content: str, title: str, dimensions: List[Dict[str, Any]], company_info: Dict[str, Any] = None) -> str:
-        """Build optimized prompt with reduced verbosity requirements"""
-        # With GPT-4.1's 1M token window, we can analyze much more content
-        # Approximately 4 chars = 1 token, so 200k chars ≈ 50k tokens (leaving room for prompt and response)
-        content_preview = content[:200000]  # Increased from 10000 to leverage GPT-4.1's capabilities
+    def _build_optimized_prompt(
+        self,
+        content: str,
+        title: str,
+        dimensions: List[Dict[str, Any]],
+        company_info: Dict[str, Any] = None,
+        dimension_instructions: Optional[str] = None,
+        company_context: Optional[str] = None,
+        content_preview: Optional[str] = None
+    ) -> str:
+        """Build optimized prompt with reduced verbosity requirements
         
-        dimension_instructions = []
-        for dim in dimensions:
-            # Parse JSON strings if needed
-            ai_context = dim.get('ai_context', {})
-            if isinstance(ai_context, str):
-                try:
-                    ai_context = json.loads(ai_context)
-                except (json.JSONDecodeError, TypeError):
-                    ai_context = {}
-            
-            criteria = dim.get('criteria', {})
-            if isinstance(criteria, str):
-                try:
-                    criteria = json.loads(criteria)
-                except (json.JSONDecodeError, TypeError):
-                    criteria = {}
-            
-            focus_areas = ai_context.get('key_focus_areas', []) if isinstance(ai_context, dict) else []
-            focus = focus_areas[0] if focus_areas else dim.get('description', 'General analysis')
-            positive_signals = criteria.get('positive_signals', [])[:3] if isinstance(criteria, dict) else []
-            
-            instruction = f"""
-**{dim.get('name', 'Unknown')}** ({dim.get('dimension_type', 'custom')}):
-Focus: {focus}
-Look for: {', '.join(positive_signals) if positive_signals else 'Relevant signals'}
-"""
-            dimension_instructions.append(instruction)
+        content_preview: token-budgeted content window; without it the raw
+        content is capped at 200k characters.
+        """
+        if content_preview is None:
+            # Approximately 4 chars = 1 token, so 200k chars ≈ 50k tokens (leaving room for prompt and response)
+            content_preview = content[:200000]
         
-        company_context = getattr(self, '_current_company_context', '')
+        if dimension_instructions is None:
+            dimension_instructions = self._build_dimension_instructions(dimensions)
+        
+        if company_context is None:
+            company_context = getattr(self, '_current_company_context', '')
         
         # Add mention analysis section if company info provided
         mention_section = ""
@@ -466,7 +666,7 @@ Title: {title}
 Text: {content_preview}
 {mention_section}
 EVALUATION DIMENSIONS:
-{chr(10).join(dimension_instructions)}
+{dimension_instructions}
 
 SCORING GUIDELINES:
 - 0-2: No relevance - content doesn't address this dimension at all
@@ -485,8 +685,40 @@ For each dimension, provide:
 Focus on SPECIFIC evidence from the content. Generic marketing language scores low. Detailed solutions, data, and outcomes score high.
 """
     
-    async def _call_openai_optimized(self, prompt: str, dimensions: List[Dict[str, Any]], include_mentions: bool = False) -> Dict[str, Any]:
-        """Call OpenAI with optimized schema"""
+    def _build_dimension_instructions(self, dimensions: List[Dict[str, Any]]) -> str:
+        """Render the per-dimension instruction block (identical for every page of a project)"""
+        dimension_instructions = []
+        for dim in dimensions:
+            # Parse JSON strings if needed
+            ai_context = dim.get('ai_context', {})
+            if isinstance(ai_context, str):
+                try:
+                    ai_context = json.loads(ai_context)
+                except (json.JSONDecodeError, TypeError):
+                    ai_context = {}
+            
+            criteria = dim.get('criteria', {})
+            if isinstance(criteria, str):
+                try:
+                    criteria = json.loads(criteria)
+                except (json.JSONDecodeError, TypeError):
+                    criteria = {}
+            
+            focus_areas = ai_context.get('key_focus_areas', []) if isinstance(ai_context, dict) else []
+            focus = focus_areas[0] if focus_areas else dim.get('description', 'General analysis')
+            positive_signals = criteria.get('positive_signals', [])[:3] if isinstance(criteria, dict) else []
+            
+            instruction = f"""
+**{dim.get('name', 'Unknown')}** ({dim.get('dimension_type', 'custom')}):
+Focus: {focus}
+Look for: {', '.join(positive_signals) if positive_signals else 'Relevant signals'}
+"""
+            dimension_instructions.append(instruction)
+        
+        return chr(10).join(dimension_instructions)
+    
+    def _build_response_schema(self, dimensions: List[Dict[str, Any]], include_mentions: bool = False) -> Dict[str, Any]:
+        """Build the simplified JSON response schema for a dimension set"""
         # Build simplified schema
         dimension_properties = {}
         for i, dim in enumerate(dimensions):
@@ -558,10 +790,21 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
                 "description": "5 main topics/themes the content covers"
             }
         
-        response_schema = {
+        return {
             "type": "object",
             "properties": schema_properties
         }
+    
+    async def _call_openai_optimized(
+        self,
+        prompt: str,
+        dimensions: List[Dict[str, Any]],
+        include_mentions: bool = False,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Call OpenAI with optimized schema"""
+        if response_schema is None:
+            response_schema = self._build_response_schema(dimensions, include_mentions)
         
         # Retry logic for API timeouts
         max_retries = 3
@@ -569,43 +812,11 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
         
         for attempt in range(max_retries):
             try:
-                async with httpx.AsyncClient() as client:
-                    headers = {
-                        "Authorization": f"Bearer {self.openai_api_key}",
-                        "Content-Type": "application/json"
-                    }
-                    
-                    # Add project ID header if available
-                    if self.openai_project_id:
-                        headers["OpenAI-Project"] = self.openai_project_id
-                    
+                async with http_clients.session('openai') as client:
                     response = await client.post(
-                        "https://api.openai.com/v1/chat/completions",
-                        headers=headers,
-                        json={
-                            "model": "gpt-4.1",  # Using GPT-4.1 with 1M token context window
-                            "messages": [
-                                {
-                                    "role": "system",
-                                    "content": "You are a concise B2B content analyst. Provide brief, actionable insights."
-                                },
-                                {
-                                    "role": "user",
-                                    "content": prompt
-                                }
-                            ],
-                            "tools": [{
-                                "type": "function",
-                                "function": {
-                                    "name": "analyze_content",
-                                    "description": "Analyze content for B2B insights",
-                                    "parameters": response_schema
-                                }
-                            }],
-                            "tool_choice": {"type": "function", "function": {"name": "analyze_content"}},
-                            "temperature": 0.3,
-                            "max_tokens": 2000  # Increased from 800 to allow for more comprehensive analysis
-                        },
+                        f"{self.openai_base_url}/chat/completions",
+                        headers=self.openai_headers(),
+                        json=self.build_chat_request(prompt, response_schema),
                         timeout=120.0  # Increased timeout for long content analysis
                     )
                     
@@ -636,6 +847,48 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
             logger.error(f"Raw response: {response.text[:500]}")
             raise
         
+        return self.extract_tool_arguments(result)
+    
+    def openai_headers(self, content_type: Optional[str] = "application/json") -> Dict[str, str]:
+        """Auth headers for the OpenAI API (chat completions, files and batches)"""
+        headers = {"Authorization": f"Bearer {self.openai_api_key}"}
+        if content_type:
+            headers["Content-Type"] = content_type
+        
+        # Add project ID header if available
+        if self.openai_project_id:
+            headers["OpenAI-Project"] = self.openai_project_id
+        return headers
+    
+    def build_chat_request(self, prompt: str, response_schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Chat completions request body (shared by direct calls and the batch API)"""
+        return {
+            "model": self.analysis_model,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": "You are a concise B2B content analyst. Provide brief, actionable insights."
+                },
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "tools": [{
+                "type": "function",
+                "function": {
+                    "name": "analyze_content",
+                    "description": "Analyze content for B2B insights",
+                    "parameters": response_schema
+                }
+            }],
+            "tool_choice": {"type": "function", "function": {"name": "analyze_content"}},
+            "temperature": 0.3,
+            "max_tokens": 2000  # Increased from 800 to allow for more comprehensive analysis
+        }
+    
+    def extract_tool_arguments(self, result: Any) -> Dict[str, Any]:
+        """Pull the analyze_content tool-call arguments out of a chat completion"""
         # Log the response structure for debugging
         logger.debug(f"OpenAI response structure: {list(result.keys()) if isinstance(result, dict) else type(result)}")
         
@@ -712,97 +965,91 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
         
         return result
     
-    async def _select_primary_dimensions(self, result: Dict[str, Any], project_id: Optional[str]) -> Dict[str, Any]:
-        """Select primary dimensions for each group"""
+    async def _select_primary_dimensions(
+        self,
+        result: Dict[str, Any],
+        project_id: Optional[str],
+        dimension_groups: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """Select primary dimensions for each group
+        
+        dimension_groups: preloaded groups with members (from the analysis context);
+        loaded from the database when not supplied.
+        """
         if not project_id or 'dimensions' not in result:
             return result
+        
+        groups = dimension_groups
+        if groups is None:
+            groups = await self._load_dimension_groups()
+        
+        if not groups:
+            # No groups defined, return as-is
+            return result
+        
+        primary_dimensions = {}
+        
+        for group in groups:
+            # Get scored dimensions for this group
+            scored_dims = []
+            for dim_member in group.get('members', []):
+                dim_id = dim_member['dimension_id']
+                if dim_id in result['dimensions']:
+                    dim_data = result['dimensions'][dim_id]
+                    scored_dims.append({
+                        'dimension_id': dim_id,
+                        'score': dim_data.get('score', 0),
+                        'confidence': dim_data.get('confidence', 0),
+                        'evidence_count': len(dim_data.get('primary_signals', [])),
+                        'priority': dim_member['priority']
+                    })
             
-        async with self.db.acquire() as conn:
-            # Get all active dimension groups
-            groups = await conn.fetch("""
-                SELECT DISTINCT 
-                    dg.id,
-                    dg.group_id,
-                    dg.name,
-                    dg.selection_strategy,
-                    dg.max_primary_dimensions
-                FROM dimension_groups dg
-                WHERE dg.is_active = TRUE
-                ORDER BY dg.display_order
-            """)
+            if not scored_dims:
+                continue
             
-            if not groups:
-                # No groups defined, return as-is
-                return result
+            # Select primary dimension(s) based on strategy
+            strategy = group['selection_strategy']
+            max_primary = group['max_primary_dimensions'] or 1
             
-            primary_dimensions = {}
+            if strategy == 'highest_score':
+                scored_dims.sort(key=lambda x: x['score'], reverse=True)
+            elif strategy == 'highest_confidence':
+                scored_dims.sort(key=lambda x: x['confidence'], reverse=True)
+            elif strategy == 'most_evidence':
+                scored_dims.sort(key=lambda x: x['evidence_count'], reverse=True)
+            elif strategy == 'manual':
+                scored_dims.sort(key=lambda x: x['priority'])
+            else:  # Default to highest score
+                scored_dims.sort(key=lambda x: x['score'], reverse=True)
             
-            for group in groups:
-                # Get dimensions in this group that were analyzed
-                group_dimension_scores = await conn.fetch("""
-                    SELECT 
-                        dgm.dimension_id,
-                        dgm.priority
-                    FROM dimension_group_members dgm
-                    WHERE dgm.group_id = $1
-                    AND dgm.dimension_id = ANY($2)
-                """, group['id'], list(result['dimensions'].keys()))
-                
-                if not group_dimension_scores:
-                    continue
-                
-                # Get scored dimensions for this group
-                scored_dims = []
-                for dim_member in group_dimension_scores:
-                    dim_id = dim_member['dimension_id']
-                    if dim_id in result['dimensions']:
-                        dim_data = result['dimensions'][dim_id]
-                        scored_dims.append({
-                            'dimension_id': dim_id,
-                            'score': dim_data.get('score', 0),
-                            'confidence': dim_data.get('confidence', 0),
-                            'evidence_count': len(dim_data.get('primary_signals', [])),
-                            'priority': dim_member['priority']
-                        })
-                
-                if not scored_dims:
-                    continue
-                
-                # Select primary dimension(s) based on strategy
-                strategy = group['selection_strategy']
-                max_primary = group['max_primary_dimensions'] or 1
-                
-                if strategy == 'highest_score':
-                    scored_dims.sort(key=lambda x: x['score'], reverse=True)
-                elif strategy == 'highest_confidence':
-                    scored_dims.sort(key=lambda x: x['confidence'], reverse=True)
-                elif strategy == 'most_evidence':
-                    scored_dims.sort(key=lambda x: x['evidence_count'], reverse=True)
-                elif strategy == 'manual':
-                    scored_dims.sort(key=lambda x: x['priority'])
-                else:  # Default to highest score
-                    scored_dims.sort(key=lambda x: x['score'], reverse=True)
-                
-                # Select top dimension(s) based on max_primary_dimensions
-                selected = scored_dims[:max_primary]
-                
-                # Store primary dimension(s) for this group
-                if len(selected) == 1:
-                    primary_dimensions[group['group_id']] = selected[0]['dimension_id']
-                else:
-                    primary_dimensions[group['group_id']] = [dim['dimension_id'] for dim in selected]
-                
-                # Mark dimensions as primary in the result
-                for dim in selected:
-                    if dim['dimension_id'] in result['dimensions']:
-                        result['dimensions'][dim['dimension_id']]['is_primary'] = True
-                        result['dimensions'][dim['dimension_id']]['group_id'] = group['group_id']
+            # Select top dimension(s) based on max_primary_dimensions
+            selected = scored_dims[:max_primary]
             
-            result['primary_dimensions'] = primary_dimensions
+            # Store primary dimension(s) for this group
+            if len(selected) == 1:
+                primary_dimensions[group['group_id']] = selected[0]['dimension_id']
+            else:
+                primary_dimensions[group['group_id']] = [dim['dimension_id'] for dim in selected]
+            
+            # Mark dimensions as primary in the result
+            for dim in selected:
+                if dim['dimension_id'] in result['dimensions']:
+                    result['dimensions'][dim['dimension_id']]['is_primary'] = True
+                    result['dimensions'][dim['dimension_id']]['group_id'] = group['group_id']
+        
+        result['primary_dimensions'] = primary_dimensions
             
         return result
     
-    async def _store_optimized_analysis(self, url: str, result: Dict[str, Any], project_id: Optional[str]) -> None:
+    async def _store_optimized_analysis(
+        self,
+        url: str,
+        result: Dict[str, Any],
+        project_id: Optional[str],
+        group_uuids: Optional[Dict[str, Any]] = None,
+        fingerprint: Optional[ContentFingerprint] = None,
+        dimension_set_version: Optional[str] = None
+    ) -> None:
         """Store optimized analysis results"""
         async with self.db.acquire() as conn:
             async with conn.transaction():
@@ -881,9 +1128,12 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
                 if 'primary_dimensions' in result:
                     for group_id, primary_dim_ids in result['primary_dimensions'].items():
                         # Get the actual group UUID from group_id
-                        group_uuid = await conn.fetchval("""
-                            SELECT id FROM dimension_groups WHERE group_id = $1
-                        """, group_id)
+                        if group_uuids is not None and group_id in group_uuids:
+                            group_uuid = group_uuids[group_id]
+                        else:
+                            group_uuid = await conn.fetchval("""
+                                SELECT id FROM dimension_groups WHERE group_id = $1
+                            """, group_id)
                         
                         if group_uuid:
                             # Handle both single dimension and list of dimensions
@@ -916,6 +1166,9 @@ Focus on SPECIFIC evidence from the content. Generic marketing language scores l
                                 """, analysis_id, group_uuid, primary_dim_ids, 
                                     f"Selected by {group_id} group strategy",
                                     dim_data.get('score', 0), project_id)
+                
+                # Fingerprint makes this analysis reusable for duplicate content
+                await self.deduplicator.record_fingerprint(conn, analysis_id, fingerprint, dimension_set_version)
     
     def _persona_to_generic(self, persona: Dict[str, Any]) -> Dict[str, Any]:
         """Convert persona to generic dimension format"""
@@ -7,6 +7,7 @@ import json
 
 from app.core.database import db_pool
 from app.models.config import ClientConfig, AnalysisConfig
+from app.services.analysis.analysis_context_cache import analysis_context_cache
 
 
 class ConfigService:
@@ -93,6 +94,9 @@ class ConfigService:
             if 'competitors' in result_dict and isinstance(result_dict['competitors'], str):
                 result_dict['competitors'] = json.loads(result_dict['competitors'])
             
+            # Company/competitor names feed the analysis prompt
+            analysis_context_cache.invalidate(reason="client config updated")
+            
             return ClientConfig(**result_dict)
     
     async def get_analysis_config(self) -> AnalysisConfig:
@@ -157,6 +161,8 @@ class ConfigService:
             values.append(existing)
             result = await conn.fetchrow(query, *values)
             
+            analysis_context_cache.invalidate(reason="analysis config updated")
+            
             return AnalysisConfig(**dict(result))
     
     async def get_api_keys_status(self) -> Dict[str, bool]:
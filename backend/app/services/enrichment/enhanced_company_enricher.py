@@ -19,6 +19,7 @@ from uuid import uuid4
 
 from app.core.config import Settings
 from app.core.database import DatabasePool
+from app.core.http_clients import http_clients
 from app.models.company import (
     CompanyProfile, CompanySearchResult, CompanyEnrichmentResult,
     BatchEnrichmentResult
@@ -416,7 +417,7 @@ Focus on brand alignment, not corporate ownership."""
             }
         }
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with http_clients.session('cognism') as client:
             try:
                 await self.rate_limiter.acquire()
                 self.logger.api_call(
@@ -842,17 +843,16 @@ Return only the classification without any reasoning or explanation."""
 
             # Use OpenAI for intelligent classification
             if self.settings.OPENAI_API_KEY:
-                import httpx
-                
                 headers = {
                     'Authorization': f'Bearer {self.settings.OPENAI_API_KEY}',
                     'Content-Type': 'application/json'
                 }
                 
-                async with httpx.AsyncClient(timeout=15.0) as client:
+                async with http_clients.session('openai') as client:
                     response = await client.post(
                         "https://api.openai.com/v1/chat/completions",
                         headers=headers,
+                        timeout=15.0,
                         json={
                             "model": "gpt-4o-mini",
                             "messages": [
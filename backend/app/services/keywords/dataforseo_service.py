@@ -8,9 +8,9 @@ import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from loguru import logger
-import httpx
 from app.core.config import get_settings
 from app.core.database import db_pool
+from app.core.http_clients import http_clients
 import redis.asyncio as redis
 
 
@@ -55,7 +55,7 @@ class DataForSEOService:
     async def initialize(self):
         """Initialize HTTP client and Redis connection"""
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            self.client = http_clients.get('dataforseo')
             
         if not self.redis_client:
             try:
@@ -321,8 +321,8 @@ class DataForSEOService:
     
     async def close(self):
         """Close connections"""
-        if self.client:
-            await self.client.aclose()
+        # The HTTP client is shared via the registry; only drop our reference
+        self.client = None
             
         if self.redis_client:
             await self.redis_client.close()
@@ -0,0 +1,322 @@
+"""
+Landscape Batch Calculator
+Computes page, keyword and company DSI for every active digital landscape in
+one pass: the landscape -> keyword membership is loaded once, the SERP frame
+is scanned once and exploded per membership, and all landscape_dsi_metrics
+rows are written with a single COPY + merge.
+"""
+import hashlib
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.database import db_pool
+from app.services.landscape.production_landscape_calculator import ProductionLandscapeCalculator
+from app.services.metrics import dsi_engine
+from app.services.metrics.dsi_snapshot_writer import DSISnapshotWriter
+
+logger = logging.getLogger(__name__)
+
+
+LOOKBACK_DAYS = 30
+COMPANY_MAX_POSITION = 20  # Company DSI only counts the top 20
+PAGE_SERP_TYPES = ('organic', 'news')
+
+
+def page_entity_id(url: str) -> str:
+    """Stable UUID for a page (md5 of the URL)"""
+    return str(uuid.UUID(hashlib.md5(url.encode()).hexdigest()))
+
+
+def _market_position(rank: int, thresholds: Tuple[int, int, int]) -> str:
+    leader, challenger, competitor = thresholds
+    if rank <= leader:
+        return 'leader'
+    if rank <= challenger:
+        return 'challenger'
+    if rank <= competitor:
+        return 'competitor'
+    return 'niche'
+
+
+class LandscapeBatchCalculator:
+    """Page, keyword and company DSI for all landscapes from one SERP scan"""
+
+    def __init__(self, db=None):
+        self.db = db or db_pool
+        self.company_calculator = ProductionLandscapeCalculator(self.db)
+        self.snapshot_writer = DSISnapshotWriter(self.db)
+
+    async def calculate_all(self, landscapes: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Calculate and store landscape DSI for every active landscape (or the given ones)"""
+        start_time = time.time()
+        calculation_date = datetime.now().date()
+        period_start = calculation_date - timedelta(days=LOOKBACK_DAYS)
+
+        await self.company_calculator.incremental_dsi.refresh_domain_scores()
+
+        async with self.db.acquire() as conn:
+            landscapes = landscapes if landscapes is not None else await self._load_landscapes(conn)
+            memberships = await self._load_memberships(conn, [str(l['id']) for l in landscapes])
+            if memberships.empty:
+                logger.warning("No landscape keywords assigned; nothing to calculate")
+                return self._summary(landscapes, {}, 0, start_time)
+
+            keyword_ids = memberships['keyword_id'].unique().tolist()
+            keywords = await self._load_keywords(conn, keyword_ids)
+            frame = await dsi_engine.load_serp_frame(
+                conn, since=period_start, until=calculation_date, keyword_ids=keyword_ids, with_titles=True
+            )
+            dsi_engine.log_frame('landscapes', frame)
+            analysis = await dsi_engine.load_url_analysis(conn, frame['url'].unique())
+
+            company_frame = frame[
+                (frame['serp_type'] == 'organic')
+                & (frame['position'] <= COMPANY_MAX_POSITION)
+            ].copy()
+            company_frame, persona = await self.company_calculator.attach_companies(conn, company_frame)
+
+        market_keywords = memberships.groupby('landscape_id')['keyword_id'].nunique()
+        pages = self._page_metrics(frame, memberships, analysis)
+        keyword_metrics = self._keyword_metrics(frame, memberships, keywords, analysis)
+        companies = self.company_calculator.company_metric_frame(
+            dsi_engine.explode_scopes(company_frame, memberships),
+            persona, market_keywords, scope=['landscape_id']
+        )
+
+        # Records in LANDSCAPE_METRIC_COLUMNS order, merged with one COPY
+        records = (
+            self._page_records(pages, calculation_date)
+            + self._keyword_records(keyword_metrics, calculation_date)
+            + self._company_records(companies, calculation_date)
+        )
+        written = await self.snapshot_writer.write_landscape_metrics(records)
+
+        per_landscape = self._per_landscape(pages, keyword_metrics, companies, market_keywords)
+        return self._summary(landscapes, per_landscape, written, start_time)
+
+    def _page_metrics(self, frame: pd.DataFrame, memberships: pd.DataFrame, analysis: pd.DataFrame) -> pd.DataFrame:
+        """Page DSI = traffic share × persona relevance, per landscape"""
+        pages = dsi_engine.explode_scopes(frame[frame['serp_type'].isin(PAGE_SERP_TYPES)], memberships)
+        metrics = dsi_engine.entity_metrics(
+            pages, 'url', scope=['landscape_id'],
+            extra_aggs=dict(title=('title', 'max'), page_domain=('domain', 'max'))
+        )
+        return dsi_engine.score(
+            metrics, 'page', analysis['persona_score'], 'url', scope=['landscape_id'], decimals=6
+        )
+
+    def _keyword_metrics(
+        self,
+        frame: pd.DataFrame,
+        memberships: pd.DataFrame,
+        keywords: pd.DataFrame,
+        analysis: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Keyword DSI = SERP presence × traffic capture × persona relevance.
+
+        SERP performance does not depend on the landscape, so it is computed once
+        per keyword and only ranked per landscape.
+        """
+        rows = frame[['keyword_id', 'url', 'estimated_traffic']].copy()
+        rows['persona'] = rows['url'].map(analysis['persona_score'])
+        rows['strategic'] = rows['url'].map(analysis['strategic_imperative_score'])
+        rows['analyzed_url'] = rows['url'].where(rows['url'].isin(analysis.index))
+        serp = rows.groupby('keyword_id', sort=False).agg(
+            total_serp_results=('url', 'nunique'),
+            estimated_traffic=('estimated_traffic', 'sum'),
+            analyzed_pages=('analyzed_url', 'nunique'),
+            avg_persona_score=('persona', 'mean'),
+            avg_strategic_score=('strategic', 'mean'),
+        ).reset_index()
+
+        metrics = memberships.merge(keywords, on='keyword_id', how='inner').merge(serp, on='keyword_id', how='left')
+        metrics[['total_serp_results', 'estimated_traffic', 'analyzed_pages']] = (
+            metrics[['total_serp_results', 'estimated_traffic', 'analyzed_pages']].fillna(0)
+        )
+        metrics['avg_persona_score'] = (
+            metrics['avg_persona_score'].fillna(metrics['keyword_persona_score']).fillna(dsi_engine.DEFAULT_RELEVANCE)
+        )
+        metrics['avg_strategic_score'] = metrics['avg_strategic_score'].fillna(dsi_engine.DEFAULT_RELEVANCE)
+
+        volume = metrics['avg_monthly_searches'].to_numpy(dtype=np.float64, na_value=np.nan)
+        serp_results = metrics['total_serp_results'].to_numpy(dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            raw = (
+                (serp_results / 100.0)
+                * (metrics['estimated_traffic'].to_numpy(dtype=np.float64) / volume)
+                * (metrics['avg_persona_score'].to_numpy(dtype=np.float64) / 10.0)
+            )
+        valid = (serp_results > 0) & (np.nan_to_num(volume) > 0)
+        metrics['dsi_score'] = np.round(np.where(valid, raw, 0.0), 6)
+
+        metrics = metrics.sort_values(
+            ['landscape_id', 'dsi_score', 'avg_monthly_searches'],
+            ascending=[True, False, False], na_position='last', kind='mergesort'
+        ).reset_index(drop=True)
+        grouped = metrics.groupby('landscape_id', sort=False)
+        metrics['rank'] = grouped.cumcount() + 1
+        metrics['total_entities'] = grouped['keyword_id'].transform('size')
+        return metrics
+
+    def _page_records(self, pages: pd.DataFrame, calculation_date) -> List[tuple]:
+        records = []
+        for row in dsi_engine.to_records(pages):
+            records.append((
+                row['landscape_id'], calculation_date, 'page', page_entity_id(row['url']),
+                (row['title'] or '')[:255], row['page_domain'] or '', row['url'],
+                int(row['keyword_count']), 1,
+                float(row['keyword_coverage_pct']) / 100.0,
+                int(row['total_traffic'] or 0),
+                float(row['traffic_share_pct']) / 100.0,
+                float(row['relevance']) / 10.0,
+                0.5,
+                float(row['dsi_score']),
+                int(row['rank']), int(row['total_entities']),
+                _market_position(row['rank'], (10, 50, 200))
+            ))
+        return records
+
+    def _keyword_records(self, metrics: pd.DataFrame, calculation_date) -> List[tuple]:
+        records = []
+        for row in dsi_engine.to_records(metrics):
+            volume = row['avg_monthly_searches']
+            records.append((
+                row['landscape_id'], calculation_date, 'keyword', row['keyword_id'],
+                row['keyword'], '', None,
+                1, int(row['analyzed_pages']),
+                float(row['total_serp_results']) / 100.0,
+                int(row['estimated_traffic'] or 0),
+                float(row['estimated_traffic']) / max(1, volume) if volume else 0.0,
+                float(row['avg_persona_score']) / 10.0,
+                float(row['avg_strategic_score']) / 10.0,
+                float(row['dsi_score'] or 0.0),
+                int(row['rank']), int(row['total_entities']),
+                _market_position(row['rank'], (5, 20, 50))
+            ))
+        return records
+
+    def _company_records(self, companies: pd.DataFrame, calculation_date) -> List[tuple]:
+        records = []
+        for row in dsi_engine.to_records(companies):
+            company = self.company_calculator.company_metric(row)
+            records.append((
+                row['landscape_id'], calculation_date, 'company', str(company.company_id),
+                company.company_name, company.domain, None,
+                company.total_keywords, company.total_pages,
+                company.keyword_coverage, int(company.total_traffic),
+                company.traffic_share, company.avg_relevance, company.avg_funnel_value,
+                company.dsi_score, company.rank_in_market, company.total_companies_in_market,
+                company.market_position
+            ))
+        return records
+
+    def _per_landscape(
+        self,
+        pages: pd.DataFrame,
+        keyword_metrics: pd.DataFrame,
+        companies: pd.DataFrame,
+        market_keywords: pd.Series
+    ) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+
+        def counts(frame: pd.DataFrame, top_column: str) -> Dict[str, Tuple[int, float]]:
+            if frame.empty:
+                return {}
+            # Frames are sorted by rank within each landscape, so the first row is the top entity
+            grouped = frame.groupby('landscape_id', sort=False)
+            return {
+                str(k): (int(n), float(top))
+                for k, n, top in zip(grouped.size().index, grouped.size().values, grouped[top_column].first().values)
+            }
+
+        page_counts = counts(pages, 'dsi_score')
+        keyword_counts = counts(keyword_metrics, 'dsi_score')
+        company_counts = counts(companies, 'dsi_score')
+        for landscape_id, keyword_total in market_keywords.items():
+            key = str(landscape_id)
+            results[key] = {
+                'pages': page_counts.get(key, (0, 0.0))[0],
+                'top_page_dsi': page_counts.get(key, (0, 0.0))[1],
+                'keywords': int(keyword_total),
+                'keywords_calculated': keyword_counts.get(key, (0, 0.0))[0],
+                'top_keyword_dsi': keyword_counts.get(key, (0, 0.0))[1],
+                'companies': company_counts.get(key, (0, 0.0))[0],
+                'top_company_dsi': company_counts.get(key, (0, 0.0))[1],
+            }
+        return results
+
+    def _summary(
+        self,
+        landscapes: List[Dict[str, Any]],
+        per_landscape: Dict[str, Dict[str, Any]],
+        rows_written: int,
+        start_time: float
+    ) -> Dict[str, Any]:
+        duration = time.time() - start_time
+        landscape_results = {
+            landscape['name']: {'landscape_id': landscape['id'], **per_landscape.get(str(landscape['id']), {})}
+            for landscape in landscapes
+        }
+        # A landscape only counts as calculated if it produced metrics and they reached the table
+        errors = [
+            f"No DSI calculated for landscape '{landscape['name']}'"
+            for landscape in landscapes if str(landscape['id']) not in per_landscape
+        ]
+        if per_landscape and not rows_written:
+            errors.append("Landscape DSI computed but no metric rows were written")
+        calculated = len(per_landscape) if rows_written else 0
+        logger.info(
+            f"Landscape batch DSI: {calculated}/{len(landscapes)} landscapes, "
+            f"{rows_written} metric rows in {duration:.2f}s"
+        )
+        return {
+            'success': calculated > 0,
+            'total_landscapes': len(landscapes),
+            'landscapes_calculated': calculated,
+            'total_pages_calculated': sum(r.get('pages', 0) for r in per_landscape.values()),
+            'total_keywords_calculated': sum(r.get('keywords_calculated', 0) for r in per_landscape.values()),
+            'total_companies_calculated': sum(r.get('companies', 0) for r in per_landscape.values()),
+            'rows_written': rows_written,
+            'landscape_results': landscape_results,
+            'errors': errors,
+            'success_rate': calculated / len(landscapes) if landscapes else 0,
+            'calculation_duration_seconds': duration,
+        }
+
+    async def _load_landscapes(self, conn) -> List[Dict[str, Any]]:
+        rows = await conn.fetch("""
+            SELECT id, name FROM digital_landscapes
+            WHERE is_active = true
+            ORDER BY name
+        """)
+        return [dict(row) for row in rows]
+
+    async def _load_memberships(self, conn, landscape_ids: List[str]) -> pd.DataFrame:
+        """landscape -> keyword membership as a two-column index (one row per pair)"""
+        rows = await conn.fetch("""
+            SELECT DISTINCT landscape_id::text, keyword_id::text
+            FROM landscape_keywords
+            WHERE landscape_id = ANY($1::uuid[])
+        """, landscape_ids)
+        return pd.DataFrame.from_records([tuple(row) for row in rows], columns=['landscape_id', 'keyword_id'])
+
+    async def _load_keywords(self, conn, keyword_ids: List[str]) -> pd.DataFrame:
+        rows = await conn.fetch("""
+            SELECT id::text, keyword, avg_monthly_searches, persona_score
+            FROM keywords
+            WHERE id = ANY($1::uuid[])
+        """, keyword_ids)
+        frame = pd.DataFrame.from_records(
+            [tuple(row) for row in rows],
+            columns=['keyword_id', 'keyword', 'avg_monthly_searches', 'keyword_persona_score']
+        )
+        frame['avg_monthly_searches'] = pd.to_numeric(frame['avg_monthly_searches'], errors='coerce')
+        frame['keyword_persona_score'] = pd.to_numeric(frame['keyword_persona_score'], errors='coerce')
+        return frame
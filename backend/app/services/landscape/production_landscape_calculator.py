@@ -9,6 +9,9 @@ from typing import Dict, List, Optional, Any
 from uuid import UUID
 
 from app.core.database import db_pool
+from app.services.metrics import dsi_engine
+from app.services.metrics.dsi_snapshot_writer import DSISnapshotWriter
+from app.services.metrics.incremental_dsi import IncrementalDSIEngine
 from app.models.dsi import DSICalculationRequest, DSIType, CompanyDSIMetrics, PageDSIMetrics
 from app.models.landscape import (
     LandscapeCalculationResult, LandscapeDSIMetrics, 
@@ -23,6 +26,8 @@ class ProductionLandscapeCalculator:
     
     def __init__(self, db=None):
         self.db = db or db_pool
+        self.incremental_dsi = IncrementalDSIEngine(self.db)
+        self.snapshot_writer = DSISnapshotWriter(self.db)
     
     async def calculate_and_store_landscape_dsi(self, landscape_id: str, client_id: str) -> LandscapeCalculationResult:
         """Calculate DSI for landscape with proper keyword filtering"""
@@ -94,154 +99,96 @@ class ProductionLandscapeCalculator:
         calculation_date = datetime.now().date()
         period_start = calculation_date - timedelta(days=30)
         
-        # CORRECTED: Get SERP results with proper traffic calculation and domain mapping
+        # Persona relevance comes from the maintained domain_dimension_scores rollup
+        await self.incremental_dsi.refresh_domain_scores()
+        
         async with self.db.acquire() as conn:
-            company_query = """
-                WITH landscape_serp AS (
-                    SELECT 
-                        s.domain,
-                        s.keyword_id,
-                        s.url,
-                        s.position,
-                        k.keyword,
-                        k.avg_monthly_searches,
-                        -- REALISTIC TRAFFIC ESTIMATION: Search Volume × Industry-Standard CTR
-                        COALESCE(k.avg_monthly_searches, 1000) * CASE 
-                            WHEN s.position = 1 THEN 0.2823  -- 28.23%
-                            WHEN s.position = 2 THEN 0.1572  -- 15.72%
-                            WHEN s.position = 3 THEN 0.1073  -- 10.73%
-                            WHEN s.position = 4 THEN 0.0775  -- 7.75%
-                            WHEN s.position = 5 THEN 0.0588  -- 5.88%
-                            WHEN s.position = 6 THEN 0.0459  -- 4.59%
-                            WHEN s.position = 7 THEN 0.0369  -- 3.69%
-                            WHEN s.position = 8 THEN 0.0302  -- 3.02%
-                            WHEN s.position = 9 THEN 0.0252  -- 2.52%
-                            WHEN s.position = 10 THEN 0.0214 -- 2.14%
-                            WHEN s.position <= 20 THEN 0.0150 -- 1.5%
-                            ELSE 0.0050 -- 0.5%
-                        END as estimated_traffic
-                    FROM serp_results s
-                    JOIN keywords k ON s.keyword_id = k.id
-                    WHERE s.keyword_id = ANY($1::uuid[])
-                        AND s.search_date >= $2
-                        AND s.search_date <= $3
-                        AND s.serp_type = $4
-                        AND s.position <= 20  -- Top 20 only
-                ),
-                company_aggregates AS (
-                    SELECT 
-                        -- ROBUST: Use domain_company_mapping for consistent company identification
-                        dcm.company_id,
-                        dcm.display_name as company_name,
-                        dcm.enrichment_source,
-                        dcm.confidence_score,
-                        MIN(ls.domain) as primary_domain,
-                        COUNT(DISTINCT ls.domain) as domain_count,
-                        COUNT(DISTINCT ls.keyword_id) as total_keywords,
-                        COUNT(DISTINCT ls.url) as total_pages,
-                        SUM(ls.estimated_traffic) as total_traffic,
-                        AVG(ls.position) as avg_position,
-                        -- CORRECTED: Personal Relevance from actual persona scores
-                        COALESCE(
-                            (SELECT AVG(CAST(oda.score AS FLOAT))
-                             FROM optimized_content_analysis oca
-                             JOIN optimized_dimension_analysis oda ON oca.id = oda.analysis_id
-                             JOIN scraped_content sc ON oca.url = sc.url
-                             WHERE sc.domain = ANY(
-                                 SELECT original_domain FROM domain_company_mapping 
-                                 WHERE company_id = dcm.company_id
-                             )
-                             AND oda.dimension_type = 'persona'
-                            ), 5.0  -- Default persona score (1-10 scale)
-                        ) as personal_relevance,
-                        AVG(CASE 
-                            WHEN ca.overall_sentiment = 'positive' THEN 1.0
-                            WHEN ca.overall_sentiment = 'neutral' THEN 0.7
-                            WHEN ca.overall_sentiment = 'negative' THEN 0.3
-                            WHEN ca.id IS NOT NULL THEN 0.6
-                            ELSE 0.4
-                        END) as avg_funnel_value
-                    FROM landscape_serp ls
-                    -- ROBUST: Use domain_company_mapping for all domain variations
-                    INNER JOIN domain_company_mapping dcm ON ls.domain = dcm.original_domain
-                    LEFT JOIN optimized_content_analysis ca ON ls.url = ca.url
-                    GROUP BY 
-                        dcm.company_id,
-                        dcm.display_name,
-                        dcm.enrichment_source,
-                        dcm.confidence_score
-                ),
-                market_totals AS (
-                    SELECT 
-                        (SELECT COUNT(*) FROM landscape_keywords WHERE landscape_id = $5) as market_keywords,
-                        SUM(ca.total_traffic) as market_traffic,
-                        COUNT(DISTINCT ca.company_id) as total_companies
-                    FROM company_aggregates ca
-                )
-                SELECT 
-                    ca.*,
-                    -- USER'S DSI FORMULA COMPONENTS
-                    (ca.total_keywords::float / NULLIF(mt.market_keywords, 0)) * 100 as keyword_coverage_pct,
-                    (ca.total_traffic / NULLIF(mt.market_traffic, 0)) * 100 as traffic_share_pct,
-                    (ca.personal_relevance / 10.0) as personal_relevance_score,
-                    -- USER'S DSI FORMULA: Keyword Coverage × Share of Traffic × Personal Relevance
-                    (
-                        (ca.total_keywords::float / NULLIF(mt.market_keywords, 0)) * 100 *
-                        (ca.total_traffic / NULLIF(mt.market_traffic, 0)) * 100 *
-                        (ca.personal_relevance / 10.0)
-                    )::numeric(10,2) as dsi_score,
-                    mt.total_companies
-                FROM company_aggregates ca
-                CROSS JOIN market_totals mt
-                WHERE ca.total_keywords >= 3  -- Minimum keywords for inclusion
-                ORDER BY dsi_score DESC NULLS LAST
-            """
-            
-            results = await conn.fetch(
-                company_query, 
-                keyword_ids, 
-                period_start, 
-                calculation_date,
-                search_type,
-                landscape_id  # Add landscape_id as $5
+            # One narrow SERP frame (top 20 only); traffic, coverage and shares are computed in memory
+            frame = await dsi_engine.load_serp_frame(
+                conn,
+                since=period_start,
+                until=calculation_date,
+                serp_types=[search_type],
+                keyword_ids=keyword_ids,
+                max_position=20
             )
-            
-            company_metrics = []
-            for idx, row in enumerate(results):
-                # Use company_id from domain_company_mapping (always present)
-                company_id = row['company_id']
-                
-                # Don't skip companies with NULL DSI scores, assign them 0
-                dsi_score = float(row['dsi_score'] or 0)
-                if dsi_score >= 30:
-                    market_position = "leader"
-                elif dsi_score >= 15:
-                    market_position = "challenger"
-                elif dsi_score >= 5:
-                    market_position = "competitor"
-                else:
-                    market_position = "niche"
-                
-                company_metric = CompanyDSIMetrics(
-                    company_id=UUID(str(company_id)) if not isinstance(company_id, UUID) else company_id,
-                    domain=row['primary_domain'],
-                    company_name=row['company_name'],
-                    total_keywords=row['total_keywords'],
-                    total_pages=row['total_pages'],
-                    keyword_coverage=float(row['keyword_coverage_pct'] or 0),
-                    total_traffic=float(row['total_traffic'] or 0),
-                    traffic_share=float(row['traffic_share_pct'] or 0),
-                    avg_relevance=float(row['personal_relevance_score'] or 0),
-                    avg_funnel_value=float(row['avg_funnel_value'] or 0),
-                    dsi_score=dsi_score,
-                    market_position=market_position,
-                    rank_in_market=idx + 1,
-                    total_companies_in_market=row['total_companies'] or 0
-                )
-                
-                company_metrics.append(company_metric)
-            
-            return company_metrics
+            frame, persona = await self.attach_companies(conn, frame)
+        
+        return self._company_metrics_from_frame(frame, persona, market_keywords=len(keyword_ids))
+    
+    async def attach_companies(self, conn, frame):
+        """Map SERP rows to companies and add each row's funnel value; returns (frame, persona by company)"""
+        # ROBUST: Use domain_company_mapping for consistent company identification
+        mapping = await dsi_engine.load_company_mapping(conn, frame['domain'].unique())
+        frame = frame.merge(mapping, on='domain', how='inner')
+        frame = frame[frame['company_id'].notna()].copy()
+        analysis = await dsi_engine.load_url_analysis(conn, frame['url'].unique())
+        frame['funnel_value'] = dsi_engine.funnel_values(frame['url'].map(analysis['overall_sentiment']))
+        persona = await dsi_engine.load_company_persona(conn, frame['company_id'].unique())
+        return frame, persona
+    
+    def _company_metrics_from_frame(
+        self,
+        frame,
+        persona,
+        market_keywords: Any,
+        scope: Optional[List[str]] = None
+    ) -> List[CompanyDSIMetrics]:
+        """Keyword Coverage × Share of Traffic × Personal Relevance per company (companies with 3+ keywords)"""
+        metrics = self.company_metric_frame(frame, persona, market_keywords, scope)
+        return [self.company_metric(row) for row in dsi_engine.to_records(metrics)]
+    
+    def company_metric_frame(self, frame, persona, market_keywords: Any, scope: Optional[List[str]] = None):
+        """Scored and ranked company metrics as a frame (one row per scope and company)"""
+        scope = scope or []
+        metrics = dsi_engine.entity_metrics(
+            frame, 'company_id', scope=scope, total_keywords=market_keywords,
+            extra_aggs=dict(
+                company_name=('company_name', 'first'),
+                enrichment_source=('enrichment_source', 'first'),
+                confidence_score=('confidence_score', 'first'),
+                primary_domain=('domain', 'min'),
+                avg_funnel_value=('funnel_value', 'mean'),
+            )
+        )
+        # Market size counts every company, including those below the inclusion threshold
+        if scope:
+            metrics['total_companies'] = metrics.groupby(scope)['company_id'].transform('size')
+        else:
+            metrics['total_companies'] = len(metrics)
+        metrics = metrics[metrics['keyword_count'] >= 3].copy()  # Minimum keywords for inclusion
+        return dsi_engine.score(metrics, 'organic', persona, 'company_id', scope=scope)
+    
+    @staticmethod
+    def company_metric(row: Dict[str, Any]) -> CompanyDSIMetrics:
+        """Build CompanyDSIMetrics from one scored company_metric_frame row"""
+        company_id = row['company_id']
+        dsi_score = float(row['dsi_score'] or 0)
+        if dsi_score >= 30:
+            market_position = "leader"
+        elif dsi_score >= 15:
+            market_position = "challenger"
+        elif dsi_score >= 5:
+            market_position = "competitor"
+        else:
+            market_position = "niche"
+        
+        return CompanyDSIMetrics(
+            company_id=UUID(str(company_id)) if not isinstance(company_id, UUID) else company_id,
+            domain=row['primary_domain'],
+            company_name=row['company_name'],
+            total_keywords=row['keyword_count'],
+            total_pages=row['page_count'],
+            keyword_coverage=float(row['keyword_coverage_pct'] or 0),
+            total_traffic=float(row['total_traffic'] or 0),
+            traffic_share=float(row['traffic_share_pct'] or 0),
+            avg_relevance=float(row['relevance'] or 0) / 10.0,
+            avg_funnel_value=float(row['avg_funnel_value'] or 0),
+            dsi_score=dsi_score,
+            market_position=market_position,
+            rank_in_market=row['rank'],
+            total_companies_in_market=row['total_companies'] or 0
+        )
     
     async def _get_landscape_details(self, landscape_id: str) -> Optional[Dict[str, Any]]:
         """Get landscape details"""
@@ -268,69 +215,37 @@ class ProductionLandscapeCalculator:
     async def _store_detailed_company_metrics(self, landscape_id: str, company_metrics: List[CompanyDSIMetrics]):
         """Store all company-level metrics"""
         calculation_date = datetime.now().date()
-        
-        async with self.db.acquire() as conn:
-            for company in company_metrics:
-                await conn.execute("""
-                    INSERT INTO landscape_dsi_metrics (
-                        landscape_id, calculation_date, entity_type, entity_id, entity_name, 
-                        entity_domain, unique_keywords, unique_pages, keyword_coverage, 
-                        estimated_traffic, traffic_share, persona_alignment, funnel_value, 
-                        dsi_score, rank_in_landscape, total_entities_in_landscape, market_position
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                    ON CONFLICT (landscape_id, calculation_date, entity_type, entity_id)
-                    DO UPDATE SET 
-                        unique_keywords = EXCLUDED.unique_keywords,
-                        unique_pages = EXCLUDED.unique_pages,
-                        keyword_coverage = EXCLUDED.keyword_coverage,
-                        estimated_traffic = EXCLUDED.estimated_traffic,
-                        traffic_share = EXCLUDED.traffic_share,
-                        persona_alignment = EXCLUDED.persona_alignment,
-                        funnel_value = EXCLUDED.funnel_value,
-                        dsi_score = EXCLUDED.dsi_score,
-                        rank_in_landscape = EXCLUDED.rank_in_landscape,
-                        market_position = EXCLUDED.market_position,
-                        created_at = NOW()
-                """,
-                    landscape_id, calculation_date, EntityType.COMPANY.value, str(company.company_id),
-                    company.company_name, company.domain, company.total_keywords,
-                    company.total_pages, company.keyword_coverage, int(company.total_traffic),
-                    company.traffic_share, company.avg_relevance, company.avg_funnel_value,
-                    company.dsi_score, company.rank_in_market, company.total_companies_in_market,
-                    company.market_position
-                )
+        records = [
+            (
+                landscape_id, calculation_date, EntityType.COMPANY.value, str(company.company_id),
+                company.company_name, company.domain, None, company.total_keywords,
+                company.total_pages, company.keyword_coverage, int(company.total_traffic),
+                company.traffic_share, company.avg_relevance, company.avg_funnel_value,
+                company.dsi_score, company.rank_in_market, company.total_companies_in_market,
+                company.market_position
+            )
+            for company in company_metrics
+        ]
+        await self.snapshot_writer.write_landscape_metrics(records)
         
         logger.info(f"Stored metrics for {len(company_metrics)} companies in landscape {landscape_id}")
     
     async def _store_detailed_page_metrics(self, landscape_id: str, page_metrics: List[PageDSIMetrics]):
         """Store all page-level metrics"""
         calculation_date = datetime.now().date()
-        
-        async with self.db.acquire() as conn:
-            for page in page_metrics:
-                await conn.execute("""
-                    INSERT INTO landscape_dsi_metrics (
-                        landscape_id, calculation_date, entity_type, entity_id, entity_name,
-                        entity_domain, entity_url, unique_keywords, unique_pages,
-                        keyword_coverage, estimated_traffic, traffic_share, persona_alignment,
-                        funnel_value, dsi_score, rank_in_landscape, total_entities_in_landscape
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                    ON CONFLICT (landscape_id, calculation_date, entity_type, entity_id)
-                    DO UPDATE SET 
-                        unique_keywords = EXCLUDED.unique_keywords,
-                        estimated_traffic = EXCLUDED.estimated_traffic,
-                        dsi_score = EXCLUDED.dsi_score,
-                        rank_in_landscape = EXCLUDED.rank_in_landscape,
-                        created_at = NOW()
-                """,
-                    landscape_id, calculation_date, EntityType.PAGE.value, str(page.page_id),
-                    getattr(page, 'title', ''), getattr(page, 'domain', ''), getattr(page, 'url', ''),
-                    getattr(page, 'total_keywords', 0), 1, getattr(page, 'keyword_coverage', 0),
-                    int(getattr(page, 'total_traffic', 0)), getattr(page, 'traffic_share', 0),
-                    getattr(page, 'avg_relevance', 0), getattr(page, 'avg_funnel_value', 0),
-                    getattr(page, 'dsi_score', 0), getattr(page, 'rank_in_market', 0),
-                    getattr(page, 'total_pages_in_market', 1)
-                )
+        records = [
+            (
+                landscape_id, calculation_date, EntityType.PAGE.value, str(page.page_id),
+                getattr(page, 'title', ''), getattr(page, 'domain', ''), getattr(page, 'url', ''),
+                getattr(page, 'total_keywords', 0), 1, getattr(page, 'keyword_coverage', 0),
+                int(getattr(page, 'total_traffic', 0)), getattr(page, 'traffic_share', 0),
+                getattr(page, 'avg_relevance', 0), getattr(page, 'avg_funnel_value', 0),
+                getattr(page, 'dsi_score', 0), getattr(page, 'rank_in_market', 0),
+                getattr(page, 'total_pages_in_market', 1), getattr(page, 'market_position', None)
+            )
+            for page in page_metrics
+        ]
+        await self.snapshot_writer.write_landscape_metrics(records)
         
         logger.info(f"Stored metrics for {len(page_metrics)} pages in landscape {landscape_id}")
     
@@ -0,0 +1,328 @@
+"""
+Columnar DSI engine
+Pulls a narrow SERP frame (keyword, serp_type, position, url, domain, search
+volume) once and computes CTR-weighted traffic, keyword coverage, traffic and
+appearance shares, DSI scores and ranks with vectorized pandas/numpy
+operations. Scope columns (e.g. landscape_id) let one pass rank every
+landscape at once instead of one query per landscape.
+
+The CTR curve lives here; SQL paths render the same curve with ctr_case_sql().
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+
+# Industry-standard CTR by organic position (2024 data)
+CTR_BY_POSITION = {
+    1: 0.2823, 2: 0.1572, 3: 0.1073, 4: 0.0775, 5: 0.0588,
+    6: 0.0459, 7: 0.0369, 8: 0.0302, 9: 0.0252, 10: 0.0214,
+}
+# (last position of band, CTR) for positions past the top 10
+CTR_BANDS = ((20, 0.0150), (30, 0.0080))
+CTR_TAIL = 0.0050
+
+DEFAULT_SEARCH_VOLUME = 1000
+DEFAULT_RELEVANCE = 5.0  # Dimension scores are on a 1-10 scale
+
+_MAX_TABLE_POSITION = CTR_BANDS[-1][0] + 1
+
+
+def _build_ctr_table() -> np.ndarray:
+    table = np.full(_MAX_TABLE_POSITION + 1, CTR_TAIL, dtype=np.float64)
+    start = 1
+    for position, ctr in CTR_BY_POSITION.items():
+        table[position] = ctr
+        start = max(start, position + 1)
+    for last, ctr in CTR_BANDS:
+        table[start:last + 1] = ctr
+        start = last + 1
+    return table
+
+
+_CTR_TABLE = _build_ctr_table()
+
+
+def ctr_for_positions(positions: Any) -> np.ndarray:
+    """Vectorized CTR lookup; positions past the last band (or missing) get the tail CTR"""
+    values = np.asarray(positions, dtype=np.float64)
+    index = np.nan_to_num(values, nan=_MAX_TABLE_POSITION)
+    index = np.clip(index, 0, _MAX_TABLE_POSITION).astype(np.int64)
+    return _CTR_TABLE[index]
+
+
+def ctr_case_sql(column: str = 's.position') -> str:
+    """The CTR curve as a SQL CASE expression over a position column"""
+    lines = [f"WHEN {column} = {position} THEN {ctr:.4f}" for position, ctr in CTR_BY_POSITION.items()]
+    lines += [f"WHEN {column} <= {last} THEN {ctr:.4f}" for last, ctr in CTR_BANDS]
+    body = "\n        ".join(lines)
+    return f"CASE\n        {body}\n        ELSE {CTR_TAIL:.4f}\n    END"
+
+
+SERP_FRAME_COLUMNS = ['keyword_id', 'serp_type', 'position', 'url', 'domain', 'search_volume']
+
+
+async def load_serp_frame(
+    conn,
+    *,
+    pipeline_id: Optional[str] = None,
+    since=None,
+    until=None,
+    serp_types: Optional[Sequence[str]] = None,
+    keyword_ids: Optional[Sequence[str]] = None,
+    max_position: Optional[int] = None,
+    with_titles: bool = False
+) -> pd.DataFrame:
+    """Load the narrow SERP/keyword frame the engine works on (one query)"""
+    filters: List[str] = []
+    params: List[Any] = []
+
+    def param(value: Any) -> str:
+        params.append(value)
+        return f"${len(params)}"
+
+    if pipeline_id:
+        filters.append(f"s.pipeline_execution_id = {param(pipeline_id)}")
+    if since is not None:
+        filters.append(f"s.search_date >= {param(since)}")
+    if until is not None:
+        filters.append(f"s.search_date <= {param(until)}")
+    if serp_types:
+        filters.append(f"s.serp_type = ANY({param(list(serp_types))}::text[])")
+    if keyword_ids is not None:
+        filters.append(f"s.keyword_id = ANY({param([str(k) for k in keyword_ids])}::uuid[])")
+    if max_position:
+        filters.append(f"s.position <= {param(int(max_position))}")
+
+    columns = list(SERP_FRAME_COLUMNS) + (['title'] if with_titles else [])
+    query = f"""
+        SELECT
+            s.keyword_id::text AS keyword_id,
+            s.serp_type,
+            s.position,
+            s.url,
+            s.domain,
+            k.avg_monthly_searches AS search_volume{', s.title' if with_titles else ''}
+        FROM serp_results s
+        JOIN keywords k ON k.id = s.keyword_id
+        WHERE s.position IS NOT NULL
+          AND s.domain IS NOT NULL
+          {''.join(' AND ' + f for f in filters)}
+    """
+    rows = await conn.fetch(query, *params)
+    frame = pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns)
+    frame['position'] = pd.to_numeric(frame['position'], errors='coerce')
+    frame['search_volume'] = pd.to_numeric(frame['search_volume'], errors='coerce')
+    frame['serp_type'] = frame['serp_type'].astype('category')
+    return prepare_frame(frame)
+
+
+async def load_url_analysis(conn, urls: Iterable[str]) -> pd.DataFrame:
+    """Per-URL dimension averages and sentiment of pipeline analyses, indexed by url"""
+    urls = list({u for u in urls if u})
+    columns = ['url', 'persona_score', 'strategic_imperative_score', 'jtbd_score', 'overall_sentiment']
+    if not urls:
+        return pd.DataFrame(columns=columns).set_index('url')
+    rows = await conn.fetch("""
+        SELECT
+            oca.url,
+            AVG(CAST(oda.score AS FLOAT)) FILTER (WHERE oda.dimension_type = 'persona') AS persona_score,
+            AVG(CAST(oda.score AS FLOAT)) FILTER (WHERE oda.dimension_type = 'strategic_imperative') AS strategic_imperative_score,
+            AVG(CAST(oda.score AS FLOAT)) FILTER (WHERE oda.dimension_type = 'jtbd_phase') AS jtbd_score,
+            MAX(oca.overall_sentiment) AS overall_sentiment
+        FROM optimized_content_analysis oca
+        LEFT JOIN optimized_dimension_analysis oda ON oda.analysis_id = oca.id
+        WHERE oca.url = ANY($1::text[]) AND oca.project_id IS NULL
+        GROUP BY oca.url
+    """, urls)
+    return pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns).set_index('url')
+
+
+async def load_company_mapping(conn, domains: Iterable[str]) -> pd.DataFrame:
+    """domain_company_mapping rows for the given domains (one per original_domain)"""
+    domains = list({d for d in domains if d})
+    columns = ['domain', 'company_id', 'company_name', 'enrichment_source', 'confidence_score']
+    if not domains:
+        return pd.DataFrame(columns=columns)
+    rows = await conn.fetch("""
+        SELECT DISTINCT ON (original_domain)
+            original_domain, company_id::text, display_name, enrichment_source, confidence_score
+        FROM domain_company_mapping
+        WHERE original_domain = ANY($1::text[])
+        ORDER BY original_domain, confidence_score DESC NULLS LAST
+    """, domains)
+    return pd.DataFrame.from_records([tuple(row) for row in rows], columns=columns)
+
+
+async def load_company_persona(conn, company_ids: Iterable[str]) -> pd.Series:
+    """Persona average over every domain mapped to each company (domain_dimension_scores rollup)"""
+    company_ids = list({c for c in company_ids if c})
+    if not company_ids:
+        return pd.Series(dtype=np.float64)
+    rows = await conn.fetch("""
+        SELECT m.company_id::text, SUM(d.score_sum) / NULLIF(SUM(d.score_count), 0)
+        FROM (
+            SELECT DISTINCT company_id, original_domain
+            FROM domain_company_mapping
+            WHERE company_id = ANY($1::uuid[])
+        ) m
+        JOIN domain_dimension_scores d
+            ON d.domain = m.original_domain AND d.dimension_type = 'persona'
+        GROUP BY m.company_id
+    """, company_ids)
+    return pd.Series({row[0]: row[1] for row in rows}, dtype=np.float64)
+
+
+def prepare_frame(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add CTR, estimated traffic and position flags (vectorized)"""
+    positions = frame['position'].to_numpy(dtype=np.float64, na_value=np.nan)
+    volume = frame['search_volume'].to_numpy(dtype=np.float64, na_value=np.nan)
+    frame['ctr'] = ctr_for_positions(positions)
+    frame['estimated_traffic'] = np.nan_to_num(volume, nan=DEFAULT_SEARCH_VOLUME) * frame['ctr'].to_numpy()
+    frame['is_top_3'] = positions <= 3
+    frame['is_top_10'] = positions <= 10
+    return frame
+
+
+def explode_scopes(frame: pd.DataFrame, memberships: pd.DataFrame, scope: str = 'landscape_id') -> pd.DataFrame:
+    """Repeat each SERP row once per scope its keyword belongs to (memberships: keyword_id, scope)"""
+    return frame.merge(memberships[['keyword_id', scope]], on='keyword_id', how='inner')
+
+
+def entity_metrics(
+    frame: pd.DataFrame,
+    entity: str,
+    scope: Sequence[str] = (),
+    total_keywords: Any = None,
+    extra_aggs: Optional[Dict[str, Any]] = None
+) -> pd.DataFrame:
+    """
+    Aggregate SERP rows per entity (domain, url, company_id...) within each scope.
+
+    total_keywords overrides the keyword universe for coverage: a scalar, or a
+    Series indexed by the scope column (e.g. landscape keyword counts).
+    """
+    scope = list(scope)
+    keys = scope + [entity]
+    aggs = dict(
+        keyword_count=('keyword_id', 'nunique'),
+        page_count=('url', 'nunique'),
+        domain_count=('domain', 'nunique'),
+        appearances=('position', 'size'),
+        avg_position=('position', 'mean'),
+        best_position=('position', 'min'),
+        top_3_count=('is_top_3', 'sum'),
+        top_10_count=('is_top_10', 'sum'),
+        total_traffic=('estimated_traffic', 'sum'),
+    )
+    aggs.update(extra_aggs or {})
+    metrics = frame.groupby(keys, sort=False, observed=True).agg(**aggs).reset_index()
+
+    market_aggs = dict(
+        market_keywords=('keyword_id', 'nunique'),
+        market_traffic=('estimated_traffic', 'sum'),
+        market_appearances=('position', 'size'),
+    )
+    if scope:
+        market = frame.groupby(scope, sort=False, observed=True).agg(**market_aggs).reset_index()
+        metrics = metrics.merge(market, on=scope, how='left')
+    else:
+        metrics['market_keywords'] = frame['keyword_id'].nunique()
+        metrics['market_traffic'] = frame['estimated_traffic'].sum()
+        metrics['market_appearances'] = len(frame)
+
+    if isinstance(total_keywords, pd.Series):
+        override = metrics[scope[0]].map(total_keywords)
+        metrics['market_keywords'] = override.fillna(metrics['market_keywords'])
+    elif total_keywords is not None:
+        metrics['market_keywords'] = total_keywords
+
+    metrics['keyword_coverage_pct'] = _percent(metrics['keyword_count'], metrics['market_keywords'])
+    metrics['traffic_share_pct'] = _percent(metrics['total_traffic'], metrics['market_traffic'])
+    metrics['appearance_share_pct'] = _percent(metrics['appearances'], metrics['market_appearances'])
+    return metrics
+
+
+def score(
+    metrics: pd.DataFrame,
+    formula: str,
+    relevance: Optional[pd.Series] = None,
+    relevance_key: Optional[str] = None,
+    scope: Sequence[str] = (),
+    decimals: int = 2
+) -> pd.DataFrame:
+    """
+    Add relevance, dsi_score, rank and total_entities.
+
+    formula: 'organic' = coverage × traffic share × relevance,
+             'page'    = traffic share × relevance,
+             'appearance' = appearance share × coverage × relevance (news/video).
+    relevance is a 1-10 Series indexed by relevance_key values.
+    """
+    scope = list(scope)
+    if relevance is not None and relevance_key:
+        metrics['relevance'] = metrics[relevance_key].map(relevance).astype(np.float64).fillna(DEFAULT_RELEVANCE)
+    elif 'relevance' not in metrics:
+        metrics['relevance'] = DEFAULT_RELEVANCE
+    weight = metrics['relevance'].to_numpy(dtype=np.float64) / 10.0
+
+    coverage = metrics['keyword_coverage_pct'].to_numpy(dtype=np.float64)
+    if formula == 'organic':
+        raw = coverage * metrics['traffic_share_pct'].to_numpy(dtype=np.float64) * weight
+    elif formula == 'page':
+        raw = metrics['traffic_share_pct'].to_numpy(dtype=np.float64) * weight
+    elif formula == 'appearance':
+        raw = metrics['appearance_share_pct'].to_numpy(dtype=np.float64) * coverage * weight
+    else:
+        raise ValueError(f"Unknown DSI formula: {formula}")
+    metrics['dsi_score'] = np.round(np.nan_to_num(raw, nan=0.0), decimals)
+    return rank(metrics, scope)
+
+
+def rank(metrics: pd.DataFrame, scope: Sequence[str] = ()) -> pd.DataFrame:
+    """Order by DSI (ties by keyword count) and number entities within each scope"""
+    scope = list(scope)
+    metrics = metrics.sort_values(
+        scope + ['dsi_score', 'keyword_count'],
+        ascending=[True] * len(scope) + [False, False],
+        kind='mergesort'
+    ).reset_index(drop=True)
+    if scope:
+        grouped = metrics.groupby(scope, sort=False, observed=True)
+        metrics['rank'] = grouped.cumcount() + 1
+        metrics['total_entities'] = grouped['dsi_score'].transform('size')
+    else:
+        metrics['rank'] = np.arange(1, len(metrics) + 1)
+        metrics['total_entities'] = len(metrics)
+    return metrics
+
+
+def funnel_values(sentiment: pd.Series) -> pd.Series:
+    """Funnel value per SERP row from the page's sentiment (0.4 when the page was never analyzed)"""
+    values = sentiment.map({'positive': 1.0, 'neutral': 0.7, 'negative': 0.3})
+    analyzed = sentiment.notna()
+    return values.where(values.notna(), np.where(analyzed, 0.6, 0.4)).astype(np.float64)
+
+
+def to_records(metrics: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Plain-Python records (numpy scalars and NaN converted) for storage and APIs"""
+    clean = metrics.astype(object).where(pd.notna(metrics), None)
+    return [
+        {key: (value.item() if isinstance(value, np.generic) else value) for key, value in row.items()}
+        for row in clean.to_dict('records')
+    ]
+
+
+def _percent(numerator: pd.Series, denominator: pd.Series) -> pd.Series:
+    denominator = pd.to_numeric(denominator, errors='coerce').replace(0, np.nan)
+    return (pd.to_numeric(numerator, errors='coerce') / denominator * 100.0).fillna(0.0)
+
+
+def log_frame(label: str, frame: pd.DataFrame) -> None:
+    logger.info(
+        f"📊 DSI frame {label}: {len(frame):,} SERP rows, "
+        f"{frame['keyword_id'].nunique():,} keywords, {frame['domain'].nunique():,} domains"
+    )
@@ -0,0 +1,227 @@
+"""
+DSI Snapshot Writer
+Bulk path for DSI output tables (landscape_dsi_metrics, dsi_scores,
+historical_page_dsi_snapshots): company names are resolved with one ANY($1)
+lookup, rows are streamed with COPY into a temp staging table and merged with
+a single INSERT ... SELECT ... ON CONFLICT, all on one connection.
+"""
+
+import json
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+from loguru import logger
+
+
+# Column order of records handed to write_landscape_metrics()
+LANDSCAPE_METRIC_COLUMNS: Tuple[str, ...] = (
+    'landscape_id', 'calculation_date', 'entity_type', 'entity_id', 'entity_name',
+    'entity_domain', 'entity_url', 'unique_keywords', 'unique_pages',
+    'keyword_coverage', 'estimated_traffic', 'traffic_share', 'persona_alignment',
+    'funnel_value', 'dsi_score', 'rank_in_landscape', 'total_entities_in_landscape',
+    'market_position'
+)
+LANDSCAPE_METRIC_KEY_COLUMNS: Tuple[str, ...] = ('landscape_id', 'calculation_date', 'entity_type', 'entity_id')
+
+# Column order of records handed to write_dsi_scores()
+DSI_SCORE_COLUMNS: Tuple[str, ...] = (
+    'pipeline_execution_id', 'company_domain',
+    'dsi_score', 'keyword_overlap_score', 'content_relevance_score',
+    'market_presence_score', 'traffic_share_score', 'serp_visibility_score',
+    'metadata'
+)
+DSI_SCORE_KEY_COLUMNS: Tuple[str, ...] = ('pipeline_execution_id', 'company_domain')
+
+# Column order of records handed to write_page_snapshots()
+PAGE_SNAPSHOT_COLUMNS: Tuple[str, ...] = (
+    'snapshot_date', 'url', 'domain', 'company_name', 'page_title',
+    'page_dsi_score', 'page_dsi_rank', 'keyword_count', 'estimated_traffic',
+    'avg_position', 'top_10_keywords', 'total_keyword_appearances',
+    'content_classification', 'persona_alignment_scores', 'jtbd_phase',
+    'jtbd_alignment_score', 'sentiment', 'word_count', 'content_quality_score',
+    'brand_mention_count', 'competitor_mention_count', 'source_type',
+    'industry', 'is_active'
+)
+PAGE_SNAPSHOT_KEY_COLUMNS: Tuple[str, ...] = ('url', 'snapshot_date')
+PAGE_SNAPSHOT_UPDATE_COLUMNS: Tuple[str, ...] = (
+    'page_dsi_score', 'page_dsi_rank', 'keyword_count', 'estimated_traffic',
+    'avg_position', 'persona_alignment_scores', 'jtbd_alignment_score',
+    'content_classification', 'brand_mention_count', 'competitor_mention_count'
+)
+
+_DSI_SCORE_MEASURES: Tuple[str, ...] = (
+    'dsi_score', 'keyword_overlap_score', 'content_relevance_score',
+    'market_presence_score', 'traffic_share_score', 'serp_visibility_score'
+)
+
+
+class DSISnapshotWriter:
+    """
+    Shared bulk writer for DSI snapshots.
+
+    - Company names for a batch of domains come from one ANY($1) lookup
+    - Rows are COPY'd into a temp staging table shaped like the target
+    - One merge statement per table, inside one transaction
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    async def resolve_companies(self, domains: Iterable[str], conn=None) -> Dict[str, Dict[str, Any]]:
+        """Map domain (with or without www.) to company_name and industry with one query"""
+        unique = sorted({d for d in domains if d})
+        if not unique:
+            return {}
+        variants = sorted(set(unique) | {_www_variant(d) for d in unique})
+
+        query = """
+            SELECT DISTINCT ON (dcm.original_domain)
+                dcm.original_domain AS domain,
+                COALESCE(dcm.display_name, cp.company_name) AS company_name,
+                cp.industry
+            FROM domain_company_mapping dcm
+            LEFT JOIN company_profiles cp ON cp.id = dcm.company_id
+            WHERE dcm.original_domain = ANY($1::text[])
+            ORDER BY dcm.original_domain, dcm.confidence_score DESC NULLS LAST
+        """
+        if conn is not None:
+            rows = await conn.fetch(query, variants)
+        else:
+            async with self.db.acquire() as conn:
+                rows = await conn.fetch(query, variants)
+
+        by_domain = {row['domain']: dict(row) for row in rows}
+        companies = {}
+        for domain in unique:
+            match = by_domain.get(domain) or by_domain.get(_www_variant(domain))
+            if match:
+                companies[domain] = match
+        return companies
+
+    async def write_landscape_metrics(self, records: Sequence[tuple], conn=None) -> int:
+        """Merge landscape_dsi_metrics records (LANDSCAPE_METRIC_COLUMNS order); every non-key column is refreshed"""
+        updates = [c for c in LANDSCAPE_METRIC_COLUMNS if c not in LANDSCAPE_METRIC_KEY_COLUMNS]
+        merge = f"""
+            INSERT INTO landscape_dsi_metrics ({{columns}})
+            SELECT DISTINCT ON ({{keys}}) {{columns}}
+            FROM {{staging}}
+            ORDER BY {{keys}}, dsi_score DESC NULLS LAST
+            ON CONFLICT ({{keys}}) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in updates)},
+                created_at = NOW()
+        """
+        return await self._write(
+            'landscape_dsi_metrics', LANDSCAPE_METRIC_COLUMNS, LANDSCAPE_METRIC_KEY_COLUMNS,
+            records, merge, conn=conn
+        )
+
+    async def write_dsi_scores(self, pipeline_id: str, records: Sequence[tuple], conn=None) -> int:
+        """
+        Replace a pipeline's dsi_scores with records (DSI_SCORE_COLUMNS order, metadata as a dict).
+
+        A domain scored by several sources keeps the best value of each measure
+        and the merged metadata (later records win on key clashes), like the
+        old per-row GREATEST upserts.
+        """
+        merged: Dict[Any, list] = {}
+        for record in records:
+            key = (record[0], record[1])
+            current = merged.get(key)
+            if current is None:
+                merged[key] = [*record[:-1], dict(record[-1] or {})]
+                continue
+            for i in range(2, len(DSI_SCORE_COLUMNS) - 1):
+                current[i] = max(current[i], record[i])
+            current[-1].update(record[-1] or {})
+        rows = [(*row[:-1], json.dumps(row[-1])) for row in merged.values()]
+
+        merge = f"""
+            INSERT INTO dsi_scores ({{columns}})
+            SELECT {{columns}} FROM {{staging}}
+            ON CONFLICT ({{keys}}) DO UPDATE SET
+                {', '.join(f'{c} = GREATEST(dsi_scores.{c}, EXCLUDED.{c})' for c in _DSI_SCORE_MEASURES)},
+                metadata = dsi_scores.metadata || EXCLUDED.metadata,
+                updated_at = NOW()
+        """
+        return await self._write(
+            'dsi_scores', DSI_SCORE_COLUMNS, DSI_SCORE_KEY_COLUMNS, rows, merge, conn=conn,
+            before=("DELETE FROM dsi_scores WHERE pipeline_execution_id = $1", pipeline_id)
+        )
+
+    async def write_page_snapshots(self, records: Sequence[tuple], conn=None) -> int:
+        """Merge historical_page_dsi_snapshots records (PAGE_SNAPSHOT_COLUMNS order), best rank per URL"""
+        merge = f"""
+            INSERT INTO historical_page_dsi_snapshots ({{columns}})
+            SELECT DISTINCT ON ({{keys}}) {{columns}}
+            FROM {{staging}}
+            ORDER BY {{keys}}, page_dsi_rank
+            ON CONFLICT ({{keys}}) DO UPDATE SET
+                {', '.join(f'{c} = EXCLUDED.{c}' for c in PAGE_SNAPSHOT_UPDATE_COLUMNS)}
+        """
+        return await self._write(
+            'historical_page_dsi_snapshots', PAGE_SNAPSHOT_COLUMNS, PAGE_SNAPSHOT_KEY_COLUMNS,
+            records, merge, conn=conn
+        )
+
+    async def _write(
+        self,
+        table: str,
+        columns: Sequence[str],
+        key_columns: Sequence[str],
+        records: Sequence[tuple],
+        merge: str,
+        conn=None,
+        before: Optional[tuple] = None
+    ) -> int:
+        if not records and before is None:
+            return 0
+
+        if conn is not None:
+            return await self._copy_and_merge(conn, table, columns, key_columns, records, merge, before)
+
+        async with self.db.acquire() as conn:
+            return await self._copy_and_merge(conn, table, columns, key_columns, records, merge, before)
+
+    async def _copy_and_merge(
+        self,
+        conn,
+        table: str,
+        columns: Sequence[str],
+        key_columns: Sequence[str],
+        records: Sequence[tuple],
+        merge: str,
+        before: Optional[tuple]
+    ) -> int:
+        staging = f"{table}_staging"
+        column_list = ', '.join(columns)
+
+        async with conn.transaction():
+            if before is not None:
+                await conn.execute(*before)
+            if not records:
+                return 0
+
+            # Staging table mirrors the target's column types and disappears on commit
+            await conn.execute(f"""
+                CREATE TEMP TABLE IF NOT EXISTS {staging}
+                ON COMMIT DROP AS
+                SELECT {column_list} FROM {table} WITH NO DATA
+            """)
+            await conn.copy_records_to_table(staging, records=records, columns=list(columns))
+            status = await conn.execute(merge.format(
+                columns=column_list, keys=', '.join(key_columns), staging=staging
+            ))
+
+        merged = _parse_row_count(status)
+        logger.debug(f"💾 Bulk merged {merged}/{len(records)} rows into {table}")
+        return merged
+
+
+def _www_variant(domain: str) -> str:
+    return domain[4:] if domain.startswith('www.') else f"www.{domain}"
+
+
+def _parse_row_count(status: Optional[str]) -> int:
+    """Extract the row count from an asyncpg command status such as 'INSERT 0 42'"""
+    try:
+        return int((status or '').split()[-1])
+    except (ValueError, IndexError):
+        return 0
@@ -0,0 +1,746 @@
+"""
+Incremental DSI engine
+Keeps per-(pipeline, serp_type, keyword, domain) SERP aggregates and per-domain
+dimension score rollups up to date from change queues filled by statement
+triggers on serp_results, keywords and the analysis tables. A refresh only
+recomputes the keys and domains that changed since the last run; organic,
+news and video DSI are then derived from the aggregates. Company enrichment
+writes only stamp a change marker, since names are resolved when rankings
+are read.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.database import DatabasePool
+from app.services.metrics.dsi_engine import ctr_case_sql
+
+
+INCREMENTAL_DSI_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS dsi_keyword_aggregates (
+    pipeline_execution_id TEXT NOT NULL,
+    serp_type TEXT NOT NULL,
+    keyword_id TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    company_name TEXT,
+    appearances INTEGER NOT NULL DEFAULT 0,
+    position_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    best_position INTEGER,
+    top_3_count INTEGER NOT NULL DEFAULT 0,
+    top_10_count INTEGER NOT NULL DEFAULT 0,
+    estimated_traffic DOUBLE PRECISION NOT NULL DEFAULT 0,
+    total_views BIGINT NOT NULL DEFAULT 0,
+    persona_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    persona_count INTEGER NOT NULL DEFAULT 0,
+    urls TEXT[] NOT NULL DEFAULT '{}',
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (pipeline_execution_id, serp_type, keyword_id, domain)
+);
+
+CREATE INDEX IF NOT EXISTS idx_dsi_keyword_aggregates_video_urls
+    ON dsi_keyword_aggregates USING GIN (urls) WHERE serp_type = 'video';
+
+CREATE INDEX IF NOT EXISTS idx_dsi_keyword_aggregates_keyword
+    ON dsi_keyword_aggregates (keyword_id);
+
+CREATE TABLE IF NOT EXISTS domain_dimension_scores (
+    domain TEXT NOT NULL,
+    dimension_type TEXT NOT NULL,
+    score_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (domain, dimension_type)
+);
+
+CREATE TABLE IF NOT EXISTS domain_content_stats (
+    domain TEXT PRIMARY KEY,
+    analyzed_pages INTEGER NOT NULL DEFAULT 0,
+    pages_with_mentions INTEGER NOT NULL DEFAULT 0,
+    positive_pages INTEGER NOT NULL DEFAULT 0,
+    neutral_pages INTEGER NOT NULL DEFAULT 0,
+    negative_pages INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS dsi_incremental_state (
+    scope TEXT PRIMARY KEY,
+    built_at TIMESTAMPTZ DEFAULT NOW(),
+    refreshed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS dsi_pending_serp_keys (
+    pipeline_execution_id TEXT NOT NULL,
+    serp_type TEXT NOT NULL,
+    keyword_id TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (pipeline_execution_id, serp_type, keyword_id)
+);
+
+CREATE TABLE IF NOT EXISTS dsi_pending_analysis_urls (
+    url TEXT PRIMARY KEY,
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS dsi_input_changes (
+    source TEXT PRIMARY KEY,
+    changed_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION dsi_track_serp_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO dsi_pending_serp_keys (pipeline_execution_id, serp_type, keyword_id)
+    SELECT DISTINCT pipeline_execution_id::text, serp_type, keyword_id::text
+    FROM changed_rows
+    WHERE pipeline_execution_id IS NOT NULL AND keyword_id IS NOT NULL AND serp_type IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dsi_track_content_analysis_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO dsi_pending_analysis_urls (url)
+    SELECT DISTINCT url FROM changed_rows WHERE url IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Search volume is baked into estimated_traffic: requeue every aggregate key of a changed keyword
+CREATE OR REPLACE FUNCTION dsi_track_keyword_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO dsi_pending_serp_keys (pipeline_execution_id, serp_type, keyword_id)
+    SELECT DISTINCT a.pipeline_execution_id, a.serp_type, a.keyword_id
+    FROM (SELECT DISTINCT id::text AS keyword_id FROM changed_rows) c
+    JOIN dsi_keyword_aggregates a ON a.keyword_id = c.keyword_id
+    WHERE a.serp_type IN ('organic', 'news')
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Company names are resolved when rankings are read and only video aggregates keep
+-- an attribution, so enrichment writes just stamp when companies last changed
+CREATE OR REPLACE FUNCTION dsi_track_company_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO dsi_input_changes (source, changed_at) VALUES ('companies', clock_timestamp())
+    ON CONFLICT (source) DO UPDATE SET changed_at = EXCLUDED.changed_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION dsi_track_dimension_analysis_changes() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO dsi_pending_analysis_urls (url)
+    SELECT DISTINCT oca.url
+    FROM changed_rows c
+    JOIN optimized_content_analysis oca ON oca.id = c.analysis_id
+    WHERE oca.url IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# Statement-level triggers with transition tables: one queue insert per statement,
+# however many rows the SERP merge or analysis write touched
+_CHANGE_TRIGGERS = [
+    ('serp_results', 'dsi_track_serp_changes'),
+    ('keywords', 'dsi_track_keyword_changes'),
+    ('optimized_content_analysis', 'dsi_track_content_analysis_changes'),
+    ('optimized_dimension_analysis', 'dsi_track_dimension_analysis_changes'),
+    ('domain_company_mapping', 'dsi_track_company_changes'),
+    ('company_profiles', 'dsi_track_company_changes'),
+    ('company_domains', 'dsi_track_company_changes'),
+    ('youtube_channel_companies', 'dsi_track_company_changes'),
+]
+
+# Same CTR curve as every other DSI path
+CTR_CASE_SQL = ctr_case_sql('s.position')
+
+_KEY_FILTER_SQL = """
+        JOIN unnest($2::text[], $3::text[]) AS changed(serp_type, keyword_id)
+            ON changed.serp_type = s.serp_type AND changed.keyword_id = s.keyword_id::text"""
+
+_SERP_AGGREGATE_SQL = """
+    INSERT INTO dsi_keyword_aggregates (
+        pipeline_execution_id, serp_type, keyword_id, domain,
+        appearances, position_sum, best_position, top_3_count, top_10_count,
+        estimated_traffic, urls, updated_at
+    )
+    SELECT
+        s.pipeline_execution_id::text, s.serp_type, s.keyword_id::text, s.domain,
+        COUNT(*), SUM(s.position), MIN(s.position),
+        COUNT(*) FILTER (WHERE s.position <= 3),
+        COUNT(*) FILTER (WHERE s.position <= 10),
+        SUM(COALESCE(k.avg_monthly_searches, 1000) * {ctr}),
+        ARRAY_AGG(DISTINCT s.url),
+        NOW()
+    FROM serp_results s
+    JOIN keywords k ON k.id = s.keyword_id{key_filter}
+    WHERE s.pipeline_execution_id = $1
+      AND s.serp_type IN ('organic', 'news')
+      AND s.position IS NOT NULL
+      AND s.domain IS NOT NULL
+      AND NOT (s.serp_type = 'news' AND s.position > 100)
+    GROUP BY s.pipeline_execution_id, s.serp_type, s.keyword_id, s.domain
+"""
+
+# Videos are attributed to the channel's company; unresolved channels keep an
+# empty domain so they still count towards market totals
+_VIDEO_AGGREGATE_SQL = """
+    INSERT INTO dsi_keyword_aggregates (
+        pipeline_execution_id, serp_type, keyword_id, domain, company_name,
+        appearances, position_sum, best_position, top_3_count, top_10_count,
+        total_views, persona_sum, persona_count, urls, updated_at
+    )
+    SELECT
+        v.pipeline_execution_id, 'video', v.keyword_id, v.company_domain, MAX(v.company_name),
+        COUNT(*), SUM(v.position), MIN(v.position),
+        COUNT(*) FILTER (WHERE v.position <= 3),
+        COUNT(*) FILTER (WHERE v.position <= 10),
+        SUM(COALESCE(v.view_count, 0)),
+        SUM(v.persona_sum), SUM(v.persona_count),
+        ARRAY_AGG(DISTINCT v.url),
+        NOW()
+    FROM (
+        SELECT
+            s.pipeline_execution_id::text AS pipeline_execution_id,
+            s.keyword_id::text AS keyword_id,
+            s.url,
+            s.position,
+            vs.view_count,
+            COALESCE(
+                ycc.company_domain,
+                cp.domain,
+                CASE WHEN vs.channel_title ~ '^[a-zA-Z0-9-]+\\.(com|net|org|io|co)$'
+                     THEN LOWER(vs.channel_title) END,
+                ''
+            ) AS company_domain,
+            COALESCE(
+                cp.company_name,
+                ycc.company_name,
+                CASE
+                    WHEN ycc.company_domain IS NOT NULL
+                        THEN INITCAP(REPLACE(SPLIT_PART(ycc.company_domain, '.', 1), '-', ' '))
+                    WHEN vs.channel_title IS NOT NULL THEN vs.channel_title
+                    ELSE 'Unknown'
+                END
+            ) AS company_name,
+            COALESCE(persona.score_sum, 0) AS persona_sum,
+            COALESCE(persona.score_count, 0) AS persona_count
+        FROM serp_results s
+        JOIN video_snapshots vs ON vs.video_url = s.url{key_filter}
+        LEFT JOIN youtube_channel_companies ycc ON ycc.channel_id = vs.channel_id
+        LEFT JOIN company_domains cd ON cd.domain = ycc.company_domain
+        LEFT JOIN company_profiles cp ON cp.id = cd.company_id
+        LEFT JOIN LATERAL (
+            SELECT SUM(CAST(oda.score AS FLOAT)) AS score_sum, COUNT(*) AS score_count
+            FROM optimized_content_analysis oca
+            JOIN optimized_dimension_analysis oda ON oda.analysis_id = oca.id
+            WHERE oca.url = s.url AND oda.dimension_type = 'persona'
+        ) persona ON TRUE
+        WHERE s.pipeline_execution_id = $1
+          AND s.serp_type = 'video'
+          AND s.position IS NOT NULL
+    ) v
+    GROUP BY v.pipeline_execution_id, v.keyword_id, v.company_domain
+"""
+
+_DOMAIN_DIMENSIONS_SQL = """
+    INSERT INTO domain_dimension_scores (domain, dimension_type, score_sum, score_count, updated_at)
+    SELECT sc.domain, oda.dimension_type, SUM(CAST(oda.score AS FLOAT)), COUNT(*), NOW()
+    FROM optimized_content_analysis oca
+    JOIN optimized_dimension_analysis oda ON oda.analysis_id = oca.id
+    JOIN scraped_content sc ON sc.url = oca.url
+    WHERE sc.domain IS NOT NULL AND oda.dimension_type IS NOT NULL{domain_filter}
+    GROUP BY sc.domain, oda.dimension_type
+"""
+
+_DOMAIN_CONTENT_STATS_SQL = """
+    INSERT INTO domain_content_stats (
+        domain, analyzed_pages, pages_with_mentions,
+        positive_pages, neutral_pages, negative_pages, updated_at
+    )
+    SELECT
+        sc.domain,
+        COUNT(DISTINCT oca.id),
+        COUNT(DISTINCT oca.id) FILTER (
+            WHERE COALESCE(CASE WHEN jsonb_typeof(oca.mentions) = 'array'
+                                THEN jsonb_array_length(oca.mentions) END, 0) > 0
+        ),
+        COUNT(DISTINCT oca.id) FILTER (WHERE oca.project_id IS NULL AND oca.overall_sentiment = 'positive'),
+        COUNT(DISTINCT oca.id) FILTER (WHERE oca.project_id IS NULL AND oca.overall_sentiment = 'neutral'),
+        COUNT(DISTINCT oca.id) FILTER (WHERE oca.project_id IS NULL AND oca.overall_sentiment = 'negative'),
+        NOW()
+    FROM optimized_content_analysis oca
+    JOIN scraped_content sc ON sc.url = oca.url
+    WHERE sc.domain IS NOT NULL{domain_filter}
+    GROUP BY sc.domain
+"""
+
+_ORGANIC_DSI_SQL = """
+    WITH agg AS (
+        SELECT * FROM dsi_keyword_aggregates
+        WHERE pipeline_execution_id = $1 AND serp_type = 'organic'
+    ),
+    market_totals AS (
+        SELECT COUNT(DISTINCT keyword_id) AS total_keywords,
+               SUM(estimated_traffic) AS total_market_traffic
+        FROM agg
+    ),
+    pages AS (
+        SELECT agg.domain, COUNT(DISTINCT page.url) AS page_count
+        FROM agg, unnest(agg.urls) AS page(url)
+        GROUP BY agg.domain
+    ),
+    domains AS (
+        SELECT
+            domain,
+            COUNT(DISTINCT keyword_id) AS keyword_count,
+            SUM(position_sum) / NULLIF(SUM(appearances), 0) AS avg_position,
+            MIN(best_position) AS best_position,
+            SUM(top_3_count) AS top_3_count,
+            SUM(top_10_count) AS top_10_count,
+            SUM(estimated_traffic) AS total_estimated_traffic
+        FROM agg
+        GROUP BY domain
+    ),
+    relevance AS (
+        SELECT
+            d.domain,
+            SUM(d.score_sum) FILTER (WHERE d.dimension_type = 'persona')
+                / NULLIF(SUM(d.score_count) FILTER (WHERE d.dimension_type = 'persona'), 0) AS persona_score,
+            SUM(d.score_sum) FILTER (WHERE d.dimension_type = 'strategic_imperative')
+                / NULLIF(SUM(d.score_count) FILTER (WHERE d.dimension_type = 'strategic_imperative'), 0) AS strategic_imperative_score,
+            SUM(d.score_sum) FILTER (WHERE d.dimension_type = 'jtbd_phase')
+                / NULLIF(SUM(d.score_count) FILTER (WHERE d.dimension_type = 'jtbd_phase'), 0) AS jtbd_score
+        FROM domain_dimension_scores d
+        JOIN domains USING (domain)
+        GROUP BY d.domain
+    ),
+    scored AS (
+        SELECT
+            COALESCE(
+                dcm.display_name,
+                cp.company_name,
+                INITCAP(REPLACE(SPLIT_PART(regexp_replace(c.domain, '^www\\.', ''), '.', 1), '-', ' '))
+            ) AS company_name,
+            COALESCE(dcm.original_domain, c.domain) AS domain,
+            dcm.company_id,
+            c.keyword_count,
+            p.page_count,
+            1 AS domain_count,
+            c.avg_position,
+            c.best_position,
+            c.top_3_count,
+            c.top_10_count,
+            c.total_estimated_traffic,
+            dcm.enrichment_source,
+            cp.industry,
+            cp.employee_count,
+            '' AS company_description,
+            cp.source_type AS company_source_type,
+            dcm.confidence_score AS enrichment_confidence,
+            ROUND(COALESCE(r.persona_score, 5.0)::numeric, 2) AS avg_persona_score,
+            ROUND(COALESCE(r.strategic_imperative_score, 5.0)::numeric, 2) AS avg_strategic_imperative_score,
+            ROUND(COALESCE(r.jtbd_score, 5.0)::numeric, 2) AS avg_jtbd_score,
+            COALESCE(st.positive_pages, 0) AS positive_content_count,
+            COALESCE(st.neutral_pages, 0) AS neutral_content_count,
+            COALESCE(st.negative_pages, 0) AS negative_content_count,
+            COALESCE(st.pages_with_mentions, 0) AS pages_with_mentions,
+            ROUND((st.positive_pages::float / NULLIF(st.analyzed_pages, 0) * 100)::numeric, 1) AS positive_sentiment_pct,
+            ROUND((st.neutral_pages::float / NULLIF(st.analyzed_pages, 0) * 100)::numeric, 1) AS neutral_sentiment_pct,
+            ROUND((st.negative_pages::float / NULLIF(st.analyzed_pages, 0) * 100)::numeric, 1) AS negative_sentiment_pct,
+            ROUND((c.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100)::numeric, 2) AS keyword_coverage_pct,
+            ROUND((c.total_estimated_traffic / NULLIF(mt.total_market_traffic, 0) * 100)::numeric, 2) AS traffic_share_pct,
+            ROUND(COALESCE(r.persona_score, 5.0)::numeric, 2) AS persona_relevance,
+            -- ORGANIC DSI FORMULA: Keyword Coverage × Share of Traffic × Persona Relevance
+            ROUND((
+                (c.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100) *
+                (c.total_estimated_traffic / NULLIF(mt.total_market_traffic, 0) * 100) *
+                (COALESCE(r.persona_score, 5.0) / 10.0)
+            )::numeric, 2) AS dsi_score
+        FROM domains c
+        JOIN pages p USING (domain)
+        CROSS JOIN market_totals mt
+        LEFT JOIN relevance r USING (domain)
+        LEFT JOIN domain_content_stats st USING (domain)
+        LEFT JOIN LATERAL (
+            SELECT m.display_name, m.original_domain, m.company_id, m.enrichment_source, m.confidence_score
+            FROM domain_company_mapping m
+            WHERE m.original_domain = c.domain
+            LIMIT 1
+        ) dcm ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT p2.company_name, p2.industry, p2.employee_count, p2.source_type
+            FROM company_profiles p2
+            WHERE p2.id = dcm.company_id OR p2.domain = c.domain
+            LIMIT 1
+        ) cp ON TRUE
+    )
+    SELECT scored.*, ROW_NUMBER() OVER (ORDER BY dsi_score DESC NULLS LAST, keyword_count DESC) AS dsi_rank
+    FROM scored
+    ORDER BY dsi_rank
+"""
+
+_NEWS_DSI_SQL = """
+    WITH agg AS (
+        SELECT * FROM dsi_keyword_aggregates
+        WHERE pipeline_execution_id = $1 AND serp_type = 'news'
+    ),
+    named AS (
+        SELECT
+            agg.*,
+            COALESCE(
+                dcm.display_name,
+                cp.company_name,
+                INITCAP(REPLACE(SPLIT_PART(regexp_replace(agg.domain, '^www\\.', ''), '.', 1), '-', ' '))
+            ) AS company_name_resolved,
+            COALESCE(dcm.original_domain, cp.domain, regexp_replace(agg.domain, '^www\\.', '')) AS resolved_domain
+        FROM agg
+        LEFT JOIN LATERAL (
+            SELECT m.display_name, m.original_domain FROM domain_company_mapping m
+            WHERE m.original_domain = agg.domain LIMIT 1
+        ) dcm ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT p.company_name, p.domain FROM company_profiles p
+            WHERE p.domain = agg.domain LIMIT 1
+        ) cp ON TRUE
+    ),
+    publishers AS (
+        SELECT
+            company_name_resolved AS company_name,
+            MIN(resolved_domain) AS primary_domain,
+            COUNT(DISTINCT domain) AS domain_count,
+            COUNT(DISTINCT keyword_id) AS keyword_count,
+            SUM(appearances) AS total_serp_appearances,
+            SUM(position_sum) / NULLIF(SUM(appearances), 0) AS avg_position
+        FROM named
+        GROUP BY company_name_resolved
+    ),
+    articles AS (
+        SELECT named.company_name_resolved AS company_name, COUNT(DISTINCT article.url) AS article_count
+        FROM named, unnest(named.urls) AS article(url)
+        GROUP BY named.company_name_resolved
+    ),
+    persona AS (
+        SELECT n.company_name_resolved AS company_name,
+               SUM(d.score_sum) / NULLIF(SUM(d.score_count), 0) AS persona_alignment
+        FROM (SELECT DISTINCT company_name_resolved, resolved_domain FROM named) n
+        JOIN domain_dimension_scores d
+            ON d.domain = n.resolved_domain AND d.dimension_type = 'persona'
+        GROUP BY n.company_name_resolved
+    ),
+    market_totals AS (
+        SELECT COUNT(DISTINCT keyword_id) AS total_keywords,
+               SUM(appearances) AS total_appearances
+        FROM agg
+    ),
+    scored AS (
+        SELECT
+            pm.company_name,
+            pm.primary_domain AS domain,
+            pm.domain_count,
+            pm.keyword_count,
+            COALESCE(a.article_count, 0) AS article_count,
+            pm.total_serp_appearances,
+            pm.avg_position,
+            ROUND(COALESCE(pa.persona_alignment, 5.0)::numeric, 2) AS persona_alignment,
+            ROUND((pm.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100)::numeric, 2) AS keyword_coverage_pct,
+            -- NEWS DSI FORMULA: SERP Appearances × Keyword Coverage × Persona Alignment
+            ROUND((
+                (pm.total_serp_appearances::float / NULLIF(mt.total_appearances, 0)) * 100 *
+                (pm.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100) *
+                (COALESCE(pa.persona_alignment, 5.0) / 10.0)
+            )::numeric, 2) AS news_dsi_score
+        FROM publishers pm
+        CROSS JOIN market_totals mt
+        LEFT JOIN articles a USING (company_name)
+        LEFT JOIN persona pa USING (company_name)
+    )
+    SELECT scored.*, ROW_NUMBER() OVER (ORDER BY news_dsi_score DESC NULLS LAST, keyword_count DESC) AS dsi_rank
+    FROM scored
+    ORDER BY dsi_rank
+"""
+
+# Video persona is averaged per SERP appearance of the company's analyzed videos
+_VIDEO_DSI_SQL = """
+    WITH agg AS (
+        SELECT * FROM dsi_keyword_aggregates
+        WHERE pipeline_execution_id = $1 AND serp_type = 'video'
+    ),
+    companies AS (
+        SELECT
+            company_name,
+            MIN(domain) AS primary_domain,
+            COUNT(DISTINCT domain) AS domain_count,
+            COUNT(DISTINCT keyword_id) AS keyword_count,
+            SUM(appearances) AS total_serp_appearances,
+            SUM(position_sum) / NULLIF(SUM(appearances), 0) AS avg_position,
+            SUM(total_views) AS total_views,
+            SUM(persona_sum) / NULLIF(SUM(persona_count), 0) AS persona_alignment
+        FROM agg
+        WHERE domain <> '' AND company_name IS NOT NULL
+        GROUP BY company_name
+    ),
+    videos AS (
+        SELECT agg.company_name, COUNT(DISTINCT video.url) AS video_count
+        FROM agg, unnest(agg.urls) AS video(url)
+        WHERE agg.domain <> '' AND agg.company_name IS NOT NULL
+        GROUP BY agg.company_name
+    ),
+    market_totals AS (
+        SELECT (SELECT COUNT(DISTINCT keyword_id) FROM agg) AS total_keywords,
+               (SELECT SUM(total_serp_appearances) FROM companies) AS total_appearances
+    ),
+    scored AS (
+        SELECT
+            cm.primary_domain AS domain,
+            cm.company_name,
+            cm.domain_count,
+            cm.keyword_count,
+            COALESCE(v.video_count, 0) AS video_count,
+            cm.total_serp_appearances,
+            cm.avg_position,
+            cm.total_views,
+            ROUND(COALESCE(cm.persona_alignment, 5.0)::numeric, 2) AS persona_alignment,
+            ROUND((cm.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100)::numeric, 2) AS keyword_coverage_pct,
+            -- VIDEO DSI FORMULA: SERP Appearances × Keyword Coverage × Persona Alignment
+            ROUND((
+                (cm.total_serp_appearances::float / NULLIF(mt.total_appearances, 0)) * 100 *
+                (cm.keyword_count::float / NULLIF(mt.total_keywords, 0) * 100) *
+                (COALESCE(cm.persona_alignment, 5.0) / 10.0)
+            )::numeric, 2) AS video_dsi_score
+        FROM companies cm
+        CROSS JOIN market_totals mt
+        LEFT JOIN videos v USING (company_name)
+    )
+    SELECT scored.*, ROW_NUMBER() OVER (ORDER BY video_dsi_score DESC NULLS LAST, keyword_count DESC) AS dsi_rank
+    FROM scored
+    ORDER BY dsi_rank
+"""
+
+DOMAIN_DIMENSIONS_SCOPE = 'domain_dimensions'
+# Queued keys of pipelines that never had DSI computed are dropped after this long
+STALE_PENDING_INTERVAL = '7 days'
+
+
+class IncrementalDSIEngine:
+    """Maintains DSI aggregates from change queues and derives rankings from them"""
+
+    def __init__(self, db: DatabasePool):
+        self.db = db
+        self._schema_ready = False
+
+    async def rankings(self, pipeline_id: str) -> Tuple[Dict[str, Any], List[Dict], List[Dict], List[Dict]]:
+        """Refresh the pipeline's aggregates, then return (refresh stats, organic, news, video)"""
+        pipeline_id = str(pipeline_id)
+        stats = await self.refresh(pipeline_id)
+        async with self.db.acquire() as conn:
+            organic = [dict(row) for row in await conn.fetch(_ORGANIC_DSI_SQL, pipeline_id)]
+            news = [dict(row) for row in await conn.fetch(_NEWS_DSI_SQL, pipeline_id)]
+            video = [dict(row) for row in await conn.fetch(_VIDEO_DSI_SQL, pipeline_id)]
+        return stats, organic, news, video
+
+    async def refresh(self, pipeline_id: str) -> Dict[str, Any]:
+        """
+        Bring aggregates for a pipeline up to date.
+
+        The first refresh of a pipeline (and of the domain rollups) builds from
+        scratch; later ones only recompute queued SERP keys and analyzed domains.
+        """
+        await self._ensure_schema()
+        stats = {
+            'pipeline_rebuilt': False,
+            'domains_rebuilt': False,
+            'serp_keys_refreshed': 0,
+            'domains_refreshed': 0,
+            'companies_changed': False,
+            'changed': False,
+        }
+
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                # One refresher at a time; queues are consumed inside this transaction
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('dsi_incremental_refresh'))")
+                await self._refresh_domains(conn, stats)
+                await self._refresh_pipeline(conn, str(pipeline_id), stats)
+                await conn.execute(f"""
+                    DELETE FROM dsi_pending_serp_keys p
+                    WHERE p.created_at < NOW() - INTERVAL '{STALE_PENDING_INTERVAL}'
+                      AND NOT EXISTS (
+                          SELECT 1 FROM dsi_incremental_state st
+                          WHERE st.scope = 'pipeline:' || p.pipeline_execution_id
+                      )
+                """)
+
+        stats['changed'] = bool(
+            stats['pipeline_rebuilt'] or stats['domains_rebuilt']
+            or stats['serp_keys_refreshed'] or stats['domains_refreshed']
+            or stats['companies_changed']
+        )
+        logger.info(
+            f"📈 Incremental DSI refresh for {pipeline_id}: "
+            f"{'rebuilt' if stats['pipeline_rebuilt'] else str(stats['serp_keys_refreshed']) + ' SERP keys'}, "
+            f"{'rebuilt' if stats['domains_rebuilt'] else str(stats['domains_refreshed']) + ' domains'}"
+        )
+        return stats
+
+    async def refresh_domain_scores(self) -> Dict[str, Any]:
+        """Bring domain_dimension_scores / domain_content_stats up to date (no pipeline aggregates)"""
+        await self._ensure_schema()
+        stats = {'domains_rebuilt': False, 'domains_refreshed': 0}
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('dsi_incremental_refresh'))")
+                await self._refresh_domains(conn, stats)
+        return stats
+
+    async def invalidate(self, pipeline_id: Optional[str] = None) -> None:
+        """Force the next refresh to rebuild a pipeline (or every pipeline and the domain rollups)"""
+        await self._ensure_schema()
+        async with self.db.acquire() as conn:
+            if pipeline_id:
+                await conn.execute("DELETE FROM dsi_incremental_state WHERE scope = $1", f"pipeline:{pipeline_id}")
+            else:
+                await conn.execute("DELETE FROM dsi_incremental_state")
+
+    async def _refresh_domains(self, conn, stats: Dict[str, Any]) -> None:
+        built = await conn.fetchval("SELECT 1 FROM dsi_incremental_state WHERE scope = $1", DOMAIN_DIMENSIONS_SCOPE)
+        if not built:
+            await conn.execute("DELETE FROM dsi_pending_analysis_urls")
+            await conn.execute("DELETE FROM domain_dimension_scores")
+            await conn.execute("DELETE FROM domain_content_stats")
+            await conn.execute(_DOMAIN_DIMENSIONS_SQL.format(domain_filter=''))
+            await conn.execute(_DOMAIN_CONTENT_STATS_SQL.format(domain_filter=''))
+            await self._mark_built(conn, DOMAIN_DIMENSIONS_SCOPE)
+            stats['domains_rebuilt'] = True
+            return
+
+        rows = await conn.fetch("DELETE FROM dsi_pending_analysis_urls RETURNING url")
+        if not rows:
+            return
+        urls = [row['url'] for row in rows]
+
+        domains = [row['domain'] for row in await conn.fetch(
+            "SELECT DISTINCT domain FROM scraped_content WHERE url = ANY($1::text[]) AND domain IS NOT NULL",
+            urls
+        )]
+        if domains:
+            domain_filter = "\n      AND sc.domain = ANY($1::text[])"
+            await conn.execute("DELETE FROM domain_dimension_scores WHERE domain = ANY($1::text[])", domains)
+            await conn.execute("DELETE FROM domain_content_stats WHERE domain = ANY($1::text[])", domains)
+            await conn.execute(_DOMAIN_DIMENSIONS_SQL.format(domain_filter=domain_filter), domains)
+            await conn.execute(_DOMAIN_CONTENT_STATS_SQL.format(domain_filter=domain_filter), domains)
+            stats['domains_refreshed'] = len(domains)
+
+        # Video aggregates carry per-URL persona sums: requeue the keys that rank these URLs
+        await conn.execute("""
+            INSERT INTO dsi_pending_serp_keys (pipeline_execution_id, serp_type, keyword_id)
+            SELECT DISTINCT pipeline_execution_id, serp_type, keyword_id
+            FROM dsi_keyword_aggregates
+            WHERE serp_type = 'video' AND urls && $1::text[]
+            ON CONFLICT DO NOTHING
+        """, urls)
+
+    async def _refresh_pipeline(self, conn, pipeline_id: str, stats: Dict[str, Any]) -> None:
+        scope = f"pipeline:{pipeline_id}"
+        built = await conn.fetchval("SELECT 1 FROM dsi_incremental_state WHERE scope = $1", scope)
+        if not built:
+            await conn.execute("DELETE FROM dsi_pending_serp_keys WHERE pipeline_execution_id = $1", pipeline_id)
+            await conn.execute("DELETE FROM dsi_keyword_aggregates WHERE pipeline_execution_id = $1", pipeline_id)
+            await conn.execute(_SERP_AGGREGATE_SQL.format(ctr=CTR_CASE_SQL, key_filter=''), pipeline_id)
+            await conn.execute(_VIDEO_AGGREGATE_SQL.format(key_filter=''), pipeline_id)
+            await self._mark_built(conn, scope)
+            stats['pipeline_rebuilt'] = True
+            return
+
+        # Company enrichment since the last refresh: rebuild the video attribution
+        companies_changed = await conn.fetchval("""
+            SELECT 1 FROM dsi_input_changes c, dsi_incremental_state st
+            WHERE c.source = 'companies' AND st.scope = $1 AND c.changed_at > st.refreshed_at
+        """, scope)
+        if companies_changed:
+            await conn.execute(
+                "DELETE FROM dsi_keyword_aggregates WHERE pipeline_execution_id = $1 AND serp_type = 'video'",
+                pipeline_id
+            )
+            await conn.execute(_VIDEO_AGGREGATE_SQL.format(key_filter=''), pipeline_id)
+            stats['companies_changed'] = True
+
+        rows = await conn.fetch("""
+            DELETE FROM dsi_pending_serp_keys
+            WHERE pipeline_execution_id = $1
+            RETURNING serp_type, keyword_id
+        """, pipeline_id)
+        if not rows:
+            if companies_changed:
+                await conn.execute(
+                    "UPDATE dsi_incremental_state SET refreshed_at = NOW() WHERE scope = $1", scope
+                )
+            return
+
+        serp_types = [row['serp_type'] for row in rows]
+        keyword_ids = [row['keyword_id'] for row in rows]
+        await conn.execute("""
+            DELETE FROM dsi_keyword_aggregates a
+            USING unnest($2::text[], $3::text[]) AS changed(serp_type, keyword_id)
+            WHERE a.pipeline_execution_id = $1
+              AND a.serp_type = changed.serp_type
+              AND a.keyword_id = changed.keyword_id
+        """, pipeline_id, serp_types, keyword_ids)
+        await conn.execute(
+            _SERP_AGGREGATE_SQL.format(ctr=CTR_CASE_SQL, key_filter=_KEY_FILTER_SQL),
+            pipeline_id, serp_types, keyword_ids
+        )
+        await conn.execute(
+            _VIDEO_AGGREGATE_SQL.format(key_filter=_KEY_FILTER_SQL),
+            pipeline_id, serp_types, keyword_ids
+        )
+        await conn.execute(
+            "UPDATE dsi_incremental_state SET refreshed_at = NOW() WHERE scope = $1", scope
+        )
+        stats['serp_keys_refreshed'] = len(rows)
+
+    @staticmethod
+    async def _mark_built(conn, scope: str) -> None:
+        await conn.execute("""
+            INSERT INTO dsi_incremental_state (scope, built_at, refreshed_at)
+            VALUES ($1, NOW(), NOW())
+            ON CONFLICT (scope) DO UPDATE SET built_at = NOW(), refreshed_at = NOW()
+        """, scope)
+
+    async def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                # Serialize with other workers creating the same triggers
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('dsi_incremental_schema'))")
+                await conn.execute(INCREMENTAL_DSI_SCHEMA_SQL)
+                for table, function in _CHANGE_TRIGGERS:
+                    await self._ensure_change_triggers(conn, table, function)
+        self._schema_ready = True
+
+    @staticmethod
+    async def _ensure_change_triggers(conn, table: str, function: str) -> None:
+        if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", table):
+            logger.debug(f"Incremental DSI: {table} does not exist yet, not tracking it")
+            return
+        # Transition tables need one trigger per event
+        for event, transition in (('INSERT', 'NEW'), ('UPDATE', 'NEW'), ('DELETE', 'OLD')):
+            name = f"{function}_{event.lower()}"
+            exists = await conn.fetchval(
+                "SELECT 1 FROM pg_trigger WHERE tgname = $1 AND tgrelid = to_regclass($2)",
+                name, table
+            )
+            if exists:
+                continue
+            await conn.execute(f"""
+                CREATE TRIGGER {name}
+                AFTER {event} ON {table}
+                REFERENCING {transition} TABLE AS changed_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION {function}()
+            """)
@@ -2,6 +2,7 @@
 Simplified DSI Calculator that works with current database schema
 """
 import asyncio
+import hashlib
 import json
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
@@ -10,6 +11,13 @@ from loguru import logger
 
 from app.core.config import Settings
 from app.core.database import DatabasePool
+from app.services.metrics.dsi_engine import ctr_case_sql
+from app.services.metrics.dsi_snapshot_writer import DSISnapshotWriter
+from app.services.metrics.incremental_dsi import IncrementalDSIEngine
+
+# Shared CTR curve (position -> click-through rate) rendered for each table alias
+_CTR_S = ctr_case_sql('s.position')
+_CTR_SR = ctr_case_sql('sr.position')
 
 
 class SimplifiedDSICalculator:
@@ -18,6 +26,8 @@ class SimplifiedDSICalculator:
     def __init__(self, settings: Settings, db: DatabasePool):
         self.settings = settings
         self.db = db
+        self.incremental = IncrementalDSIEngine(db)
+        self.snapshot_writer = DSISnapshotWriter(db)
         
     async def calculate_dsi_rankings(self, pipeline_id: Optional[str] = None) -> Dict[str, Any]:
         """Calculate DSI rankings for all data or specific pipeline"""
@@ -25,8 +35,13 @@ class SimplifiedDSICalculator:
             # Store pipeline_id for use in queries
             self.current_pipeline_id = pipeline_id
             
-            # Calculate organic search DSI
-            organic_dsi = await self._calculate_organic_dsi()
+            # Pipeline runs derive company DSI from incrementally maintained aggregates
+            refresh = None
+            if pipeline_id and getattr(self.settings, 'DSI_INCREMENTAL_ENABLED', True):
+                refresh, organic_dsi, news_dsi, youtube_dsi = await self.incremental.rankings(pipeline_id)
+            else:
+                # Calculate organic search DSI
+                organic_dsi = await self._calculate_organic_dsi()
             
             # Calculate page-level DSI for all SERP types if pipeline_id provided
             page_dsi = []
@@ -39,15 +54,20 @@ class SimplifiedDSICalculator:
                 video_pages = await self._calculate_page_dsi(pipeline_id, 'video')
                 page_dsi = organic_pages + news_pages + video_pages
             
-            # Calculate news DSI
-            news_dsi = await self._calculate_news_dsi()
-            
-            # Calculate YouTube DSI  
-            youtube_dsi = await self._calculate_youtube_dsi()
+            if refresh is None:
+                # Calculate news DSI
+                news_dsi = await self._calculate_news_dsi()
+                
+                # Calculate YouTube DSI  
+                youtube_dsi = await self._calculate_youtube_dsi()
             
             # Store DSI scores in database if pipeline_id provided
             if pipeline_id:
-                await self._store_dsi_scores(pipeline_id, organic_dsi, news_dsi, youtube_dsi)
+                # Nothing changed since the last run: the stored scores are still current
+                if refresh is None or refresh['changed'] or not await self._has_dsi_scores(pipeline_id):
+                    await self._store_dsi_scores(pipeline_id, organic_dsi, news_dsi, youtube_dsi)
+                else:
+                    logger.info(f"DSI inputs unchanged for pipeline {pipeline_id}, keeping stored scores")
                 # Also store page-level data
                 if organic_pages:
                     await self._store_page_dsi_scores(pipeline_id, organic_pages, source_type='organic')
@@ -80,6 +100,9 @@ class SimplifiedDSICalculator:
     
     async def _calculate_organic_dsi(self) -> List[Dict[str, Any]]:
         """Calculate organic search DSI with proper CTR curves"""
+        # Bring the per-domain analysis rollup up to date before joining it
+        await self.incremental.refresh_domain_scores()
+        
         pipeline_filter = ""
         if hasattr(self, 'current_pipeline_id') and self.current_pipeline_id:
             pipeline_filter = f"AND s.pipeline_execution_id = '{self.current_pipeline_id}'"
@@ -96,37 +119,9 @@ class SimplifiedDSICalculator:
                     k.keyword,
                     k.avg_monthly_searches,
                     -- Industry-standard CTR curve based on 2024 data
-                    CASE 
-                        WHEN s.position = 1 THEN 0.2823  -- 28.23%
-                        WHEN s.position = 2 THEN 0.1572  -- 15.72%
-                        WHEN s.position = 3 THEN 0.1073  -- 10.73%
-                        WHEN s.position = 4 THEN 0.0775  -- 7.75%
-                        WHEN s.position = 5 THEN 0.0588  -- 5.88%
-                        WHEN s.position = 6 THEN 0.0459  -- 4.59%
-                        WHEN s.position = 7 THEN 0.0369  -- 3.69%
-                        WHEN s.position = 8 THEN 0.0302  -- 3.02%
-                        WHEN s.position = 9 THEN 0.0252  -- 2.52%
-                        WHEN s.position = 10 THEN 0.0214 -- 2.14%
-                        WHEN s.position <= 20 THEN 0.0150 -- 1.5% for positions 11-20
-                        WHEN s.position <= 30 THEN 0.0080 -- 0.8% for positions 21-30
-                        ELSE 0.0050 -- 0.5% for positions 31+
-                    END as estimated_ctr,
+                    {_CTR_S} as estimated_ctr,
                     -- ESTIMATED TRAFFIC = Search Volume × CTR
-                    COALESCE(k.avg_monthly_searches, 1000) * CASE 
-                        WHEN s.position = 1 THEN 0.2823
-                        WHEN s.position = 2 THEN 0.1572
-                        WHEN s.position = 3 THEN 0.1073
-                        WHEN s.position = 4 THEN 0.0775
-                        WHEN s.position = 5 THEN 0.0588
-                        WHEN s.position = 6 THEN 0.0459
-                        WHEN s.position = 7 THEN 0.0369
-                        WHEN s.position = 8 THEN 0.0302
-                        WHEN s.position = 9 THEN 0.0252
-                        WHEN s.position = 10 THEN 0.0214
-                        WHEN s.position <= 20 THEN 0.0150
-                        WHEN s.position <= 30 THEN 0.0080
-                        ELSE 0.0050
-                    END as estimated_traffic
+                    COALESCE(k.avg_monthly_searches, 1000) * {_CTR_S} as estimated_traffic
                 FROM serp_results s
                 JOIN keywords k ON s.keyword_id = k.id
                 WHERE s.serp_type = 'organic'
@@ -153,50 +148,12 @@ class SimplifiedDSICalculator:
                     COUNT(CASE WHEN s.position <= 10 THEN 1 END) as top_10_count,
                     -- CORRECTED: Use estimated traffic (Search Volume × CTR)
                     SUM(s.estimated_traffic) as total_estimated_traffic,
-                    -- ENHANCED: Aggregate page-level analysis data
-                    COALESCE(
-                        (SELECT AVG(CAST(oda.score AS FLOAT))
-                         FROM optimized_content_analysis oca
-                         JOIN optimized_dimension_analysis oda ON oca.id = oda.analysis_id
-                         JOIN scraped_content sc ON oca.url = sc.url
-                         WHERE sc.domain = COALESCE(dcm.original_domain, MIN(s.domain))
-                         AND oda.dimension_type = 'persona'
-                        ), 5.0  -- Default persona score (1-10 scale)
-                    ) as persona_score,
-                    -- Strategic Imperatives aggregate scores
-                    COALESCE(
-                        (SELECT AVG(CAST(oda.score AS FLOAT))
-                         FROM optimized_content_analysis oca
-                         JOIN optimized_dimension_analysis oda ON oca.id = oda.analysis_id
-                         JOIN scraped_content sc ON oca.url = sc.url
-                         WHERE sc.domain = COALESCE(dcm.original_domain, MIN(s.domain))
-                         AND oda.dimension_type = 'strategic_imperative'
-                        ), 5.0
-                    ) as strategic_imperative_score,
-                    -- JTBD aggregate scores
-                    COALESCE(
-                        (SELECT AVG(CAST(oda.score AS FLOAT))
-                         FROM optimized_content_analysis oca
-                         JOIN optimized_dimension_analysis oda ON oca.id = oda.analysis_id
-                         JOIN scraped_content sc ON oca.url = sc.url
-                         WHERE sc.domain = COALESCE(dcm.original_domain, MIN(s.domain))
-                         AND oda.dimension_type = 'jtbd_phase'
-                        ), 5.0
-                    ) as jtbd_score,
+                    -- Domain whose analysis rollup (domain_dimension_scores) applies to this company
+                    COALESCE(dcm.original_domain, MIN(s.domain)) as relevance_domain,
                     -- Sentiment analysis aggregates
                     COUNT(CASE WHEN oca.overall_sentiment = 'positive' THEN 1 END) as positive_content_count,
                     COUNT(CASE WHEN oca.overall_sentiment = 'neutral' THEN 1 END) as neutral_content_count,
                     COUNT(CASE WHEN oca.overall_sentiment = 'negative' THEN 1 END) as negative_content_count,
-                    -- Mention analysis aggregates
-                    COALESCE(
-                        (SELECT COUNT(*)
-                         FROM optimized_content_analysis oca
-                         JOIN scraped_content sc ON oca.url = sc.url
-                         WHERE sc.domain = COALESCE(dcm.original_domain, MIN(s.domain))
-                         AND oca.mentions IS NOT NULL 
-                         AND jsonb_array_length(oca.mentions) > 0
-                        ), 0
-                    ) as pages_with_mentions,
                     -- Company enrichment details
                     cp.industry,
                     cp.employee_count,
@@ -224,6 +181,31 @@ class SimplifiedDSICalculator:
                     COUNT(DISTINCT s.domain) as total_domains,
                     SUM(s.estimated_traffic) as total_market_traffic
                 FROM serp_data s
+            ),
+            domain_relevance AS (
+                -- Pre-aggregated page analysis per domain (persona, strategic imperative, JTBD, mentions)
+                SELECT 
+                    rd.relevance_domain,
+                    COALESCE(
+                        SUM(dds.score_sum) FILTER (WHERE dds.dimension_type = 'persona')
+                        / NULLIF(SUM(dds.score_count) FILTER (WHERE dds.dimension_type = 'persona'), 0),
+                        5.0  -- Default persona score (1-10 scale)
+                    ) as persona_score,
+                    COALESCE(
+                        SUM(dds.score_sum) FILTER (WHERE dds.dimension_type = 'strategic_imperative')
+                        / NULLIF(SUM(dds.score_count) FILTER (WHERE dds.dimension_type = 'strategic_imperative'), 0),
+                        5.0
+                    ) as strategic_imperative_score,
+                    COALESCE(
+                        SUM(dds.score_sum) FILTER (WHERE dds.dimension_type = 'jtbd_phase')
+                        / NULLIF(SUM(dds.score_count) FILTER (WHERE dds.dimension_type = 'jtbd_phase'), 0),
+                        5.0
+                    ) as jtbd_score,
+                    COALESCE(MAX(dcs.pages_with_mentions), 0) as pages_with_mentions
+                FROM (SELECT DISTINCT relevance_domain FROM company_metrics) rd
+                LEFT JOIN domain_dimension_scores dds ON dds.domain = rd.relevance_domain
+                LEFT JOIN domain_content_stats dcs ON dcs.domain = rd.relevance_domain
+                GROUP BY rd.relevance_domain
             )
             SELECT 
                 cm.company_name,
@@ -246,13 +228,13 @@ class SimplifiedDSICalculator:
                 cm.company_source_type,
                 cm.enrichment_confidence,
                 -- ENHANCED: Aggregate Page-Level Analysis Data
-                ROUND(cm.persona_score::numeric, 2) as avg_persona_score,
-                ROUND(cm.strategic_imperative_score::numeric, 2) as avg_strategic_imperative_score,
-                ROUND(cm.jtbd_score::numeric, 2) as avg_jtbd_score,
+                ROUND(COALESCE(dr.persona_score, 5.0)::numeric, 2) as avg_persona_score,
+                ROUND(COALESCE(dr.strategic_imperative_score, 5.0)::numeric, 2) as avg_strategic_imperative_score,
+                ROUND(COALESCE(dr.jtbd_score, 5.0)::numeric, 2) as avg_jtbd_score,
                 cm.positive_content_count,
                 cm.neutral_content_count,
                 cm.negative_content_count,
-                cm.pages_with_mentions,
+                COALESCE(dr.pages_with_mentions, 0) as pages_with_mentions,
                 -- Calculated sentiment distribution
                 ROUND(
                     (cm.positive_content_count::float / NULLIF(cm.page_count, 0) * 100)::numeric, 1
@@ -272,18 +254,19 @@ class SimplifiedDSICalculator:
                     (cm.total_estimated_traffic / NULLIF(mt.total_market_traffic, 0) * 100)::numeric,
                     2
                 ) as traffic_share_pct,
-                ROUND(cm.persona_score::numeric, 2) as persona_relevance,
+                ROUND(COALESCE(dr.persona_score, 5.0)::numeric, 2) as persona_relevance,
                 -- ORGANIC DSI FORMULA: Keyword Coverage × Share of Traffic × Personal Relevance (full formula)
                 ROUND(
                     (
                         (cm.keyword_count::float / mt.total_keywords * 100) *
                         (cm.total_estimated_traffic / NULLIF(mt.total_market_traffic, 0) * 100) *
-                        (cm.persona_score / 10.0)  -- Normalize 1-10 scale to 0-1
+                        (COALESCE(dr.persona_score, 5.0) / 10.0)  -- Normalize 1-10 scale to 0-1
                     )::numeric,
                     2
                 ) as dsi_score
             FROM company_metrics cm
             CROSS JOIN market_totals mt
+            LEFT JOIN domain_relevance dr ON dr.relevance_domain = cm.relevance_domain
             WHERE cm.keyword_count >= 1  -- Include any company with at least 1 keyword
             ORDER BY dsi_score DESC, cm.keyword_count DESC
         """
@@ -365,7 +348,7 @@ class SimplifiedDSICalculator:
             results = await self.db.fetch(query, pipeline_id)
             return [dict(row) for row in results]
 
-        query = """
+        query = f"""
             WITH page_serp_data AS (
                 SELECT 
                     sr.url,
@@ -376,20 +359,7 @@ class SimplifiedDSICalculator:
                     k.keyword as keyword_text,
                     k.avg_monthly_searches,
                     -- Industry-standard CTR curve for traffic estimation
-                    COALESCE(k.avg_monthly_searches, 1000) * CASE 
-                        WHEN sr.position = 1 THEN 0.2823
-                        WHEN sr.position = 2 THEN 0.1572
-                        WHEN sr.position = 3 THEN 0.1073
-                        WHEN sr.position = 4 THEN 0.0775
-                        WHEN sr.position = 5 THEN 0.0588
-                        WHEN sr.position = 6 THEN 0.0459
-                        WHEN sr.position = 7 THEN 0.0369
-                        WHEN sr.position = 8 THEN 0.0302
-                        WHEN sr.position = 9 THEN 0.0252
-                        WHEN sr.position = 10 THEN 0.0214
-                        WHEN sr.position <= 20 THEN 0.0150
-                        ELSE 0.0050
-                    END as estimated_traffic
+                    COALESCE(k.avg_monthly_searches, 1000) * {_CTR_SR} as estimated_traffic
                 FROM serp_results sr
                 LEFT JOIN keywords k ON k.id = sr.keyword_id
                 WHERE sr.serp_type = $2
@@ -554,7 +524,7 @@ class SimplifiedDSICalculator:
                 logger.info(f"Calculating page DSI for landscape '{landscape_name}' with {len(keyword_ids)} keywords")
                 
                 # Landscape-specific page DSI query (based on _calculate_page_dsi but filtered by landscape keywords)
-                query = """
+                query = f"""
                     WITH page_serp_data AS (
                         SELECT 
                             sr.url,
@@ -565,20 +535,7 @@ class SimplifiedDSICalculator:
                             k.keyword as keyword_text,
                             k.avg_monthly_searches,
                             -- Industry-standard CTR curve for traffic estimation
-                            COALESCE(k.avg_monthly_searches, 1000) * CASE 
-                                WHEN sr.position = 1 THEN 0.2823
-                                WHEN sr.position = 2 THEN 0.1572
-                                WHEN sr.position = 3 THEN 0.1073
-                                WHEN sr.position = 4 THEN 0.0775
-                                WHEN sr.position = 5 THEN 0.0588
-                                WHEN sr.position = 6 THEN 0.0459
-                                WHEN sr.position = 7 THEN 0.0369
-                                WHEN sr.position = 8 THEN 0.0302
-                                WHEN sr.position = 9 THEN 0.0252
-                                WHEN sr.position = 10 THEN 0.0214
-                                WHEN sr.position <= 20 THEN 0.0150
-                                ELSE 0.0050
-                            END as estimated_traffic
+                            COALESCE(k.avg_monthly_searches, 1000) * {_CTR_SR} as estimated_traffic
                         FROM serp_results sr
                         LEFT JOIN keywords k ON k.id = sr.keyword_id
                         WHERE sr.serp_type IN ('organic', 'news')  -- Focus on content pages
@@ -720,60 +677,32 @@ class SimplifiedDSICalculator:
             return 0
             
         try:
-            async with self.db.acquire() as conn:
-                stored_count = 0
-                for rank, page in enumerate(page_dsi, 1):
-                    # Get company name from domain
-                    company_name = None
-                    async with self.db.acquire() as conn2:
-                        company_result = await conn2.fetchrow("""
-                            SELECT company_name FROM company_profiles 
-                            WHERE domain = $1 OR domain = $2
-                            LIMIT 1
-                        """, page['domain'], page['domain'].replace('www.', '') if page['domain'].startswith('www.') else f"www.{page['domain']}")
-                        company_name = company_result['company_name'] if company_result else page['domain']
-                    
-                    # Generate UUID from URL for consistent entity_id
-                    import hashlib
-                    url_hash = hashlib.md5(page['url'].encode()).hexdigest()
-                    page_entity_id = f"{url_hash[:8]}-{url_hash[8:12]}-{url_hash[12:16]}-{url_hash[16:20]}-{url_hash[20:32]}"
-                    
-                    await conn.execute("""
-                        INSERT INTO landscape_dsi_metrics (
-                            landscape_id, calculation_date, entity_type, entity_id, entity_name,
-                            entity_domain, entity_url, unique_keywords, unique_pages,
-                            keyword_coverage, estimated_traffic, traffic_share, persona_alignment,
-                            funnel_value, dsi_score, rank_in_landscape, total_entities_in_landscape,
-                            market_position
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18)
-                        ON CONFLICT (landscape_id, calculation_date, entity_type, entity_id)
-                        DO UPDATE SET 
-                            unique_keywords = EXCLUDED.unique_keywords,
-                            estimated_traffic = EXCLUDED.estimated_traffic,
-                            traffic_share = EXCLUDED.traffic_share,
-                            persona_alignment = EXCLUDED.persona_alignment,
-                            dsi_score = EXCLUDED.dsi_score,
-                            rank_in_landscape = EXCLUDED.rank_in_landscape,
-                            created_at = NOW()
-                    """,
-                        landscape_id, datetime.now().date(), 'page', 
-                        page_entity_id,  # Use generated UUID
-                        page['title'][:255] if page['title'] else '',
-                        page['domain'], page['url'],
-                        page['keyword_count'], 1,  # unique_pages = 1 for individual page
-                        float(page['keyword_coverage_pct']) / 100.0,  # Convert to 0-1 scale
-                        int(page['total_estimated_traffic']),
-                        float(page['traffic_share_pct']) / 100.0,  # Convert to 0-1 scale  
-                        float(page['persona_relevance']) / 10.0,  # Convert to 0-1 scale
-                        0.5,  # funnel_value - could be derived from content analysis
-                        page['dsi_score'],
-                        rank, len(page_dsi),  # rank and total in this landscape
-                        'leader' if rank <= 10 else 'challenger' if rank <= 50 else 'competitor' if rank <= 200 else 'niche'
-                    )
-                    stored_count += 1
+            calculation_date = datetime.now().date()
+            records = []
+            for rank, page in enumerate(page_dsi, 1):
+                # Generate UUID from URL for consistent entity_id
+                url_hash = hashlib.md5(page['url'].encode()).hexdigest()
+                page_entity_id = f"{url_hash[:8]}-{url_hash[8:12]}-{url_hash[12:16]}-{url_hash[16:20]}-{url_hash[20:32]}"
                 
-                logger.info(f"Stored {stored_count} landscape page DSI snapshots for {landscape_name}")
-                return stored_count
+                records.append((
+                    landscape_id, calculation_date, 'page', 
+                    page_entity_id,  # Use generated UUID
+                    page['title'][:255] if page['title'] else '',
+                    page['domain'], page['url'],
+                    page['keyword_count'], 1,  # unique_pages = 1 for individual page
+                    float(page['keyword_coverage_pct']) / 100.0,  # Convert to 0-1 scale
+                    int(page['total_estimated_traffic']),
+                    float(page['traffic_share_pct']) / 100.0,  # Convert to 0-1 scale  
+                    float(page['persona_relevance']) / 10.0,  # Convert to 0-1 scale
+                    0.5,  # funnel_value - could be derived from content analysis
+                    float(page['dsi_score']),
+                    rank, len(page_dsi),  # rank and total in this landscape
+                    'leader' if rank <= 10 else 'challenger' if rank <= 50 else 'competitor' if rank <= 200 else 'niche'
+                ))
+            
+            stored_count = await self.snapshot_writer.write_landscape_metrics(records)
+            logger.info(f"Stored {stored_count} landscape page DSI snapshots for {landscape_name}")
+            return stored_count
                 
         except Exception as e:
             logger.error(f"Failed to store landscape page DSI for {landscape_name}: {e}")
@@ -853,7 +782,7 @@ class SimplifiedDSICalculator:
         try:
             async with self.db.acquire() as conn:
                 # Get comprehensive keyword metrics for this landscape
-                keyword_metrics = await conn.fetch("""
+                keyword_metrics = await conn.fetch(f"""
                     WITH landscape_keywords AS (
                         SELECT k.id, k.keyword, k.category, k.jtbd_stage, k.is_brand,
                                k.persona_score, k.seo_score, k.composite_score, k.client_score,
@@ -876,20 +805,7 @@ class SimplifiedDSICalculator:
                             COUNT(CASE WHEN sr.serp_type = 'news' THEN 1 END) as news_results,
                             COUNT(CASE WHEN sr.serp_type = 'video' THEN 1 END) as video_results,
                             -- Calculate estimated traffic using CTR curve
-                            SUM(COALESCE(k.avg_monthly_searches, 1000) * CASE 
-                                WHEN sr.position = 1 THEN 0.2823
-                                WHEN sr.position = 2 THEN 0.1572
-                                WHEN sr.position = 3 THEN 0.1073
-                                WHEN sr.position = 4 THEN 0.0775
-                                WHEN sr.position = 5 THEN 0.0588
-                                WHEN sr.position = 6 THEN 0.0459
-                                WHEN sr.position = 7 THEN 0.0369
-                                WHEN sr.position = 8 THEN 0.0302
-                                WHEN sr.position = 9 THEN 0.0252
-                                WHEN sr.position = 10 THEN 0.0214
-                                WHEN sr.position <= 20 THEN 0.0150
-                                ELSE 0.0050
-                            END) as estimated_traffic
+                            SUM(COALESCE(k.avg_monthly_searches, 1000) * {_CTR_SR}) as estimated_traffic
                         FROM serp_results sr
                         JOIN keywords k ON sr.keyword_id = k.id
                         WHERE sr.search_date >= CURRENT_DATE - INTERVAL '30 days'
@@ -986,45 +902,29 @@ class SimplifiedDSICalculator:
             return 0
             
         try:
-            async with self.db.acquire() as conn:
-                stored_count = 0
-                for rank, keyword in enumerate(keyword_dsi, 1):
-                    await conn.execute("""
-                        INSERT INTO landscape_dsi_metrics (
-                            landscape_id, calculation_date, entity_type, entity_id, entity_name,
-                            entity_domain, unique_keywords, unique_pages,
-                            keyword_coverage, estimated_traffic, traffic_share, persona_alignment,
-                            funnel_value, dsi_score, rank_in_landscape, total_entities_in_landscape,
-                            market_position
-                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17)
-                        ON CONFLICT (landscape_id, calculation_date, entity_type, entity_id)
-                        DO UPDATE SET 
-                            unique_keywords = 1,
-                            estimated_traffic = EXCLUDED.estimated_traffic,
-                            traffic_share = EXCLUDED.traffic_share,
-                            persona_alignment = EXCLUDED.persona_alignment,
-                            dsi_score = EXCLUDED.dsi_score,
-                            rank_in_landscape = EXCLUDED.rank_in_landscape,
-                            created_at = NOW()
-                    """,
-                        landscape_id, datetime.now().date(), 'keyword',
-                        str(keyword['keyword_id']),  # Use keyword ID as entity_id
-                        keyword['keyword'],  # keyword text as entity_name
-                        '',  # no specific domain for keywords
-                        1, keyword['analyzed_pages'],  # unique_keywords=1, pages=analyzed_pages
-                        keyword['total_serp_results'] / 100.0 if keyword['total_serp_results'] else 0,  # keyword coverage
-                        int(keyword['estimated_traffic']),
-                        keyword['estimated_traffic'] / max(1, keyword['avg_monthly_searches']) if keyword['avg_monthly_searches'] else 0,  # traffic efficiency 
-                        float(keyword['avg_persona_score']) / 10.0,  # persona alignment 0-1
-                        float(keyword['avg_strategic_score']) / 10.0,  # funnel value from strategic score
-                        keyword['keyword_dsi_score'] or 0.0,  # Ensure no null values
-                        rank, len(keyword_dsi),  # rank and total
-                        'leader' if rank <= 5 else 'challenger' if rank <= 20 else 'competitor' if rank <= 50 else 'niche'
-                    )
-                    stored_count += 1
-                
-                logger.info(f"Stored {stored_count} landscape keyword DSI snapshots for {landscape_name}")
-                return stored_count
+            calculation_date = datetime.now().date()
+            records = []
+            for rank, keyword in enumerate(keyword_dsi, 1):
+                records.append((
+                    landscape_id, calculation_date, 'keyword',
+                    str(keyword['keyword_id']),  # Use keyword ID as entity_id
+                    keyword['keyword'],  # keyword text as entity_name
+                    '',  # no specific domain for keywords
+                    None,  # no entity_url for keywords
+                    1, keyword['analyzed_pages'],  # unique_keywords=1, pages=analyzed_pages
+                    keyword['total_serp_results'] / 100.0 if keyword['total_serp_results'] else 0,  # keyword coverage
+                    int(keyword['estimated_traffic']),
+                    keyword['estimated_traffic'] / max(1, keyword['avg_monthly_searches']) if keyword['avg_monthly_searches'] else 0,  # traffic efficiency 
+                    float(keyword['avg_persona_score']) / 10.0,  # persona alignment 0-1
+                    float(keyword['avg_strategic_score']) / 10.0,  # funnel value from strategic score
+                    float(keyword['keyword_dsi_score'] or 0.0),  # Ensure no null values
+                    rank, len(keyword_dsi),  # rank and total
+                    'leader' if rank <= 5 else 'challenger' if rank <= 20 else 'competitor' if rank <= 50 else 'niche'
+                ))
+            
+            stored_count = await self.snapshot_writer.write_landscape_metrics(records)
+            logger.info(f"Stored {stored_count} landscape keyword DSI snapshots for {landscape_name}")
+            return stored_count
                 
         except Exception as e:
             logger.error(f"Failed to store landscape keyword DSI for {landscape_name}: {e}")
@@ -1344,248 +1244,175 @@ class SimplifiedDSICalculator:
             insights=[]
         )
     
+    async def _has_dsi_scores(self, pipeline_id: str) -> bool:
+        async with self.db.acquire() as conn:
+            return bool(await conn.fetchval(
+                "SELECT 1 FROM dsi_scores WHERE pipeline_execution_id = $1 LIMIT 1", pipeline_id
+            ))
+    
     async def _store_dsi_scores(self, pipeline_id: str, organic_dsi: List[Dict], news_dsi: List[Dict], youtube_dsi: List[Dict]):
         """Store DSI scores in the database"""
-        async with self.db.acquire() as conn:
-            # Clear existing scores for this pipeline
-            await conn.execute("DELETE FROM dsi_scores WHERE pipeline_execution_id = $1", pipeline_id)
+        records = []
+        # Store organic DSI scores with comprehensive company and analysis data
+        for item in organic_dsi:
+            # Normalize DSI score (percentage → 0..1)
+            raw_dsi = float(item.get('dsi_score') or 0)
+            dsi_score = max(0.0, min(1.0, raw_dsi / 100.0))
+            keyword_coverage = float(item.get('keyword_coverage_pct') or 0) / 100
+            traffic_share = float(item.get('traffic_share_pct') or 0) / 100
+            persona_relevance = float(item.get('persona_relevance') or 5.0) / 10
             
-            # Store organic DSI scores with comprehensive company and analysis data
-            for item in organic_dsi:
-                # Normalize DSI score (percentage → 0..1)
-                raw_dsi = float(item.get('dsi_score') or 0)
-                dsi_score = max(0.0, min(1.0, raw_dsi / 100.0))
-                keyword_coverage = float(item.get('keyword_coverage_pct') or 0) / 100
-                traffic_share = float(item.get('traffic_share_pct') or 0) / 100
-                persona_relevance = float(item.get('persona_relevance') or 5.0) / 10
-                
-                serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
-                await conn.execute("""
-                    INSERT INTO dsi_scores (
-                        pipeline_execution_id, company_domain,
-                        dsi_score, keyword_overlap_score, content_relevance_score,
-                        market_presence_score, traffic_share_score, serp_visibility_score,
-                        metadata
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    ON CONFLICT (pipeline_execution_id, company_domain)
-                    DO UPDATE SET
-                        dsi_score = GREATEST(dsi_scores.dsi_score, EXCLUDED.dsi_score),
-                        keyword_overlap_score = GREATEST(dsi_scores.keyword_overlap_score, EXCLUDED.keyword_overlap_score),
-                        content_relevance_score = GREATEST(dsi_scores.content_relevance_score, EXCLUDED.content_relevance_score),
-                        market_presence_score = GREATEST(dsi_scores.market_presence_score, EXCLUDED.market_presence_score),
-                        traffic_share_score = GREATEST(dsi_scores.traffic_share_score, EXCLUDED.traffic_share_score),
-                        serp_visibility_score = GREATEST(dsi_scores.serp_visibility_score, EXCLUDED.serp_visibility_score),
-                        metadata = dsi_scores.metadata || EXCLUDED.metadata,
-                        updated_at = NOW()
-                """, pipeline_id, item['domain'], 
-                    dsi_score,  # Your DSI formula result (0-1)
-                    keyword_coverage,  # Keyword coverage (0-1)
-                    persona_relevance,  # Content relevance from persona analysis
-                    min(1.0, float(item.get('top_10_count') or 0) / max(float(item.get('keyword_count') or 1), 1)),  # Market presence (0-1)
-                    traffic_share,  # Traffic share (0-1)
-                    serp_visibility,  # SERP visibility (0-1)
-                    json.dumps({
-                        'source': 'organic',
-                        'company_name': item.get('company_name', ''),
-                        'company_id': str(item.get('company_id', '')),
-                        # SERP Performance
-                        'avg_position': float(item.get('avg_position') or 0),
-                        'best_position': int(item.get('best_position') or 20),
-                        'keyword_count': int(item.get('keyword_count') or 0),
-                        'page_count': int(item.get('page_count') or 0),
-                        'domain_count': int(item.get('domain_count') or 1),
-                        'top_3_count': int(item.get('top_3_count') or 0),
-                        'top_10_count': int(item.get('top_10_count') or 0),
-                        'total_estimated_traffic': int(item.get('total_estimated_traffic') or 0),
-                        # Company Details
-                        'industry': item.get('industry', ''),
-                        'employee_count': item.get('employee_count', ''),
-                        'company_description': item.get('company_description', '') or '',
-                        'company_source_type': item.get('company_source_type', ''),
-                        'enrichment_confidence': float(item.get('enrichment_confidence') or 0),
-                        # Aggregate Page Analysis Data
-                        'avg_persona_score': float(item.get('avg_persona_score') or 5.0),
-                        'avg_strategic_imperative_score': float(item.get('avg_strategic_imperative_score') or 5.0),
-                        'avg_jtbd_score': float(item.get('avg_jtbd_score') or 5.0),
-                        'positive_content_count': int(item.get('positive_content_count') or 0),
-                        'neutral_content_count': int(item.get('neutral_content_count') or 0),
-                        'negative_content_count': int(item.get('negative_content_count') or 0),
-                        'pages_with_mentions': int(item.get('pages_with_mentions') or 0),
-                        'positive_sentiment_pct': float(item.get('positive_sentiment_pct') or 0),
-                        'neutral_sentiment_pct': float(item.get('neutral_sentiment_pct') or 0),
-                        'negative_sentiment_pct': float(item.get('negative_sentiment_pct') or 0),
-                        # DSI Components
-                        'keyword_coverage_pct': float(item.get('keyword_coverage_pct') or 0),
-                        'traffic_share_pct': float(item.get('traffic_share_pct') or 0)
-                    }))
+            serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
+            records.append((pipeline_id, item['domain'],
+                dsi_score,  # Your DSI formula result (0-1)
+                keyword_coverage,  # Keyword coverage (0-1)
+                persona_relevance,  # Content relevance from persona analysis
+                min(1.0, float(item.get('top_10_count') or 0) / max(float(item.get('keyword_count') or 1), 1)),  # Market presence (0-1)
+                traffic_share,  # Traffic share (0-1)
+                serp_visibility,  # SERP visibility (0-1)
+                {
+                    'source': 'organic',
+                    'company_name': item.get('company_name', ''),
+                    'company_id': str(item.get('company_id', '')),
+                    # SERP Performance
+                    'avg_position': float(item.get('avg_position') or 0),
+                    'best_position': int(item.get('best_position') or 20),
+                    'keyword_count': int(item.get('keyword_count') or 0),
+                    'page_count': int(item.get('page_count') or 0),
+                    'domain_count': int(item.get('domain_count') or 1),
+                    'top_3_count': int(item.get('top_3_count') or 0),
+                    'top_10_count': int(item.get('top_10_count') or 0),
+                    'total_estimated_traffic': int(item.get('total_estimated_traffic') or 0),
+                    # Company Details
+                    'industry': item.get('industry', ''),
+                    'employee_count': item.get('employee_count', ''),
+                    'company_description': item.get('company_description', '') or '',
+                    'company_source_type': item.get('company_source_type', ''),
+                    'enrichment_confidence': float(item.get('enrichment_confidence') or 0),
+                    # Aggregate Page Analysis Data
+                    'avg_persona_score': float(item.get('avg_persona_score') or 5.0),
+                    'avg_strategic_imperative_score': float(item.get('avg_strategic_imperative_score') or 5.0),
+                    'avg_jtbd_score': float(item.get('avg_jtbd_score') or 5.0),
+                    'positive_content_count': int(item.get('positive_content_count') or 0),
+                    'neutral_content_count': int(item.get('neutral_content_count') or 0),
+                    'negative_content_count': int(item.get('negative_content_count') or 0),
+                    'pages_with_mentions': int(item.get('pages_with_mentions') or 0),
+                    'positive_sentiment_pct': float(item.get('positive_sentiment_pct') or 0),
+                    'neutral_sentiment_pct': float(item.get('neutral_sentiment_pct') or 0),
+                    'negative_sentiment_pct': float(item.get('negative_sentiment_pct') or 0),
+                    # DSI Components
+                    'keyword_coverage_pct': float(item.get('keyword_coverage_pct') or 0),
+                    'traffic_share_pct': float(item.get('traffic_share_pct') or 0)
+                }))
+        
+        # Store news DSI scores with SERP appearances × keyword coverage × persona alignment formula
+        for item in news_dsi:
+            # Normalize DSI score (percentage → 0..1)
+            raw_news = float(item.get('news_dsi_score') or 0)
+            news_dsi_score = max(0.0, min(1.0, raw_news / 100.0))
+            # Use normalized keyword coverage from SQL (percentage)
+            keyword_coverage = float(item.get('keyword_coverage_pct') or 0)
+            serp_appearances = float(item.get('total_serp_appearances') or 0)
+            persona_alignment = float(item.get('persona_alignment') or 5.0) / 10
             
-            # Store news DSI scores with SERP appearances × keyword coverage × persona alignment formula
-            for item in news_dsi:
-                # Normalize DSI score (percentage → 0..1)
-                raw_news = float(item.get('news_dsi_score') or 0)
-                news_dsi_score = max(0.0, min(1.0, raw_news / 100.0))
-                # Use normalized keyword coverage from SQL (percentage)
-                keyword_coverage = float(item.get('keyword_coverage_pct') or 0)
-                serp_appearances = float(item.get('total_serp_appearances') or 0)
-                persona_alignment = float(item.get('persona_alignment') or 5.0) / 10
-                
-                serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
-                await conn.execute("""
-                    INSERT INTO dsi_scores (
-                        pipeline_execution_id, company_domain,
-                        dsi_score, keyword_overlap_score, content_relevance_score,
-                        market_presence_score, traffic_share_score, serp_visibility_score,
-                        metadata
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    ON CONFLICT (pipeline_execution_id, company_domain)
-                    DO UPDATE SET
-                        dsi_score = GREATEST(dsi_scores.dsi_score, EXCLUDED.dsi_score),
-                        keyword_overlap_score = GREATEST(dsi_scores.keyword_overlap_score, EXCLUDED.keyword_overlap_score),
-                        content_relevance_score = GREATEST(dsi_scores.content_relevance_score, EXCLUDED.content_relevance_score),
-                        market_presence_score = GREATEST(dsi_scores.market_presence_score, EXCLUDED.market_presence_score),
-                        traffic_share_score = GREATEST(dsi_scores.traffic_share_score, EXCLUDED.traffic_share_score),
-                        serp_visibility_score = GREATEST(dsi_scores.serp_visibility_score, EXCLUDED.serp_visibility_score),
-                        metadata = dsi_scores.metadata || EXCLUDED.metadata,
-                        updated_at = NOW()
-                """, pipeline_id, item['domain'],
-                    news_dsi_score,  # News DSI (0-1)
-                    keyword_coverage / 100,  # Keyword coverage (0-1)
-                    persona_alignment,  # Persona alignment (0-1)
-                    min(1.0, serp_appearances / 100),  # Market presence (0-1)
-                    0.0,  # No traffic share for news (not applicable)
-                    serp_visibility,  # SERP visibility (0-1)
-                    json.dumps({
-                        'source': 'news',
-                        'formula': 'SERP Appearances × Keyword Coverage × Persona Alignment',
-                        'avg_position': float(item.get('avg_position') or 0),
-                        'article_count': int(item.get('article_count') or 0),
-                        'total_serp_appearances': int(item.get('total_serp_appearances') or 0),
-                        'keyword_count': int(item.get('keyword_count') or 0),
-                        'persona_alignment': float(item.get('persona_alignment') or 5.0)
-                    }))
+            serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
+            records.append((pipeline_id, item['domain'],
+                news_dsi_score,  # News DSI (0-1)
+                keyword_coverage / 100,  # Keyword coverage (0-1)
+                persona_alignment,  # Persona alignment (0-1)
+                min(1.0, serp_appearances / 100),  # Market presence (0-1)
+                0.0,  # No traffic share for news (not applicable)
+                serp_visibility,  # SERP visibility (0-1)
+                {
+                    'source': 'news',
+                    'formula': 'SERP Appearances × Keyword Coverage × Persona Alignment',
+                    'avg_position': float(item.get('avg_position') or 0),
+                    'article_count': int(item.get('article_count') or 0),
+                    'total_serp_appearances': int(item.get('total_serp_appearances') or 0),
+                    'keyword_count': int(item.get('keyword_count') or 0),
+                    'persona_alignment': float(item.get('persona_alignment') or 5.0)
+                }))
+        
+        # Store YouTube DSI scores with SERP appearances × keyword coverage × persona alignment formula
+        for item in youtube_dsi:
+            # Normalize DSI score (percentage → 0..1)
+            raw_video = float(item.get('video_dsi_score') or 0)
+            video_dsi_score = max(0.0, min(1.0, raw_video / 100.0))
+            # Use normalized keyword coverage from SQL (percentage)
+            keyword_coverage = float(item.get('keyword_coverage_pct') or 0)
+            serp_appearances = float(item.get('total_serp_appearances') or 0)
+            persona_alignment = float(item.get('persona_alignment') or 5.0) / 10
             
-            # Store YouTube DSI scores with SERP appearances × keyword coverage × persona alignment formula
-            for item in youtube_dsi:
-                # Normalize DSI score (percentage → 0..1)
-                raw_video = float(item.get('video_dsi_score') or 0)
-                video_dsi_score = max(0.0, min(1.0, raw_video / 100.0))
-                # Use normalized keyword coverage from SQL (percentage)
-                keyword_coverage = float(item.get('keyword_coverage_pct') or 0)
-                serp_appearances = float(item.get('total_serp_appearances') or 0)
-                persona_alignment = float(item.get('persona_alignment') or 5.0) / 10
-                
-                serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
-                await conn.execute("""
-                    INSERT INTO dsi_scores (
-                        pipeline_execution_id, company_domain,
-                        dsi_score, keyword_overlap_score, content_relevance_score,
-                        market_presence_score, traffic_share_score, serp_visibility_score,
-                        metadata
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    ON CONFLICT (pipeline_execution_id, company_domain)
-                    DO UPDATE SET
-                        dsi_score = GREATEST(dsi_scores.dsi_score, EXCLUDED.dsi_score),
-                        keyword_overlap_score = GREATEST(dsi_scores.keyword_overlap_score, EXCLUDED.keyword_overlap_score),
-                        content_relevance_score = GREATEST(dsi_scores.content_relevance_score, EXCLUDED.content_relevance_score),
-                        market_presence_score = GREATEST(dsi_scores.market_presence_score, EXCLUDED.market_presence_score),
-                        traffic_share_score = GREATEST(dsi_scores.traffic_share_score, EXCLUDED.traffic_share_score),
-                        serp_visibility_score = GREATEST(dsi_scores.serp_visibility_score, EXCLUDED.serp_visibility_score),
-                        metadata = dsi_scores.metadata || EXCLUDED.metadata,
-                        updated_at = NOW()
-                """, pipeline_id, item['domain'],
-                    video_dsi_score,  # Video DSI (0-1)
-                    keyword_coverage / 100,  # Keyword coverage (0-1)
-                    persona_alignment,  # Persona alignment (0-1)
-                    min(1.0, serp_appearances / 50),  # Market presence (0-1)
-                    0.0,  # No traffic share for video (not applicable)
-                    serp_visibility,  # SERP visibility (0-1)
-                    json.dumps({
-                        'source': 'video',
-                        'formula': 'SERP Appearances × Keyword Coverage × Persona Alignment',
-                        'avg_position': float(item.get('avg_position') or 0),
-                        'video_count': int(item.get('video_count') or 0),
-                        'total_views': int(item.get('total_views') or 0),
-                        'total_serp_appearances': int(item.get('total_serp_appearances') or 0),
-                        'keyword_count': int(item.get('keyword_count') or 0),
-                        'persona_alignment': float(item.get('persona_alignment') or 5.0)
-                    }))
+            serp_visibility = max(0.0, min(1.0, 1.0 - (float(item.get('avg_position') or 20) / 20)))
+            records.append((pipeline_id, item['domain'],
+                video_dsi_score,  # Video DSI (0-1)
+                keyword_coverage / 100,  # Keyword coverage (0-1)
+                persona_alignment,  # Persona alignment (0-1)
+                min(1.0, serp_appearances / 50),  # Market presence (0-1)
+                0.0,  # No traffic share for video (not applicable)
+                serp_visibility,  # SERP visibility (0-1)
+                {
+                    'source': 'video',
+                    'formula': 'SERP Appearances × Keyword Coverage × Persona Alignment',
+                    'avg_position': float(item.get('avg_position') or 0),
+                    'video_count': int(item.get('video_count') or 0),
+                    'total_views': int(item.get('total_views') or 0),
+                    'total_serp_appearances': int(item.get('total_serp_appearances') or 0),
+                    'keyword_count': int(item.get('keyword_count') or 0),
+                    'persona_alignment': float(item.get('persona_alignment') or 5.0)
+                }))
+        
+        # Replaces this pipeline's scores in one transaction: DELETE, COPY, merge
+        await self.snapshot_writer.write_dsi_scores(pipeline_id, records)
     
     async def _store_page_dsi_scores(self, pipeline_id: str, page_dsi: List[Dict], source_type: str = 'organic'):
         """Store page-level DSI scores using SAME formula as company-level"""
-        async with self.db.acquire() as conn:
-            # Store comprehensive page analysis in historical snapshots only (avoid dsi_scores unique constraint)
-            await self._store_page_dsi_snapshots(pipeline_id, page_dsi, source_type)
-            
-            logger.info(f"Stored page-level DSI scores: {len(page_dsi)}")
+        # Store comprehensive page analysis in historical snapshots only (avoid dsi_scores unique constraint)
+        await self._store_page_dsi_snapshots(pipeline_id, page_dsi, source_type)
+        
+        logger.info(f"Stored page-level DSI scores: {len(page_dsi)}")
 
     async def _store_page_dsi_snapshots(self, pipeline_id: str, page_dsi: List[Dict], source_type: str):
         """Store comprehensive page-level DSI data in historical snapshots"""
         async with self.db.acquire() as conn:
             snapshot_date = datetime.now().date()
+            # Company information for every page domain in one lookup
+            companies = await self.snapshot_writer.resolve_companies((page['domain'] for page in page_dsi), conn=conn)
             
+            records = []
             for rank, page in enumerate(page_dsi, 1):
-                # Get company information for this domain
-                company_info = await conn.fetchrow("""
-                    SELECT dcm.display_name as company_name, cp.industry
-                    FROM domain_company_mapping dcm
-                    LEFT JOIN company_profiles cp ON cp.id = dcm.company_id
-                    WHERE dcm.original_domain = $1
-                    LIMIT 1
-                """, page['domain'])
-                
-                await conn.execute("""
-                    INSERT INTO historical_page_dsi_snapshots (
-                        snapshot_date, url, domain, company_name, page_title,
-                        page_dsi_score, page_dsi_rank, keyword_count, estimated_traffic,
-                        avg_position, top_10_keywords, total_keyword_appearances,
-                        content_classification, persona_alignment_scores, jtbd_phase,
-                        jtbd_alignment_score, sentiment, word_count, content_quality_score,
-                        brand_mention_count, competitor_mention_count, source_type, 
-                        industry, is_active
-                    ) VALUES (
-                        $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21, $22, $23, $24
-                    )
-                    ON CONFLICT (url, snapshot_date) DO UPDATE SET
-                        page_dsi_score = EXCLUDED.page_dsi_score,
-                        page_dsi_rank = EXCLUDED.page_dsi_rank,
-                        keyword_count = EXCLUDED.keyword_count,
-                        estimated_traffic = EXCLUDED.estimated_traffic,
-                        avg_position = EXCLUDED.avg_position,
-                        persona_alignment_scores = EXCLUDED.persona_alignment_scores,
-                        jtbd_alignment_score = EXCLUDED.jtbd_alignment_score,
-                        content_classification = EXCLUDED.content_classification,
-                        brand_mention_count = EXCLUDED.brand_mention_count,
-                        competitor_mention_count = EXCLUDED.competitor_mention_count
-                """,
-                    snapshot_date,                                              # $1
-                    page['url'],                                               # $2  
-                    page['domain'],                                            # $3
-                    company_info['company_name'] if company_info else page['domain'],  # $4
-                    page.get('title', '')[:255],                              # $5
-                    float(page.get('dsi_score') or 0),                         # $6
-                    rank,                                                      # $7
-                    int(page.get('keyword_count', 0)),                        # $8
-                    int(page.get('total_estimated_traffic') or 0),            # $9
-                    float(page.get('avg_position') or 20),                    # $10
-                    int(page.get('top_10_count', 0)),                         # $11
-                    int(page.get('keyword_count', 0)),                        # $12 (total appearances = keyword count)
-                    page.get('overall_sentiment', 'neutral'),                 # $13
-                    json.dumps({                                               # $14 (persona alignment scores)
+                company_info = companies.get(page['domain'])
+                records.append((
+                    snapshot_date,
+                    page['url'],
+                    page['domain'],
+                    (company_info or {}).get('company_name') or page['domain'],
+                    (page.get('title') or '')[:255],
+                    float(page.get('dsi_score') or 0),
+                    rank,
+                    int(page.get('keyword_count', 0)),
+                    int(page.get('total_estimated_traffic') or 0),
+                    float(page.get('avg_position') or 20),
+                    int(page.get('top_10_count', 0)),
+                    int(page.get('keyword_count', 0)),                        # total appearances = keyword count
+                    page.get('overall_sentiment', 'neutral'),                 # content_classification
+                    json.dumps({                                               # persona alignment scores
                         'persona': float(page.get('persona_score') or 5.0),
                         'strategic_imperative': float(page.get('strategic_imperative_score') or 5.0),
                         'jtbd': float(page.get('jtbd_score') or 5.0)
                     }),
-                    page.get('overall_sentiment', 'neutral'),                 # $15 (jtbd_phase - using sentiment as proxy)
-                    float(page.get('jtbd_score') or 5.0),                     # $16
-                    page.get('overall_sentiment', 'neutral'),                 # $17
-                    len(page.get('overall_insights', '').split()) if page.get('overall_insights') else 0,  # $18 (word count estimate)
-                    float(page.get('persona_score') or 5.0) / 10.0,           # $19 (content quality from persona score)
-                    int(page.get('brand_mention_count') or 0),                # $20
-                    int(page.get('competitor_mention_count') or 0),           # $21
-                    source_type,                                               # $22 (source type)
-                    company_info['industry'] if company_info else 'Unknown',  # $23
-                    True                                                       # $24 (is_active)
-                )
+                    page.get('overall_sentiment', 'neutral'),                 # jtbd_phase - using sentiment as proxy
+                    float(page.get('jtbd_score') or 5.0),
+                    page.get('overall_sentiment', 'neutral'),                 # sentiment
+                    len(page.get('overall_insights', '').split()) if page.get('overall_insights') else 0,  # word count estimate
+                    float(page.get('persona_score') or 5.0) / 10.0,           # content quality from persona score
+                    int(page.get('brand_mention_count') or 0),
+                    int(page.get('competitor_mention_count') or 0),
+                    source_type,
+                    company_info['industry'] if company_info else 'Unknown',
+                    True                                                       # is_active
+                ))
             
+            await self.snapshot_writer.write_page_snapshots(records, conn=conn)
             logger.info(f"Stored {len(page_dsi)} page DSI snapshots")
 
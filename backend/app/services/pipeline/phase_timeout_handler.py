@@ -10,6 +10,7 @@ from uuid import UUID
 from loguru import logger
 
 from app.core.database import db_pool
+from app.services.robustness.circuit_breaker import notify_circuit_breaker_reset
 
 
 class PhaseTimeoutHandler:
@@ -122,6 +123,7 @@ class PhaseTimeoutHandler:
                 SET state = 'closed', failure_count = 0, opened_at = NULL 
                 WHERE service_name = 'youtube_api'
             """)
+            await notify_circuit_breaker_reset(conn, 'youtube_api')
             logger.info("Reset YouTube API circuit breaker due to timeout")
         
         # Check progress
@@ -5,7 +5,7 @@ Consolidates all pipeline variants into a single, configurable service
 
 import asyncio
 from datetime import datetime, date
-from typing import List, Dict, Any, Optional, Set, Tuple
+from typing import AsyncIterator, List, Dict, Any, Optional, Set, Tuple
 from uuid import UUID, uuid4
 from enum import Enum
 import json
@@ -18,9 +18,12 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super().default(obj)
 
+import httpx
 from loguru import logger
 from pydantic import BaseModel
 
+from app.core.adaptive_limiter import adaptive_limits
+from app.core.bounded_runner import RunStats, run_bounded
 from app.core.database import db_pool
 from app.services.robustness.state_tracker import StateStatus
 from app.services.serp.unified_serp_collector import UnifiedSERPCollector
@@ -28,11 +31,14 @@ from app.services.enrichment.enhanced_company_enricher import EnhancedCompanyEnr
 from app.services.enrichment.video_enricher import OptimizedVideoEnricher as VideoEnricher
 from app.services.enrichment.channel_company_resolver import ChannelCompanyResolver
 from app.services.scraping.web_scraper import WebScraper
+from app.services.scraping.content_revalidator import ContentRevalidator, REFRESH_FORCE, REFRESH_REVALIDATE, refresh_mode
+from app.services.analysis.analysis_context_cache import analysis_context_cache
 # from app.services.analysis.content_analyzer import ContentAnalyzer  # Moved to redundant
 from app.services.metrics.simplified_dsi_calculator import SimplifiedDSICalculator as DSICalculator
 from app.services.keywords.simplified_google_ads_service import SimplifiedGoogleAdsService
 from app.services.historical_data_service import HistoricalDataService
 from app.services.landscape.production_landscape_calculator import ProductionLandscapeCalculator
+from app.services.landscape.landscape_batch_calculator import LandscapeBatchCalculator
 from app.services.websocket_service import WebSocketService
 from app.services.pipeline.pipeline_phases import PipelinePhaseManager
 from app.services.pipeline.flexible_phase_completion import FlexiblePhaseCompletion
@@ -76,6 +82,7 @@ class PipelineConfig(BaseModel):
     max_concurrent_serp: int = 10
     max_concurrent_enrichment: int = 15
     max_concurrent_analysis: int = 20
+    dataflow_queue_size: int = 1000  # Bound for each inter-stage queue in streaming dataflow mode
     
     # Scheduling settings
     is_initial_run: bool = False  # True for first/manual runs to get historical data
@@ -91,7 +98,9 @@ class PipelineConfig(BaseModel):
     enable_content_analysis: bool = True
     enable_historical_tracking: bool = True
     enable_landscape_dsi: bool = True
+    enable_streaming_dataflow: bool = False  # Stream SERP rows into enrichment/scraping/analysis instead of sequential phases
     force_refresh: bool = False
+    content_refresh: str = 'skip'  # Pages scraped by earlier runs: 'skip', 'revalidate' (re-scrape only if changed) or 'force'
     
     # Testing mode configuration
     testing_mode: bool = False  # When True, forces full pipeline run regardless of data freshness
@@ -185,6 +194,7 @@ class PipelineService:
         )
         self.video_enricher = VideoEnricher(db, settings)
         self.web_scraper = WebScraper(settings, db)
+        self.content_revalidator = ContentRevalidator(db, self.web_scraper)
         # Use Optimized Unified Analyzer for reduced verbosity and better performance
         from app.services.analysis.optimized_unified_analyzer import OptimizedUnifiedAnalyzer
         self.content_analyzer = OptimizedUnifiedAnalyzer(settings, db)
@@ -194,6 +204,7 @@ class PipelineService:
         self.dsi_calculator = DSICalculator(settings, db)
         self.google_ads_service = SimplifiedGoogleAdsService()
         self.landscape_calculator = ProductionLandscapeCalculator(db)
+        self.landscape_batch_calculator = LandscapeBatchCalculator(db)
         self.historical_service = HistoricalDataService(db, settings)
         self.websocket_service = WebSocketService()
         # Background channel resolver
@@ -524,6 +535,7 @@ class PipelineService:
                 self.current_pipeline_id = pipeline_id
             except Exception:
                 pass
+            self.current_content_refresh = refresh_mode(getattr(config, 'content_refresh', None))
             # Propagate project/client context for downstream services (e.g., analyzer)
             try:
                 client_id = getattr(config, 'client_id', None)
@@ -534,6 +546,8 @@ class PipelineService:
                     self.current_project_id = None
             except Exception:
                 self.current_project_id = None
+            # Each run starts from a freshly loaded analysis context, then shares it
+            analysis_context_cache.invalidate(self.current_project_id, reason=f"pipeline {pipeline_id} started")
             result.status = PipelineStatus.RUNNING
             await self._save_pipeline_state(result)
             await self._broadcast_status(pipeline_id, "Pipeline started")
@@ -624,6 +638,8 @@ class PipelineService:
                 logger.info(f"🎯 Keyword metrics enrichment DISABLED in config")
             
             # Phase 2: SERP Collection (skip if already completed or reusing from another pipeline)
+            # In streaming dataflow mode, phases 2-6 run concurrently from this point
+            streamed = False
             if config.enable_serp_collection:
                 # Check if SERP collection already completed (e.g., on resume)
                 serp_already_completed = False
@@ -659,6 +675,22 @@ class PipelineService:
                     logger.info(f"🔍 PIPELINE PHASE 2: Skipping SERP collection for pipeline {pipeline_id} (already completed)")
                     # Load existing SERP results from the database
                     serp_result = await self._get_existing_serp_results(config, pipeline_id)
+                elif config.enable_streaming_dataflow:
+                    result.current_phase = "serp_collection"
+                    logger.info(f"🌊 PIPELINE PHASE 2: Starting streaming dataflow execution for pipeline {pipeline_id}")
+                    await self._broadcast_status(pipeline_id, "Collecting SERP data and streaming into enrichment, scraping and analysis...")
+                    from app.services.pipeline.streaming_dataflow import StreamingPipelineDataflow
+                    dataflow = StreamingPipelineDataflow(self, config, pipeline_id, update_phase_status)
+                    serp_result = await dataflow.run()
+                    streamed = True
+                    
+                    dataflow_results = serp_result.get('dataflow', {})
+                    if dataflow_results.get('youtube_enrichment'):
+                        result.phase_results[PipelinePhase.YOUTUBE_ENRICHMENT] = dataflow_results['youtube_enrichment']
+                        result.videos_enriched = dataflow_results['youtube_enrichment'].get('videos_enriched', 0)
+                    if dataflow_results.get('content_analysis'):
+                        result.phase_results[PipelinePhase.CONTENT_ANALYSIS] = dataflow_results['content_analysis']
+                        result.content_analyzed = dataflow_results['content_analysis'].get('content_analyzed', 0)
                 else:
                     result.current_phase = "serp_collection"
                     logger.info(f"🔍 PIPELINE PHASE 2: Starting fresh SERP collection for pipeline {pipeline_id}")
@@ -878,7 +910,7 @@ class PipelineService:
                 })
             
             # Phase 4: Video Enrichment (Non-Critical)
-            if config.enable_video_enrichment and serp_result.get('video_urls'):
+            if config.enable_video_enrichment and serp_result.get('video_urls') and not streamed:
                 result.current_phase = "youtube_enrichment"
                 logger.info(f"Pipeline {pipeline_id}: Starting video enrichment (non-critical phase)")
                 await self._broadcast_status(pipeline_id, "Enriching video content (optional)...")
@@ -941,7 +973,6 @@ class PipelineService:
                     scraping_result = {
                         'urls_total': len(serp_result.get('content_urls', [])),
                         'urls_scraped': scraped_count or 0,
-                        'scraped_results': [],
                         'errors': []
                     }
                 else:
@@ -995,8 +1026,8 @@ class PipelineService:
                     logger.warning(f"Failed to log scrape summary for pipeline {pipeline_id}: {e}")
             
             # Phase 6: Content Analysis
-            # Now we wait for the concurrent analyzer to complete
-            if config.enable_content_analysis:
+            # Now we wait for the concurrent analyzer to complete (already drained in streaming mode)
+            if config.enable_content_analysis and not streamed:
                 result.current_phase = "content_analysis"
                 logger.info(f"Pipeline {pipeline_id}: Waiting for content analysis to complete")
                 await self._broadcast_status(pipeline_id, "Analyzing content with AI...")
@@ -1007,6 +1038,9 @@ class PipelineService:
                 
                 # Stop the concurrent analyzer
                 await self.concurrent_content_analyzer.stop_monitoring()
+                analysis_result['content_dedup'] = self.concurrent_content_analyzer.analyzer.deduplicator.pipeline_stats(
+                    str(pipeline_id)
+                )
                 
                 result.phase_results[PipelinePhase.CONTENT_ANALYSIS] = analysis_result
                 result.content_analyzed = analysis_result.get('content_analyzed', 0)
@@ -1223,8 +1257,18 @@ class PipelineService:
             # Keep in memory for a while for status queries
             asyncio.create_task(self._cleanup_pipeline_after_delay(pipeline_id, 3600))
     
-    async def _execute_serp_collection_phase(self, config: PipelineConfig, pipeline_id: UUID) -> Dict[str, Any]:
-        """Execute SERP collection phase"""
+    async def _execute_serp_collection_phase(
+        self,
+        config: PipelineConfig,
+        pipeline_id: UUID,
+        results_callback=None
+    ) -> Dict[str, Any]:
+        """Execute SERP collection phase
+        
+        Args:
+            results_callback: Optional async callable receiving each stored SERP
+                result set's rows (streaming dataflow mode)
+        """
         logger.info(f"🔍 SERP PHASE START: Collection beginning for pipeline {pipeline_id}")
         logger.info(f"🔍 SERP CONFIG: regions={config.regions}, content_types={config.content_types}, force_refresh={config.force_refresh}")
         logger.info(f"🔍 SERP SETTINGS: max_concurrent={getattr(config, 'max_concurrent_serp', 'default')}")
@@ -1481,7 +1525,8 @@ class PipelineService:
                     content_type=batch_info['content_type'],
                     pipeline_execution_id=str(pipeline_id),
                     state_tracker=state_tracker,
-                    progress_callback=serp_progress_callback
+                    progress_callback=serp_progress_callback,
+                    results_callback=results_callback
                 )
                 monitoring_tasks.append(task)
             
@@ -1585,6 +1630,17 @@ class PipelineService:
             'content_urls': content_urls
         }
     
+    async def _init_item_tracking(self, pipeline_execution_id, phase: str, items: List[Dict[str, Any]]) -> bool:
+        """Create pipeline_state rows for a phase's items; False if tracking is unavailable"""
+        if not pipeline_execution_id or not items or not self.state_tracker:
+            return False
+        try:
+            await self.state_tracker.initialize_pipeline(pipeline_execution_id, [phase], items)
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️ STATE TRACKING: Could not initialize {phase} tracking: {e}")
+            return False
+    
     async def _execute_company_enrichment_phase(self, domains: List[str], phase_name: str = "default") -> Dict[str, Any]:
         """Execute company enrichment phase
         
@@ -1620,65 +1676,73 @@ class PipelineService:
             # Continue with all domains if filtering fails
         
         companies_enriched = 0
-        errors = []
+        stats = RunStats()
         
-        semaphore = asyncio.Semaphore(15)  # Respect API limits
+        pipeline_execution_id = getattr(self, 'current_pipeline_id', None)
+        track_items = await self._init_item_tracking(
+            pipeline_execution_id, "company_enrichment",
+            [{'type': 'domain', 'domain': domain} for domain in domains]
+        )
+        
+        def record(domain: str, status: StateStatus, error: Optional[str] = None, category: Optional[str] = None):
+            if track_items:
+                self.state_tracker.record(pipeline_execution_id, "company_enrichment", domain, status,
+                                          error=error, error_category=category)
+        
+        limiter = adaptive_limits.get('cognism')  # Adapts to Cognism's 429s and latency
         
         async def enrich_domain(domain: str):
             nonlocal companies_enriched
-            async with semaphore:
+            async with limiter:
+                record(domain, StateStatus.PROCESSING)
                 try:
-                    result = await self.company_enricher.enrich_domain(domain)
+                    async with asyncio.timeout(300):  # No single domain may hold a slot past 5 minutes
+                        result = await self.company_enricher.enrich_domain(domain)
                     if result:
                         companies_enriched += 1
+                        record(domain, StateStatus.COMPLETED)
+                    else:
+                        record(domain, StateStatus.SKIPPED)
                     return result
                 except asyncio.TimeoutError:
                     error_msg = f"Timeout enriching {domain}"
                     logger.warning(error_msg)
-                    errors.append(error_msg)
+                    stats.record_error(error_msg)
+                    record(domain, StateStatus.FAILED, error_msg, 'timeout')
                     return None
                 except httpx.HTTPError as e:
                     error_msg = f"HTTP error for {domain}: {str(e)}"
                     logger.warning(error_msg)
-                    errors.append(error_msg)
+                    stats.record_error(error_msg)
+                    record(domain, StateStatus.FAILED, error_msg, 'http')
                     return None
                 except Exception as e:
                     error_msg = f"Failed to enrich {domain}: {str(e)}"
                     logger.error(error_msg, exc_info=True)
-                    errors.append(error_msg)
+                    stats.record_error(error_msg)
+                    record(domain, StateStatus.FAILED, error_msg, 'unknown')
                     return None
         
-        # Process in smaller batches to avoid overwhelming the system
-        batch_size = 50
-        for i in range(0, len(domains), batch_size):
-            batch = domains[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (len(domains) + batch_size - 1) // batch_size
-            
-            logger.info(f"🏢 Processing enrichment batch {batch_num}/{total_batches} ({len(batch)} domains)")
-            
-            tasks = [enrich_domain(domain) for domain in batch]
-            try:
-                # Add timeout for each batch
-                async with asyncio.timeout(300):  # 5 minute timeout per batch
-                    await asyncio.gather(*tasks, return_exceptions=True)
-            except asyncio.TimeoutError:
-                logger.error(f"Batch {batch_num} timed out after 5 minutes")
-                errors.append(f"Batch {batch_num} timed out")
+        # Fixed pool of consumers fed from a bounded queue; the limiter inside sets the real pace
+        await run_bounded(domains, enrich_domain, limiter.config.max_limit, name=f"Company enrichment ({phase_name})", stats=stats)
+        
+        if track_items:
+            await self.state_tracker.flush_updates()
         
         # Log summary
         success = companies_enriched > 0 or len(domains) == 0
-        if not success and errors:
-            logger.warning(f"Company enrichment completed with errors: {len(errors)} errors for {len(domains)} domains")
-            for error in errors[:5]:  # Log first 5 errors
+        if not success and stats.errors:
+            logger.warning(f"Company enrichment completed with errors: {stats.errors_total} errors for {len(domains)} domains")
+            for error in stats.errors[:5]:  # Log first 5 errors
                 logger.warning(f"  - {error}")
                 
         return {
             'success': success,
             'phase_name': phase_name,
-            'domains_processed': len(domains),
+            'domains_processed': stats.processed,
             'companies_enriched': companies_enriched,
-            'errors': errors,
+            'errors': stats.errors,
+            'errors_total': stats.errors_total,
             'message': f"Enriched {companies_enriched}/{len(domains)} domains"
         }
     
@@ -1732,11 +1796,16 @@ class PipelineService:
         # Process batches with increased concurrency for better performance
         semaphore = asyncio.Semaphore(10)  # Process up to 10 batches concurrently
         
+        def record_batch(batch: List[str], status: StateStatus, error: Optional[str] = None):
+            if state_tracker and pipeline_execution_id:
+                for url in batch:
+                    state_tracker.record(pipeline_execution_id, "video_enrichment", url, status, error=error)
+        
         async def process_batch(batch: List[str], batch_num: int):
             nonlocal total_enriched, total_cached, total_failed
             
             async with semaphore:
-                # Skip detailed state tracking for now - just track at batch level
+                record_batch(batch, StateStatus.PROCESSING)
                 
                 try:
                     logger.info(f"Processing video batch {batch_num+1}/{len(video_batches)} with {len(batch)} videos")
@@ -1786,7 +1855,8 @@ class PipelineService:
                         total_cached += enrichment_result.cached_count
                         total_failed += enrichment_result.failed_count
                         
-                        # Skip detailed state tracking for now
+                        skipped = getattr(enrichment_result, 'skipped_reason', None)
+                        record_batch(batch, StateStatus.SKIPPED if skipped else StateStatus.COMPLETED, skipped)
                         
                         logger.info(f"Batch {batch_num+1} complete: "
                                   f"{enrichment_result.enriched_count} enriched, "
@@ -1800,8 +1870,7 @@ class PipelineService:
                 except Exception as e:
                     logger.error(f"Failed to process video batch {batch_num+1}: {str(e)}")
                     errors.append(f"Batch {batch_num+1} error: {str(e)}")
-                    
-                    # Skip detailed state tracking for now
+                    record_batch(batch, StateStatus.FAILED, str(e))
                     
                     # Job status update removed - processing directly
                     
@@ -1837,6 +1906,7 @@ class PipelineService:
         # Get progress summary
         progress_summary = {}
         if state_tracker and pipeline_execution_id:
+            await state_tracker.flush_updates()
             progress_summary = await state_tracker.get_phase_progress(
                 pipeline_execution_id,
                 "video_enrichment"
@@ -1871,8 +1941,7 @@ class PipelineService:
     async def _execute_content_scraping_phase(self, urls: List[str]) -> Dict[str, Any]:
         """Execute content scraping phase"""
         scraped_count = 0
-        errors = []
-        scraped_results = []
+        stats = RunStats()  # Counters and a capped error sample; pages go straight to the database
         
         # Attach current pipeline id to any already-scraped URLs so the analyzer can pick them up
         try:
@@ -1884,50 +1953,92 @@ class PipelineService:
         urls_to_scrape = await self._filter_unscraped_urls(urls)
         logger.info(f"Content scraping: {len(urls)} total URLs, {len(urls) - len(urls_to_scrape)} already scraped, {len(urls_to_scrape)} new URLs to scrape")
         
-        # Use configured concurrency limit or default to 50
-        max_concurrent = getattr(self.settings, 'DEFAULT_SCRAPER_CONCURRENT_LIMIT', 50)
-        semaphore = asyncio.Semaphore(max_concurrent)
-        logger.info(f"Content scraping using {max_concurrent} concurrent connections")
+        # Already-scraped pages: re-scrape all (force) or only those that changed (revalidate)
+        refresh = getattr(self, 'current_content_refresh', None)
+        refresh_urls: List[str] = []
+        revalidation = None
+        if refresh in (REFRESH_FORCE, REFRESH_REVALIDATE):
+            pending = set(urls_to_scrape)
+            scraped_before = [u for u in urls if u not in pending]
+            if refresh == REFRESH_FORCE:
+                refresh_urls = scraped_before
+            else:
+                try:
+                    normalize = getattr(self.web_scraper, '_normalize_url', None)
+                    lookup = list({*scraped_before, *(normalize(u) for u in scraped_before)}) if normalize else scraped_before
+                    revalidation = await self.content_revalidator.revalidate(lookup)
+                    refresh_urls = revalidation.to_rescrape
+                except Exception as e:
+                    logger.warning(f"Content revalidation failed, keeping existing pages: {e}")
+            urls_to_scrape = urls_to_scrape + refresh_urls
+            logger.info(f"Content refresh ({refresh}): {len(refresh_urls)} previously scraped URLs will be scraped again")
+        no_cache = set(refresh_urls)
+        
+        # Up to the adaptive ceiling; the ScrapingBee limiter inside the scraper sets the real pace
+        max_concurrent = adaptive_limits.get('scrapingbee').config.max_limit
+        logger.info(f"Content scraping using up to {max_concurrent} concurrent connections, round-robin across hosts")
+        
+        pipeline_execution_id = getattr(self, 'current_pipeline_id', None)
+        track_items = await self._init_item_tracking(
+            pipeline_execution_id, "content_scraping",
+            [{'type': 'url', 'url': url} for url in urls_to_scrape]
+        )
+        
+        def record(url: str, status: StateStatus, error: Optional[str] = None):
+            if track_items:
+                self.state_tracker.record(pipeline_execution_id, "content_scraping", url, status, error=error)
         
         async def scrape_url(url: str):
             nonlocal scraped_count
-            async with semaphore:
+            record(url, StateStatus.PROCESSING)
+            try:
+                result = await self.web_scraper.scrape(url, check_cache=url not in no_cache)
+                # Always attach pipeline_execution_id and store outcome
+                if result is None:
+                    result = {'url': url, 'content': '', 'title': '', 'html': '', 'meta_description': '', 'word_count': 0}
                 try:
-                    result = await self.web_scraper.scrape(url)
-                    # Always attach pipeline_execution_id and store outcome
-                    if result is None:
-                        result = {'url': url, 'content': '', 'title': '', 'html': '', 'meta_description': '', 'word_count': 0}
-                    try:
-                        result['pipeline_execution_id'] = str(self.current_pipeline_id) if hasattr(self, 'current_pipeline_id') else None
-                    except Exception:
-                        result['pipeline_execution_id'] = None
-                    await self._store_scraped_content(result)
-                    if result.get('content'):
-                        scraped_count += 1
-                        scraped_results.append(result)
-                    return result
-                except Exception as e:
-                    # Persist failed attempt as failed row
-                    try:
-                        await self._store_scraped_content({'url': url, 'content': '', 'title': '', 'html': '', 'meta_description': f'error: {str(e)}', 'word_count': 0, 'pipeline_execution_id': str(self.current_pipeline_id) if hasattr(self, 'current_pipeline_id') else None})
-                    except Exception:
-                        pass
-                    errors.append(f"Failed to scrape {url}: {str(e)}")
-                    return None
+                    result['pipeline_execution_id'] = str(self.current_pipeline_id) if hasattr(self, 'current_pipeline_id') else None
+                except Exception:
+                    result['pipeline_execution_id'] = None
+                await self._store_scraped_content(result)
+                if result.get('content'):
+                    scraped_count += 1
+                    record(url, StateStatus.COMPLETED)
+                    return True
+                record(url, StateStatus.FAILED, result.get('error') or 'No content')
+                return False
+            except Exception as e:
+                record(url, StateStatus.FAILED, str(e))
+                # Persist failed attempt as failed row
+                try:
+                    await self._store_scraped_content({'url': url, 'content': '', 'title': '', 'html': '', 'meta_description': f'error: {str(e)}', 'word_count': 0, 'pipeline_execution_id': str(self.current_pipeline_id) if hasattr(self, 'current_pipeline_id') else None})
+                except Exception:
+                    pass
+                stats.record_error(f"Failed to scrape {url}: {str(e)}")
+                return None
         
-        tasks = [scrape_url(url) for url in urls_to_scrape]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Per-host caps and token buckets keep a few big or slow domains from taking every slot
+        schedule = await self.web_scraper.host_scheduler().run(urls_to_scrape, scrape_url, max_concurrent)
+        if track_items:
+            await self.state_tracker.flush_updates()
         
         return {
             'urls_total': len(urls),
             'urls_candidates': len(urls_to_scrape),
             'urls_scraped': scraped_count,
-            'scraped_results': scraped_results,
-            'errors': errors
+            'errors': stats.errors,
+            'errors_total': stats.errors_total,
+            'host_schedule': schedule,
+            'content_refresh': {
+                'mode': refresh or 'skip',
+                'rescraped': len(refresh_urls),
+                **(revalidation.summary() if revalidation else {})
+            }
         }
 
     async def _attach_pipeline_id_to_existing_scraped(self, urls: List[str]) -> None:
         """Attach current pipeline_execution_id to existing scraped_content rows for given URLs."""
+        from app.services.analysis.concurrent_content_analyzer import notify_content_ready
         if not urls:
             return
         pipeline_id_str = None
@@ -1948,42 +2059,43 @@ class PipelineService:
                 urls,
                 pipeline_id_str,
             )
+            # Previously scraped pages now belong to this run and are ready for analysis
+            await notify_content_ready(conn, pipeline_id_str)
     
     async def _execute_content_analysis_phase(self) -> Dict[str, Any]:
         """Execute content analysis phase (legacy - for non-concurrent mode)"""
-        # Get all unanalyzed content
-        unanalyzed_content = await self._get_unanalyzed_content()
-        
-        analyzed_count = 0
-        errors = []
-        
-        semaphore = asyncio.Semaphore(30)  # OpenAI limits
+        limiter = adaptive_limits.get('openai')
         
         async def analyze_content(content_data: Dict):
-            nonlocal analyzed_count
-            async with semaphore:
+            async with limiter:
                 try:
-                    result = await self.content_analyzer.analyze_content(
+                    return await self.content_analyzer.analyze_content(
                         url=content_data['url'],
                         content=content_data['content'],
                         title=content_data.get('title', ''),
-                        project_id=self.current_project_id if hasattr(self, 'current_project_id') else None
+                        project_id=self.current_project_id if hasattr(self, 'current_project_id') else None,
+                        pipeline_id=str(self.current_pipeline_id) if getattr(self, 'current_pipeline_id', None) else None
                     )
-                    if result:
-                        analyzed_count += 1
-                    return result
                 except Exception as e:
-                    errors.append(f"Failed to analyze {content_data['url']}: {str(e)}")
+                    stats.record_error(f"Failed to analyze {content_data['url']}: {str(e)}")
                     return None
         
-        tasks = [analyze_content(content) for content in unanalyzed_content]
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Unanalyzed pages stream in from the database page by page instead of being loaded up front
+        stats = RunStats()
+        await run_bounded(
+            self._iter_unanalyzed_content(), analyze_content, limiter.config.max_limit,
+            name="Content analysis", stats=stats
+        )
         
         return {
-            'success': analyzed_count > 0 or len(unanalyzed_content) == 0,
-            'content_processed': len(unanalyzed_content),
-            'content_analyzed': analyzed_count,
-            'errors': errors
+            'success': stats.succeeded > 0 or stats.processed == 0,
+            'content_processed': stats.processed,
+            'content_analyzed': stats.succeeded,
+            'errors': stats.errors,
+            'errors_total': stats.errors_total,
+            'content_dedup': self.content_analyzer.deduplicator.pipeline_stats(
+                str(self.current_pipeline_id) if getattr(self, 'current_pipeline_id', None) else None
+            )
         }
     
     async def _wait_for_content_analysis_completion(self, pipeline_id: UUID) -> Dict[str, Any]:
@@ -2260,6 +2372,26 @@ class PipelineService:
             total_companies_ranked = dsi_result.get('companies_ranked', 0)
             total_pages_ranked = dsi_result.get('pages_ranked', 0)
             
+            if getattr(self.settings, 'LANDSCAPE_DSI_BATCH_ENABLED', True):
+                # One SERP scan and one COPY for page, keyword and company DSI of every landscape
+                batch_result = await self.landscape_batch_calculator.calculate_all(landscapes)
+                logger.info(
+                    f"Landscape batch DSI: {batch_result['landscapes_calculated']}/{batch_result['total_landscapes']} landscapes, "
+                    f"{batch_result['total_pages_calculated']} pages, {batch_result['total_keywords_calculated']} keywords, "
+                    f"{batch_result['total_companies_calculated']} companies"
+                )
+                return {
+                    'success': batch_result['success'],
+                    'dsi_calculated': batch_result['success'],
+                    'landscapes_processed': len(landscapes),
+                    'companies_ranked': total_companies_ranked,
+                    'pages_ranked': total_pages_ranked,
+                    'landscape_dsi': batch_result,
+                    'landscape_results': batch_result['landscape_results'],
+                    'errors': batch_result['errors'],
+                    'success_rate': batch_result['success_rate']
+                }
+            
             # Calculate landscape-specific page DSI for all 24 landscapes
             logger.info(f"Calculating landscape-specific page DSI for all digital landscapes")
             landscape_page_result = await self.dsi_calculator.calculate_all_landscape_page_dsi()
@@ -2531,6 +2663,16 @@ class PipelineService:
                     'message': 'No active landscapes found'
                 }
             
+            if getattr(self.settings, 'LANDSCAPE_DSI_BATCH_ENABLED', True):
+                batch_result = await self.landscape_batch_calculator.calculate_all(landscapes)
+                return {
+                    'landscapes_calculated': batch_result['landscapes_calculated'],
+                    'landscape_results': batch_result['landscape_results'],
+                    'total_landscapes': len(landscapes),
+                    'errors': batch_result['errors'],
+                    'success_rate': batch_result['success_rate']
+                }
+            
             landscapes_calculated = 0
             landscape_results = {}
             errors = []
@@ -2765,6 +2907,7 @@ class PipelineService:
     async def _store_scraped_content(self, result: Dict) -> None:
         """Store scraped content in database"""
         from urllib.parse import urlparse
+        from app.services.analysis.concurrent_content_analyzer import notify_content_ready
         
         if not result or not result.get('url'):
             return
@@ -2787,54 +2930,76 @@ class PipelineService:
         except Exception:
             error_message = None
         
+        if has_quality_content:
+            await self.content_analyzer.deduplicator.ensure_schema()
+        
         async with db_pool.acquire() as conn:
-            await conn.execute(
-                """
-                INSERT INTO scraped_content (
-                    url, domain, title, content, html, meta_description,
-                    word_count, content_type, scraped_at, status, pipeline_execution_id, error_message
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                ON CONFLICT (url) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    content = EXCLUDED.content,
-                    html = EXCLUDED.html,
-                    meta_description = EXCLUDED.meta_description,
-                    word_count = EXCLUDED.word_count,
-                    content_type = EXCLUDED.content_type,
-                    scraped_at = EXCLUDED.scraped_at,
-                    status = EXCLUDED.status,
-                    pipeline_execution_id = COALESCE(EXCLUDED.pipeline_execution_id, scraped_content.pipeline_execution_id),
-                    error_message = COALESCE(EXCLUDED.error_message, scraped_content.error_message)
-                """,
-                result.get('url'),
-                domain,
-                result.get('title', ''),
-                result.get('content', ''),
-                result.get('html', ''),
-                result.get('meta_description', ''),
-                result.get('word_count', 0),
-                result.get('content_type', 'text/html'),
-                datetime.utcnow(),
-                status_value,
-                result.get('pipeline_execution_id'),
-                error_message
-            )
+            # Content and its fingerprint land together, so the analyzer never pairs new content with an old hash
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    INSERT INTO scraped_content (
+                        url, domain, title, content, html, meta_description,
+                        word_count, content_type, scraped_at, status, pipeline_execution_id, error_message
+                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                    ON CONFLICT (url) DO UPDATE SET
+                        title = EXCLUDED.title,
+                        content = EXCLUDED.content,
+                        html = EXCLUDED.html,
+                        meta_description = EXCLUDED.meta_description,
+                        word_count = EXCLUDED.word_count,
+                        content_type = EXCLUDED.content_type,
+                        scraped_at = EXCLUDED.scraped_at,
+                        status = EXCLUDED.status,
+                        pipeline_execution_id = COALESCE(EXCLUDED.pipeline_execution_id, scraped_content.pipeline_execution_id),
+                        error_message = COALESCE(EXCLUDED.error_message, scraped_content.error_message)
+                    -- A failed re-scrape never replaces good content from an earlier run
+                    WHERE EXCLUDED.status = 'completed' OR scraped_content.status IS DISTINCT FROM 'completed'
+                    """,
+                    result.get('url'),
+                    domain,
+                    result.get('title', ''),
+                    result.get('content', ''),
+                    result.get('html', ''),
+                    result.get('meta_description', ''),
+                    result.get('word_count', 0),
+                    result.get('content_type', 'text/html'),
+                    datetime.utcnow(),
+                    status_value,
+                    result.get('pipeline_execution_id'),
+                    error_message
+                )
+                if has_quality_content:
+                    # Fingerprint next to the content so duplicate pages can share one analysis
+                    await self.content_analyzer.deduplicator.record_scraped_fingerprint(conn, result['url'], content_text)
+            if has_quality_content:
+                # Wake the concurrent analyzer feeder as soon as the page lands
+                await notify_content_ready(conn, result.get('pipeline_execution_id'))
     
-    async def _get_unanalyzed_content(self) -> List[Dict]:
-        """Get content that hasn't been analyzed"""
-        async with db_pool.acquire() as conn:
-            results = await conn.fetch(
-                """
-                SELECT sc.url, sc.title, sc.content
-                FROM scraped_content sc
-                LEFT JOIN content_analysis ca ON sc.url = ca.url
-                WHERE sc.status = 'completed' 
-                AND sc.content IS NOT NULL 
-                AND ca.id IS NULL
-                ORDER BY sc.scraped_at DESC
-                """
-            )
-            return [dict(row) for row in results]
+    async def _iter_unanalyzed_content(self, page_size: int = 100) -> AsyncIterator[Dict]:
+        """Yield content that hasn't been analyzed, one keyset page (by URL) at a time"""
+        last_url = ''
+        while True:
+            async with db_pool.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT sc.url, sc.title, sc.content
+                    FROM scraped_content sc
+                    LEFT JOIN content_analysis ca ON sc.url = ca.url
+                    WHERE sc.status = 'completed' 
+                    AND sc.content IS NOT NULL 
+                    AND ca.id IS NULL
+                    AND sc.url > $1
+                    ORDER BY sc.url
+                    LIMIT $2
+                    """,
+                    last_url, page_size
+                )
+            for row in rows:
+                yield dict(row)
+            if len(rows) < page_size:
+                return
+            last_url = rows[-1]['url']
     
     async def _get_active_landscapes(self) -> List[Dict]:
         """Get all active digital landscapes"""
@@ -0,0 +1,465 @@
+"""
+Streaming Dataflow Execution for the Pipeline
+
+Wires SERP collection, company enrichment, content scraping and content analysis
+as a bounded-queue dataflow graph instead of strictly sequential phases:
+
+    SERP batch stored ──► domain queue ──► company enrichment ──┐ (per-domain readiness)
+                     └──► URL queue ────► content scraping ───► analysis queue ──► content analysis
+
+Each stored SERP result set is fanned out immediately, scraped pages flow straight
+into analysis, and analysis of a page only waits for *that page's* domain to be
+enriched. Wall-clock time becomes roughly the slowest stage instead of the sum.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from urllib.parse import urlparse
+from uuid import UUID
+
+from loguru import logger
+
+from app.core.adaptive_limiter import adaptive_limits
+
+
+def _normalize_host(value: str) -> str:
+    """Normalize a domain or URL to a bare lowercase host without www."""
+    if not value:
+        return ""
+    host = urlparse(value).netloc if "://" in value else value
+    host = host.split(":")[0].lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class StreamingPipelineDataflow:
+    """
+    Runs the SERP → enrichment/scraping → analysis phases of a pipeline as
+    concurrent stages connected by bounded queues.
+    """
+
+    def __init__(
+        self,
+        pipeline_service,
+        config,
+        pipeline_id: UUID,
+        update_phase_status: Callable[..., Awaitable[None]],
+    ):
+        self.service = pipeline_service
+        self.config = config
+        self.pipeline_id = pipeline_id
+        self.update_phase_status = update_phase_status
+        self.db = pipeline_service.db
+
+        queue_size = max(1, int(getattr(config, 'dataflow_queue_size', 1000)))
+        self._domain_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._scrape_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._analysis_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        # Per-domain readiness: analysis of a page waits only on its own domain
+        self._domain_ready: Dict[str, asyncio.Event] = {}
+        self._host_domain: Dict[str, str] = {}
+        self._domain_profiles: Dict[str, Dict[str, Any]] = {}
+        self._seen_urls: Set[str] = set()
+        self._video_urls: Set[str] = set()
+
+        self._analysis_enabled = bool(config.enable_content_analysis and config.enable_content_scraping)
+
+        self.stats: Dict[str, Any] = {
+            'serp_result_sets': 0,
+            'serp_rows_received': 0,
+            'domains_total': 0,
+            'domains_already_enriched': 0,
+            'companies_enriched': 0,
+            'urls_total': 0,
+            'urls_already_scraped': 0,
+            'urls_scraped': 0,
+            'content_analyzed': 0,
+            'errors': [],
+        }
+
+    # ------------------------------------------------------------------
+    # Entry point
+    # ------------------------------------------------------------------
+    async def run(self) -> Dict[str, Any]:
+        """Execute the dataflow graph and return a SERP-phase compatible result."""
+        config = self.config
+        pipeline_id = self.pipeline_id
+        logger.info(f"🌊 DATAFLOW: Starting streaming execution for pipeline {pipeline_id}")
+
+        if self._analysis_enabled:
+            self._analysis_enabled = await self._analysis_is_configured()
+
+        await self.update_phase_status("serp_collection", "running")
+        if config.enable_company_enrichment:
+            await self.update_phase_status("company_enrichment_serp", "running")
+        if config.enable_content_scraping:
+            await self.update_phase_status("content_scraping", "running")
+        if self._analysis_enabled:
+            await self.update_phase_status("content_analysis", "running")
+
+        enrichment_workers = max(1, config.max_concurrent_enrichment)
+        # Enough workers for the adaptive ceiling; the ScrapingBee limiter sets the real pace
+        scrape_workers = max(1, adaptive_limits.get('scrapingbee').config.max_limit)
+        analysis_workers = max(1, config.max_concurrent_analysis)
+
+        workers: List[asyncio.Task] = []
+        if config.enable_company_enrichment:
+            workers += [asyncio.create_task(self._enrichment_worker()) for _ in range(enrichment_workers)]
+        if config.enable_content_scraping:
+            workers += [asyncio.create_task(self._scrape_worker()) for _ in range(scrape_workers)]
+        if self._analysis_enabled:
+            workers += [asyncio.create_task(self._analysis_worker()) for _ in range(analysis_workers)]
+
+        try:
+            # Stage 1: SERP collection streams stored rows into the graph
+            serp_result = await self.service._execute_serp_collection_phase(
+                config, pipeline_id, results_callback=self._on_serp_rows_stored
+            )
+            await self.update_phase_status("serp_collection", "completed", self._serp_summary(serp_result))
+            logger.info(
+                f"🌊 DATAFLOW: SERP stage finished - {self.stats['serp_rows_received']} rows, "
+                f"{self.stats['domains_total']} domains, {self.stats['urls_total']} URLs fanned out"
+            )
+
+            # Video enrichment only needs the complete video URL set, run it alongside the drain
+            video_task = None
+            video_urls = sorted(self._video_urls) or list(serp_result.get('video_urls') or [])
+            if config.enable_video_enrichment and video_urls:
+                video_task = asyncio.create_task(self._run_video_enrichment(video_urls))
+
+            # Stage 2/3: drain enrichment and scraping, then analysis
+            enrichment_result = None
+            if config.enable_company_enrichment:
+                await self._domain_queue.join()
+                enrichment_result = {
+                    'success': True,
+                    'phase_name': 'company_enrichment_serp',
+                    'domains_processed': self.stats['domains_total'] - self.stats['domains_already_enriched'],
+                    'companies_enriched': self.stats['companies_enriched'],
+                    'errors': [e for e in self.stats['errors'] if e.startswith('enrich')][:100],
+                    'message': f"Enriched {self.stats['companies_enriched']} domains (streaming)",
+                    'streaming': True,
+                }
+                await self.update_phase_status("company_enrichment_serp", "completed", enrichment_result)
+
+            scraping_result = None
+            if config.enable_content_scraping:
+                await self._scrape_queue.join()
+                scraping_result = {
+                    'urls_total': self.stats['urls_total'],
+                    'urls_candidates': self.stats['urls_total'] - self.stats['urls_already_scraped'],
+                    'urls_scraped': self.stats['urls_scraped'],
+                    'errors': [e for e in self.stats['errors'] if e.startswith('scrape')][:100],
+                    'streaming': True,
+                }
+                await self.update_phase_status("content_scraping", "completed", scraping_result)
+
+            analysis_result = None
+            if self._analysis_enabled:
+                await self._analysis_queue.join()
+                analyzed = self.stats['content_analyzed']
+                analysis_result = {
+                    'success': analyzed > 0,
+                    'content_processed': self.stats['urls_scraped'] + self.stats['urls_already_scraped'],
+                    'content_analyzed': analyzed,
+                    'errors': [e for e in self.stats['errors'] if e.startswith('analy')][:100],
+                    'streaming': True,
+                    'content_dedup': self.service.content_analyzer.deduplicator.pipeline_stats(str(pipeline_id)),
+                }
+                await self.update_phase_status(
+                    "content_analysis", "completed" if analyzed > 0 else "failed", analysis_result
+                )
+                await self.service._update_pipeline_metrics(str(pipeline_id), content_analyzed=analyzed)
+
+            video_result = await video_task if video_task else None
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        logger.info(f"🌊 DATAFLOW: Completed for pipeline {pipeline_id}: {self._stats_summary()}")
+
+        serp_result['dataflow'] = {
+            **self._stats_summary(),
+            'company_enrichment': enrichment_result,
+            'content_scraping': scraping_result,
+            'content_analysis': analysis_result,
+            'youtube_enrichment': video_result,
+        }
+        return serp_result
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    async def _on_serp_rows_stored(self, rows: List[Dict[str, Any]]) -> None:
+        """Fan a freshly stored SERP result set out to the enrichment and scraping stages."""
+        self.stats['serp_result_sets'] += 1
+        self.stats['serp_rows_received'] += len(rows)
+
+        new_domains: List[str] = []
+        new_urls: List[str] = []
+        for row in rows:
+            url = row.get('url') or ''
+            if not url:
+                continue
+            serp_domain = row.get('domain') or urlparse(url).netloc
+            key = _normalize_host(serp_domain)
+            if key and key not in self._domain_ready:
+                self._domain_ready[key] = asyncio.Event()
+                new_domains.append(serp_domain)
+            # Pages are looked up by their own host, alias it to the SERP domain
+            self._host_domain.setdefault(_normalize_host(url), key)
+
+            serp_type = row.get('serp_type')
+            if serp_type == 'video':
+                self._video_urls.add(url)
+            elif serp_type in ('organic', 'news') and url not in self._seen_urls:
+                self._seen_urls.add(url)
+                new_urls.append(url)
+
+        if new_domains:
+            await self._enqueue_domains(new_domains)
+        if new_urls and self.config.enable_content_scraping:
+            await self._enqueue_urls(new_urls)
+
+    async def _enqueue_domains(self, domains: List[str]) -> None:
+        """Resolve already-enriched domains in one lookup and queue the rest."""
+        self.stats['domains_total'] += len(domains)
+        if not self.config.enable_company_enrichment:
+            for domain in domains:
+                self._mark_domain_ready(domain)
+            return
+
+        existing: Dict[str, Dict[str, Any]] = {}
+        try:
+            async with self.db.acquire() as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT domain, company_name, industry, employee_count, source
+                    FROM company_profiles
+                    WHERE domain = ANY($1::text[])
+                    """,
+                    [_normalize_host(d) for d in domains]
+                )
+            existing = {row['domain']: dict(row) for row in rows}
+        except Exception as e:
+            logger.warning(f"🌊 DATAFLOW: Failed to look up existing company profiles: {e}")
+
+        for domain in domains:
+            key = _normalize_host(domain)
+            if key in existing:
+                profile = existing[key]
+                self._domain_profiles[key] = {
+                    'company_name': profile.get('company_name'),
+                    'company_domain': key,
+                    'industry': profile.get('industry'),
+                    'company_size': profile.get('employee_count'),
+                    'source_type': profile.get('source'),
+                }
+                self.stats['domains_already_enriched'] += 1
+                self._mark_domain_ready(domain)
+            else:
+                await self._domain_queue.put(domain)
+
+    async def _enqueue_urls(self, urls: List[str]) -> None:
+        """Attach already-scraped pages to this run and queue every URL for the scrape stage."""
+        self.stats['urls_total'] += len(urls)
+        already_scraped: Set[str] = set()
+        try:
+            await self.service._attach_pipeline_id_to_existing_scraped(urls)
+            unscraped = set(await self.service._filter_unscraped_urls(urls))
+            already_scraped = {u for u in urls if u not in unscraped}
+        except Exception as e:
+            logger.warning(f"🌊 DATAFLOW: Failed to filter scraped URLs, scraping all: {e}")
+
+        self.stats['urls_already_scraped'] += len(already_scraped)
+        for url in urls:
+            await self._scrape_queue.put((url, url in already_scraped))
+
+    # ------------------------------------------------------------------
+    # Stage workers
+    # ------------------------------------------------------------------
+    async def _enrichment_worker(self) -> None:
+        while True:
+            domain = await self._domain_queue.get()
+            try:
+                profile = await self.service.company_enricher.enrich_domain(domain)
+                if profile:
+                    self.stats['companies_enriched'] += 1
+                    self._domain_profiles[_normalize_host(domain)] = {
+                        'company_name': getattr(profile, 'company_name', None),
+                        'company_domain': _normalize_host(getattr(profile, 'domain', domain) or domain),
+                        'industry': getattr(profile, 'industry', None),
+                        'company_size': getattr(profile, 'employee_range', None),
+                        'source_type': getattr(profile, 'source_type', None),
+                    }
+            except Exception as e:
+                self.stats['errors'].append(f"enrich {domain}: {e}")
+                logger.warning(f"🌊 DATAFLOW: Enrichment failed for {domain}: {e}")
+            finally:
+                # Unblock dependent analyses even on failure (domain fallback, as in batch mode)
+                self._mark_domain_ready(domain)
+                self._domain_queue.task_done()
+
+    async def _scrape_worker(self) -> None:
+        while True:
+            url, already_scraped = await self._scrape_queue.get()
+            try:
+                page = None
+                if already_scraped:
+                    page = await self._load_scraped_page(url)
+                else:
+                    page = await self._scrape_and_store(url)
+                if page and self._analysis_enabled:
+                    await self._analysis_queue.put(page)
+            except Exception as e:
+                self.stats['errors'].append(f"scrape {url}: {e}")
+                logger.warning(f"🌊 DATAFLOW: Scrape stage failed for {url}: {e}")
+            finally:
+                self._scrape_queue.task_done()
+
+    async def _analysis_worker(self) -> None:
+        while True:
+            page = await self._analysis_queue.get()
+            try:
+                await self._wait_for_domain(page['url'])
+                if not await self._is_analyzed(page['url']):
+                    metadata = dict(self._domain_profiles.get(self._domain_key(page['url'])) or {})
+                    analyzer = self.service.content_analyzer
+                    project_id = getattr(self.service, 'current_project_id', None)
+                    result = await analyzer.analyze_content(
+                        url=page['url'],
+                        content=page['content'],
+                        title=page.get('title', ''),
+                        project_id=project_id,
+                        metadata=metadata or None,
+                        context=await analyzer.get_analysis_context(project_id),
+                        pipeline_id=str(self.pipeline_id)
+                    )
+                    if result and not result.get('error'):
+                        self.stats['content_analyzed'] += 1
+                    elif result:
+                        self.stats['errors'].append(f"analysis {page['url']}: {result.get('error')}")
+            except Exception as e:
+                self.stats['errors'].append(f"analysis {page['url']}: {e}")
+                logger.warning(f"🌊 DATAFLOW: Analysis failed for {page['url']}: {e}")
+            finally:
+                self._analysis_queue.task_done()
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+    def _mark_domain_ready(self, domain: str) -> None:
+        key = _normalize_host(domain)
+        event = self._domain_ready.setdefault(key, asyncio.Event())
+        event.set()
+
+    def _domain_key(self, url: str) -> str:
+        host = _normalize_host(url)
+        return self._host_domain.get(host, host)
+
+    async def _wait_for_domain(self, url: str) -> None:
+        event = self._domain_ready.get(self._domain_key(url))
+        if event is not None:
+            await event.wait()
+
+    async def _scrape_and_store(self, url: str) -> Optional[Dict[str, Any]]:
+        """Scrape one URL and persist the outcome exactly like the sequential scraping phase."""
+        pipeline_id_str = str(self.pipeline_id)
+        try:
+            result = await self.service.web_scraper.scrape(url)
+        except Exception as e:
+            await self.service._store_scraped_content({
+                'url': url, 'content': '', 'title': '', 'html': '',
+                'meta_description': f'error: {str(e)}', 'word_count': 0,
+                'pipeline_execution_id': pipeline_id_str
+            })
+            raise
+
+        if result is None:
+            result = {'url': url, 'content': '', 'title': '', 'html': '', 'meta_description': '', 'word_count': 0}
+        result['pipeline_execution_id'] = pipeline_id_str
+        await self.service._store_scraped_content(result)
+
+        content = result.get('content') or ''
+        if len(content.strip()) < 100:
+            return None
+        self.stats['urls_scraped'] += 1
+        return {'url': url, 'title': result.get('title', ''), 'content': content}
+
+    async def _load_scraped_page(self, url: str) -> Optional[Dict[str, Any]]:
+        async with self.db.acquire() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT url, title, content
+                FROM scraped_content
+                WHERE url = $1
+                  AND status = 'completed'
+                  AND content IS NOT NULL
+                  AND LENGTH(content) > 100
+                """,
+                url
+            )
+        return dict(row) if row else None
+
+    async def _is_analyzed(self, url: str) -> bool:
+        async with self.db.acquire() as conn:
+            return bool(await conn.fetchval(
+                "SELECT EXISTS(SELECT 1 FROM optimized_content_analysis WHERE url = $1 AND project_id IS NULL)",
+                url
+            ))
+
+    async def _analysis_is_configured(self) -> bool:
+        """Mirror ConcurrentContentAnalyzer.start_monitoring's dimension validation."""
+        analyzer = self.service.content_analyzer
+        project_id = getattr(self.service, 'current_project_id', None)
+        try:
+            context = await analyzer.get_analysis_context(project_id)
+            if not context.dimensions:
+                logger.error("🌊 DATAFLOW: No dimensions configured, analysis stage disabled")
+                return False
+            validation = context.validation
+            if not validation['valid']:
+                logger.error(f"🌊 DATAFLOW: Analysis stage disabled: {validation['message']}")
+                return False
+        except Exception as e:
+            logger.error(f"🌊 DATAFLOW: Failed to validate analysis dimensions: {e}")
+            return False
+        return True
+
+    async def _run_video_enrichment(self, video_urls: List[str]) -> Optional[Dict[str, Any]]:
+        try:
+            if getattr(self.service.settings, 'CHANNEL_COMPANY_RESOLVER_ENABLED', True):
+                self.service.channel_resolver.start_background()
+        except Exception:
+            pass
+        await self.update_phase_status("youtube_enrichment", "running")
+        try:
+            video_result = await self.service._execute_video_enrichment_phase(
+                video_urls, pipeline_execution_id=str(self.pipeline_id)
+            )
+        except Exception as e:
+            logger.warning(f"🌊 DATAFLOW: YouTube enrichment failed (non-critical): {e}")
+            video_result = {
+                'success': False,
+                'videos_enriched': 0,
+                'error': str(e),
+                'skipped_reason': 'YouTube API error - phase skipped (non-critical)'
+            }
+        await self.update_phase_status(
+            "youtube_enrichment", "completed" if video_result.get('success') else "skipped", video_result
+        )
+        return video_result
+
+    def _serp_summary(self, serp_result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'keywords_processed': serp_result.get('keywords_processed', 0),
+            'total_results': serp_result.get('total_results', 0),
+            'content_type_results': serp_result.get('content_type_results', {}),
+            'streaming': True,
+        }
+
+    def _stats_summary(self) -> Dict[str, Any]:
+        summary = {k: v for k, v in self.stats.items() if k != 'errors'}
+        summary['errors_recorded'] = len(self.stats['errors'])
+        return summary
@@ -1,34 +1,58 @@
 """
 Circuit Breaker Pattern Implementation
 Prevents cascade failures by temporarily blocking calls to failing services
+
+Breaker state lives in process memory, so a guarded call makes no database
+round-trips and holds no pooled connection. A background sync task writes
+the accumulated counters and state transitions to circuit_breakers in one
+batched transaction, announces transitions with pg_notify so other worker
+processes follow immediately, and re-reads the table so resets made directly
+in SQL (pipeline monitor, timeout handler, scripts) are picked up.
 """
 
 import asyncio
-from datetime import datetime, timedelta
-from typing import Optional, Callable, Any, Dict
+import json
+import os
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Optional, Callable, Any, Dict, List
 from enum import Enum
 import asyncpg
 from loguru import logger
 
+from app.core.config import settings
 from app.core.database import DatabasePool
 
 
+CIRCUIT_BREAKER_CHANNEL = "circuit_breaker_state"
+
+
 class CircuitState(str, Enum):
     CLOSED = "closed"      # Normal operation
     OPEN = "open"          # Blocking calls
     HALF_OPEN = "half_open" # Testing recovery
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
 class CircuitBreaker:
     """
     Circuit breaker implementation for external service calls
-    
+
     States:
     - CLOSED: Normal operation, requests pass through
     - OPEN: Service is failing, requests are blocked
     - HALF_OPEN: Testing if service recovered, limited requests
     """
-    
+
     def __init__(
         self,
         service_name: str,
@@ -36,7 +60,8 @@ class CircuitBreaker:
         failure_threshold: int = 10,
         success_threshold: int = 5,
         timeout_seconds: int = 300,
-        half_open_requests: int = 1
+        half_open_requests: int = 1,
+        store: Optional["CircuitBreakerStore"] = None
     ):
         self.service_name = service_name
         self.db_pool = db_pool
@@ -44,86 +69,112 @@ class CircuitBreaker:
         self.success_threshold = success_threshold
         self.timeout_seconds = timeout_seconds
         self.half_open_requests = half_open_requests
-        self._half_open_counter = 0
-        self._lock = asyncio.Lock()
-        
-    async def _get_state(self, conn: asyncpg.Connection) -> Dict[str, Any]:
-        """Get or create circuit breaker state from database"""
-        state = await conn.fetchrow(
-            """
-            INSERT INTO circuit_breakers (
-                service_name, 
-                failure_threshold, 
-                success_threshold, 
-                timeout_seconds
-            ) VALUES ($1, $2, $3, $4)
-            ON CONFLICT (service_name) 
-            DO UPDATE SET 
-                updated_at = NOW()
-            RETURNING *
-            """,
-            self.service_name,
-            self.failure_threshold,
-            self.success_threshold,
-            self.timeout_seconds
-        )
-        return dict(state)
-    
-    async def _should_attempt_reset(self, state: Dict[str, Any]) -> bool:
+        self._store = store
+
+        # Current state (authoritative for this process between syncs)
+        self.state = CircuitState.CLOSED
+        self.failure_count = 0
+        self.success_count = 0
+        self.opened_at: Optional[datetime] = None
+        self.half_opened_at: Optional[datetime] = None
+        self._half_open_in_flight = 0
+
+        # Deltas not yet written to circuit_breakers
+        self._pending_requests = 0
+        self._pending_failures = 0
+        self._pending_successes = 0
+        self._last_failure_at: Optional[datetime] = None
+        self._last_success_at: Optional[datetime] = None
+        self._state_changed = False
+        self._transitions = 0
+
+        # Totals as last read back from the table
+        self._persisted: Dict[str, Any] = {}
+
+    # All state changes below are synchronous: under asyncio nothing can
+    # interleave with them, so no lock is needed around the counters.
+
+    def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset"""
-        if state['state'] != CircuitState.OPEN:
+        if self.state != CircuitState.OPEN or not self.opened_at:
             return False
-            
-        if not state['opened_at']:
-            return False
-            
-        time_since_open = datetime.utcnow() - state['opened_at'].replace(tzinfo=None)
-        return time_since_open > timedelta(seconds=self.timeout_seconds)
-    
-    async def _update_state(
-        self,
-        conn: asyncpg.Connection,
-        new_state: CircuitState,
-        increment_success: bool = False,
-        increment_failure: bool = False,
-        reset_counts: bool = False
-    ):
-        """Update circuit breaker state in database"""
-        # Build SET clause parts separately from UPDATE statement
-        set_parts = [
-            "state = $2",
-            "updated_at = NOW()"
-        ]
-        
-        params = [self.service_name, new_state]
-        param_count = 3
-        
-        if increment_success:
-            set_parts.append(f"success_count = success_count + 1")
-            set_parts.append(f"total_successes = total_successes + 1")
-            set_parts.append(f"last_success_at = NOW()")
-            
-        if increment_failure:
-            set_parts.append(f"failure_count = failure_count + 1")
-            set_parts.append(f"total_failures = total_failures + 1")
-            set_parts.append(f"last_failure_at = NOW()")
-            
+        return _utcnow() - self.opened_at > timedelta(seconds=self.timeout_seconds)
+
+    def _transition(self, new_state: CircuitState, reset_counts: bool = False):
+        """Move to a new state and schedule it for persistence and broadcast"""
         if reset_counts:
-            set_parts.append(f"success_count = 0")
-            set_parts.append(f"failure_count = 0")
-            
-        if new_state == CircuitState.OPEN:
-            set_parts.append(f"opened_at = NOW()")
-        elif new_state == CircuitState.HALF_OPEN:
-            set_parts.append(f"half_opened_at = NOW()")
-            
-        set_parts.append("total_requests = total_requests + 1")
-        
-        # Build the query with proper comma separation
-        set_clause = ", ".join(set_parts)
-        query = f"UPDATE circuit_breakers SET {set_clause} WHERE service_name = $1"
-        await conn.execute(query, *params)
-    
+            self.failure_count = 0
+            self.success_count = 0
+        if new_state != self.state:
+            self.state = new_state
+            if new_state == CircuitState.OPEN:
+                self.opened_at = _utcnow()
+            elif new_state == CircuitState.HALF_OPEN:
+                self.half_opened_at = _utcnow()
+                self._half_open_in_flight = 0
+            self._state_changed = True
+            self._transitions += 1
+            if self._store:
+                self._store.wake()
+
+    def _admit(self) -> Optional[str]:
+        """Return None if the call may proceed, otherwise the rejection reason"""
+        if self._should_attempt_reset():
+            self._transition(CircuitState.HALF_OPEN, reset_counts=True)
+            logger.info(f"Circuit breaker for {self.service_name} entering HALF_OPEN state")
+
+        # OPEN state - reject calls
+        if self.state == CircuitState.OPEN:
+            logger.warning(f"Circuit breaker OPEN for {self.service_name}, rejecting call")
+            return f"Circuit breaker is OPEN for {self.service_name}"
+
+        # HALF_OPEN state - limited concurrent probe calls
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_in_flight >= self.half_open_requests:
+                logger.warning(f"Circuit breaker HALF_OPEN limit reached for {self.service_name}")
+                return f"Circuit breaker HALF_OPEN limit reached for {self.service_name}"
+            self._half_open_in_flight += 1
+        return None
+
+    def _record_success(self, probe: bool):
+        self._pending_requests += 1
+        self._pending_successes += 1
+        self._last_success_at = _utcnow()
+        if probe:
+            self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+
+        if self.state == CircuitState.HALF_OPEN:
+            self.success_count += 1
+            if self.success_count >= self.success_threshold:
+                # Recover to CLOSED
+                self._transition(CircuitState.CLOSED, reset_counts=True)
+                logger.info(f"Circuit breaker for {self.service_name} recovered to CLOSED state")
+        else:
+            # CLOSED state - just track success
+            self.success_count += 1
+
+    def _record_failure(self, probe: bool):
+        self._pending_requests += 1
+        self._pending_failures += 1
+        self._last_failure_at = _utcnow()
+        if probe:
+            self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+
+        if self.state == CircuitState.CLOSED:
+            self.failure_count += 1
+            if self.failure_count >= self.failure_threshold:
+                # Trip to OPEN
+                self._transition(CircuitState.OPEN)
+                logger.error(f"Circuit breaker for {self.service_name} tripped to OPEN state")
+        elif self.state == CircuitState.HALF_OPEN:
+            # Failed in HALF_OPEN, back to OPEN
+            self.failure_count += 1
+            self._transition(CircuitState.OPEN)
+            logger.warning(f"Circuit breaker for {self.service_name} failed in HALF_OPEN, back to OPEN")
+        else:
+            # Already OPEN
+            self.failure_count += 1
+
     async def call(
         self,
         func: Callable,
@@ -133,144 +184,400 @@ class CircuitBreaker:
     ) -> Any:
         """
         Execute function through circuit breaker
-        
+
         Args:
             func: The function to call
             fallback: Optional fallback function if circuit is open
             *args, **kwargs: Arguments for the function
-            
+
         Returns:
             Result from func or fallback
-            
+
         Raises:
             Exception: If circuit is open and no fallback provided
         """
-        async with self.db_pool.acquire() as conn:
-            async with self._lock:
-                state = await self._get_state(conn)
-                
-                # Check if we should transition from OPEN to HALF_OPEN
-                if await self._should_attempt_reset(state):
-                    await self._update_state(conn, CircuitState.HALF_OPEN, reset_counts=True)
-                    state['state'] = CircuitState.HALF_OPEN
-                    self._half_open_counter = 0
-                    logger.info(f"Circuit breaker for {self.service_name} entering HALF_OPEN state")
-                
-                # OPEN state - reject calls
-                if state['state'] == CircuitState.OPEN:
-                    logger.warning(f"Circuit breaker OPEN for {self.service_name}, rejecting call")
-                    if fallback:
-                        return await fallback(*args, **kwargs)
-                    raise Exception(f"Circuit breaker is OPEN for {self.service_name}")
-                
-                # HALF_OPEN state - limited calls
-                if state['state'] == CircuitState.HALF_OPEN:
-                    if self._half_open_counter >= self.half_open_requests:
-                        logger.warning(f"Circuit breaker HALF_OPEN limit reached for {self.service_name}")
-                        if fallback:
-                            return await fallback(*args, **kwargs)
-                        raise Exception(f"Circuit breaker HALF_OPEN limit reached for {self.service_name}")
-                    self._half_open_counter += 1
-            
-            # Try to execute the function
-            try:
-                result = await func(*args, **kwargs)
-                
-                # Success - update state
-                async with self._lock:
-                    state = await self._get_state(conn)
-                    
-                    if state['state'] == CircuitState.HALF_OPEN:
-                        new_success_count = state['success_count'] + 1
-                        if new_success_count >= self.success_threshold:
-                            # Recover to CLOSED
-                            await self._update_state(
-                                conn, 
-                                CircuitState.CLOSED, 
-                                increment_success=True,
-                                reset_counts=True
-                            )
-                            logger.info(f"Circuit breaker for {self.service_name} recovered to CLOSED state")
-                        else:
-                            await self._update_state(conn, state['state'], increment_success=True)
-                    else:
-                        # CLOSED state - just track success
-                        await self._update_state(conn, state['state'], increment_success=True)
-                
-                return result
-                
-            except Exception as e:
-                # Failure - update state
-                async with self._lock:
-                    state = await self._get_state(conn)
-                    
-                    if state['state'] == CircuitState.CLOSED:
-                        new_failure_count = state['failure_count'] + 1
-                        if new_failure_count >= self.failure_threshold:
-                            # Trip to OPEN
-                            await self._update_state(
-                                conn,
-                                CircuitState.OPEN,
-                                increment_failure=True
-                            )
-                            logger.error(f"Circuit breaker for {self.service_name} tripped to OPEN state")
-                        else:
-                            await self._update_state(conn, state['state'], increment_failure=True)
-                            
-                    elif state['state'] == CircuitState.HALF_OPEN:
-                        # Failed in HALF_OPEN, back to OPEN
-                        await self._update_state(
-                            conn,
-                            CircuitState.OPEN,
-                            increment_failure=True
-                        )
-                        logger.warning(f"Circuit breaker for {self.service_name} failed in HALF_OPEN, back to OPEN")
-                    else:
-                        # Already OPEN
-                        await self._update_state(conn, state['state'], increment_failure=True)
-                
-                raise
-    
+        if self._store:
+            self._store.ensure_started()
+
+        rejection = self._admit()
+        if rejection:
+            if fallback:
+                return await fallback(*args, **kwargs)
+            raise Exception(rejection)
+        probe = self.state == CircuitState.HALF_OPEN
+
+        # Try to execute the function
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            if isinstance(e, Exception):
+                self._record_failure(probe)
+            elif probe:
+                # Cancelled probe: free the slot without counting a failure
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+            raise
+
+        self._record_success(probe)
+        return result
+
+    def apply_remote_state(
+        self,
+        state: str,
+        opened_at: Optional[datetime] = None,
+        half_opened_at: Optional[datetime] = None
+    ) -> bool:
+        """Adopt a transition made by another process or directly in the table"""
+        try:
+            new_state = CircuitState(state)
+        except ValueError:
+            return False
+        if new_state == self.state:
+            return False
+        self.state = new_state
+        if new_state == CircuitState.OPEN:
+            self.opened_at = _aware(opened_at) or _utcnow()
+        elif new_state == CircuitState.HALF_OPEN:
+            self.half_opened_at = _aware(half_opened_at) or _utcnow()
+        self.failure_count = 0
+        self.success_count = 0
+        self._half_open_in_flight = 0
+        logger.info(f"Circuit breaker for {self.service_name} synced to {new_state.value.upper()} from shared state")
+        return True
+
     async def get_metrics(self) -> Dict[str, Any]:
         """Get circuit breaker metrics"""
-        async with self.db_pool.acquire() as conn:
-            state = await self._get_state(conn)
-            
-            # Calculate success rate
-            total = state['total_requests']
-            success_rate = (state['total_successes'] / total * 100) if total > 0 else 0
-            
-            return {
-                'service_name': self.service_name,
-                'current_state': state['state'],
-                'failure_count': state['failure_count'],
-                'success_count': state['success_count'],
-                'total_requests': state['total_requests'],
-                'total_failures': state['total_failures'],
-                'total_successes': state['total_successes'],
-                'success_rate': round(success_rate, 2),
-                'last_failure_at': state['last_failure_at'],
-                'last_success_at': state['last_success_at'],
-                'opened_at': state['opened_at'],
-                'half_opened_at': state['half_opened_at']
-            }
-    
+        persisted = self._persisted
+        total = persisted.get('total_requests', 0) + self._pending_requests
+        total_successes = persisted.get('total_successes', 0) + self._pending_successes
+        total_failures = persisted.get('total_failures', 0) + self._pending_failures
+
+        # Calculate success rate
+        success_rate = (total_successes / total * 100) if total > 0 else 0
+
+        return {
+            'service_name': self.service_name,
+            'current_state': self.state.value,
+            'failure_count': self.failure_count,
+            'success_count': self.success_count,
+            'total_requests': total,
+            'total_failures': total_failures,
+            'total_successes': total_successes,
+            'success_rate': round(success_rate, 2),
+            'last_failure_at': self._last_failure_at or persisted.get('last_failure_at'),
+            'last_success_at': self._last_success_at or persisted.get('last_success_at'),
+            'opened_at': self.opened_at,
+            'half_opened_at': self.half_opened_at
+        }
+
     async def reset(self):
         """Manually reset circuit breaker to CLOSED state"""
-        async with self.db_pool.acquire() as conn:
-            async with self._lock:
-                await self._update_state(conn, CircuitState.CLOSED, reset_counts=True)
-                self._half_open_counter = 0
-                logger.info(f"Circuit breaker for {self.service_name} manually reset to CLOSED")
+        self._transition(CircuitState.CLOSED, reset_counts=True)
+        self._half_open_in_flight = 0
+        # A reset is always written, even if this process already saw CLOSED
+        self._state_changed = True
+        logger.info(f"Circuit breaker for {self.service_name} manually reset to CLOSED")
+        if self._store:
+            await self._store.flush()
+
+    def _take_pending(self) -> Dict[str, Any]:
+        """Snapshot and clear unpersisted deltas (restored if the write fails)"""
+        pending = {
+            'requests': self._pending_requests,
+            'failures': self._pending_failures,
+            'successes': self._pending_successes,
+            'last_failure_at': self._last_failure_at,
+            'last_success_at': self._last_success_at,
+            'state_changed': self._state_changed,
+            'transitions': self._transitions,
+        }
+        self._pending_requests = 0
+        self._pending_failures = 0
+        self._pending_successes = 0
+        self._state_changed = False
+        return pending
+
+    def _restore_pending(self, pending: Dict[str, Any]):
+        self._pending_requests += pending['requests']
+        self._pending_failures += pending['failures']
+        self._pending_successes += pending['successes']
+        self._state_changed = self._state_changed or pending['state_changed']
+
+    @property
+    def _has_pending(self) -> bool:
+        return bool(self._pending_requests or self._state_changed)
+
+
+class CircuitBreakerStore:
+    """
+    Process-wide registry of circuit breakers and their background sync.
+
+    Every CircuitBreakerManager shares this store, so all pipelines in a
+    process see the same breaker for a service.
+    """
+
+    def __init__(self):
+        self.db_pool: Optional[DatabasePool] = None
+        self.origin = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake_event: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._listener: Optional[asyncpg.Connection] = None
+        self._listener_failed = False
+        self._persisted_names: set = set()
+
+    @property
+    def flush_interval(self) -> float:
+        return float(getattr(settings, 'CIRCUIT_BREAKER_FLUSH_INTERVAL_S', 5))
+
+    def bind(self, db_pool: DatabasePool):
+        if self.db_pool is None:
+            self.db_pool = db_pool
+
+    def breaker(self, service_name: str, **kwargs) -> CircuitBreaker:
+        if service_name not in self._breakers:
+            self._breakers[service_name] = CircuitBreaker(
+                service_name=service_name,
+                db_pool=self.db_pool,
+                store=self,
+                **kwargs
+            )
+        self.ensure_started()
+        return self._breakers[service_name]
+
+    @property
+    def breakers(self) -> Dict[str, CircuitBreaker]:
+        return self._breakers
+
+    def ensure_started(self):
+        """Start the sync task once an event loop is running"""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._wake_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    def wake(self):
+        """Persist and broadcast a state transition without waiting for the interval"""
+        if self._wake_event is not None:
+            self._wake_event.set()
+
+    async def stop(self):
+        """Write outstanding counters and stop syncing"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        if self._breakers and self.db_pool is not None:
+            await self.flush()
+        await self._close_listener()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake_event.clear()
+            try:
+                await self._ensure_listener()
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Circuit breaker sync failed: {e}")
+
+    async def flush(self):
+        """
+        Persist pending counters and transitions for every breaker in one
+        transaction, broadcast the transitions, then adopt any state changed
+        elsewhere.
+        """
+        if not self._breakers or self.db_pool is None:
+            return
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            breakers = list(self._breakers.values())
+            pending = {b.service_name: b._take_pending() for b in breakers if b._has_pending}
+            new = [b for b in breakers if b.service_name not in self._persisted_names]
+
+            try:
+                async with self.db_pool.acquire() as conn:
+                    async with conn.transaction():
+                        if new:
+                            await self._insert_missing(conn, new)
+                        if pending:
+                            await self._write_pending(conn, pending)
+                        rows = await conn.fetch("""
+                            SELECT service_name, state, opened_at, half_opened_at,
+                                   total_requests, total_failures, total_successes,
+                                   last_failure_at, last_success_at
+                            FROM circuit_breakers
+                            WHERE service_name = ANY($1::text[])
+                        """, [b.service_name for b in breakers])
+            except Exception:
+                for name, snapshot in pending.items():
+                    self._breakers[name]._restore_pending(snapshot)
+                raise
+
+            self._persisted_names.update(b.service_name for b in new)
+            for row in rows:
+                breaker = self._breakers.get(row['service_name'])
+                if breaker is None:
+                    continue
+                breaker._persisted = dict(row)
+                snapshot = pending.get(breaker.service_name)
+                # Only adopt the table's state if this process has not changed
+                # the breaker since the snapshot (its own write wins next flush)
+                unchanged = snapshot is None or snapshot['transitions'] == breaker._transitions
+                if unchanged and not breaker._state_changed:
+                    breaker.apply_remote_state(row['state'], row['opened_at'], row['half_opened_at'])
+
+    async def _insert_missing(self, conn: asyncpg.Connection, breakers: List[CircuitBreaker]):
+        await conn.execute("""
+            INSERT INTO circuit_breakers (
+                service_name, failure_threshold, success_threshold, timeout_seconds
+            )
+            SELECT * FROM unnest($1::text[], $2::int[], $3::int[], $4::int[])
+            ON CONFLICT (service_name) DO NOTHING
+        """,
+            [b.service_name for b in breakers],
+            [b.failure_threshold for b in breakers],
+            [b.success_threshold for b in breakers],
+            [b.timeout_seconds for b in breakers]
+        )
+
+    async def _write_pending(self, conn: asyncpg.Connection, pending: Dict[str, Dict[str, Any]]):
+        names = list(pending)
+        breakers = [self._breakers[name] for name in names]
+        snapshots = [pending[name] for name in names]
+
+        await conn.execute("""
+            UPDATE circuit_breakers cb SET
+                total_requests = cb.total_requests + u.requests,
+                total_failures = cb.total_failures + u.failures,
+                total_successes = cb.total_successes + u.successes,
+                last_failure_at = COALESCE(u.last_failure_at, cb.last_failure_at),
+                last_success_at = COALESCE(u.last_success_at, cb.last_success_at),
+                state = CASE WHEN u.state_changed THEN u.state ELSE cb.state END,
+                opened_at = CASE WHEN u.state_changed THEN COALESCE(u.opened_at, cb.opened_at) ELSE cb.opened_at END,
+                half_opened_at = CASE WHEN u.state_changed THEN COALESCE(u.half_opened_at, cb.half_opened_at) ELSE cb.half_opened_at END,
+                failure_count = CASE WHEN u.state_changed OR cb.state::text = u.state THEN u.failure_count ELSE cb.failure_count END,
+                success_count = CASE WHEN u.state_changed OR cb.state::text = u.state THEN u.success_count ELSE cb.success_count END,
+                updated_at = NOW()
+            FROM unnest(
+                $1::text[], $2::bigint[], $3::bigint[], $4::bigint[],
+                $5::timestamptz[], $6::timestamptz[], $7::bool[], $8::text[],
+                $9::timestamptz[], $10::timestamptz[], $11::int[], $12::int[]
+            ) AS u(
+                service_name, requests, failures, successes,
+                last_failure_at, last_success_at, state_changed, state,
+                opened_at, half_opened_at, failure_count, success_count
+            )
+            WHERE cb.service_name = u.service_name
+        """,
+            names,
+            [s['requests'] for s in snapshots],
+            [s['failures'] for s in snapshots],
+            [s['successes'] for s in snapshots],
+            [s['last_failure_at'] for s in snapshots],
+            [s['last_success_at'] for s in snapshots],
+            [s['state_changed'] for s in snapshots],
+            [b.state.value for b in breakers],
+            [b.opened_at for b in breakers],
+            [b.half_opened_at for b in breakers],
+            [b.failure_count for b in breakers],
+            [b.success_count for b in breakers]
+        )
+
+        # Delivered to listeners when the transaction commits
+        for breaker, snapshot in zip(breakers, snapshots):
+            if snapshot['state_changed']:
+                await conn.execute(
+                    "SELECT pg_notify($1, $2)",
+                    CIRCUIT_BREAKER_CHANNEL,
+                    json.dumps({
+                        'origin': self.origin,
+                        'service_name': breaker.service_name,
+                        'state': breaker.state.value,
+                        'opened_at': breaker.opened_at.isoformat() if breaker.opened_at else None,
+                    })
+                )
+
+    async def _ensure_listener(self):
+        """Dedicated LISTEN connection (outside the pool) for transitions made elsewhere"""
+        if not getattr(settings, 'CIRCUIT_BREAKER_LISTEN_ENABLED', True):
+            return
+        if self._listener is not None and not self._listener.is_closed():
+            return
+        try:
+            self._listener = await asyncpg.connect(settings.DATABASE_URL)
+            await self._listener.add_listener(CIRCUIT_BREAKER_CHANNEL, self._on_notify)
+            self._listener_failed = False
+            logger.info("Circuit breaker state listener connected")
+        except Exception as e:
+            self._listener = None
+            if not self._listener_failed:
+                # Periodic re-reads still converge, only slower
+                logger.warning(f"Circuit breaker listener unavailable, relying on periodic sync: {e}")
+                self._listener_failed = True
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            message = json.loads(payload)
+        except (TypeError, ValueError):
+            return
+        if message.get('origin') == self.origin:
+            return
+        breaker = self._breakers.get(message.get('service_name'))
+        if breaker is None:
+            return
+        opened_at = message.get('opened_at')
+        breaker.apply_remote_state(
+            message.get('state'),
+            datetime.fromisoformat(opened_at) if opened_at else None
+        )
+
+    async def _close_listener(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.is_closed():
+            try:
+                await listener.close()
+            except Exception as e:
+                logger.debug(f"Error closing circuit breaker listener: {e}")
+
+
+# Global circuit breaker store
+circuit_breaker_store = CircuitBreakerStore()
+
+
+async def notify_circuit_breaker_reset(conn: asyncpg.Connection, service_name: str):
+    """Tell running processes about a reset written directly to circuit_breakers"""
+    await conn.execute(
+        "SELECT pg_notify($1, $2)",
+        CIRCUIT_BREAKER_CHANNEL,
+        json.dumps({'origin': 'sql', 'service_name': service_name, 'state': CircuitState.CLOSED.value})
+    )
 
 
 class CircuitBreakerManager:
     """Manages circuit breakers for multiple services"""
-    
-    def __init__(self, db_pool: DatabasePool):
+
+    def __init__(self, db_pool: DatabasePool, store: Optional[CircuitBreakerStore] = None):
         self.db_pool = db_pool
+        self._store = store or circuit_breaker_store
+        self._store.bind(db_pool)
         self._breakers: Dict[str, CircuitBreaker] = {}
-        
+
     def get_breaker(
         self,
         service_name: str,
@@ -280,23 +587,26 @@ class CircuitBreakerManager:
     ) -> CircuitBreaker:
         """Get or create circuit breaker for a service"""
         if service_name not in self._breakers:
-            self._breakers[service_name] = CircuitBreaker(
-                service_name=service_name,
-                db_pool=self.db_pool,
+            self._breakers[service_name] = self._store.breaker(
+                service_name,
                 failure_threshold=failure_threshold,
                 success_threshold=success_threshold,
                 timeout_seconds=timeout_seconds
             )
         return self._breakers[service_name]
-    
+
     async def get_all_metrics(self) -> Dict[str, Dict[str, Any]]:
         """Get metrics for all circuit breakers"""
         metrics = {}
         for name, breaker in self._breakers.items():
             metrics[name] = await breaker.get_metrics()
         return metrics
-    
+
     async def reset_all(self):
         """Reset all circuit breakers"""
         for breaker in self._breakers.values():
             await breaker.reset()
+
+    async def flush(self):
+        """Persist pending counters now (normally done by the background sync)"""
+        await self._store.flush()
@@ -1,23 +1,31 @@
 """
 Persistent Job Queue Management
 Provides reliable background job processing with retry capabilities
+
+Workers claim several jobs per statement (FOR UPDATE SKIP LOCKED), run them
+concurrently up to a per-queue cap without holding a connection, and wake on
+pg_notify from enqueue instead of polling. Stale locks are reaped on their
+own timer, which also refreshes the locks of jobs still running.
 """
 
 import asyncio
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional, Callable, TypeVar, Generic
+from typing import Dict, Any, List, Optional, Callable, TypeVar
 from uuid import UUID, uuid4
 from enum import Enum
 import asyncpg
 from loguru import logger
 from pydantic import BaseModel
 
+from app.core.config import settings
 from app.core.database import DatabasePool
 
 
 T = TypeVar('T', bound=BaseModel)
 
+JOB_QUEUE_CHANNEL = "job_queue"
+
 
 class JobStatus(str, Enum):
     PENDING = "pending"
@@ -75,16 +83,23 @@ class JobQueue:
         db_pool: DatabasePool,
         worker_id: Optional[str] = None,
         lock_timeout_seconds: int = 300,
-        visibility_timeout_seconds: int = 300
+        visibility_timeout_seconds: int = 300,
+        idle_poll_seconds: float = 30.0
     ):
         self.queue_name = queue_name
         self.db_pool = db_pool
         self.worker_id = worker_id or f"worker-{uuid4()}"
         self.lock_timeout_seconds = lock_timeout_seconds
         self.visibility_timeout_seconds = visibility_timeout_seconds
+        self.idle_poll_seconds = idle_poll_seconds
         self._handlers: Dict[str, Callable] = {}
         self._running = False
         self._processing_task: Optional[asyncio.Task] = None
+        self._reaper_task: Optional[asyncio.Task] = None
+        self._in_flight: Dict[UUID, asyncio.Task] = {}
+        self._wake: Optional[asyncio.Event] = None
+        self._listener: Optional[asyncpg.Connection] = None
+        self._next_due: Optional[datetime] = None
         
     def register_handler(self, job_type: str, handler: Callable[[Dict[str, Any]], Any]):
         """Register a handler for a specific job type"""
@@ -134,6 +149,8 @@ class JobQueue:
                 max_attempts,
                 json.dumps(metadata or {})
             )
+            if delay_seconds <= 0:
+                await self._notify(conn)
             
         logger.info(f"Enqueued job {job_id} of type {job_type} to {self.queue_name}")
         return job_id
@@ -171,59 +188,104 @@ class JobQueue:
                 columns=['id', 'queue_name', 'job_type', 'payload', 'priority',
                         'scheduled_for', 'max_attempts', 'metadata']
             )
+            if records:
+                await self._notify(conn)
             
         logger.info(f"Bulk enqueued {len(jobs)} jobs to {self.queue_name}")
         return job_ids
         
-    async def _acquire_job(self, conn: asyncpg.Connection) -> Optional[Job]:
+    async def _notify(self, conn: asyncpg.Connection):
+        """Wake workers listening on this queue (delivered on commit)"""
+        await conn.execute("SELECT pg_notify($1, $2)", JOB_QUEUE_CHANNEL, self.queue_name)
+
+    @staticmethod
+    def _row_to_job(row: asyncpg.Record) -> Job:
+        job_data = dict(row)
+        for key in ('payload', 'metadata'):
+            if isinstance(job_data.get(key), str):
+                job_data[key] = json.loads(job_data[key])
+        return Job(**job_data)
+
+    async def _claim_jobs(self, limit: int) -> List[Job]:
+        """Lock up to `limit` available jobs in one statement"""
+        async with self.db_pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                WITH next_jobs AS (
+                    SELECT id FROM job_queue
+                    WHERE queue_name = $1
+                    AND status = 'pending'
+                    AND NOT dead_letter
+                    AND scheduled_for <= NOW()
+                    AND (locked_at IS NULL OR locked_at < $3)
+                    ORDER BY priority DESC, scheduled_for ASC
+                    LIMIT $4
+                    FOR UPDATE SKIP LOCKED
+                )
+                UPDATE job_queue j
+                SET 
+                    locked_at = NOW(),
+                    locked_by = $2,
+                    status = 'processing',
+                    started_at = COALESCE(j.started_at, NOW()),
+                    attempts = j.attempts + 1
+                FROM next_jobs
+                WHERE j.id = next_jobs.id
+                RETURNING j.*
+                """,
+                self.queue_name,
+                self.worker_id,
+                datetime.utcnow() - timedelta(seconds=self.lock_timeout_seconds),
+                limit
+            )
+        jobs = [self._row_to_job(row) for row in rows]
+        # UPDATE ... RETURNING does not keep the subquery order
+        jobs.sort(key=lambda job: (-job.priority, job.scheduled_for))
+        return jobs
+
+    async def _acquire_job(self) -> Optional[Job]:
         """Acquire next available job from queue"""
-        # Release expired locks
-        await conn.execute(
-            """
-            UPDATE job_queue 
-            SET locked_at = NULL, locked_by = NULL
-            WHERE queue_name = $1
-            AND locked_at < $2
-            AND status = 'processing'
-            """,
-            self.queue_name,
-            datetime.utcnow() - timedelta(seconds=self.lock_timeout_seconds)
-        )
-        
-        # Acquire next job
-        row = await conn.fetchrow(
-            """
-            UPDATE job_queue
-            SET 
-                locked_at = NOW(),
-                locked_by = $2,
-                status = 'processing',
-                started_at = COALESCE(started_at, NOW()),
-                attempts = attempts + 1
-            WHERE id = (
-                SELECT id FROM job_queue
+        jobs = await self._claim_jobs(1)
+        return jobs[0] if jobs else None
+
+    async def _reap_expired_locks(self) -> int:
+        """
+        Return jobs whose worker stopped heartbeating to pending (or dead letter
+        once out of attempts), and refresh the locks of jobs running here.
+        """
+        async with self.db_pool.acquire() as conn:
+            if self._in_flight:
+                await conn.execute(
+                    """
+                    UPDATE job_queue SET locked_at = NOW()
+                    WHERE id = ANY($1::uuid[]) AND locked_by = $2 AND status = 'processing'
+                    """,
+                    list(self._in_flight),
+                    self.worker_id
+                )
+            result = await conn.execute(
+                """
+                UPDATE job_queue
+                SET 
+                    status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                    dead_letter = attempts >= max_attempts,
+                    failed_at = CASE WHEN attempts >= max_attempts THEN NOW() ELSE failed_at END,
+                    last_error = COALESCE(last_error, 'Lock expired'),
+                    locked_at = NULL,
+                    locked_by = NULL
                 WHERE queue_name = $1
-                AND status = 'pending'
-                AND NOT dead_letter
-                AND scheduled_for <= NOW()
-                AND (locked_at IS NULL OR locked_at < $3)
-                ORDER BY priority DESC, scheduled_for ASC
-                LIMIT 1
-                FOR UPDATE SKIP LOCKED
+                AND status = 'processing'
+                AND locked_at < $2
+                """,
+                self.queue_name,
+                datetime.utcnow() - timedelta(seconds=self.lock_timeout_seconds)
             )
-            RETURNING *
-            """,
-            self.queue_name,
-            self.worker_id,
-            datetime.utcnow() - timedelta(seconds=self.lock_timeout_seconds)
-        )
-        
-        if row:
-            job_data = dict(row)
-            job_data['payload'] = json.loads(job_data['payload'])
-            job_data['metadata'] = json.loads(job_data['metadata'])
-            return Job(**job_data)
-        return None
+            reaped = int(result.split()[-1])
+            if reaped:
+                await self._notify(conn)
+        if reaped:
+            logger.warning(f"Released {reaped} expired job locks in {self.queue_name}")
+        return reaped
         
     async def _complete_job(self, job_id: UUID):
         """Mark job as completed"""
@@ -277,6 +339,8 @@ class JobQueue:
             )
             
             if row:
+                if row['status'] == 'pending':
+                    self._remember_due(row['scheduled_for'])
                 if row['status'] == 'failed':
                     logger.error(f"Job {job_id} failed after {row['attempts']} attempts")
                 else:
@@ -310,44 +374,124 @@ class JobQueue:
             return False
             
     async def process_jobs(self, batch_size: int = 10):
-        """Process jobs in batches"""
+        """Process jobs one at a time"""
+        await self.run_worker(concurrency=1, batch_size=batch_size)
+
+    async def run_worker(self, concurrency: int = 10, batch_size: Optional[int] = None):
+        """
+        Claim jobs in batches and run up to `concurrency` of them at once.
+
+        A connection is only held while claiming or updating a job, never
+        while a handler runs.
+        """
         self._running = True
-        logger.info(f"Starting job processor for queue {self.queue_name}")
-        
+        self._wake = asyncio.Event()
+        batch_size = batch_size or concurrency
+        await self._start_listener()
+        self._reaper_task = asyncio.create_task(self._reap_loop())
+        logger.info(f"Starting job processor for queue {self.queue_name} (concurrency {concurrency})")
+
+        try:
+            while self._running:
+                # Clear before claiming: a NOTIFY that lands during the claim query must still wake us
+                self._wake.clear()
+                free = concurrency - len(self._in_flight)
+                claimed = 0
+                if free > 0:
+                    try:
+                        jobs = await self._claim_jobs(min(free, batch_size))
+                    except Exception as e:
+                        logger.error(f"Error in job processor: {e}")
+                        await asyncio.sleep(5)
+                        continue
+                    for job in jobs:
+                        task = asyncio.create_task(self._process_job(job))
+                        self._in_flight[job.id] = task
+                        task.add_done_callback(lambda _, job_id=job.id: self._on_job_done(job_id))
+                    claimed = len(jobs)
+
+                # A full claim may mean more work is waiting; otherwise sleep
+                # until notified, a slot frees up or a retry becomes due
+                if free > 0 and claimed == free:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self._idle_timeout())
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self._in_flight:
+                await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+            if self._reaper_task:
+                self._reaper_task.cancel()
+                self._reaper_task = None
+            await self._stop_listener()
+
+    def _on_job_done(self, job_id: UUID):
+        self._in_flight.pop(job_id, None)
+        if self._wake:
+            self._wake.set()
+
+    def _remember_due(self, scheduled_for: Optional[datetime]):
+        if scheduled_for is None:
+            return
+        scheduled_for = scheduled_for.replace(tzinfo=None)
+        if self._next_due is None or scheduled_for < self._next_due:
+            self._next_due = scheduled_for
+
+    def _idle_timeout(self) -> float:
+        """Poll interval, shortened when a retry scheduled by this worker is due sooner"""
+        timeout = self.idle_poll_seconds
+        if self._next_due is not None:
+            until_due = (self._next_due - datetime.utcnow()).total_seconds()
+            if until_due <= timeout:
+                self._next_due = None
+                timeout = max(until_due, 0.05)
+        return timeout
+
+    async def _reap_loop(self):
+        interval = max(self.lock_timeout_seconds / 3, 5)
         while self._running:
+            await asyncio.sleep(interval)
             try:
-                jobs_processed = 0
-                
-                # Process batch
-                async with self.db_pool.acquire() as conn:
-                    for _ in range(batch_size):
-                        job = await self._acquire_job(conn)
-                        if not job:
-                            break
-                            
-                        await self._process_job(job)
-                        jobs_processed += 1
-                        
-                # If no jobs processed, wait before checking again
-                if jobs_processed == 0:
-                    await asyncio.sleep(1)
-                    
+                await self._reap_expired_locks()
+            except Exception as e:
+                logger.warning(f"Job lock reaper failed for {self.queue_name}: {e}")
+
+    async def _start_listener(self):
+        """Dedicated LISTEN connection (outside the pool) for enqueue wakeups"""
+        try:
+            self._listener = await asyncpg.connect(settings.DATABASE_URL)
+            await self._listener.add_listener(JOB_QUEUE_CHANNEL, self._on_notify)
+        except Exception as e:
+            self._listener = None
+            logger.warning(f"Job queue listener unavailable for {self.queue_name}, polling instead: {e}")
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if payload == self.queue_name and self._wake:
+            self._wake.set()
+
+    async def _stop_listener(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and not listener.is_closed():
+            try:
+                await listener.close()
             except Exception as e:
-                logger.error(f"Error in job processor: {e}")
-                await asyncio.sleep(5)
+                logger.debug(f"Error closing job queue listener: {e}")
                 
-    async def start(self, batch_size: int = 10):
+    async def start(self, batch_size: int = 10, concurrency: int = 1):
         """Start background job processing"""
         if self._processing_task:
             logger.warning(f"Job processor already running for {self.queue_name}")
             return
             
-        self._processing_task = asyncio.create_task(self.process_jobs(batch_size))
+        self._processing_task = asyncio.create_task(self.run_worker(concurrency, batch_size))
         logger.info(f"Started job processor for {self.queue_name}")
         
     async def stop(self):
-        """Stop job processing"""
+        """Stop job processing (waits for running jobs to finish)"""
         self._running = False
+        if self._wake:
+            self._wake.set()
         if self._processing_task:
             await self._processing_task
             self._processing_task = None
@@ -397,6 +541,8 @@ class JobQueue:
                 
             result = await conn.execute(query, *params)
             count = int(result.split()[-1])
+            if count:
+                await self._notify(conn)
             logger.info(f"Retrying {count} dead letter jobs in {self.queue_name}")
             return count
 
@@ -419,10 +565,10 @@ class JobQueueManager:
             )
         return self._queues[queue_name]
         
-    async def start_all(self, batch_size: int = 10):
+    async def start_all(self, batch_size: int = 10, concurrency: int = 1):
         """Start all job queues"""
         for queue in self._queues.values():
-            await queue.start(batch_size)
+            await queue.start(batch_size, concurrency)
             
     async def stop_all(self):
         """Stop all job queues"""
@@ -13,6 +13,7 @@ import asyncpg
 from app.core.database import db_pool
 from app.services.pipeline.pipeline_alerting import PipelineAlerter
 from app.services.pipeline.flexible_phase_completion import FlexiblePhaseCompletion
+from app.services.robustness.circuit_breaker import notify_circuit_breaker_reset
 
 
 class PipelineMonitor:
@@ -225,6 +226,7 @@ class PipelineMonitor:
             SET state = 'closed', failure_count = 0, opened_at = NULL 
             WHERE service_name = 'youtube_api'
         """)
+        await notify_circuit_breaker_reset(conn, 'youtube_api')
         
         # Update phase to trigger re-processing
         await conn.execute("""
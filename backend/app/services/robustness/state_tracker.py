@@ -1,8 +1,13 @@
 """
 Pipeline State Tracking Service
 Provides granular tracking and resume capabilities for pipeline execution
+
+Per-item transitions from the phases go through a coalescing writer that
+keeps only the latest state per item and flushes them as one set-based
+UPDATE every few hundred milliseconds.
 """
 
+import asyncio
 import json
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
@@ -11,6 +16,7 @@ from enum import Enum
 import asyncpg
 from loguru import logger
 
+from app.core.config import settings
 from app.core.database import DatabasePool
 from app.core.robustness_logging import get_logger, log_performance
 
@@ -24,6 +30,19 @@ class StateStatus(str, Enum):
     QUEUED = "queued"
 
 
+# Shared by the set-based updates; u is the unnest() of the buffered transitions
+_BULK_SET_CLAUSE = """
+    status = u.status,
+    updated_at = NOW(),
+    last_attempt_at = CASE WHEN u.attempted THEN NOW() ELSE ps.last_attempt_at END,
+    attempt_count = ps.attempt_count + CASE WHEN u.attempted THEN 1 ELSE 0 END,
+    completed_at = CASE WHEN u.status = 'completed' THEN NOW() ELSE ps.completed_at END,
+    progress_data = COALESCE(u.progress_data::jsonb, ps.progress_data),
+    last_error = COALESCE(u.last_error, ps.last_error),
+    error_category = COALESCE(u.error_category, ps.error_category)
+"""
+
+
 class StateTracker:
     """
     Tracks pipeline execution state at a granular level
@@ -33,6 +52,11 @@ class StateTracker:
     def __init__(self, db_pool: DatabasePool):
         self.db_pool = db_pool
         self.logger = get_logger("state_tracker")
+        self.writer = StateUpdateWriter(
+            self,
+            flush_interval_ms=getattr(settings, 'STATE_TRACKER_FLUSH_INTERVAL_MS', 250),
+            max_pending=getattr(settings, 'STATE_TRACKER_MAX_PENDING', 5000)
+        )
         
     @log_performance("state_tracker", "initialize_pipeline")
     async def initialize_pipeline(
@@ -106,8 +130,9 @@ class StateTracker:
     def _generate_item_identifier(self, phase: str, item: Dict[str, Any]) -> str:
         """Generate unique identifier for an item"""
         if phase in ['keyword_metrics', 'serp_collection']:
-            # For keyword-based phases
-            return f"{item['keyword']}:{item.get('region', 'global')}:{item.get('type', 'web')}"
+            # For keyword-based phases (one item per keyword, region and content type)
+            content_type = item.get('content_type') or item.get('type', 'web')
+            return f"{item['keyword']}:{item.get('region', 'global')}:{content_type}"
         elif phase in ['company_enrichment']:
             # For domain-based phases
             return item['domain']
@@ -222,15 +247,100 @@ class StateTracker:
             reason=error
         )
     
+    @log_performance("state_tracker", "bulk_update_states")
     async def bulk_update_states(
         self,
-        updates: List[Tuple[UUID, StateStatus, Optional[Dict[str, Any]]]]
-    ):
-        """Update multiple states efficiently"""
+        updates: List[Tuple]
+    ) -> int:
+        """
+        Update multiple states in one statement
+
+        Each update is (state_id, status, progress_data[, error[, error_category]]).
+        """
+        if not updates:
+            return 0
+        columns = self._bulk_columns(updates)
         async with self.db_pool.acquire() as conn:
-            async with conn.transaction():
-                for state_id, status, progress_data in updates:
-                    await self.update_state(state_id, status, progress_data)
+            result = await conn.execute(
+                f"""
+                UPDATE pipeline_state ps SET {_BULK_SET_CLAUSE}
+                FROM unnest($1::uuid[], $2::text[], $3::bool[], $4::text[], $5::text[], $6::text[])
+                    AS u(id, status, attempted, progress_data, last_error, error_category)
+                WHERE ps.id = u.id
+                """,
+                *columns
+            )
+        return int(result.split()[-1])
+
+    @log_performance("state_tracker", "bulk_update_items")
+    async def bulk_update_items(
+        self,
+        pipeline_execution_id: UUID,
+        phase: str,
+        updates: List[Tuple]
+    ) -> int:
+        """
+        Update items of one phase by item_identifier in one statement
+
+        Each update is (item_identifier, status, progress_data[, error[, error_category]]).
+        """
+        if not updates:
+            return 0
+        columns = self._bulk_columns(updates)
+        async with self.db_pool.acquire() as conn:
+            result = await conn.execute(
+                f"""
+                UPDATE pipeline_state ps SET {_BULK_SET_CLAUSE}
+                FROM unnest($3::text[], $4::text[], $5::bool[], $6::text[], $7::text[], $8::text[])
+                    AS u(item_identifier, status, attempted, progress_data, last_error, error_category)
+                WHERE ps.pipeline_execution_id = $1
+                AND ps.phase = $2
+                AND ps.item_identifier = u.item_identifier
+                """,
+                pipeline_execution_id,
+                phase,
+                *columns
+            )
+        return int(result.split()[-1])
+
+    @staticmethod
+    def _bulk_columns(updates: List[Tuple]) -> List[List[Any]]:
+        """Turn update tuples into the parallel arrays unnest() expects"""
+        keys, statuses, attempted, progress, errors, categories = [], [], [], [], [], []
+        for update in updates:
+            key, status, progress_data = update[0], update[1], update[2]
+            error = update[3] if len(update) > 3 else None
+            error_category = update[4] if len(update) > 4 else None
+            # Coalesced updates carry whether any PROCESSING transition was folded in
+            was_attempted = update[5] if len(update) > 5 else status == StateStatus.PROCESSING
+            keys.append(key)
+            statuses.append(status.value if isinstance(status, StateStatus) else str(status))
+            attempted.append(bool(was_attempted))
+            progress.append(json.dumps(progress_data) if progress_data else None)
+            errors.append(error[:1000] if error else None)
+            categories.append(error_category)
+        return [keys, statuses, attempted, progress, errors, categories]
+
+    def record(
+        self,
+        pipeline_execution_id: Optional[Any],
+        phase: str,
+        item_identifier: str,
+        status: StateStatus,
+        progress_data: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        error_category: Optional[str] = None
+    ):
+        """Buffer an item transition; written by the coalescing writer"""
+        if pipeline_execution_id:
+            self.writer.record(
+                pipeline_execution_id, phase, item_identifier, status,
+                progress_data, error, error_category
+            )
+
+    async def flush_updates(self):
+        """Write buffered item transitions now (call before reading progress)"""
+        await self.writer.flush()
                     
     @log_performance("state_tracker", "get_phase_progress")
     async def get_phase_progress(
@@ -491,3 +601,122 @@ class StateTracker:
         )
         
         return count
+
+
+
+class StateUpdateWriter:
+    """
+    Coalescing writer for per-item state transitions
+
+    Keeps only the latest transition per item (remembering whether a
+    PROCESSING step was folded in, so attempt counts stay right) and writes
+    each pipeline/phase group with one bulk_update_items statement. The flush
+    task runs only while transitions are pending.
+    """
+
+    def __init__(self, tracker: StateTracker, flush_interval_ms: int = 250, max_pending: int = 5000):
+        self.tracker = tracker
+        self.flush_interval = max(flush_interval_ms, 10) / 1000
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+        self._pending_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self.transitions_recorded = 0
+        self.rows_written = 0
+        self.flushes = 0
+
+    def record(
+        self,
+        pipeline_execution_id: Any,
+        phase: str,
+        item_identifier: str,
+        status: StateStatus,
+        progress_data: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+        error_category: Optional[str] = None
+    ):
+        group = self._pending.setdefault((str(pipeline_execution_id), phase), {})
+        entry = group.get(item_identifier)
+        if entry is None:
+            entry = group[item_identifier] = {'attempted': False, 'progress_data': None, 'error': None, 'error_category': None}
+            self._pending_count += 1
+        entry['status'] = status
+        entry['attempted'] = entry['attempted'] or status == StateStatus.PROCESSING
+        if progress_data:
+            entry['progress_data'] = progress_data
+        if error:
+            entry['error'] = error
+        if error_category:
+            entry['error_category'] = error_category
+        self.transitions_recorded += 1
+        self._ensure_task()
+        if self._pending_count >= self.max_pending and self._full is not None:
+            self._full.set()
+
+    def _ensure_task(self):
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._full = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while self._pending_count:
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"State update flush failed, will retry: {e}")
+                await asyncio.sleep(self.flush_interval)
+
+    async def flush(self):
+        """Write every buffered transition (one statement per pipeline/phase)"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+            for index, ((pipeline_execution_id, phase), items) in enumerate(list(pending.items())):
+                updates = [
+                    (identifier, entry['status'], entry['progress_data'], entry['error'],
+                     entry['error_category'], entry['attempted'])
+                    for identifier, entry in items.items()
+                ]
+                try:
+                    self.rows_written += await self.tracker.bulk_update_items(
+                        UUID(pipeline_execution_id), phase, updates
+                    )
+                except Exception:
+                    # Put back what was not written; newer transitions win
+                    for (group_key, group_items) in list(pending.items())[index:]:
+                        self._requeue(group_key, group_items)
+                    raise
+            self.flushes += 1
+
+    def _requeue(self, group_key: Tuple[str, str], items: Dict[str, Dict[str, Any]]):
+        group = self._pending.setdefault(group_key, {})
+        for identifier, entry in items.items():
+            if identifier in group:
+                group[identifier]['attempted'] = group[identifier]['attempted'] or entry['attempted']
+            else:
+                group[identifier] = entry
+                self._pending_count += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'transitions_recorded': self.transitions_recorded,
+            'rows_written': self.rows_written,
+            'flushes': self.flushes,
+            'pending': self._pending_count,
+        }
@@ -352,6 +352,7 @@ class SchedulingService:
                 scheduled_for=scheduled_for,
                 # Enable robust execution for scheduled runs
                 force_refresh=True,  # Always refresh data for scheduled runs
+                content_refresh='revalidate',  # Re-scrape and re-analyze only pages that changed
                 enable_historical_tracking=True
             )
             
@@ -0,0 +1,189 @@
+"""
+Content Revalidation
+Cheap change detection for pages that were already scraped: a conditional
+direct GET (If-None-Match / If-Modified-Since) per stale page, falling back to
+comparing the extracted content hash when the origin ignores validators. Only
+pages that changed (or could not be checked) go back to ScrapingBee; unchanged
+pages keep their content, and their analysis carries over to the new run.
+"""
+import asyncio
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+from loguru import logger
+
+from app.core.config import settings
+from app.core.http_clients import http_clients
+from app.services.analysis.content_dedup import fingerprint_content, hamming_distance
+from app.services.scraping.host_scheduler import HostScheduler
+from app.services.scraping.html_extractor import html_extraction_pool
+
+
+CONTENT_REVALIDATION_SQL = """
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS http_etag TEXT;
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS http_last_modified TEXT;
+ALTER TABLE scraped_content ADD COLUMN IF NOT EXISTS revalidated_at TIMESTAMP;
+"""
+
+# Content refresh modes for already-scraped pages (PipelineConfig.content_refresh)
+REFRESH_SKIP = 'skip'              # Never re-scrape completed pages
+REFRESH_REVALIDATE = 'revalidate'  # Re-scrape stale pages only when they changed
+REFRESH_FORCE = 'force'            # Re-scrape every page
+
+REVALIDATION_TIMEOUT = 15.0
+NEAR_DUPLICATE_DISTANCE = 3  # SimHash bits; rotating dates or teasers do not count as a change
+
+
+@dataclass
+class RevalidationResult:
+    """Outcome of one revalidation pass"""
+    checked: int = 0
+    not_modified: int = 0      # 304 from the origin
+    hash_unchanged: int = 0    # 200, same or near-identical content fingerprint
+    changed: List[str] = field(default_factory=list)
+    unverified: List[str] = field(default_factory=list)  # Blocked, failed or too thin to compare
+
+    @property
+    def to_rescrape(self) -> List[str]:
+        return self.changed + self.unverified
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'checked': self.checked,
+            'unchanged': self.not_modified + self.hash_unchanged,
+            'not_modified': self.not_modified,
+            'hash_unchanged': self.hash_unchanged,
+            'changed': len(self.changed),
+            'unverified': len(self.unverified),
+        }
+
+
+class ContentRevalidator:
+    """
+    Decides which previously scraped pages need a paid re-scrape.
+
+    - Only completed pages not scraped or revalidated in the last
+      CONTENT_REVALIDATE_AFTER_DAYS days are checked
+    - Requests go direct (no ScrapingBee credits) through the per-host scheduler
+    - Stored validators are refreshed on every successful check
+    """
+
+    def __init__(self, db, web_scraper):
+        self.db = db
+        self.web_scraper = web_scraper
+        self.max_age_days = int(getattr(settings, 'CONTENT_REVALIDATE_AFTER_DAYS', 7) or 0)
+        self.concurrency = int(getattr(settings, 'CONTENT_REVALIDATION_CONCURRENCY', 20) or 20)
+        self._schema_ready = False
+
+    async def ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        async with self.db.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('scraped_content_revalidation'))")
+                await conn.execute(CONTENT_REVALIDATION_SQL)
+        self._schema_ready = True
+
+    async def revalidate(self, urls: Sequence[str]) -> RevalidationResult:
+        """Check the stale, already-scraped pages among urls"""
+        result = RevalidationResult()
+        if not urls:
+            return result
+        await self.ensure_schema()
+
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT url, content_hash, content_simhash, http_etag, http_last_modified
+                FROM scraped_content
+                WHERE url = ANY($1::text[])
+                  AND status = 'completed'
+                  AND COALESCE(revalidated_at, scraped_at) < NOW() - make_interval(days => $2)
+            """, list(urls), self.max_age_days)
+        if not rows:
+            return result
+
+        pages = {row['url']: dict(row) for row in rows}
+        checked: List[tuple] = []  # (url, etag, last_modified) for pages whose validators are fresh
+
+        async def check(url: str):
+            page = pages[url]
+            outcome, etag, last_modified = await self._check(page)
+            result.checked += 1
+            if outcome == 'not_modified':
+                result.not_modified += 1
+            elif outcome == 'hash_unchanged':
+                result.hash_unchanged += 1
+            elif outcome == 'changed':
+                result.changed.append(url)
+            else:
+                result.unverified.append(url)
+            if outcome != 'unverified':
+                checked.append((url, etag, last_modified))
+
+        await HostScheduler(breaker=self.web_scraper.domain_breaker).run(pages.keys(), check, self.concurrency)
+
+        if checked:
+            async with self.db.acquire() as conn:
+                await conn.executemany("""
+                    UPDATE scraped_content
+                    SET revalidated_at = $4,
+                        http_etag = COALESCE($2, http_etag),
+                        http_last_modified = COALESCE($3, http_last_modified)
+                    WHERE url = $1
+                """, [(url, etag, last_modified, datetime.utcnow()) for url, etag, last_modified in checked])
+
+        logger.info(
+            f"🔁 Revalidated {result.checked} stale pages: {result.not_modified} not modified, "
+            f"{result.hash_unchanged} same content, {len(result.changed)} changed, {len(result.unverified)} unverified"
+        )
+        return result
+
+    async def _check(self, page: Dict[str, Any]) -> tuple:
+        """('not_modified' | 'hash_unchanged' | 'changed' | 'unverified', etag, last_modified)"""
+        url = page['url']
+        headers = dict(self.web_scraper.headers)
+        if page.get('http_etag'):
+            headers['If-None-Match'] = page['http_etag']
+        if page.get('http_last_modified'):
+            headers['If-Modified-Since'] = page['http_last_modified']
+
+        try:
+            async with http_clients.session('direct') as client:
+                response = await client.get(url, headers=headers, timeout=REVALIDATION_TIMEOUT, follow_redirects=True)
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            logger.debug(f"Revalidation request failed for {url}: {e}")
+            return 'unverified', None, None
+
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        if response.status_code == 304:
+            return 'not_modified', etag, last_modified
+        if response.status_code != 200 or not page.get('content_hash'):
+            return 'unverified', None, None
+
+        try:
+            extracted = await html_extraction_pool.extract(response.content, url, response.encoding)
+        except Exception as e:
+            logger.debug(f"Revalidation extraction failed for {url}: {e}")
+            return 'unverified', None, None
+        if len(extracted['content'].strip()) < 100:
+            # Direct fetch got a shell (JS page, bot wall); only a rendered scrape can tell
+            return 'unverified', None, None
+
+        fingerprint = await asyncio.to_thread(fingerprint_content, extracted['content'])
+        if fingerprint.content_hash == page['content_hash']:
+            return 'hash_unchanged', etag, last_modified
+        if (
+            page.get('content_simhash') is not None
+            and hamming_distance(fingerprint.simhash, page['content_simhash']) <= NEAR_DUPLICATE_DISTANCE
+        ):
+            return 'hash_unchanged', etag, last_modified
+        return 'changed', etag, last_modified
+
+
+def refresh_mode(value: Optional[str]) -> str:
+    """Normalize a content refresh mode, defaulting to skip"""
+    value = (value or REFRESH_SKIP).lower()
+    return value if value in (REFRESH_SKIP, REFRESH_REVALIDATE, REFRESH_FORCE) else REFRESH_SKIP
@@ -0,0 +1,299 @@
+"""
+Per-host Scrape Scheduling
+HostScheduler dispatches a URL list round-robin across hosts, each host with
+its own concurrency cap and token bucket, so a few large or slow domains
+cannot occupy every scrape slot. DomainCircuitBreaker keeps per-domain
+failure counts and open windows in Redis so every worker process sees the
+same breaker; without Redis (or while it is unreachable) it falls back to
+process memory.
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from app.core.config import settings
+
+
+BREAKER_KEY_PREFIX = "scrape:breaker"
+BREAKER_FAILURE_TTL = 600     # Failure counts expire after 10 minutes without failures
+BREAKER_CACHE_SECONDS = 1.0   # Local cache of the shared open window per domain
+BREAKER_REDIS_RETRY_SECONDS = 30.0  # After a Redis error, use process memory only for this long
+
+
+def host_key(url_or_host: str) -> str:
+    """Lower-cased host without port or leading www."""
+    host = urlparse(url_or_host).netloc if '//' in url_or_host else url_or_host
+    host = host.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+class DomainCircuitBreaker:
+    """
+    Per-domain circuit breaker shared through Redis.
+
+    - Failures are counted with INCR (expiring after BREAKER_FAILURE_TTL)
+    - From `threshold` failures the domain opens for 3, 6, 12, ... seconds (cap `max_open`)
+    - A success clears both keys
+    - After a Redis error the breaker stays in process memory for
+      BREAKER_REDIS_RETRY_SECONDS instead of paying a timeout on every call
+    """
+
+    def __init__(self, redis_client=None, threshold: int = 3, max_open: float = 60.0):
+        self.redis = redis_client
+        self.threshold = threshold
+        self.max_open = max_open
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._cache: Dict[str, Tuple[float, float]] = {}  # domain -> (checked_at, open_until)
+        self._redis_retry_at = 0.0
+
+    async def open_until(self, domain: str) -> float:
+        """Epoch second the domain's circuit stays open until, or 0.0 when closed"""
+        domain = host_key(domain)
+        now = time.time()
+        cached = self._cache.get(domain)
+        if cached and now - cached[0] < BREAKER_CACHE_SECONDS:
+            until = cached[1]
+        else:
+            until = await self._read_open_until(domain)
+            self._cache[domain] = (now, until)
+        return until if until > now else 0.0
+
+    async def record_success(self, domain: str) -> None:
+        domain = host_key(domain)
+        self._failures.pop(domain, None)
+        self._open_until.pop(domain, None)
+        self._cache.pop(domain, None)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                await shared.delete(self._key(domain, 'failures'), self._key(domain, 'open'))
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def record_failure(self, domain: str) -> float:
+        """Count a failed scrape; returns the open-until epoch when the circuit opens (else 0.0)"""
+        domain = host_key(domain)
+        failures = await self._increment(domain)
+        if failures < self.threshold:
+            return 0.0
+
+        backoff = min(3 * (2 ** max(failures - 1, 0)), self.max_open)
+        until = time.time() + backoff
+        self._open_until[domain] = until
+        self._cache[domain] = (time.time(), until)
+        shared = self._shared()
+        if shared is not None:
+            try:
+                await shared.set(self._key(domain, 'open'), f"{until:.3f}", ex=max(int(backoff), 1))
+            except Exception as e:
+                self._redis_failed(e)
+        logger.warning(f"Opening circuit for {domain} for {backoff:.0f}s after {failures} failures")
+        return until
+
+    async def _increment(self, domain: str) -> int:
+        failures = self._failures.get(domain, 0) + 1
+        shared = self._shared()
+        if shared is not None:
+            try:
+                key = self._key(domain, 'failures')
+                async with shared.pipeline(transaction=True) as pipe:
+                    pipe.incr(key)
+                    pipe.expire(key, BREAKER_FAILURE_TTL)
+                    failures = int((await pipe.execute())[0])
+            except Exception as e:
+                self._redis_failed(e)
+        self._failures[domain] = failures
+        return failures
+
+    async def _read_open_until(self, domain: str) -> float:
+        shared = self._shared()
+        if shared is not None:
+            try:
+                value = await shared.get(self._key(domain, 'open'))
+                return float(value) if value else 0.0
+            except Exception as e:
+                self._redis_failed(e)
+        return self._open_until.get(domain, 0.0)
+
+    def _shared(self):
+        """The Redis client, or None while it is missing or cooling down after an error"""
+        if self.redis is None or time.monotonic() < self._redis_retry_at:
+            return None
+        return self.redis
+
+    def _redis_failed(self, error: Exception) -> None:
+        self._redis_retry_at = time.monotonic() + BREAKER_REDIS_RETRY_SECONDS
+        logger.warning(
+            f"Domain breaker Redis unavailable, using process memory for {BREAKER_REDIS_RETRY_SECONDS:.0f}s: {error}"
+        )
+
+    @staticmethod
+    def _key(domain: str, kind: str) -> str:
+        return f"{BREAKER_KEY_PREFIX}:{kind}:{domain}"
+
+
+@dataclass
+class _HostState:
+    urls: Deque[str]
+    tokens: float
+    refilled_at: float
+    inflight: int = 0
+    dispatched: int = 0
+    breaker_until: float = 0.0
+    trips: int = 0
+
+
+class HostScheduler:
+    """
+    Fair scheduler for one batch of URLs.
+
+    - Hosts are served round-robin in order of their first URL (SERP priority),
+      URLs within a host keep their order
+    - Per host: at most `per_host` scrapes in flight and a token bucket of
+      `rate` requests/second with `burst` capacity
+    - Hosts with an open circuit are parked until it closes; after `max_trips`
+      openings in one batch their remaining URLs are released so the scraper
+      can fail them fast instead of holding the batch open
+    """
+
+    def __init__(
+        self,
+        breaker: Optional[DomainCircuitBreaker] = None,
+        per_host: Optional[int] = None,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_trips: int = 3
+    ):
+        self.breaker = breaker
+        self.per_host = per_host or int(getattr(settings, 'SCRAPER_HOST_CONCURRENCY', 4) or 4)
+        self.rate = rate or float(getattr(settings, 'SCRAPER_HOST_RATE_PER_SECOND', 2.0) or 2.0)
+        self.burst = burst or int(getattr(settings, 'SCRAPER_HOST_BURST', 4) or 4)
+        self.max_trips = max_trips
+
+    async def run(
+        self,
+        urls: Iterable[str],
+        handler: Callable[[str], Awaitable[Any]],
+        concurrency: int
+    ) -> Dict[str, Any]:
+        """Call handler(url) for every URL with at most `concurrency` in flight; returns scheduling stats"""
+        started = time.monotonic()
+        hosts: "OrderedDict[str, _HostState]" = OrderedDict()
+        for url in urls:
+            key = host_key(url)
+            state = hosts.get(key)
+            if state is None:
+                state = hosts[key] = _HostState(urls=deque(), tokens=float(self.burst), refilled_at=started)
+            state.urls.append(url)
+
+        ring: Deque[str] = deque(hosts.keys())
+        tasks: Dict[asyncio.Task, str] = {}
+        total = sum(len(s.urls) for s in hosts.values())
+        concurrency = max(1, concurrency)
+
+        while ring or tasks:
+            next_ready = None
+            while ring and len(tasks) < concurrency:
+                picked, ready_at, parked = await self._pick(ring, hosts)
+                if picked is None and parked and not tasks:
+                    # Only breaker-parked hosts are left: let the scraper fail them fast rather than idle
+                    picked, ready_at, parked = await self._pick(ring, hosts, honour_breaker=False)
+                if picked is None:
+                    next_ready = ready_at
+                    break
+                state = hosts[picked]
+                url = state.urls.popleft()
+                if not state.urls:
+                    ring.remove(picked)
+                state.inflight += 1
+                state.dispatched += 1
+                tasks[asyncio.create_task(self._run_one(handler, url))] = picked
+
+            if not tasks:
+                if not ring:
+                    break
+                await asyncio.sleep(max(next_ready or 0.05, 0.01))
+                continue
+
+            timeout = max(next_ready, 0.01) if next_ready is not None else None
+            done, _ = await asyncio.wait(tasks.keys(), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                hosts[tasks.pop(task)].inflight -= 1
+
+        stats = self._stats(hosts, total, time.monotonic() - started)
+        logger.info(
+            f"🗂️ Host scheduler: {total} URLs across {stats['hosts']} hosts in {stats['duration_seconds']}s "
+            f"(per host {self.per_host} concurrent, {self.rate}/s; {stats['hosts_tripped']} hosts tripped their breaker)"
+        )
+        return stats
+
+    async def _pick(
+        self,
+        ring: Deque[str],
+        hosts: Dict[str, _HostState],
+        honour_breaker: bool = True
+    ) -> Tuple[Optional[str], Optional[float], int]:
+        """
+        Next eligible host in round-robin order.
+
+        Returns (host, None, 0), or (None, seconds until a host may become
+        eligible, number of hosts skipped only because their circuit is open).
+        """
+        now = time.monotonic()
+        soonest: Optional[float] = None
+        parked = 0
+        for _ in range(len(ring)):
+            key = ring[0]
+            ring.rotate(-1)
+            state = hosts[key]
+            if state.inflight >= self.per_host:
+                continue
+
+            state.tokens = min(float(self.burst), state.tokens + (now - state.refilled_at) * self.rate)
+            state.refilled_at = now
+            if state.tokens < 1.0:
+                wait = (1.0 - state.tokens) / self.rate
+                soonest = wait if soonest is None else min(soonest, wait)
+                continue
+
+            if honour_breaker and self.breaker is not None and state.trips <= self.max_trips:
+                until = await self.breaker.open_until(key)
+                if until:
+                    if until > state.breaker_until:
+                        state.trips += 1
+                        state.breaker_until = until
+                    if state.trips <= self.max_trips:
+                        wait = max(until - time.time(), 0.05)
+                        soonest = wait if soonest is None else min(soonest, wait)
+                        parked += 1
+                        continue
+                    logger.warning(f"Circuit for {key} opened {state.trips} times; releasing its {len(state.urls)} remaining URLs")
+
+            state.tokens -= 1.0
+            return key, None, 0
+        return None, soonest, parked
+
+    @staticmethod
+    async def _run_one(handler: Callable[[str], Awaitable[Any]], url: str) -> None:
+        try:
+            await handler(url)
+        except Exception as e:
+            logger.error(f"Scheduled scrape failed for {url}: {e}")
+
+    def _stats(self, hosts: Dict[str, _HostState], total: int, duration: float) -> Dict[str, Any]:
+        busiest: List[Tuple[str, int]] = sorted(
+            ((key, state.dispatched) for key, state in hosts.items()), key=lambda item: -item[1]
+        )[:5]
+        return {
+            'urls': total,
+            'hosts': len(hosts),
+            'hosts_tripped': sum(1 for state in hosts.values() if state.trips),
+            'busiest_hosts': dict(busiest),
+            'duration_seconds': round(duration, 2),
+        }
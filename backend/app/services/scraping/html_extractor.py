@@ -0,0 +1,338 @@
+"""
+HTML Extraction Pool
+Turns raw HTML bytes into main text plus page metadata in worker processes, so
+parsing multi-MB pages never runs on the event loop. trafilatura extracts the
+main content; metadata and the body-text fallback use selectolax (lxml when
+selectolax is not installed). Every result carries its extraction timings.
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:  # pragma: no cover - lxml fallback
+    HTMLParser = None
+
+# Tags whose text never belongs to page content
+_NON_CONTENT_TAGS = ['script', 'style', 'noscript']
+# Main content containers tried before falling back to <body>
+_CONTENT_SELECTORS = ('main', 'article', 'div.content', 'div.main-content', 'div.article-body')
+_CONTENT_XPATHS = (
+    '//main', '//article',
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]",
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' main-content ')]",
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' article-body ')]",
+)
+
+
+def extract_html(html: bytes, url: str, encoding: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extract title, main text and metadata from raw HTML (runs in a worker process).
+
+    Returns content/title/author/date/meta_description/metadata/word_count plus
+    `timings` in milliseconds (decode, content, metadata, total).
+    """
+    started = time.perf_counter()
+    text = _decode(html, encoding)
+    decoded = time.perf_counter()
+
+    content_data = _extract_content(text, url)
+    content_done = time.perf_counter()
+
+    try:
+        metadata = _extract_metadata(text)
+    except Exception:
+        metadata = {}
+    if not content_data.get('content'):
+        content_data.update({k: v for k, v in _extract_body_text(text).items() if v})
+    finished = time.perf_counter()
+
+    content = content_data.get('content') or ''
+    return {
+        'title': content_data.get('title') or metadata.get('title', ''),
+        'content': content,
+        'author': content_data.get('author') or metadata.get('author', ''),
+        'date': content_data.get('date') or metadata.get('published_date', ''),
+        'meta_description': metadata.get('description', ''),
+        'metadata': metadata,
+        'word_count': len(content.split()),
+        'timings': {
+            'decode_ms': round((decoded - started) * 1000, 2),
+            'content_ms': round((content_done - decoded) * 1000, 2),
+            'metadata_ms': round((finished - content_done) * 1000, 2),
+            'total_ms': round((finished - started) * 1000, 2),
+            'html_bytes': len(html),
+        },
+    }
+
+
+def _decode(html: bytes, encoding: Optional[str]) -> str:
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode(encoding or 'utf-8', errors='replace')
+    except LookupError:
+        return html.decode('utf-8', errors='replace')
+
+
+def _extract_content(text: str, url: str) -> Dict[str, str]:
+    """Main content via trafilatura (JSON output keeps title/author/date)"""
+    import trafilatura
+
+    extracted = trafilatura.extract(
+        text,
+        url=url,
+        include_comments=False,
+        include_tables=True,
+        deduplicate=True,
+        output_format='json',
+        favor_recall=True
+    )
+    if not extracted:
+        return {}
+    content_json = json.loads(extracted)
+    return {
+        # Try different keys for content
+        'content': (
+            content_json.get('text', '') or
+            content_json.get('raw', '') or
+            content_json.get('content', '')
+        ),
+        'title': content_json.get('title') or '',
+        'author': content_json.get('author') or '',
+        'date': content_json.get('date') or '',
+    }
+
+
+def _extract_metadata(text: str) -> Dict[str, str]:
+    """Title, description, Open Graph, author, published date, keywords and canonical URL"""
+    metadata: Dict[str, str] = {}
+    for kind, key, value in _iter_head_tags(text):
+        if kind == 'title':
+            metadata.setdefault('title', value.strip())
+        elif kind == 'canonical':
+            metadata.setdefault('canonical_url', value)
+        elif key.startswith('og:'):
+            metadata.setdefault(f"og_{key[3:]}", value)
+        elif key == 'description':
+            metadata.setdefault('description', value)
+        elif key == 'author':
+            metadata.setdefault('author', value)
+        elif key == 'article:published_time':
+            metadata.setdefault('published_date', value)
+        elif key == 'keywords':
+            metadata.setdefault('keywords', value)
+    return metadata
+
+
+def _iter_head_tags(text: str):
+    """Yield ('title', '', text), ('meta', name-or-property, content) and ('canonical', '', href)"""
+    if HTMLParser is not None:
+        tree = HTMLParser(text)
+        title = tree.css_first('title')
+        if title is not None:
+            yield 'title', '', title.text(strip=True)
+        for node in tree.css('meta'):
+            attrs = node.attributes
+            key = (attrs.get('property') or attrs.get('name') or '').strip().lower()
+            if key:
+                yield 'meta', key, attrs.get('content') or ''
+        canonical = tree.css_first('link[rel="canonical"]')
+        if canonical is not None:
+            yield 'canonical', '', canonical.attributes.get('href') or ''
+        return
+
+    import lxml.html
+
+    tree = lxml.html.document_fromstring(text)
+    title = tree.find('.//title')
+    if title is not None:
+        yield 'title', '', title.text_content()
+    for node in tree.iter('meta'):
+        key = (node.get('property') or node.get('name') or '').strip().lower()
+        if key:
+            yield 'meta', key, node.get('content') or ''
+    for node in tree.iter('link'):
+        if (node.get('rel') or '').lower() == 'canonical':
+            yield 'canonical', '', node.get('href') or ''
+            break
+
+
+def _extract_body_text(text: str) -> Dict[str, str]:
+    """Fallback when trafilatura finds no main content: main/article container, else <body>"""
+    if HTMLParser is not None:
+        tree = HTMLParser(text)
+        title = tree.css_first('title')
+        tree.strip_tags(_NON_CONTENT_TAGS)
+        root = next((n for n in (tree.css_first(s) for s in _CONTENT_SELECTORS) if n is not None), None)
+        root = root or tree.body
+        body = root.text(separator=' ', strip=True) if root is not None else ''
+        title_text = title.text(strip=True) if title is not None else ''
+    else:
+        import lxml.html
+
+        tree = lxml.html.document_fromstring(text)
+        for node in tree.xpath('//script|//style|//noscript'):
+            node.drop_tree()
+        title = tree.find('.//title')
+        root = next((n for n in (tree.xpath(x) for x in _CONTENT_XPATHS) if n), None)
+        body = (root[0] if root else tree).text_content()
+        title_text = title.text_content().strip() if title is not None else ''
+    return {'title': title_text, 'content': ' '.join(body.split())}
+
+
+def _warm_worker() -> None:
+    # Pay trafilatura's import cost once per worker, not on the first page
+    import trafilatura  # noqa: F401
+
+
+class HTMLExtractionPool:
+    """
+    Process pool for HTML extraction with a bounded queue.
+
+    - Workers default to the CPU count (SCRAPER_EXTRACTION_WORKERS)
+    - At most SCRAPER_EXTRACTION_QUEUE_DEPTH pages are submitted at once; further
+      callers wait, so raw HTML does not pile up in memory behind a slow pool
+    - A crashed worker replaces the pool and the page is retried once
+    - A page running past SCRAPER_EXTRACTION_TIMEOUT fails and the pool holding
+      the stuck worker is replaced (its other pages are retried on the new one)
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        queue_depth: Optional[int] = None,
+        timeout: Optional[float] = None
+    ):
+        self.workers = workers or getattr(settings, 'SCRAPER_EXTRACTION_WORKERS', None) or os.cpu_count() or 2
+        self.queue_depth = (
+            queue_depth or getattr(settings, 'SCRAPER_EXTRACTION_QUEUE_DEPTH', None) or self.workers * 4
+        )
+        self.timeout = timeout or getattr(settings, 'SCRAPER_EXTRACTION_TIMEOUT', None) or 30.0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._inflight = 0
+        self._waiting = 0
+        self._stats = {
+            'pages': 0, 'failures': 0, 'timeouts': 0, 'restarts': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'bytes': 0
+        }
+
+    async def extract(self, html: bytes, url: str, encoding: Optional[str] = None) -> Dict[str, Any]:
+        """Extract one page off the event loop; `timings.queue_ms` is the wait for a slot"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.queue_depth)
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        self._inflight += 1
+        try:
+            queue_ms = round((time.perf_counter() - queued_at) * 1000, 2)
+            # Captured before running: only the pool that broke under this page may be replaced
+            executor = self._get_executor()
+            try:
+                result = await self._run(executor, html, url, encoding)
+            except BrokenProcessPool:
+                self._restart(executor)
+                result = await self._run(self._get_executor(), html, url, encoding)
+        except asyncio.CancelledError:
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                raise
+            # The pool cancelled the future (shutdown); callers handle that like any extraction failure
+            self._stats['failures'] += 1
+            raise RuntimeError(f"HTML extraction cancelled for {url}") from None
+        except Exception:
+            self._stats['failures'] += 1
+            raise
+        finally:
+            self._inflight -= 1
+            self._slots.release()
+
+        result['timings']['queue_ms'] = queue_ms
+        self._record(result['timings'])
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pool size, queue state and extraction timing totals"""
+        pages = self._stats['pages']
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'inflight': self._inflight,
+            'waiting': self._waiting,
+            'started': self._executor is not None,
+            'avg_ms': round(self._stats['total_ms'] / pages, 2) if pages else None,
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in self._stats.items()},
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("🧵 HTML extraction pool stopped")
+
+    async def _run(
+        self,
+        executor: ProcessPoolExecutor,
+        html: bytes,
+        url: str,
+        encoding: Optional[str]
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(executor, extract_html, html, url, encoding)
+        try:
+            return await asyncio.wait_for(future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # The worker is still busy with the page and cannot be interrupted; retire its pool
+            self._stats['timeouts'] += 1
+            logger.warning(f"⚠️ HTML extraction timed out after {self.timeout}s: {url}")
+            self._restart(executor, terminate=True)
+            raise
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that already runs an event loop, DB pool and HTTP clients is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_warm_worker
+            )
+            logger.info(f"🧵 HTML extraction pool: {self.workers} workers, queue depth {self.queue_depth}")
+        return self._executor
+
+    def _restart(self, broken: ProcessPoolExecutor, terminate: bool = False) -> None:
+        """Replace `broken` if it is still the current pool (concurrent failures restart it once)"""
+        if self._executor is not broken:
+            return
+        logger.warning("⚠️ HTML extraction pool unhealthy; restarting pool")
+        self._stats['restarts'] += 1
+        self._executor = None
+        # Pending futures of a broken pool fail with BrokenProcessPool on their own; never cancel them
+        processes = list((getattr(broken, '_processes', None) or {}).values()) if terminate else []
+        broken.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
+
+    def _record(self, timings: Dict[str, Any]) -> None:
+        self._stats['pages'] += 1
+        self._stats['total_ms'] += timings['total_ms']
+        self._stats['max_ms'] = max(self._stats['max_ms'], timings['total_ms'])
+        self._stats['bytes'] += timings['html_bytes']
+
+
+# Global extraction pool (shared by all WebScraper instances in this process)
+html_extraction_pool = HTMLExtractionPool()
@@ -0,0 +1,409 @@
+"""
+ScrapingBee Domain Profiles
+Remembers, per domain, the cheapest ScrapingBee request shape (proxy tier,
+JS rendering, timeout) that last returned usable content, with its latency and
+credit cost. Scrapes start at the learned rung instead of walking the whole
+standard -> premium -> stealth ladder, occasionally probe one rung cheaper,
+and escalate after repeated failures. Profiles live in scrape_domain_profiles.
+"""
+import asyncio
+import math
+import statistics
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.database import db_pool
+
+
+SCRAPE_PROFILE_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS scrape_domain_profiles (
+    domain VARCHAR(255) PRIMARY KEY,
+    proxy_tier VARCHAR(20) NOT NULL,
+    render_js BOOLEAN NOT NULL,
+    timeout_seconds INTEGER NOT NULL,
+    successes INTEGER NOT NULL DEFAULT 0,
+    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+    success_streak INTEGER NOT NULL DEFAULT 0,
+    avg_latency_ms DOUBLE PRECISION,
+    avg_credits DOUBLE PRECISION,
+    last_success_at TIMESTAMPTZ,
+    last_failure_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+# Request shapes, cheapest first: (proxy tier, render_js)
+LADDER: Tuple[Tuple[str, bool], ...] = (
+    ('standard', False),
+    ('standard', True),
+    ('premium', False),
+    ('premium', True),
+    ('stealth', True),  # ScrapingBee stealth proxy always renders JS
+)
+# ScrapingBee credits per request shape (used when the Spb-Cost header is missing)
+CREDIT_COST: Dict[Tuple[str, bool], int] = {
+    ('standard', False): 1,
+    ('standard', True): 5,
+    ('premium', False): 10,
+    ('premium', True): 25,
+    ('stealth', True): 75,
+}
+
+# Priors for domains without a profile yet
+PROTECTED_SITES = (
+    'openai.com', 'linkedin.com', 'facebook.com', 'instagram.com',
+    'twitter.com', 'amazon.com', 'google.com', 'microsoft.com',
+    'medium.com', 'reddit.com', 'quora.com'
+)
+HEAVY_SITES = ('openai.com', 'linkedin.com', 'medium.com', 'twitter.com', 'kpmg.com', 'capgemini.com')
+DEFAULT_TIMEOUT = 45.0
+HEAVY_TIMEOUT = 90.0
+MIN_TIMEOUT = 20.0
+
+MIN_STATIC_WORDS = 50    # A non-JS response with fewer words is treated as an unrendered shell
+ESCALATE_AFTER = 2       # Consecutive failures at the learned rung before starting one rung higher
+LATENCY_SAMPLES = 500    # Recent successful scrapes kept for the p50
+
+
+@dataclass(frozen=True)
+class ScrapeAttempt:
+    """One ScrapingBee request shape"""
+    proxy_tier: str
+    render_js: bool
+    timeout: float
+
+    @property
+    def rung(self) -> int:
+        return LADDER.index((self.proxy_tier, self.render_js))
+
+    @property
+    def credits(self) -> int:
+        return CREDIT_COST[(self.proxy_tier, self.render_js)]
+
+    @property
+    def proxy_value(self) -> str:
+        """Legacy proxy_type value stored with scraped content ('false' = standard)"""
+        return 'false' if self.proxy_tier == 'standard' else self.proxy_tier
+
+    def params(self) -> Dict[str, str]:
+        params = {
+            'render_js': 'true' if self.render_js else 'false',
+            'wait': '3000' if self.render_js else '0',
+            'timeout': str(int(self.timeout * 1000)),  # Milliseconds
+        }
+        if self.proxy_tier == 'premium':
+            params['premium_proxy'] = 'true'
+        elif self.proxy_tier == 'stealth':
+            params['stealth_proxy'] = 'true'
+        else:
+            params['premium_proxy'] = 'false'
+        return params
+
+    def __str__(self) -> str:
+        return f"{self.proxy_tier}/{'js' if self.render_js else 'static'}/{int(self.timeout)}s"
+
+
+@dataclass
+class DomainProfile:
+    """Cheapest known-good request shape for one domain"""
+    domain: str
+    proxy_tier: str
+    render_js: bool
+    timeout_seconds: int
+    successes: int = 0
+    consecutive_failures: int = 0
+    success_streak: int = 0
+    avg_latency_ms: Optional[float] = None
+    avg_credits: Optional[float] = None
+    last_success_at: Optional[datetime] = None
+    last_failure_at: Optional[datetime] = None
+
+    @property
+    def rung(self) -> int:
+        return LADDER.index((self.proxy_tier, self.render_js))
+
+
+class ScrapeProfileStore:
+    """
+    Per-domain ScrapingBee profiles, cached in memory and persisted in batches.
+
+    - plan() orders the request shapes to try for a domain
+    - record_success() / record_failure() move the learned rung and mark the profile dirty
+    - After SCRAPE_PROFILE_PROBE_AFTER straight successes one cheaper shape is tried first
+    - Dirty profiles are upserted together every SCRAPE_PROFILE_FLUSH_INTERVAL_S and on stop()
+    """
+
+    def __init__(self, db=None):
+        self.db = db or db_pool
+        self.enabled = getattr(settings, 'SCRAPE_PROFILES_ENABLED', True)
+        self.probe_after = int(getattr(settings, 'SCRAPE_PROFILE_PROBE_AFTER', 20) or 20)
+        self._profiles: Dict[str, DomainProfile] = {}
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._dirty: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._totals = {'pages': 0, 'credits': 0, 'attempts': 0, 'failed_attempts': 0, 'probe_wins': 0, 'probe_misses': 0}
+
+    async def plan(self, domain: str, render_js: bool = True) -> List[ScrapeAttempt]:
+        """Request shapes to try for domain, in order"""
+        domain = _profile_key(domain)
+        default_timeout = HEAVY_TIMEOUT if _matches(domain, HEAVY_SITES) else DEFAULT_TIMEOUT
+        profile = await self.get(domain) if self.enabled else None
+
+        if profile is None:
+            if _matches(domain, PROTECTED_SITES):
+                rungs = [('premium', True), ('stealth', True)]
+            else:
+                rungs = [('standard', render_js), ('premium', render_js), ('stealth', True)]
+            return [ScrapeAttempt(tier, js, default_timeout) for tier, js in rungs]
+
+        start = profile.rung
+        if profile.consecutive_failures >= ESCALATE_AFTER:
+            start = min(start + 1, len(LADDER) - 1)
+        rungs = list(range(start, len(LADDER)))
+        if start == profile.rung and start > 0 and profile.success_streak >= self.probe_after:
+            rungs.insert(0, start - 1)
+
+        attempts = []
+        for index in rungs:
+            tier, js = LADDER[index]
+            timeout = float(profile.timeout_seconds) if index == profile.rung else max(default_timeout, profile.timeout_seconds)
+            attempts.append(ScrapeAttempt(tier, js, timeout))
+        return attempts
+
+    async def record_success(self, domain: str, attempt: ScrapeAttempt, latency: float, credits: Optional[int] = None) -> None:
+        """A request shape returned usable content (latency in seconds)"""
+        credits = credits if credits is not None else attempt.credits
+        self._totals['pages'] += 1
+        self._totals['attempts'] += 1
+        self._totals['credits'] += credits
+        self._latencies.append(latency)
+        if not self.enabled:
+            return
+
+        domain = _profile_key(domain)
+        profile = self._profiles.get(domain)
+        now = datetime.utcnow()
+        if profile is None or attempt.rung != profile.rung:
+            if profile is not None:
+                if attempt.rung < profile.rung:
+                    self._totals['probe_wins'] += 1
+                logger.info(f"🐝 {domain}: scrape profile {profile.proxy_tier}/{'js' if profile.render_js else 'static'} → {attempt}")
+            profile = DomainProfile(
+                domain=domain,
+                proxy_tier=attempt.proxy_tier,
+                render_js=attempt.render_js,
+                timeout_seconds=int(attempt.timeout),
+                successes=profile.successes if profile else 0,
+            )
+            self._profiles[domain] = profile
+
+        profile.successes += 1
+        profile.consecutive_failures = 0
+        profile.success_streak += 1
+        profile.avg_latency_ms = _ewma(profile.avg_latency_ms, latency * 1000.0)
+        profile.avg_credits = _ewma(profile.avg_credits, float(credits))
+        profile.timeout_seconds = _learned_timeout(profile.avg_latency_ms, attempt.timeout)
+        profile.last_success_at = now
+        self._mark_dirty(profile)
+
+    async def record_failure(self, domain: str, attempt: ScrapeAttempt, credits: int = 0) -> None:
+        """A request shape failed (error status, timeout or unusable content that was still billed)"""
+        self._totals['attempts'] += 1
+        self._totals['failed_attempts'] += 1
+        self._totals['credits'] += credits
+        if not self.enabled:
+            return
+
+        profile = self._profiles.get(_profile_key(domain))
+        if profile is None:
+            return
+        if attempt.rung < profile.rung:
+            # Failed probe: stay on the learned rung for another probe_after successes
+            self._totals['probe_misses'] += 1
+            profile.success_streak = 0
+        elif attempt.rung == profile.rung:
+            profile.consecutive_failures += 1
+            profile.success_streak = 0
+        else:
+            return
+        profile.last_failure_at = datetime.utcnow()
+        self._mark_dirty(profile)
+
+    async def get(self, domain: str) -> Optional[DomainProfile]:
+        await self._load()
+        return self._profiles.get(_profile_key(domain))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Credits per successful page, p50 latency and profile distribution"""
+        pages = self._totals['pages']
+        by_shape: Dict[str, int] = {}
+        for profile in self._profiles.values():
+            shape = f"{profile.proxy_tier}/{'js' if profile.render_js else 'static'}"
+            by_shape[shape] = by_shape.get(shape, 0) + 1
+        return {
+            'enabled': self.enabled,
+            'domains': len(self._profiles),
+            'profiles_by_shape': by_shape,
+            'credits_per_page': round(self._totals['credits'] / pages, 2) if pages else None,
+            'p50_latency_ms': round(statistics.median(self._latencies) * 1000, 1) if self._latencies else None,
+            **self._totals,
+        }
+
+    async def _load(self) -> None:
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                async with self.db.acquire() as conn:
+                    async with conn.transaction():
+                        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('scrape_domain_profiles'))")
+                        await conn.execute(SCRAPE_PROFILE_SCHEMA_SQL)
+                    rows = await conn.fetch("""
+                        SELECT domain, proxy_tier, render_js, timeout_seconds, successes,
+                               consecutive_failures, success_streak, avg_latency_ms, avg_credits,
+                               last_success_at, last_failure_at
+                        FROM scrape_domain_profiles
+                    """)
+                for row in rows:
+                    if (row['proxy_tier'], row['render_js']) in CREDIT_COST:
+                        self._profiles[row['domain']] = DomainProfile(**dict(row))
+                logger.info(f"🐝 Loaded {len(self._profiles)} ScrapingBee domain profiles")
+            except Exception as e:
+                # Without the table every domain simply starts from the priors
+                logger.warning(f"Could not load scrape domain profiles: {e}")
+            self._loaded = True
+
+    @property
+    def flush_interval(self) -> float:
+        return float(getattr(settings, 'SCRAPE_PROFILE_FLUSH_INTERVAL_S', 10) or 10)
+
+    def ensure_started(self) -> None:
+        """Start the flush task once an event loop is running"""
+        if self._task is not None and not self._task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write outstanding profile updates and stop flushing"""
+        task, self._task = self._task, None
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.warning(f"Could not save {len(self._dirty)} scrape domain profiles: {e}")
+
+    async def flush(self) -> None:
+        """Upsert every dirty profile with one statement (re-marked dirty if the write fails)"""
+        if not self._dirty:
+            return
+        await self._load()  # Creates the table
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            domains, self._dirty = self._dirty, set()
+            profiles = [self._profiles[d] for d in domains if d in self._profiles]
+            try:
+                async with self.db.acquire() as conn:
+                    await conn.execute("""
+                        INSERT INTO scrape_domain_profiles (
+                            domain, proxy_tier, render_js, timeout_seconds, successes,
+                            consecutive_failures, success_streak, avg_latency_ms, avg_credits,
+                            last_success_at, last_failure_at, updated_at
+                        )
+                        SELECT *, NOW() FROM unnest(
+                            $1::text[], $2::text[], $3::bool[], $4::int[], $5::int[],
+                            $6::int[], $7::int[], $8::float8[], $9::float8[],
+                            $10::timestamptz[], $11::timestamptz[]
+                        )
+                        ON CONFLICT (domain) DO UPDATE SET
+                            proxy_tier = EXCLUDED.proxy_tier,
+                            render_js = EXCLUDED.render_js,
+                            timeout_seconds = EXCLUDED.timeout_seconds,
+                            successes = EXCLUDED.successes,
+                            consecutive_failures = EXCLUDED.consecutive_failures,
+                            success_streak = EXCLUDED.success_streak,
+                            avg_latency_ms = EXCLUDED.avg_latency_ms,
+                            avg_credits = EXCLUDED.avg_credits,
+                            last_success_at = EXCLUDED.last_success_at,
+                            last_failure_at = EXCLUDED.last_failure_at,
+                            updated_at = NOW()
+                    """,
+                        [p.domain for p in profiles], [p.proxy_tier for p in profiles],
+                        [p.render_js for p in profiles], [p.timeout_seconds for p in profiles],
+                        [p.successes for p in profiles], [p.consecutive_failures for p in profiles],
+                        [p.success_streak for p in profiles], [p.avg_latency_ms for p in profiles],
+                        [p.avg_credits for p in profiles], [p.last_success_at for p in profiles],
+                        [p.last_failure_at for p in profiles]
+                    )
+            except Exception:
+                self._dirty |= domains
+                raise
+
+    def _mark_dirty(self, profile: DomainProfile) -> None:
+        self._dirty.add(profile.domain)
+        self.ensure_started()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not save {len(self._dirty)} scrape domain profiles, will retry: {e}")
+
+
+def _profile_key(domain: str) -> str:
+    domain = (domain or '').lower().split(':')[0]
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def _matches(domain: str, sites: Tuple[str, ...]) -> bool:
+    """domain is one of sites or a subdomain of one (x.com does not match box.com)"""
+    return any(domain == site or domain.endswith('.' + site) for site in sites)
+
+
+def _ewma(current: Optional[float], value: float, weight: float = 0.2) -> float:
+    return value if current is None else current + weight * (value - current)
+
+
+def _learned_timeout(avg_latency_ms: Optional[float], current: float) -> int:
+    """Twice the usual latency plus headroom, within [MIN_TIMEOUT, HEAVY_TIMEOUT]"""
+    if avg_latency_ms is None:
+        return int(current)
+    return int(min(max(math.ceil(avg_latency_ms / 1000.0 * 2 + 10), MIN_TIMEOUT), HEAVY_TIMEOUT))
+
+
+def response_credits(headers) -> Optional[int]:
+    """Credits ScrapingBee charged for a response (Spb-Cost header)"""
+    try:
+        value = headers.get('spb-cost')
+        return int(float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Global profile store (shared by all WebScraper instances in this process)
+scrape_profiles = ScrapeProfileStore()
@@ -1,19 +1,23 @@
 import httpx
-from bs4 import BeautifulSoup
-import trafilatura
-from typing import Dict, Optional, List, Any
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
 from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 import asyncio
 from datetime import datetime
 import hashlib
 import json
+import time
 from loguru import logger
 import redis.asyncio as redis
 from tenacity import retry, stop_after_attempt, wait_exponential
 
+from app.core.adaptive_limiter import adaptive_limits
 from app.core.config import settings, Settings
 from app.core.database import DatabasePool
+from app.core.http_clients import http_clients
 from app.services.scraping.document_parser import DocumentParser
+from app.services.scraping.host_scheduler import DomainCircuitBreaker, HostScheduler
+from app.services.scraping.html_extractor import html_extraction_pool
+from app.services.scraping.scrape_profiles import MIN_STATIC_WORDS, response_credits, scrape_profiles
 
 
 class WebScraper:
@@ -26,7 +30,13 @@ class WebScraper:
         # Initialize Redis cache client if available
         try:
             redis_url = getattr(self.settings, 'REDIS_URL', None) or 'redis://redis:6379/0'
-            self.redis_client = redis.from_url(redis_url)
+            # Bounded waits: an unreachable Redis must not stall every scrape behind the breaker
+            redis_timeout = float(getattr(self.settings, 'SCRAPER_REDIS_TIMEOUT_S', 1.0) or 1.0)
+            self.redis_client = redis.from_url(
+                redis_url,
+                socket_connect_timeout=redis_timeout,
+                socket_timeout=redis_timeout
+            )
             logger.info(f"Initialized Redis cache client: {redis_url}")
         except Exception as e:
             self.redis_client = None
@@ -35,9 +45,8 @@ class WebScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36'
         }
-        # Simple per-domain circuit breaker memory (process-local)
-        self._domain_failures: Dict[str, int] = {}
-        self._circuit_open_until: Dict[str, float] = {}
+        # Per-domain circuit breaker, shared with other workers through Redis
+        self.domain_breaker = DomainCircuitBreaker(self.redis_client)
         self.js_domains = {
             'linkedin.com',
             'facebook.com',
@@ -51,14 +60,13 @@ class WebScraper:
         }
         # Document file extensions
         self.document_extensions = {'.pdf', '.docx', '.doc'}
-        # Concurrency limiter for ScrapingBee - use DEFAULT_SCRAPER_CONCURRENT_LIMIT or 50
-        try:
-            max_sb_conc = int(getattr(self.settings, 'DEFAULT_SCRAPER_CONCURRENT_LIMIT', 50) or 50)
-            logger.info(f"ScrapingBee concurrency limit set to: {max_sb_conc}")
-        except Exception:
-            max_sb_conc = 50
-            logger.warning(f"Using default ScrapingBee concurrency: {max_sb_conc}")
-        self._scrapingbee_semaphore = asyncio.Semaphore(max_sb_conc)
+        # Adaptive concurrency for ScrapingBee - starts at DEFAULT_SCRAPER_CONCURRENT_LIMIT
+        self._scrapingbee_limiter = adaptive_limits.get('scrapingbee')
+        logger.info(f"ScrapingBee concurrency limit starts at: {self._scrapingbee_limiter.limit}")
+        # HTML -> text/metadata runs in worker processes, bounded by the pool's queue depth
+        self.extractor = html_extraction_pool
+        # Learned per-domain proxy tier / JS rendering / timeout for ScrapingBee
+        self.profiles = scrape_profiles
     
     async def scrape(
         self,
@@ -90,8 +98,7 @@ class WebScraper:
             raise Exception("ScrapingBee is required but not configured or disabled")
         # Prefer JS rendering by default for higher success; ScrapingBee handles non-JS quickly too
         logger.info(f"Scraping {url} with ScrapingBee (JS by default)")
-        async with self._scrapingbee_semaphore:
-            result = await self._scrape_with_scrapingbee(url, use_javascript=True)
+        result = await self._scrape_with_scrapingbee(url, use_javascript=True)
         
         # Cache or purge based on result quality
         if self.redis_client:
@@ -112,44 +119,27 @@ class WebScraper:
     async def _scrape_direct(self, url: str) -> Dict:
         """Direct HTTP scraping without JavaScript"""
         
-        async with httpx.AsyncClient(follow_redirects=True, timeout=30.0) as client:
+        async with http_clients.session('direct') as client:
             try:
-                response = await client.get(url, headers=self.headers)
+                response = await client.get(url, headers=self.headers, timeout=30.0)
                 response.raise_for_status()
                 
-                # Extract content using trafilatura
-                content_data = {}
-                extracted = trafilatura.extract(
-                    response.text,
-                    include_comments=False,
-                    include_tables=True,
-                    deduplicate=True,
-                    output_format='json',
-                    favor_recall=True
-                )
-                
-                if extracted:
-                    content_data = json.loads(extracted)
-                else:
-                    # Fallback to BeautifulSoup
-                    content_data = self._extract_with_beautifulsoup(response.text)
-                
-                # Get metadata
-                soup = BeautifulSoup(response.text, 'html.parser')
-                metadata = self._extract_metadata(soup)
+                # Parse off the event loop (process pool)
+                extracted = await self.extractor.extract(response.content, url, response.encoding)
                 
                 return {
                     "url": str(response.url),
                     "final_url": str(response.url),
                     "status_code": response.status_code,
-                    "title": content_data.get('title') or metadata.get('title', ''),
-                    "meta_description": metadata.get('description', ''),
-                    "content": content_data.get('text', ''),
-                    "word_count": len(content_data.get('text', '').split()),
+                    "title": extracted['title'],
+                    "meta_description": extracted['meta_description'],
+                    "content": extracted['content'],
+                    "word_count": extracted['word_count'],
                     "content_type": response.headers.get('content-type', 'text/html'),
                     "scraped_at": datetime.utcnow().isoformat(),
                     "engine": "direct",
-                    "metadata": metadata,
+                    "metadata": extracted['metadata'],
+                    "extraction_ms": extracted['timings']['total_ms'],
                     "error": None
                 }
                 
@@ -183,11 +173,9 @@ class WebScraper:
         domain = parsed_url.netloc.lower()
 
         # Circuit breaker: if domain is open (too many recent failures), short-circuit fast
-        import time
-        now = time.time()
-        open_until = self._circuit_open_until.get(domain)
-        if open_until and now < open_until:
-            wait_seconds = int(open_until - now)
+        open_until = await self.domain_breaker.open_until(domain)
+        if open_until:
+            wait_seconds = int(open_until - time.time())
             logger.warning(f"Circuit open for {domain}; skipping scrape for {wait_seconds}s")
             return {
                 "url": url,
@@ -198,65 +186,34 @@ class WebScraper:
                 "proxy_type": "n/a"
             }
         
-        # Sites that need premium/stealth proxy
-        protected_sites = [
-            'openai.com', 'linkedin.com', 'facebook.com', 'instagram.com',
-            'twitter.com', 'amazon.com', 'google.com', 'microsoft.com',
-            'medium.com', 'reddit.com', 'quora.com'
-        ]
-        
-        # Heavy sites that need longer timeout
-        heavy_sites = ['openai.com', 'linkedin.com', 'medium.com', 'twitter.com', 'kpmg.com', 'capgemini.com']
-        
-        # Check if we need special proxy
-        use_special_proxy = any(site in domain for site in protected_sites)
-        is_heavy_site = any(site in domain for site in heavy_sites)
-        
-        # Set timeout based on site
-        timeout = 90.0 if is_heavy_site else 45.0  # increase timeouts to improve yield
-        
-        # Try different proxy levels based on site protection needs
-        proxy_attempts = []
-        if use_special_proxy:
-            # For protected sites, start with premium proxy
-            proxy_attempts = [
-                ('premium_proxy', 'premium'),
-                ('stealth_proxy', 'stealth')
-            ]
-        else:
-            # For regular sites, start with standard but always have fallbacks
-            proxy_attempts = [
-                ('premium_proxy', 'false'),    # Standard proxy
-                ('premium_proxy', 'premium'),   # Fallback to premium
-                ('stealth_proxy', 'stealth')    # Ultimate fallback to stealth
-            ]
-        
+        # Cheapest request shape known to work for this domain first, then escalate
+        attempts = await self.profiles.plan(domain, render_js=use_javascript)
         last_error = None
         
-        for proxy_param, proxy_value in proxy_attempts:
+        for attempt in attempts:
+            proxy_value = attempt.proxy_value
             params = {
                 'api_key': self.scrapingbee_api_key,
                 'url': url,
-                'render_js': 'true' if use_javascript else 'false',
                 'country_code': 'us',
-                'wait': '3000' if use_javascript else '0',  # Increased wait for JS
                 'block_ads': 'true',
-                'timeout': str(int(timeout * 1000))  # Convert to milliseconds
+                **attempt.params()
             }
-            
-            # Add proxy parameter
-            if proxy_value != 'false':
-                params[proxy_param] = 'true'
+            if attempt.proxy_tier != 'standard':
                 logger.info(f"Using {proxy_value} proxy for {domain}")
-            else:
-                params['premium_proxy'] = 'false'
+            timeout = attempt.timeout
             
-            async with httpx.AsyncClient(timeout=timeout) as client:
+            async with http_clients.session('scrapingbee') as client:
                 try:
-                    response = await client.get(
-                        'https://app.scrapingbee.com/api/v1',
-                        params=params
-                    )
+                    # Permit covers the provider call only; extraction below runs without it
+                    started = time.monotonic()
+                    async with self._scrapingbee_limiter:
+                        response = await client.get(
+                            'https://app.scrapingbee.com/api/v1',
+                            params=params,
+                            timeout=timeout
+                        )
+                    latency = time.monotonic() - started
                     
                     if response.status_code == 401:
                         logger.error("ScrapingBee: Invalid API key")
@@ -270,6 +227,7 @@ class WebScraper:
                     elif response.status_code == 503:
                         logger.warning(f"ScrapingBee {proxy_value} proxy returned 503, trying next option")
                         last_error = f"{proxy_value} proxy unavailable"
+                        await self.profiles.record_failure(domain, attempt)
                         continue
                     elif response.status_code in (404, 410):
                         # Permanent/not found – do not retry other proxies
@@ -283,9 +241,10 @@ class WebScraper:
                             "proxy_type": proxy_value
                         }
                     elif response.status_code != 200:
-                        logger.warning(f"ScrapingBee error with {proxy_value}: {response.status_code}")
+                        logger.warning(f"ScrapingBee error with {attempt}: {response.status_code}")
                         last_error = f"HTTP {response.status_code}"
-                        if proxy_value != 'stealth':  # Only log fallback if not on last attempt
+                        await self.profiles.record_failure(domain, attempt)
+                        if attempt is not attempts[-1]:  # Only log fallback if not on last attempt
                             logger.info(f"Attempting fallback to next proxy level for {domain}")
                         # brief backoff on 5xx to reduce hammering
                         if 500 <= response.status_code < 600:
@@ -295,49 +254,14 @@ class WebScraper:
                                 pass
                         continue
                     
-                    # Process the HTML
-                    content_data = {}
-                    extracted = trafilatura.extract(
-                        response.text,
-                        include_comments=False,
-                        include_tables=True,
-                        output_format='json'
-                    )
-                    
-                    if extracted:
-                        import json
-                        content_json = json.loads(extracted)
-                        # Try different keys for content
-                        content_data['content'] = (
-                            content_json.get('text', '') or 
-                            content_json.get('raw', '') or 
-                            content_json.get('content', '')
-                        )
-                        content_data['title'] = content_json.get('title', '')
-                        content_data['author'] = content_json.get('author', '')
-                        content_data['date'] = content_json.get('date', '')
-                    else:
-                        # Fallback to basic extraction
-                        soup = BeautifulSoup(response.text, 'html.parser')
-                        content_data['title'] = soup.find('title').text if soup.find('title') else ''
-                        # Extract text from body, removing scripts and styles
-                        for script in soup(["script", "style"]):
-                            script.decompose()
-                        content_data['content'] = soup.get_text(strip=True, separator=' ')
-                    
-                    # Always extract basic metadata for description
-                    try:
-                        soup_md = BeautifulSoup(response.text, 'html.parser')
-                        md = self._extract_metadata(soup_md)
-                    except Exception:
-                        md = {}
-
-                    # Ensure we have content
-                    if not content_data.get('content'):
-                        # Try alternative extraction
-                        extracted_simple = trafilatura.extract(response.text)
-                        if extracted_simple:
-                            content_data['content'] = extracted_simple
+                    # Parse off the event loop (process pool)
+                    extracted = await self.extractor.extract(response.content, url, response.encoding)
+                    content_data = {
+                        'content': extracted['content'],
+                        'title': extracted['title'],
+                        'author': extracted['author'],
+                        'date': extracted['date'],
+                    }
                     
                     content_data['success'] = True
                     content_data['html'] = response.text
@@ -346,111 +270,39 @@ class WebScraper:
                     content_data['status_code'] = 200
                     content_data['url'] = url
                     content_data['final_url'] = url
-                    content_data['meta_description'] = md.get('description', '')
-                    try:
-                        content_data['word_count'] = len((content_data.get('content') or '').split())
-                    except Exception:
-                        content_data['word_count'] = 0
+                    content_data['meta_description'] = extracted['meta_description']
+                    content_data['word_count'] = extracted['word_count']
+                    content_data['extraction_ms'] = extracted['timings']['total_ms']
+                    content_data['render_js'] = attempt.render_js
+                    content_data['credits_used'] = response_credits(response.headers) or attempt.credits
+                    
+                    # Without JS rendering, a near-empty page is usually an unrendered shell
+                    if not attempt.render_js and extracted['word_count'] < MIN_STATIC_WORDS and attempt is not attempts[-1]:
+                        logger.info(f"Static render of {url} returned {extracted['word_count']} words; retrying with next profile")
+                        last_error = "thin content without JS rendering"
+                        await self.profiles.record_failure(domain, attempt, content_data['credits_used'])
+                        continue
+                    await self.profiles.record_success(domain, attempt, latency, content_data['credits_used'])
                     
-                    proxy_desc = "standard" if proxy_value == 'false' else proxy_value
-                    logger.info(f"Successfully scraped {url} with {proxy_desc} proxy")
+                    logger.info(f"Successfully scraped {url} with {attempt} ({latency:.1f}s)")
                     # Reset circuit breaker on success
-                    self._domain_failures.pop(domain, None)
-                    self._circuit_open_until.pop(domain, None)
+                    await self.domain_breaker.record_success(domain)
                     return content_data
                     
                 except httpx.ReadTimeout:
-                    logger.error(f"ScrapingBee timeout for {url} with {proxy_value} proxy")
+                    logger.error(f"ScrapingBee timeout for {url} with {attempt}")
                     last_error = f"Request timed out after {timeout} seconds"
+                    await self.profiles.record_failure(domain, attempt)
                     continue
                 except Exception as e:
                     logger.error(f"ScrapingBee error with {proxy_value}: {str(e)}")
                     last_error = str(e)
                     continue
         
-        # All attempts failed: increment domain failures and possibly open circuit
-        failures = self._domain_failures.get(domain, 0) + 1
-        self._domain_failures[domain] = failures
-        # Exponential open window: 3, 6, 12, 24 seconds (cap 60s)
-        backoff_seconds = min(3 * (2 ** max(failures - 1, 0)), 60)
-        if failures >= 3:
-            self._circuit_open_until[domain] = time.time() + backoff_seconds
-            logger.warning(f"Opening circuit for {domain} for {backoff_seconds}s after {failures} failures")
+        # All attempts failed: count it against the domain, opening its circuit after repeated failures
+        await self.domain_breaker.record_failure(domain)
         raise Exception(f"All proxy attempts failed. Last error: {last_error}")
     
-    def _extract_with_beautifulsoup(self, html: str) -> Dict:
-        """Extract content using BeautifulSoup as fallback"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style", "noscript"]):
-            script.decompose()
-        
-        # Get title
-        title = soup.find('title')
-        title_text = title.text.strip() if title else ''
-        
-        # Get main content
-        # Try to find main content areas
-        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=['content', 'main-content', 'article-body'])
-        
-        if main_content:
-            text = main_content.get_text(separator=' ', strip=True)
-        else:
-            # Fallback to body
-            text = soup.get_text(separator=' ', strip=True)
-        
-        # Clean up whitespace
-        text = ' '.join(text.split())
-        
-        return {
-            'title': title_text,
-            'text': text
-        }
-    
-    def _extract_metadata(self, soup: BeautifulSoup) -> Dict:
-        """Extract metadata from HTML"""
-        metadata = {}
-        
-        # Title
-        title_tag = soup.find('title')
-        if title_tag:
-            metadata['title'] = title_tag.text.strip()
-        
-        # Meta description
-        desc_tag = soup.find('meta', attrs={'name': 'description'})
-        if desc_tag:
-            metadata['description'] = desc_tag.get('content', '')
-        
-        # Open Graph data
-        og_tags = soup.find_all('meta', attrs={'property': lambda x: x and x.startswith('og:')})
-        for tag in og_tags:
-            property_name = tag.get('property', '').replace('og:', '')
-            if property_name:
-                metadata[f'og_{property_name}'] = tag.get('content', '')
-        
-        # Author
-        author = soup.find('meta', attrs={'name': 'author'})
-        if author:
-            metadata['author'] = author.get('content', '')
-        
-        # Published date
-        pub_date = soup.find('meta', attrs={'property': 'article:published_time'})
-        if pub_date:
-            metadata['published_date'] = pub_date.get('content', '')
-        
-        # Keywords
-        keywords = soup.find('meta', attrs={'name': 'keywords'})
-        if keywords:
-            metadata['keywords'] = keywords.get('content', '')
-        
-        # Canonical URL
-        canonical = soup.find('link', attrs={'rel': 'canonical'})
-        if canonical:
-            metadata['canonical_url'] = canonical.get('href', '')
-        
-        return metadata
-    
     def _requires_javascript(self, url: str) -> bool:
         """Determine if URL requires JavaScript rendering"""
         domain = urlparse(url).netloc.lower()
@@ -479,8 +331,8 @@ class WebScraper:
         try:
             # Prefer extension heuristic; only use HEAD to refine, never to fall back to HTML
             try:
-                async with httpx.AsyncClient(timeout=20.0) as client:
-                    head_response = await client.head(url, headers=self.headers, follow_redirects=True)
+                async with http_clients.session('direct') as client:
+                    head_response = await client.head(url, headers=self.headers, follow_redirects=True, timeout=20.0)
                     content_type = head_response.headers.get('content-type', '').lower()
                     if any(doc_type in content_type for doc_type in ['pdf', 'document', 'msword', 'wordprocessingml']):
                         pass  # Confirmed as document
@@ -645,30 +497,45 @@ class WebScraper:
         except Exception as e:
             logger.error(f"Cache delete error: {e}")
     
+    async def stream_scrape(
+        self,
+        urls: Iterable[str],
+        on_result: Callable[[str, Optional[Dict]], Awaitable[Any]],
+        max_concurrent: int = 5,
+        use_javascript: bool = False
+    ) -> Dict[str, Any]:
+        """Scrape URLs round-robin across hosts, handing each result to on_result as it lands; returns scheduling stats"""
+        
+        async def scrape_one(url: str):
+            try:
+                result = await self.scrape(url, use_javascript)
+            except Exception as e:
+                logger.error(f"Batch scrape error for {url}: {e}")
+                result = {
+                    "url": url,
+                    "error": str(e),
+                    "scraped_at": datetime.utcnow().isoformat()
+                }
+            await on_result(url, result)
+        
+        return await self.host_scheduler().run(urls, scrape_one, max_concurrent)
+    
     async def batch_scrape(
         self,
         urls: List[str],
         max_concurrent: int = 5,
         use_javascript: bool = False
     ) -> Dict[str, Dict]:
-        """Scrape multiple URLs concurrently"""
-        semaphore = asyncio.Semaphore(max_concurrent)
+        """Scrape multiple URLs concurrently, round-robin across hosts; large batches should use stream_scrape"""
         results = {}
         
-        async def scrape_with_semaphore(url: str):
-            async with semaphore:
-                try:
-                    result = await self.scrape(url, use_javascript)
-                    results[url] = result
-                except Exception as e:
-                    logger.error(f"Batch scrape error for {url}: {e}")
-                    results[url] = {
-                        "url": url,
-                        "error": str(e),
-                        "scraped_at": datetime.utcnow().isoformat()
-                    }
+        async def collect(url: str, result: Optional[Dict]):
+            results[url] = result
         
-        tasks = [scrape_with_semaphore(url) for url in urls]
-        await asyncio.gather(*tasks)
+        await self.stream_scrape(urls, collect, max_concurrent, use_javascript)
         
-        return results 
\ No newline at end of file
+        return results
+
+    def host_scheduler(self) -> HostScheduler:
+        """Per-host fair scheduler sharing this scraper's circuit breaker"""
+        return HostScheduler(breaker=self.domain_breaker)
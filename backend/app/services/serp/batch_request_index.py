@@ -0,0 +1,109 @@
+"""
+SERP Batch Request Index
+Hash index over ScaleSERP batch requests so downloaded results can be matched
+to their originating request in O(1), with a report of what did not match.
+"""
+
+import json
+from typing import Dict, List, Any, Iterable, Optional, Set, Tuple
+
+
+RequestKey = Tuple[str, str, str]
+
+# Sample size for unmatched/missing keys included in reports and logs
+REPORT_SAMPLE_SIZE = 20
+
+
+class BatchRequestIndex:
+    """
+    Index of batch requests keyed by normalized (query, location, content_type).
+
+    Shared by the batch monitoring path and the webhook path. Tracks which
+    requests received a result and which results matched no request.
+    """
+
+    def __init__(self, batch_requests: Optional[Iterable[Dict[str, Any]]] = None):
+        self._requests: Dict[RequestKey, Dict[str, Any]] = {}
+        self._matched: Set[RequestKey] = set()
+        self._unmatched: Set[RequestKey] = set()
+        self.duplicate_requests = 0
+
+        for request in batch_requests or []:
+            key = self.key_for_request(request)
+            if key in self._requests:
+                self.duplicate_requests += 1
+                continue
+            self._requests[key] = request
+
+    @classmethod
+    def from_stored(cls, batch_requests: Any) -> "BatchRequestIndex":
+        """Build from batch_requests as persisted in serp_batch_coordinator_runs (list or JSON text)"""
+        if isinstance(batch_requests, str):
+            try:
+                batch_requests = json.loads(batch_requests)
+            except ValueError:
+                batch_requests = []
+        return cls(batch_requests or [])
+
+    @staticmethod
+    def normalize_key(query: Optional[str], location: Optional[str], content_type: Optional[str]) -> RequestKey:
+        """Normalize a (query, location, content_type) triple into an index key"""
+        normalized_query = ' '.join((query or '').lower().split())
+        # Video searches are sent with a site: restriction that is not part of the keyword
+        normalized_query = normalized_query.replace(' site:youtube.com', '')
+        return (
+            normalized_query,
+            (location or '').strip().lower(),
+            (content_type or '').strip().lower()
+        )
+
+    @classmethod
+    def key_for_request(cls, request: Dict[str, Any]) -> RequestKey:
+        return cls.normalize_key(
+            request.get('keyword'),
+            request.get('gl') or request.get('region'),
+            request.get('content_type')
+        )
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __bool__(self) -> bool:
+        return bool(self._requests)
+
+    def match(self, key: RequestKey) -> Optional[Dict[str, Any]]:
+        """Return the request for a normalized key, recording the outcome"""
+        request = self._requests.get(key)
+        if request is None:
+            self._unmatched.add(key)
+        else:
+            self._matched.add(key)
+        return request
+
+    def lookup(self, query: Optional[str], location: Optional[str], content_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Normalize and match in one step"""
+        return self.match(self.normalize_key(query, location, content_type))
+
+    @property
+    def unmatched_results(self) -> List[RequestKey]:
+        return sorted(self._unmatched)
+
+    @property
+    def missing_requests(self) -> List[Dict[str, Any]]:
+        """Requests that did not receive any result"""
+        return [request for key, request in self._requests.items() if key not in self._matched]
+
+    def report(self) -> Dict[str, Any]:
+        """Summary of matching outcomes with a sample of the offending keys"""
+        missing = self.missing_requests
+        return {
+            'requests_total': len(self._requests),
+            'duplicate_requests': self.duplicate_requests,
+            'requests_matched': len(self._matched),
+            'requests_without_result': len(missing),
+            'results_unmatched': len(self._unmatched),
+            'unmatched_result_keys': ['|'.join(key) for key in self.unmatched_results[:REPORT_SAMPLE_SIZE]],
+            'missing_request_keys': [
+                '|'.join(self.key_for_request(request)) for request in missing[:REPORT_SAMPLE_SIZE]
+            ],
+        }
@@ -0,0 +1,154 @@
+"""
+Incremental parsers for ScaleSERP result downloads
+Turn a stream of response byte chunks into JSON array items or CSV rows
+without holding the whole page in memory.
+"""
+
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+
+DEFAULT_CHUNK_BYTES = 64 * 1024
+
+_ITEM_DELIMITERS = ' \t\r\n,]'
+
+
+async def iter_json_array(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Yield the items of a top-level JSON array as soon as each one is complete.
+
+    Memory is bounded by the read chunk size plus the largest single item.
+    Payloads that are not a top-level array are parsed whole as a fallback:
+    a list yields its items, anything else is yielded as one item.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    started = False
+    finished = False
+    whole_document: Optional[List[str]] = None
+
+    async for chunk in byte_chunks:
+        piece = text_decoder.decode(chunk)
+        if whole_document is not None:
+            whole_document.append(piece)
+            continue
+        if finished:
+            continue
+
+        buffer += piece
+        if not started:
+            stripped = buffer.lstrip()
+            if not stripped:
+                buffer = ''
+                continue
+            if stripped[0] != '[':
+                whole_document = [stripped]
+                buffer = ''
+                continue
+            buffer = stripped[1:]
+            started = True
+
+        items, consumed, finished = _drain_array_items(decoder, buffer)
+        buffer = buffer[consumed:]
+        for item in items:
+            yield item
+
+    tail = text_decoder.decode(b'', final=True)
+    if whole_document is not None:
+        whole_document.append(tail)
+        document = json.loads(''.join(whole_document))
+        if isinstance(document, list):
+            for item in document:
+                yield item
+        else:
+            yield document
+        return
+
+    if not started or finished:
+        return
+
+    # Stream ended without a closing bracket: parse what is left, then fail loudly
+    buffer += tail
+    items, consumed, finished = _drain_array_items(decoder, buffer, final=True)
+    for item in items:
+        yield item
+    if not finished:
+        raise ValueError("Truncated JSON array in streamed result page")
+
+
+def _drain_array_items(decoder: json.JSONDecoder, buffer: str, final: bool = False):
+    """Decode complete items from the head of buffer; returns (items, consumed, finished)"""
+    items = []
+    pos = 0
+    length = len(buffer)
+    while True:
+        while pos < length and buffer[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= length:
+            return items, pos, False
+        if buffer[pos] == ']':
+            return items, pos + 1, True
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Incomplete item; wait for more data
+            return items, pos, False
+        if not final and (end >= length or buffer[end] not in _ITEM_DELIMITERS):
+            # A number may continue in the next chunk ("12." + "5"); only a delimiter proves the item is complete
+            return items, pos, False
+        items.append(item)
+        pos = end
+
+
+async def iter_text_lines(byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Yield decoded lines (without line endings) from a stream of byte chunks"""
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in byte_chunks:
+        pending += text_decoder.decode(chunk)
+        lines = pending.split('\n')
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip('\r')
+    pending += text_decoder.decode(b'', final=True)
+    if pending:
+        yield pending.rstrip('\r')
+
+
+async def iter_csv_rows(lines: AsyncIterator[str]) -> AsyncIterator[Dict[str, Optional[str]]]:
+    """
+    Yield CSV rows as dicts keyed by the header row (csv.DictReader semantics).
+
+    Quoted fields that span several lines are reassembled before parsing.
+    """
+    header: Optional[List[str]] = None
+    pending: Optional[str] = None
+
+    async for line in lines:
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            continue
+
+        record = next(csv.reader([pending]), [])
+        pending = None
+        if header is None:
+            header = record
+            continue
+        if not record:
+            continue
+        yield _row_dict(header, record)
+
+    if pending is not None and header is not None:
+        record = next(csv.reader([pending]), [])
+        if record:
+            yield _row_dict(header, record)
+
+
+def _row_dict(header: List[str], record: List[str]) -> Dict[str, Optional[str]]:
+    row: Dict[str, Optional[str]] = dict(zip(header, record))
+    for field in header[len(record):]:
+        row[field] = None
+    return row
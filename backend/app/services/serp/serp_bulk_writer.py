@@ -0,0 +1,151 @@
+"""
+SERP Bulk Writer
+Loads SERP result rows with COPY into a staging table and merges them into
+serp_results with a single set-based INSERT ... ON CONFLICT per chunk.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Sequence, Tuple
+from loguru import logger
+
+
+# Column order of every record handed to SERPBulkWriter.write_records()
+SERP_RESULT_COLUMNS: Tuple[str, ...] = (
+    'keyword_id', 'search_date', 'location', 'serp_type',
+    'position', 'url', 'title', 'snippet', 'domain',
+    'source', 'published_date', 'video_length', 'total_results',
+    'device', 'google_domain', 'language_code', 'time_period',
+    'news_type', 'query_displayed', 'time_taken_displayed',
+    'pipeline_execution_id'
+)
+
+SERP_RESULT_KEY_COLUMNS: Tuple[str, ...] = ('keyword_id', 'search_date', 'location', 'serp_type', 'url')
+
+STAGING_TABLE = 'serp_results_staging'
+
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class SERPBulkWriter:
+    """
+    Bulk ingestion path for serp_results.
+
+    - Keyword ids are resolved once per batch with a single ANY($1) lookup
+    - Rows are streamed with copy_records_to_table into a temp staging table
+    - One INSERT ... SELECT ... ON CONFLICT merges each chunk into serp_results
+    """
+
+    def __init__(self, db, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db
+        self.chunk_size = max(1, chunk_size)
+
+    async def resolve_keyword_ids(self, keywords: Iterable[str], conn=None) -> Dict[str, Any]:
+        """Map keyword text to keyword id with one query"""
+        unique = sorted({k for k in keywords if k})
+        if not unique:
+            return {}
+
+        query = "SELECT id, keyword FROM keywords WHERE keyword = ANY($1::text[])"
+        if conn is not None:
+            rows = await conn.fetch(query, unique)
+        else:
+            async with self.db.acquire() as conn:
+                rows = await conn.fetch(query, unique)
+
+        return {row['keyword']: row['id'] for row in rows}
+
+    def chunks(self, records: Sequence[tuple]) -> List[Sequence[tuple]]:
+        """Split records into chunks of at most chunk_size"""
+        return [records[i:i + self.chunk_size] for i in range(0, len(records), self.chunk_size)]
+
+    def pack_groups(self, groups: Sequence[Sequence[tuple]]) -> List[Tuple[List[tuple], int]]:
+        """
+        Pack groups of records (one group per search result set) into chunks of
+        about chunk_size rows without splitting a group.
+
+        Returns (records, group_count) pairs.
+        """
+        packed: List[Tuple[List[tuple], int]] = []
+        current: List[tuple] = []
+        current_groups = 0
+        for group in groups:
+            if current and len(current) + len(group) > self.chunk_size:
+                packed.append((current, current_groups))
+                current, current_groups = [], 0
+            current.extend(group)
+            current_groups += 1
+        if current:
+            packed.append((current, current_groups))
+        return packed
+
+    async def write_records(
+        self,
+        records: Sequence[tuple],
+        update_existing: bool = True,
+        conn=None
+    ) -> int:
+        """
+        Merge records (ordered as SERP_RESULT_COLUMNS) into serp_results.
+
+        Args:
+            records: Row tuples in SERP_RESULT_COLUMNS order
+            update_existing: DO UPDATE on conflict when True, DO NOTHING otherwise
+            conn: Optional connection to reuse instead of acquiring one
+
+        Returns:
+            Number of rows inserted or updated by the merge
+        """
+        if not records:
+            return 0
+
+        if conn is not None:
+            return await self._copy_and_merge(conn, records, update_existing)
+
+        async with self.db.acquire() as conn:
+            return await self._copy_and_merge(conn, records, update_existing)
+
+    async def _copy_and_merge(self, conn, records: Sequence[tuple], update_existing: bool) -> int:
+        columns = ', '.join(SERP_RESULT_COLUMNS)
+        key_columns = ', '.join(SERP_RESULT_KEY_COLUMNS)
+
+        if update_existing:
+            update_columns = [c for c in SERP_RESULT_COLUMNS if c not in SERP_RESULT_KEY_COLUMNS]
+            conflict_action = "DO UPDATE SET " + ", ".join(
+                f"{c} = EXCLUDED.{c}" for c in update_columns
+            )
+        else:
+            conflict_action = "DO NOTHING"
+
+        async with conn.transaction():
+            # Staging table mirrors serp_results column types and disappears on commit
+            await conn.execute(f"""
+                CREATE TEMP TABLE IF NOT EXISTS {STAGING_TABLE}
+                ON COMMIT DROP AS
+                SELECT {columns} FROM serp_results WITH NO DATA
+            """)
+
+            await conn.copy_records_to_table(
+                STAGING_TABLE,
+                records=records,
+                columns=list(SERP_RESULT_COLUMNS)
+            )
+
+            # DISTINCT ON keeps one row per conflict key; ON CONFLICT cannot touch a row twice
+            status = await conn.execute(f"""
+                INSERT INTO serp_results ({columns})
+                SELECT DISTINCT ON ({key_columns}) {columns}
+                FROM {STAGING_TABLE}
+                ORDER BY {key_columns}, position NULLS LAST
+                ON CONFLICT ({key_columns}) {conflict_action}
+            """)
+
+        merged = _parse_row_count(status)
+        logger.debug(f"💾 Bulk merged {merged}/{len(records)} SERP rows")
+        return merged
+
+
+def _parse_row_count(status: Optional[str]) -> int:
+    """Extract the row count from an asyncpg command status such as 'INSERT 0 42'"""
+    try:
+        return int((status or '').split()[-1])
+    except (ValueError, IndexError):
+        return 0
@@ -6,7 +6,7 @@ Combines functionality from both serp_collector.py and enhanced_serp_collector.p
 import httpx
 import asyncio
 import os
-from typing import Dict, List, Any, Optional, Callable
+from typing import Dict, List, Any, Optional, Callable, AsyncIterator
 from datetime import datetime, date, timedelta, timezone
 import json
 from urllib.parse import urlparse
@@ -16,7 +16,110 @@ import re
 from app.core.config import settings as get_settings, Settings
 from app.models.serp import SERPType
 from app.core.database import get_db
+from app.core.http_clients import http_clients
 from app.core.robustness_logging import get_logger, log_performance
+from app.services.robustness.state_tracker import StateStatus
+from app.services.serp.serp_bulk_writer import SERPBulkWriter
+from app.services.serp.batch_request_index import BatchRequestIndex
+from app.services.serp.result_stream import DEFAULT_CHUNK_BYTES, iter_csv_rows, iter_json_array, iter_text_lines
+
+
+def _safe_int(value: Any) -> Optional[int]:
+    try:
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return value
+        s = str(value).strip()
+        if s == "":
+            return None
+        return int(float(s))
+    except Exception:
+        return None
+
+
+def _parse_relative_date(text: str) -> Optional[datetime]:
+    if not text or not isinstance(text, str):
+        return None
+    # Patterns like '2 days ago', '11 hours ago', '1 day ago'
+    m = re.match(r"^(\d+)\s+(minute|minutes|hour|hours|day|days|week|weeks|month|months|year|years)\s+ago$", text.strip(), re.IGNORECASE)
+    if not m:
+        return None
+    qty = int(m.group(1))
+    unit = m.group(2).lower()
+    now = datetime.now(timezone.utc)
+    if unit.startswith('minute'):
+        return now - timedelta(minutes=qty)
+    if unit.startswith('hour'):
+        return now - timedelta(hours=qty)
+    if unit.startswith('day'):
+        return now - timedelta(days=qty)
+    if unit.startswith('week'):
+        return now - timedelta(weeks=qty)
+    if unit.startswith('month'):
+        return now - timedelta(days=qty * 30)
+    if unit.startswith('year'):
+        return now - timedelta(days=qty * 365)
+    return None
+
+
+def _webhook_csv_record(row: Dict, content_type: str, keyword: str, keyword_id: Any, pipeline_id: str) -> tuple:
+    """Build a serp_results record (SERP_RESULT_COLUMNS order) from one webhook CSV row"""
+    # Extract URL based on content type
+    if content_type == 'organic':
+        url = row.get('result.organic_results.link', row.get('link', ''))
+    elif content_type == 'news':
+        url = row.get('result.news_results.link', row.get('link', ''))
+    elif content_type == 'video':
+        url = row.get('result.video_results.link', row.get('link', ''))
+    else:
+        url = row.get('link', '')
+    domain = urlparse(url).netloc if url else ''
+    
+    # Position
+    raw_position = row.get(f'result.{content_type}_results.position', row.get('position', None))
+    position_val = _safe_int(raw_position)
+
+    # Published date: handle absolute or relative strings (always make UTC-aware)
+    raw_published = row.get(f'result.{content_type}_results.date', row.get('date', None))
+    published_dt: Optional[datetime] = None
+    if raw_published:
+        # Try relative first
+        published_dt = _parse_relative_date(str(raw_published))
+        if not published_dt:
+            try:
+                from dateutil import parser as dtparser
+                parsed = dtparser.parse(str(raw_published))
+                if parsed.tzinfo is None:
+                    published_dt = parsed.replace(tzinfo=timezone.utc)
+                else:
+                    published_dt = parsed.astimezone(timezone.utc)
+            except Exception:
+                published_dt = None
+
+    return (
+        keyword_id,  # keyword_id
+        date.today(),  # search_date as DATE
+        row.get('gl', row.get('location', 'US')),  # location
+        content_type,  # serp_type
+        position_val,  # position
+        url,  # url
+        row.get(f'result.{content_type}_results.title', row.get('title', '')),  # title
+        row.get(f'result.{content_type}_results.snippet', row.get('snippet', '')),  # snippet
+        domain,  # domain
+        row.get(f'result.{content_type}_results.source', row.get('source', '')),  # source
+        (published_dt.date() if isinstance(published_dt, datetime) else published_dt),  # published_date as DATE
+        row.get('video_length', None),  # video_length
+        _safe_int(row.get('total_results', None)),  # total_results
+        row.get('device', 'desktop'),  # device
+        row.get('google_domain', 'google.com'),  # google_domain
+        row.get('hl', 'en'),  # language_code
+        row.get('time_period', None),  # time_period
+        row.get('type', None),  # news_type
+        row.get('query_displayed', keyword),  # query_displayed
+        row.get('time_taken_displayed', None),  # time_taken_displayed
+        pipeline_id  # pipeline_execution_id
+    )
 
 
 class UnifiedSERPCollector:
@@ -50,7 +153,7 @@ class UnifiedSERPCollector:
         self.circuit_breaker = circuit_breaker
         self.retry_manager = retry_manager
         self.logger = get_logger("unified_serp_collector")
-        self.client = None  # Will be created when needed
+        self.client = None  # Shared ScaleSERP client from the registry, bound when needed
         
         # Batch-specific settings
         self.batch_size_limit = 15000  # Scale SERP batch limit
@@ -61,7 +164,7 @@ class UnifiedSERPCollector:
     async def _scale_serp_request(self, method: str, path: str, **kwargs):
         """Make an async request to Scale SERP API"""
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            self.client = http_clients.get('scaleserp')
         
         url = f"https://api.scaleserp.com{path}"
         params = kwargs.get('params', {})
@@ -152,7 +255,7 @@ class UnifiedSERPCollector:
         
         async def make_request():
             if not self.client:
-                self.client = httpx.AsyncClient(timeout=30.0)
+                self.client = http_clients.get('scaleserp')
                 
             self.logger.api_call(
                 service="scale_serp",
@@ -643,13 +746,25 @@ class UnifiedSERPCollector:
         pipeline_id: str,
         content_type: str = "organic",
         result_set_id: Optional[int] = None,
-        download_links: Optional[Dict[str, Any]] = None
+        download_links: Optional[Dict[str, Any]] = None,
+        batch_requests: Optional[List[Dict]] = None
     ) -> Dict[str, Any]:
-        """Process results from a completed ScaleSERP batch (webhook-triggered)"""
+        """Process results from a completed ScaleSERP batch (webhook-triggered)
+        
+        batch_requests are loaded from BatchPersistenceService when not given, so
+        CSV rows are matched to their requests through the same index as the
+        monitoring path. Rows of unknown requests fall back to a keyword lookup.
+        """
         try:
             logger.info(f"📥 Processing webhook batch {batch_id} for pipeline {pipeline_id}")
             
-            # Get batch info
+            if batch_requests is None:
+                from app.services.serp.batch_persistence import BatchPersistenceService
+                details = await BatchPersistenceService.retrieve_batch_details(pipeline_id, batch_id)
+                batch_requests = details.get('batch_requests') if details else None
+            request_index = BatchRequestIndex.from_stored(batch_requests)
+            
+            # Get batch info (also creates the HTTP client used for downloads)
             batch_response = await self._scale_serp_request('GET', f'/batches/{batch_id}')
             if not batch_response or not batch_response.get('request_info', {}).get('success'):
                 raise Exception(f"Failed to get batch info: {batch_response}")
@@ -706,25 +821,19 @@ class UnifiedSERPCollector:
                                 json_url = pages[0]
                                 logger.info(f"📥 Found JSON download URL (no CSV available): {json_url}")
                 
+                csv_rows = None
                 if csv_url:
                     logger.info(f"📥 Using CSV download link: {csv_url}")
-                    # Download directly from the provided URL
-                    results_response = await self.client.get(csv_url)
-                    results_response.raise_for_status()
-                    # The response will be the raw CSV text
-                    logger.info(f"📊 CSV content length: {len(results_response.text)} characters")
+                    # Rows are read incrementally from the download
+                    csv_rows = self._stream_csv_rows(csv_url)
                 elif json_url:
                     logger.info(f"📥 Using JSON download link (CSV not available for video searches): {json_url}")
                     # Download JSON and convert to our format
                     json_response = await self.client.get(json_url)
                     json_response.raise_for_status()
                     # Process JSON response
-                    import json
                     json_data = json_response.json()
                     
-                    # Skip CSV processing for JSON data
-                    results_response = None
-                    
                     # Process JSON data directly
                     if 'searches' in json_data:
                         for search in json_data['searches']:
@@ -737,204 +846,61 @@ class UnifiedSERPCollector:
                                 video_url = video.get('link', '')
                                 if video_url:
                                     video_urls.append(video_url)
-                                    stored += 1
                                     
                                     # Extract channel domain if possible
                                     channel_link = video.get('channel', {}).get('link', '')
                                     if channel_link:
-                                        from urllib.parse import urlparse
                                         domain = urlparse(channel_link).netloc
                                         if domain:
                                             unique_domains.add(domain)
                 else:
                     # Fallback to API endpoint
                     logger.info(f"📥 No download link, using API endpoint")
-                    results_response = await self._scale_serp_request(
-                        'GET',
-                        f'/batches/{batch_id}/result_sets/{result_set_id}/results',
-                        params={'format': 'csv'}
+                    csv_rows = self._stream_csv_rows(
+                        f"https://api.scaleserp.com/batches/{batch_id}/result_sets/{result_set_id}/results",
+                        params={'format': 'csv', 'api_key': self.api_key}
                     )
                 
-                if results_response:
+                if csv_rows is not None:
                     # Process CSV results directly
                     # The CSV contains the raw SERP data that we need to parse and store
-                    csv_content = results_response.text
-                    stored = 0
-                    failed = 0
-                    domains = set()
-                    videos = []
-                    
-                    # Parse CSV and store results
-                    import csv
-                    from io import StringIO
-                    csv_reader = csv.DictReader(StringIO(csv_content))
-                    
                     logger.info(f"📝 Processing CSV for batch {batch_id}, content_type: {content_type}")
                     
-                    # Get database connection
                     from app.core.database import db_pool
-                    async with db_pool.acquire() as conn:
-                        row_count = 0
-
-                        def _safe_int(value: Any) -> Optional[int]:
-                            try:
-                                if value is None:
-                                    return None
-                                if isinstance(value, int):
-                                    return value
-                                s = str(value).strip()
-                                if s == "":
-                                    return None
-                                return int(float(s))
-                            except Exception:
-                                return None
-
-                        def _parse_relative_date(text: str) -> Optional[datetime]:
-                            if not text or not isinstance(text, str):
-                                return None
-                            # Patterns like '2 days ago', '11 hours ago', '1 day ago'
-                            m = re.match(r"^(\d+)\s+(minute|minutes|hour|hours|day|days|week|weeks|month|months|year|years)\s+ago$", text.strip(), re.IGNORECASE)
-                            if not m:
-                                return None
-                            qty = int(m.group(1))
-                            unit = m.group(2).lower()
-                            now = datetime.now(timezone.utc)
-                            if unit.startswith('minute'):
-                                return now - timedelta(minutes=qty)
-                            if unit.startswith('hour'):
-                                return now - timedelta(hours=qty)
-                            if unit.startswith('day'):
-                                return now - timedelta(days=qty)
-                            if unit.startswith('week'):
-                                return now - timedelta(weeks=qty)
-                            if unit.startswith('month'):
-                                return now - timedelta(days=qty * 30)
-                            if unit.startswith('year'):
-                                return now - timedelta(days=qty * 365)
-                            return None
-                        for row in csv_reader:
-                            row_count += 1
-                            try:
-                                # Extract keyword from search query
-                                keyword = row.get('search.q', row.get('search_query', ''))
-                                if not keyword and row_count == 1:
-                                    logger.warning(f"🔍 CSV headers: {list(row.keys())}")
-                                if not keyword:
-                                    logger.warning(f"🔍 Row {row_count}: No keyword found, skipping")
-                                    continue
-                                    
-                                keywords_processed.add(keyword)
-                                
-                                # Get keyword ID
-                                keyword_data = await conn.fetchrow(
-                                    "SELECT id FROM keywords WHERE keyword = $1",
-                                    keyword
-                                )
-                                if not keyword_data:
-                                    logger.warning(f"🔍 Keyword '{keyword}' not found in database, skipping row {row_count}")
-                                    failed += 1
-                                    continue
-                                
-                                keyword_id = keyword_data['id']
-                                
-                                # Extract URL based on content type
-                                if content_type == 'organic':
-                                    url = row.get('result.organic_results.link', row.get('link', ''))
-                                elif content_type == 'news':
-                                    url = row.get('result.news_results.link', row.get('link', ''))
-                                elif content_type == 'video':
-                                    url = row.get('result.video_results.link', row.get('link', ''))
-                                else:
-                                    url = row.get('link', '')
-                                
-                                if url:
-                                    from urllib.parse import urlparse
-                                    domain = urlparse(url).netloc
-                                    if domain:
-                                        unique_domains.add(domain)
-                                    
-                                    # Check for video URLs
-                                    if 'youtube.com' in url or 'youtu.be' in url:
-                                        video_urls.append(url)
-                                
-                                # Prepare typed fields with normalization
-                                # Position
-                                raw_position = row.get(f'result.{content_type}_results.position', row.get('position', None))
-                                position_val = _safe_int(raw_position)
-
-                                # Published date: handle absolute or relative strings (always make UTC-aware)
-                                raw_published = row.get(f'result.{content_type}_results.date', row.get('date', None))
-                                published_dt: Optional[datetime] = None
-                                if raw_published:
-                                    # Try relative first
-                                    published_dt = _parse_relative_date(str(raw_published))
-                                    if not published_dt:
-                                        try:
-                                            from dateutil import parser as dtparser
-                                            parsed = dtparser.parse(str(raw_published))
-                                            if parsed.tzinfo is None:
-                                                published_dt = parsed.replace(tzinfo=timezone.utc)
-                                            else:
-                                                published_dt = parsed.astimezone(timezone.utc)
-                                        except Exception:
-                                            published_dt = None
-
-                                # total_results numeric
-                                total_results_val = _safe_int(row.get('total_results', None))
-
-                                # Store SERP result in database
-                                await conn.execute(
-                                    """
-                                    INSERT INTO serp_results (
-                                        keyword_id, search_date, location, serp_type,
-                                        position, url, title, snippet, domain,
-                                        source, published_date, video_length, total_results,
-                                        device, google_domain, language_code, time_period,
-                                        news_type, query_displayed, time_taken_displayed,
-                                        pipeline_execution_id
-                                    ) VALUES ($1, $2::date, $3, $4, $5, $6, $7, $8, $9, $10, $11::date, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21)
-                                    ON CONFLICT (keyword_id, location, serp_type, url, search_date) DO NOTHING
-                                    """,
-                                    keyword_id,  # keyword_id
-                                    date.today(),  # search_date as DATE
-                                    row.get('gl', row.get('location', 'US')),  # location
-                                    content_type,  # serp_type
-                                    position_val,  # position
-                                    url,  # url
-                                    row.get(f'result.{content_type}_results.title', row.get('title', '')),  # title
-                                    row.get(f'result.{content_type}_results.snippet', row.get('snippet', '')),  # snippet
-                                    domain,  # domain
-                                    row.get(f'result.{content_type}_results.source', row.get('source', '')),  # source
-                                    (published_dt.date() if isinstance(published_dt, datetime) else published_dt),  # published_date as DATE
-                                    row.get('video_length', None),  # video_length
-                                    total_results_val,  # total_results
-                                    row.get('device', 'desktop'),  # device
-                                    row.get('google_domain', 'google.com'),  # google_domain
-                                    row.get('hl', 'en'),  # language_code
-                                    row.get('time_period', None),  # time_period
-                                    row.get('type', None),  # news_type
-                                    row.get('query_displayed', keyword),  # query_displayed
-                                    row.get('time_taken_displayed', None),  # time_taken_displayed
-                                    pipeline_id  # pipeline_execution_id
-                                )
-                                stored += 1
-                                
-                            except Exception as e:
-                                logger.warning(f"Failed to process/store row: {e}")
-                                failed += 1
+                    writer = SERPBulkWriter(
+                        self.db or db_pool,
+                        chunk_size=getattr(self.settings, 'SERP_BULK_WRITE_CHUNK_SIZE', 5000)
+                    )
+                    csv_stats = {'rows': 0, 'stored': 0, 'failed': 0, 'matched_by_index': 0}
+                    keyword_ids: Dict[str, Any] = {}
                     
-                    logger.info(f"✅ CSV processing complete: {row_count} rows, {stored} stored, {failed} failed")
-                    total_stored += stored
-                    unique_domains.update(domains)
-                    video_urls.extend(videos)
+                    # Store every chunk_size rows so memory stays bounded by the chunk size
+                    pending_rows: List[Dict] = []
+                    async for row in csv_rows:
+                        pending_rows.append(row)
+                        if len(pending_rows) >= writer.chunk_size:
+                            await self._store_webhook_csv_rows(
+                                pending_rows, writer, keyword_ids, request_index, content_type,
+                                pipeline_id, csv_stats, keywords_processed, unique_domains, video_urls
+                            )
+                            pending_rows = []
+                    if pending_rows:
+                        await self._store_webhook_csv_rows(
+                            pending_rows, writer, keyword_ids, request_index, content_type,
+                            pipeline_id, csv_stats, keywords_processed, unique_domains, video_urls
+                        )
                     
-                    # Extract keywords from results
-                    import csv
-                    from io import StringIO
-                    csv_reader = csv.DictReader(StringIO(results_response.text))
-                    for row in csv_reader:
-                        if 'search_query' in row:
-                            keywords_processed.add(row['search_query'])
+                    logger.info(f"✅ CSV processing complete: {csv_stats['rows']} rows, {csv_stats['stored']} stored, {csv_stats['failed']} failed")
+                    if request_index:
+                        logger.info(f"🔗 {csv_stats['matched_by_index']}/{csv_stats['rows']} CSV rows matched a batch request")
+                    total_stored += csv_stats['stored']
+            
+            match_report = request_index.report()
+            if request_index and (match_report['results_unmatched'] or match_report['requests_without_result']):
+                logger.warning(
+                    f"⚠️ Webhook batch {batch_id} matching: {match_report['results_unmatched']} searches matched no request, "
+                    f"{match_report['requests_without_result']}/{match_report['requests_total']} requests got no result"
+                )
             
             return {
                 'success': True,
@@ -945,7 +911,8 @@ class UnifiedSERPCollector:
                 'results_failed': 0,
                 'keywords_processed': len(keywords_processed),
                 'unique_domains': list(unique_domains),
-                'video_urls': video_urls
+                'video_urls': video_urls,
+                'request_matching': match_report
             }
             
         except Exception as e:
@@ -961,6 +928,84 @@ class UnifiedSERPCollector:
                 'video_urls': []
             }
     
+    async def _store_webhook_csv_rows(
+        self,
+        rows: List[Dict],
+        writer: SERPBulkWriter,
+        keyword_ids: Dict[str, Any],
+        request_index: BatchRequestIndex,
+        content_type: str,
+        pipeline_id: str,
+        csv_stats: Dict[str, int],
+        keywords_processed: set,
+        unique_domains: set,
+        video_urls: List[str]
+    ) -> None:
+        """Convert one chunk of webhook CSV rows into records and bulk load them (existing rows are kept)"""
+        resolved = []
+        unresolved_keywords = set()
+        for row in rows:
+            csv_stats['rows'] += 1
+            # Extract keyword from search query
+            keyword = row.get('search.q', row.get('search_query', ''))
+            if not keyword and csv_stats['rows'] == 1:
+                logger.warning(f"🔍 CSV headers: {list(row.keys())}")
+            if not keyword:
+                logger.warning(f"🔍 Row {csv_stats['rows']}: No keyword found, skipping")
+                continue
+            
+            keywords_processed.add(keyword)
+            
+            # Get keyword ID from the originating request, falling back to the keyword map
+            request = request_index.lookup(
+                keyword, row.get('gl', row.get('location', 'US')), content_type
+            ) if request_index else None
+            if request and request.get('keyword_id'):
+                csv_stats['matched_by_index'] += 1
+                resolved.append((row, keyword, request['keyword_id']))
+            else:
+                if keyword not in keyword_ids:
+                    unresolved_keywords.add(keyword)
+                resolved.append((row, keyword, None))
+        
+        # One lookup per chunk for keywords not seen before; misses are cached as None
+        if unresolved_keywords:
+            found = await writer.resolve_keyword_ids(unresolved_keywords)
+            for keyword in unresolved_keywords:
+                keyword_ids[keyword] = found.get(keyword)
+        
+        records: List[tuple] = []
+        for row, keyword, keyword_id in resolved:
+            keyword_id = keyword_id or keyword_ids.get(keyword)
+            if not keyword_id:
+                logger.warning(f"🔍 Keyword '{keyword}' not found in database, skipping row")
+                csv_stats['failed'] += 1
+                continue
+            try:
+                record = _webhook_csv_record(row, content_type, keyword, keyword_id, pipeline_id)
+            except Exception as e:
+                logger.warning(f"Failed to process row: {e}")
+                csv_stats['failed'] += 1
+                continue
+            
+            url, domain = record[5], record[8]
+            if url:
+                if domain:
+                    unique_domains.add(domain)
+                # Check for video URLs
+                if 'youtube.com' in url or 'youtu.be' in url:
+                    video_urls.append(url)
+            records.append(record)
+        
+        # Bulk load: COPY into staging + one merge per chunk (existing rows are kept)
+        for chunk in writer.chunks(records):
+            try:
+                await writer.write_records(chunk, update_existing=False)
+                csv_stats['stored'] += len(chunk)
+            except Exception as e:
+                logger.warning(f"Failed to store SERP chunk of {len(chunk)} rows: {e}")
+                csv_stats['failed'] += len(chunk)
+    
     async def monitor_batch(
         self,
         batch_id: str,
@@ -968,11 +1013,15 @@ class UnifiedSERPCollector:
         content_type: str,
         pipeline_execution_id: Optional[str] = None,
         state_tracker=None,
-        progress_callback=None
+        progress_callback=None,
+        results_callback=None
     ) -> Dict[str, Any]:
         """
         Monitor an existing batch until completion.
         Separate from batch creation to allow concurrent processing.
+        
+        results_callback, if given, is awaited with the stored rows of each
+        result set as soon as they are written (used by streaming pipelines).
         """
         logger.info(f"👀 Monitoring {content_type.upper()} batch: {batch_id}")
         
@@ -982,7 +1031,8 @@ class UnifiedSERPCollector:
                 batch_requests,
                 state_tracker,
                 pipeline_execution_id,
-                progress_callback
+                progress_callback,
+                results_callback=results_callback
             )
             
             logger.info(f"✅ {content_type.upper()} batch {batch_id} completed: {results.get('stored_count', 0)} results")
@@ -1016,7 +1066,7 @@ class UnifiedSERPCollector:
     ) -> str:
         """Create a Scale SERP batch with all search requests"""
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            self.client = http_clients.get('scaleserp')
         
         logger.info(f"🚀 Creating Scale SERP batch for content type: {content_type} (Step 1/3)")
         
@@ -1230,7 +1280,7 @@ class UnifiedSERPCollector:
         """Start batch execution for manual batches"""
         try:
             if not self.client:
-                self.client = httpx.AsyncClient(timeout=30.0)
+                self.client = http_clients.get('scaleserp')
             
             # Scale SERP requires GET request to start manual batches
             response = await self.client.get(
@@ -1255,11 +1305,12 @@ class UnifiedSERPCollector:
         batch_requests: List[Dict],
         state_tracker=None,
         pipeline_execution_id: str = None,
-        progress_callback=None
+        progress_callback=None,
+        results_callback=None
     ) -> Dict:
         """Monitor batch until completion with robustness features"""
         if not self.client:
-            self.client = httpx.AsyncClient(timeout=30.0)
+            self.client = http_clients.get('scaleserp')
         
         if self.use_webhooks:
             logger.info(f"📊 Monitoring batch {batch_id} with webhooks enabled (fallback polling every {self.monitor_interval}s, timeout: {self.batch_timeout//60}m)")
@@ -1369,63 +1420,49 @@ class UnifiedSERPCollector:
                         
                         logger.info(f"📥 Found {len(pages)} result pages to download")
                         
-                        # Download and process results
-                        all_results = {}
-                        for page_url in pages:
-                            logger.info(f"📥 Downloading results from: {page_url}")
-                            
-                            # Download the actual SERP results CSV file
-                            download_response = await self.client.get(page_url)
-                            
-                            if download_response.status_code == 200:
-                                try:
-                                    # Parse JSON data
-                                    page_results = download_response.json()
-                                    
-                                    # Log the results
-                                    logger.info(f"📥 Downloaded {len(page_results)} search results")
-                                    
-                                    # Log the structure of the first result for debugging
-                                    if page_results:
-                                        logger.info(f"📥 First result structure: {list(page_results[0].keys())}")
-                                        if 'search_parameters' in page_results[0]:
-                                            logger.info(f"📥 Search parameters: {page_results[0]['search_parameters']}")
-                                    
-                                    # Process JSON results
-                                    for result_data in page_results:
-                                        # Extract the actual result from the Scale SERP response structure
-                                        if 'result' in result_data and result_data['result']:
-                                            actual_result = result_data['result']
-                                            
-                                            # Get search parameters from the actual result
-                                            search_params = actual_result.get('search_parameters', {})
-                                            
-                                            # Create a search key from query and location
-                                            query = search_params.get('q', '')
-                                            # For video searches, remove site:youtube.com from the query for key matching
-                                            if content_type == 'video' and ' site:youtube.com' in query:
-                                                query = query.replace(' site:youtube.com', '')
-                                            location = search_params.get('gl', search_params.get('location', ''))
-                                            search_key = f"{query}_{location}_{content_type}"
-                                            
-                                            if query:  # Only process if we have a query
-                                                all_results[search_key] = actual_result
-                                                logger.info(f"📥 Added result for key: {search_key}")
-                                    
-                                    logger.info(f"✅ Processed {len(page_results)} search results into {len(all_results)} keyed results")
-                                except Exception as parse_error:
-                                    logger.error(f"❌ Error parsing downloaded results: {parse_error}")
-                                    import traceback
-                                    logger.error(f"Traceback: {traceback.format_exc()}")
-                            else:
-                                logger.error(f"❌ Failed to download results page: {download_response.status_code}")
+                        # Download and process results, keyed the same way as the request index
+                        request_index = BatchRequestIndex(batch_requests)
                         
-                        # Process the downloaded results
-                        logger.info(f"💾 Processing {len(all_results)} total results from batch")
+                        if getattr(self.settings, 'SERP_STREAM_DOWNLOADS', True):
+                            # Rows are parsed and stored while pages are still downloading
+                            logger.info(f"📥 Streaming {len(pages)} result pages into storage")
+                            keyed_results = self._stream_keyed_results(pages, content_type, request_index)
+                        else:
+                            keyed_results = {}
+                            for page_url in pages:
+                                logger.info(f"📥 Downloading results from: {page_url}")
+                                
+                                # Download the actual SERP results JSON file
+                                download_response = await self.client.get(page_url)
+                                
+                                if download_response.status_code == 200:
+                                    try:
+                                        # Parse JSON data
+                                        page_results = download_response.json()
+                                        
+                                        # Log the results
+                                        logger.info(f"📥 Downloaded {len(page_results)} search results")
+                                        
+                                        # Process JSON results
+                                        for result_data in page_results:
+                                            keyed = self._keyed_result(result_data, content_type, request_index)
+                                            if keyed:
+                                                keyed_results[keyed[0]] = keyed[1]
+                                        
+                                        logger.info(f"✅ Processed {len(page_results)} search results into {len(keyed_results)} keyed results")
+                                    except Exception as parse_error:
+                                        logger.error(f"❌ Error parsing downloaded results: {parse_error}")
+                                        import traceback
+                                        logger.error(f"Traceback: {traceback.format_exc()}")
+                                else:
+                                    logger.error(f"❌ Failed to download results page: {download_response.status_code}")
+                            
+                            # Process the downloaded results
+                            logger.info(f"💾 Processing {len(keyed_results)} total results from batch")
                         
                         # Convert to expected format for _process_batch_results
                         batch_results = {
-                            'results': all_results,
+                            'results': keyed_results,
                             'ended_at': ended_at,
                             'started_at': started_at
                         }
@@ -1436,7 +1473,9 @@ class UnifiedSERPCollector:
                             batch_requests,
                             state_tracker,
                             pipeline_execution_id,
-                            progress_callback
+                            progress_callback,
+                            results_callback=results_callback,
+                            request_index=request_index
                         )
                         
                         return results
@@ -1474,209 +1513,262 @@ class UnifiedSERPCollector:
         logger.error(f"❌ Batch {batch_id} monitoring timeout after {self.batch_timeout//60} minutes")
         return {'stored_count': 0, 'failed_count': len(batch_requests)}
     
+    def _keyed_result(
+        self,
+        result_data: Dict,
+        content_type: str,
+        request_index: BatchRequestIndex
+    ) -> Optional[tuple]:
+        """Return (request index key, result) for one downloaded search, or None if it has no query"""
+        # Extract the actual result from the Scale SERP response structure
+        actual_result = result_data.get('result') if isinstance(result_data, dict) else None
+        if not actual_result:
+            return None
+        
+        search_params = actual_result.get('search_parameters', {})
+        query = search_params.get('q', '')
+        if not query:
+            return None
+        
+        location = search_params.get('gl', search_params.get('location', ''))
+        return request_index.normalize_key(query, location, content_type), actual_result
+    
+    async def _stream_keyed_results(
+        self,
+        pages: List[str],
+        content_type: str,
+        request_index: BatchRequestIndex
+    ) -> AsyncIterator[tuple]:
+        """Download result pages chunk by chunk and yield (key, result) pairs as they are parsed"""
+        chunk_bytes = getattr(self.settings, 'SERP_STREAM_CHUNK_BYTES', DEFAULT_CHUNK_BYTES)
+        for page_url in pages:
+            logger.info(f"📥 Streaming results from: {page_url}")
+            page_count = 0
+            try:
+                async with self.client.stream('GET', page_url) as response:
+                    if response.status_code != 200:
+                        logger.error(f"❌ Failed to download results page: {response.status_code}")
+                        continue
+                    
+                    async for result_data in iter_json_array(response.aiter_bytes(chunk_bytes)):
+                        page_count += 1
+                        keyed = self._keyed_result(result_data, content_type, request_index)
+                        if keyed:
+                            yield keyed
+            except Exception as parse_error:
+                logger.error(f"❌ Error streaming results page after {page_count} searches: {parse_error}")
+                continue
+            
+            logger.info(f"✅ Streamed {page_count} search results from page")
+    
+    async def _stream_csv_rows(self, url: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict]:
+        """Yield CSV rows from a download URL, streaming unless SERP_STREAM_DOWNLOADS is off"""
+        if not getattr(self.settings, 'SERP_STREAM_DOWNLOADS', True):
+            import csv
+            from io import StringIO
+            response = await self.client.get(url, params=params)
+            response.raise_for_status()
+            logger.info(f"📊 CSV content length: {len(response.text)} characters")
+            for row in csv.DictReader(StringIO(response.text)):
+                yield row
+            return
+        
+        chunk_bytes = getattr(self.settings, 'SERP_STREAM_CHUNK_BYTES', DEFAULT_CHUNK_BYTES)
+        async with self.client.stream('GET', url, params=params) as response:
+            response.raise_for_status()
+            async for row in iter_csv_rows(iter_text_lines(response.aiter_bytes(chunk_bytes))):
+                yield row
+    
     async def _process_batch_results(
         self,
         batch_results: Dict,
         batch_requests: List[Dict],
         state_tracker=None,
         pipeline_execution_id: str = None,
-        progress_callback=None
+        progress_callback=None,
+        results_callback=None,
+        request_index: Optional[BatchRequestIndex] = None
     ) -> Dict:
-        """Process and store batch results with robustness features"""
+        """Process and store batch results with robustness features
+        
+        batch_results['results'] is either a dict keyed by
+        BatchRequestIndex.normalize_key() or an async iterator of (key, result)
+        pairs; the latter is stored chunk by chunk while it is still being read.
+        The index is built from batch_requests when not supplied.
+        """
         logger.info(f"💾 Processing batch results for storage")
         
         # Extract batch timing for scheduling
         batch_ended_at = batch_results.get('ended_at')
         logger.info(f"📅 Using batch collection date: {batch_ended_at}")
         
+        results_source = batch_results.get('results', {})
         if progress_callback:
             await progress_callback("serp_results_processing", {
                 'phase': 'result_processing',
-                'total_results': len(batch_results.get('results', {})),
+                'total_results': len(results_source) if isinstance(results_source, dict) else None,
                 'status': 'processing'
             })
         
         stored_count = 0
         failed_count = 0
         
-        async def process_with_retry(search_key: str, result_data: Dict, request: Dict):
-            """Process a single result with retry logic"""
-            try:
-                serp_results = self._extract_results(
-                    result_data,
-                    request['content_type']
+        # Use batch ended_at date if available
+        search_date = self._batch_search_date(batch_ended_at)
+        
+        if request_index is None:
+            request_index = BatchRequestIndex(batch_requests)
+        
+        writer = SERPBulkWriter(
+            self.db,
+            chunk_size=getattr(self.settings, 'SERP_BULK_WRITE_CHUNK_SIZE', 5000)
+        )
+        concurrency = max(1, getattr(self.settings, 'SERP_STORAGE_CONCURRENCY', 4))
+        progress_every = max(1, getattr(self.settings, 'SERP_PROGRESS_EVERY_CHUNKS', 5))
+        semaphore = asyncio.Semaphore(concurrency)
+        progress = {'chunks_dispatched': 0, 'chunks_done': 0, 'rows_parsed': 0, 'rows_stored': 0, 'rows_failed': 0}
+        store_tasks = []
+        
+        track_items = bool(state_tracker and pipeline_execution_id)
+        
+        def record_items(requests: List[Dict], status: StateStatus, error: Optional[str] = None):
+            # Buffered and coalesced by the state tracker; no DB write per search
+            for request in requests:
+                state_tracker.record(
+                    pipeline_execution_id, 'serp_collection',
+                    state_tracker._generate_item_identifier('serp_collection', request),
+                    status, error=error
                 )
-                
-                # Store results in database
-                if self.db:
-                    async with self.db.acquire() as conn:
-                        for idx, serp_result in enumerate(serp_results):
-                            try:
-                                # Ensure all values are not None
-                                keyword_id = request['keyword_id']
-                                location = request['region']
-                                serp_type = request['content_type']
-                                position = serp_result.get('position', idx + 1)
-                                url = serp_result.get('link', '') or ''
-                                title = (serp_result.get('title', '') or '')[:500]
-                                snippet = serp_result.get('snippet', '') or ''
-                                domain = serp_result.get('domain', '') or ''
-                                
-                                # Validate required fields
-                                if not keyword_id or not url:
-                                    logger.warning(f"⚠️ Skipping result with missing keyword_id or url")
-                                    continue
-                                
-                                # Use batch ended_at date if available
-                                if batch_ended_at:
-                                    # Ensure UTC-aware then convert to date
-                                    dt = datetime.fromisoformat(batch_ended_at.replace('Z', '+00:00'))
-                                    if dt.tzinfo is None:
-                                        dt = dt.replace(tzinfo=timezone.utc)
-                                    else:
-                                        dt = dt.astimezone(timezone.utc)
-                                    search_date = dt.date()
-                                else:
-                                    search_date = date.today()
-                                
-                                # Parse published date if available
-                                published_date = None
-                                if serp_result.get('date'):
-                                    try:
-                                        from dateutil import parser
-                                        parsed = parser.parse(serp_result['date'])
-                                        if parsed.tzinfo is None:
-                                            published_date = parsed.replace(tzinfo=timezone.utc)
-                                        else:
-                                            published_date = parsed.astimezone(timezone.utc)
-                                    except:
-                                        pass
-                                
-                                # Get additional fields based on content type
-                                source = serp_result.get('source', '') if serp_type == 'news' else None
-                                video_length = serp_result.get('length', '') if serp_type == 'video' else None
-                                
-                                # Get search metadata from parent result data
-                                search_params = result_data.get('search_parameters', {})
-                                search_info = result_data.get('search_information', {})
-                                
-                                # Extract search parameters
-                                device = search_params.get('device')
-                                google_domain = search_params.get('google_domain')
-                                language_code = search_params.get('hl')
-                                time_period = search_params.get('time_period')
-                                news_type = search_params.get('news_type') if serp_type == 'news' else None
-                                
-                                # Extract search information
-                                total_results = None
-                                if search_info.get('total_results'):
-                                    try:
-                                        total_results = int(search_info.get('total_results', 0))
-                                    except:
-                                        pass
-                                query_displayed = search_info.get('query_displayed')
-                                time_taken_displayed = search_info.get('time_taken_displayed')
-                                
-                                await conn.execute(
-                                    """
-                                    INSERT INTO serp_results (
-                                        keyword_id, search_date, location, serp_type,
-                                        position, url, title, snippet, domain,
-                                        source, published_date, video_length, total_results,
-                                        device, google_domain, language_code, time_period, 
-                                        news_type, query_displayed, time_taken_displayed,
-                                        pipeline_execution_id
-                                    ) VALUES ($1, $2::date, $3, $4, $5, $6, $7, $8, $9, $10, $11::date, $12, $13, $14, $15, $16, $17, $18, $19, $20, $21)
-                                    ON CONFLICT (keyword_id, search_date, location, serp_type, url) 
-                                    DO UPDATE SET
-                                        position = EXCLUDED.position,
-                                        title = EXCLUDED.title,
-                                        snippet = EXCLUDED.snippet,
-                                        source = EXCLUDED.source,
-                                        published_date = EXCLUDED.published_date,
-                                        video_length = EXCLUDED.video_length,
-                                        total_results = EXCLUDED.total_results,
-                                        device = EXCLUDED.device,
-                                        google_domain = EXCLUDED.google_domain,
-                                        language_code = EXCLUDED.language_code,
-                                        time_period = EXCLUDED.time_period,
-                                        news_type = EXCLUDED.news_type,
-                                        query_displayed = EXCLUDED.query_displayed,
-                                        time_taken_displayed = EXCLUDED.time_taken_displayed,
-                                        pipeline_execution_id = EXCLUDED.pipeline_execution_id
-                                    """,
-                                    keyword_id,
-                                    search_date,
-                                    location,
-                                    serp_type,
-                                    position,
-                                    url,
-                                    title,
-                                    snippet,
-                                    domain,
-                                    source,
-                                    published_date,
-                                    video_length,
-                                    total_results,
-                                    device,
-                                    google_domain,
-                                    language_code,
-                                    time_period,
-                                    news_type,
-                                    query_displayed,
-                                    time_taken_displayed,
-                                    pipeline_execution_id
-                                )
-                                
-                            except Exception as store_error:
-                                logger.error(f"❌ Failed to store SERP result: {store_error}")
-                    
-                    logger.info(f"💾 Stored {len(serp_results)} SERP results for {request['keyword']} ({request['region']}, {request['content_type']})")
-                    return len(serp_results)
-                
-            except Exception as e:
-                logger.error(f"❌ Error processing result {search_id}: {e}")
-                raise
         
-        # Process results with retry logic
-        for search_id, result_data in batch_results.get('results', {}).items():
+        async def store_chunk(chunk_index: int, chunk: List[tuple], search_count: int, requests: List[Dict]):
+            nonlocal stored_count, failed_count
             try:
-                # Find corresponding request by matching search key
-                request = None
-                for req in batch_requests:
-                    # Match the key format used when processing JSON results
-                    expected_key = f"{req['keyword']}_{req['gl']}_{req['content_type']}"
-                    if search_id == expected_key:
-                        request = req
-                        break
-                
-                if not request:
-                    logger.warning(f"⚠️ Could not find request for result: {search_id}")
-                    failed_count += 1
-                    continue
-                
-                # Process with retry if retry manager available
+                # Each write acquires its own pooled connection; retry covers the whole chunk
                 if self.retry_manager:
-                    # retry_with_backoff expects a callable, so we wrap the async function
                     async def retry_wrapper():
-                        return await process_with_retry(search_id, result_data, request)
+                        return await writer.write_records(chunk)
                     
-                    count = await self.retry_manager.retry_with_backoff(
+                    await self.retry_manager.retry_with_backoff(
                         retry_wrapper,
                         entity_type='serp_result_processing',
-                        entity_id=search_id
+                        entity_id=f"{pipeline_execution_id}_chunk_{chunk_index}"
                     )
                 else:
-                    count = await process_with_retry(search_id, result_data, request)
+                    await writer.write_records(chunk)
                 
-                stored_count += count
+                stored_count += len(chunk)
+                progress['rows_stored'] += len(chunk)
+                if track_items:
+                    record_items(requests, StateStatus.COMPLETED)
                 
             except Exception as e:
-                logger.error(f"❌ Failed to process result {search_id}: {e}")
-                failed_count += 1
+                logger.error(f"❌ Failed to store SERP chunk {chunk_index + 1} ({search_count} searches, {len(chunk)} rows): {e}")
+                failed_count += search_count
+                progress['rows_failed'] += len(chunk)
+                chunk = None
+                if track_items:
+                    record_items(requests, StateStatus.FAILED, error=str(e))
+            finally:
+                progress['chunks_done'] += 1
+                semaphore.release()
+            
+            # Hand stored rows downstream as soon as the chunk is committed
+            if chunk and results_callback:
+                try:
+                    await results_callback([
+                        {
+                            'keyword_id': record[0],
+                            'region': record[2],
+                            'serp_type': record[3],
+                            'url': record[5],
+                            'domain': record[8]
+                        }
+                        for record in chunk
+                    ])
+                except Exception as callback_error:
+                    logger.error(f"❌ SERP results callback failed: {callback_error}")
+            
+            # Progress is reported every few chunks rather than per result set
+            if progress_callback and progress['chunks_done'] % progress_every == 0:
+                await self._report_storage_progress(progress_callback, progress)
+        
+        async def dispatch(groups: List[List[tuple]], requests: List[Dict]):
+            # Waiting on the semaphore before creating the task bounds rows held in memory
+            offset = 0
+            for chunk, search_count in writer.pack_groups(groups):
+                await semaphore.acquire()
+                chunk_index = progress['chunks_dispatched']
+                progress['chunks_dispatched'] += 1
+                # pack_groups keeps group order, so the chunk's searches are the next search_count requests
+                chunk_requests = requests[offset:offset + search_count]
+                offset += search_count
+                store_tasks.append(asyncio.create_task(store_chunk(chunk_index, chunk, search_count, chunk_requests)))
+        
+        async def iterate_results():
+            if isinstance(results_source, dict):
+                for item in results_source.items():
+                    yield item
+            else:
+                async for item in results_source:
+                    yield item
+        
+        # Parse result sets into columnar records and flush a chunk whenever enough rows are pending
+        pending_groups: List[List[tuple]] = []
+        pending_requests: List[Dict] = []
+        pending_rows = 0
+        try:
+            async for search_id, result_data in iterate_results():
+                try:
+                    # Find corresponding request via the hash index
+                    request = request_index.match(search_id)
+                    
+                    if not request:
+                        logger.warning(f"⚠️ Could not find request for result: {search_id}")
+                        failed_count += 1
+                        continue
+                    
+                    group = self._build_serp_records(
+                        result_data, request, search_date, pipeline_execution_id
+                    )
+                    
+                except Exception as e:
+                    logger.error(f"❌ Failed to process result {search_id}: {e}")
+                    failed_count += 1
+                    continue
+                
+                if not group or not self.db:
+                    if track_items:
+                        record_items([request], StateStatus.COMPLETED)
+                    continue
+                
+                pending_groups.append(group)
+                pending_requests.append(request)
+                pending_rows += len(group)
+                progress['rows_parsed'] += len(group)
+                if pending_rows >= writer.chunk_size:
+                    await dispatch(pending_groups, pending_requests)
+                    pending_groups, pending_requests, pending_rows = [], [], 0
+            
+            if pending_groups:
+                await dispatch(pending_groups, pending_requests)
+        finally:
+            if store_tasks:
+                await asyncio.gather(*store_tasks, return_exceptions=True)
+        
+        if progress_callback and progress['chunks_done']:
+            await self._report_storage_progress(progress_callback, progress)
         
         logger.info(f"💾 BATCH STORAGE COMPLETE: {stored_count} stored, {failed_count} failed")
         
+        match_report = request_index.report()
+        if match_report['results_unmatched'] or match_report['requests_without_result']:
+            logger.warning(
+                f"⚠️ Batch request matching: {match_report['results_unmatched']} results matched no request, "
+                f"{match_report['requests_without_result']}/{match_report['requests_total']} requests got no result "
+                f"(unmatched sample: {match_report['unmatched_result_keys'][:5]}, "
+                f"missing sample: {match_report['missing_request_keys'][:5]})"
+            )
+        
         if progress_callback:
             await progress_callback("serp_storage_completed", {
                 'stored_count': stored_count,
@@ -1686,6 +1778,7 @@ class UnifiedSERPCollector:
         
         # Create storage checkpoint
         if state_tracker and pipeline_execution_id:
+            await state_tracker.flush_updates()
             await state_tracker.create_checkpoint(
                 pipeline_execution_id,
                 "serp_collection",
@@ -1693,11 +1786,117 @@ class UnifiedSERPCollector:
                 {
                     'stored_count': stored_count,
                     'failed_count': failed_count,
+                    'results_unmatched': match_report['results_unmatched'],
+                    'requests_without_result': match_report['requests_without_result'],
                     'completed_at': datetime.utcnow().isoformat()
                 }
             )
         
-        return {'stored_count': stored_count, 'failed_count': failed_count}
+        return {'stored_count': stored_count, 'failed_count': failed_count, 'request_matching': match_report}
+    
+    async def _report_storage_progress(self, progress_callback, progress: Dict[str, int]) -> None:
+        try:
+            await progress_callback("serp_results_processing", {
+                'phase': 'result_processing',
+                'status': 'storing',
+                'chunks_completed': progress['chunks_done'],
+                'chunks_dispatched': progress['chunks_dispatched'],
+                'rows_parsed': progress['rows_parsed'],
+                'rows_stored': progress['rows_stored'],
+                'rows_failed': progress['rows_failed']
+            })
+        except Exception as callback_error:
+            logger.warning(f"⚠️ SERP progress callback failed: {callback_error}")
+    
+    def _batch_search_date(self, batch_ended_at: Optional[str]) -> date:
+        """Collection date for a batch: its UTC ended_at date, or today"""
+        if batch_ended_at:
+            # Ensure UTC-aware then convert to date
+            dt = datetime.fromisoformat(batch_ended_at.replace('Z', '+00:00'))
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            else:
+                dt = dt.astimezone(timezone.utc)
+            return dt.date()
+        return date.today()
+    
+    def _build_serp_records(
+        self,
+        result_data: Dict,
+        request: Dict,
+        search_date: date,
+        pipeline_execution_id: Optional[str]
+    ) -> List[tuple]:
+        """Convert one search result set into serp_results records (SERP_RESULT_COLUMNS order)"""
+        serp_type = request['content_type']
+        keyword_id = request['keyword_id']
+        location = request['region']
+        
+        # Search metadata is shared by every row of the result set
+        search_params = result_data.get('search_parameters', {})
+        search_info = result_data.get('search_information', {})
+        
+        device = search_params.get('device')
+        google_domain = search_params.get('google_domain')
+        language_code = search_params.get('hl')
+        time_period = search_params.get('time_period')
+        news_type = search_params.get('news_type') if serp_type == 'news' else None
+        
+        total_results = None
+        if search_info.get('total_results'):
+            try:
+                total_results = int(search_info.get('total_results', 0))
+            except (TypeError, ValueError):
+                pass
+        query_displayed = search_info.get('query_displayed')
+        time_taken_displayed = search_info.get('time_taken_displayed')
+        
+        records = []
+        for idx, serp_result in enumerate(self._extract_results(result_data, serp_type)):
+            url = serp_result.get('link', '') or ''
+            
+            # Validate required fields
+            if not keyword_id or not url:
+                logger.warning(f"⚠️ Skipping result with missing keyword_id or url")
+                continue
+            
+            # Parse published date if available
+            published_date = None
+            if serp_result.get('date'):
+                try:
+                    from dateutil import parser
+                    parsed = parser.parse(serp_result['date'])
+                    if parsed.tzinfo is None:
+                        parsed = parsed.replace(tzinfo=timezone.utc)
+                    published_date = parsed.astimezone(timezone.utc).date()
+                except Exception:
+                    pass
+            
+            records.append((
+                keyword_id,
+                search_date,
+                location,
+                serp_type,
+                serp_result.get('position', idx + 1),
+                url,
+                (serp_result.get('title', '') or '')[:500],
+                serp_result.get('snippet', '') or '',
+                serp_result.get('domain', '') or '',
+                serp_result.get('source', '') if serp_type == 'news' else None,
+                published_date,
+                serp_result.get('length', '') if serp_type == 'video' else None,
+                total_results,
+                device,
+                google_domain,
+                language_code,
+                time_period,
+                news_type,
+                query_displayed,
+                time_taken_displayed,
+                pipeline_execution_id
+            ))
+        
+        return records
     
     def _get_location_name(self, region_code: str) -> str:
         """Convert region code to location name"""
@@ -1833,6 +2032,5 @@ class UnifiedSERPCollector:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit - cleanup resources"""
-        if self.client:
-            await self.client.aclose()
-            self.client = None
+        # The HTTP client is shared via the registry and closed at application shutdown
+        self.client = None
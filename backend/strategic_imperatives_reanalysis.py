@@ -7,7 +7,9 @@ Business Units, and any other custom dimensions) that were missing due to the an
 loading from generic_custom_dimensions table.
 
 Usage:
-    python strategic_imperatives_reanalysis.py
+    python strategic_imperatives_reanalysis.py            # concurrent chat-completion calls
+    python strategic_imperatives_reanalysis.py --batch    # OpenAI Batch API (overnight, lower cost)
+    python strategic_imperatives_reanalysis.py --resume-batch <batch_id>
 
 The script will:
 1. Load ALL custom dimensions from generic_custom_dimensions (Strategic Imperatives, BUs, etc.)
@@ -30,14 +32,17 @@ sys.path.insert(0, '/app')
 from app.core.database import db_pool
 from app.core.config import get_settings
 from app.services.analysis.optimized_unified_analyzer import OptimizedUnifiedAnalyzer
+from app.services.analysis.openai_batch_analyzer import OpenAIBatchAnalyzer
 from loguru import logger
 
 
 class CustomDimensionsReAnalyzer:
     """Re-analyze existing content for ALL custom dimensions (Strategic Imperatives, BUs, etc.)"""
     
-    def __init__(self):
+    def __init__(self, batch_mode: bool = False, resume_batch_id: Optional[str] = None):
         self.settings = get_settings()
+        self.batch_mode = batch_mode or bool(resume_batch_id)
+        self.resume_batch_id = resume_batch_id
         self.db = db_pool
         self.analyzer = OptimizedUnifiedAnalyzer(self.settings, self.db)
         self.processed_count = 0
@@ -89,6 +94,13 @@ class CustomDimensionsReAnalyzer:
                 logger.info("ℹ️  No content found to re-analyze")
                 return
             
+            if self.batch_mode:
+                await self._process_all_content_batch_api(content_to_reanalyze, strategic_imperatives)
+                elapsed = (datetime.now() - self.start_time).total_seconds()
+                logger.info(f"🎉 Batch re-analysis complete: {self.processed_count} pages, "
+                           f"{self.error_count} errors in {elapsed/60:.1f} minutes")
+                return
+            
             # Advanced concurrent batch processing (matching ConcurrentContentAnalyzer)
             logger.info(f"🚀 Starting concurrent batch processing: {self._max_concurrent_batches} batches × {self._batch_size} items = {self._max_concurrent_batches * self._batch_size} concurrent analyses")
             
@@ -245,6 +257,32 @@ class CustomDimensionsReAnalyzer:
                 # No active batches and no content queue - we're done
                 break
     
+    async def _process_all_content_batch_api(self, content_list: List[Dict[str, Any]], strategic_imperatives: List[Dict[str, Any]]):
+        """Submit all pages through the OpenAI Batch API instead of concurrent chat-completion calls"""
+        batch_runner = OpenAIBatchAnalyzer(self.analyzer, self.settings, self.db)
+        analysis_ids = {c['url']: c['analysis_id'] for c in content_list}
+        
+        async def on_result(url: str, analysis_result: Dict[str, Any]):
+            si_results = self._extract_strategic_imperative_results(url, analysis_result, strategic_imperatives)
+            analysis_id = analysis_ids.get(url)
+            if si_results and analysis_id:
+                await self._store_custom_dimension_results(analysis_id, si_results)
+            self.processed_count += 1
+        
+        if self.resume_batch_id:
+            stats = await batch_runner.resume(self.resume_batch_id, on_result=on_result)
+        else:
+            stats = await batch_runner.analyze_many(
+                [
+                    {'url': c['url'], 'content': c.get('content') or '', 'title': c.get('title') or ''}
+                    for c in content_list
+                ],
+                project_id=None,  # Use None instead of 'default' to avoid UUID validation error
+                on_result=on_result
+            )
+        self.error_count += stats.get('failed', 0)
+        logger.info(f"📦 Batch API stats: { {k: v for k, v in stats.items() if k != 'failed_urls'} }")
+    
     async def _process_batch_with_semaphore(self, content_batch: List[Dict[str, Any]], strategic_imperatives: List[Dict[str, Any]]):
         """Process a batch of content with semaphore control for OpenAI calls"""
         
@@ -348,6 +386,22 @@ class CustomDimensionsReAnalyzer:
                 logger.warning(f"No valid analysis result for {url[:50]}...")
                 return []
             
+            return self._extract_strategic_imperative_results(url, analysis_result, strategic_imperatives)
+            
+        except Exception as e:
+            logger.error(f"Failed to analyze Strategic Imperatives for {url}: {e}")
+            import traceback
+            traceback.print_exc()
+            return []
+    
+    def _extract_strategic_imperative_results(
+        self,
+        url: str,
+        analysis_result: Dict[str, Any],
+        strategic_imperatives: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Pick the Strategic Imperative scores out of a full analysis result"""
+        try:
             # Look for dimensions in the result
             dimensions_data = analysis_result.get('dimensions', {})
             logger.info(f"🔑 Found dimensions: {list(dimensions_data.keys()) if dimensions_data else 'None'}")
@@ -374,9 +428,7 @@ class CustomDimensionsReAnalyzer:
             return si_results
             
         except Exception as e:
-            logger.error(f"Failed to analyze Strategic Imperatives for {url}: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error(f"Failed to extract Strategic Imperatives for {url}: {e}")
             return []
     
     async def _store_custom_dimension_results(self, analysis_id: UUID, custom_results: List[Dict[str, Any]]):
@@ -416,7 +468,11 @@ class CustomDimensionsReAnalyzer:
 
 async def main():
     """Main entry point"""
-    reanalyzer = CustomDimensionsReAnalyzer()
+    resume_batch_id = None
+    if '--resume-batch' in sys.argv:
+        index = sys.argv.index('--resume-batch')
+        resume_batch_id = sys.argv[index + 1] if index + 1 < len(sys.argv) else None
+    reanalyzer = CustomDimensionsReAnalyzer(batch_mode='--batch' in sys.argv, resume_batch_id=resume_batch_id)
     await reanalyzer.run()
 
 
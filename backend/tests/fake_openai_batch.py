@@ -0,0 +1,174 @@
+"""
+In-process fake of the OpenAI Files and Batch endpoints
+
+Covers what OpenAIBatchAnalyzer uses: file upload, batch create, batch poll
+and file content download. Batches move validating -> in_progress -> a
+terminal status after a configurable number of polls; chosen requests can
+fail (error file) and a batch can expire part-way through.
+
+Tests mount it with httpx.ASGITransport. It also runs standalone for manual
+checks:
+
+    uvicorn fake_openai_batch:app --app-dir tests --port 8765
+    OPENAI_BASE_URL=http://localhost:8765/v1
+"""
+
+import itertools
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import Response
+
+
+def tool_call_completion(custom_id: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Chat completion body carrying one analyze_content tool call"""
+    return {
+        'id': f"chatcmpl-{custom_id}",
+        'object': 'chat.completion',
+        'choices': [{
+            'index': 0,
+            'finish_reason': 'tool_calls',
+            'message': {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': [{
+                    'id': f"call-{custom_id}",
+                    'type': 'function',
+                    'function': {'name': 'analyze_content', 'arguments': json.dumps(arguments)},
+                }],
+            },
+        }],
+    }
+
+
+class FakeOpenAIBatchServer:
+    """
+    Fake batch server.
+
+    - polls_until_done: polls answered as validating/in_progress before the batch finishes
+    - fail_ids: custom_ids answered with a 500 in the error file
+    - expire_after: process only this many requests, then report the batch expired
+    - respond(custom_id, body): tool-call arguments for a successful request
+    """
+
+    def __init__(
+        self,
+        polls_until_done: int = 2,
+        fail_ids: Iterable[str] = (),
+        expire_after: Optional[int] = None,
+        respond: Optional[Callable[[str, Dict[str, Any]], Dict[str, Any]]] = None
+    ):
+        self.polls_until_done = polls_until_done
+        self.fail_ids = set(fail_ids)
+        self.expire_after = expire_after
+        self.respond = respond or (lambda custom_id, body: {'summary': f"analysis of {custom_id}"})
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.calls: List[str] = []
+        self._ids = itertools.count(1)
+        self.app = self._build_app()
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/files")
+        async def upload(purpose: str = Form(...), file: UploadFile = File(...)):
+            self.calls.append('upload')
+            data = await file.read()
+            file_id = self._store_file(data)
+            return {'id': file_id, 'object': 'file', 'purpose': purpose, 'bytes': len(data), 'filename': file.filename}
+
+        @app.post("/v1/batches")
+        async def create(request: Request):
+            self.calls.append('create')
+            payload = await request.json()
+            if payload.get('input_file_id') not in self.files:
+                raise HTTPException(status_code=400, detail="unknown input_file_id")
+            batch_id = f"batch_{next(self._ids)}"
+            lines = [json.loads(line) for line in self.files[payload['input_file_id']].splitlines() if line.strip()]
+            self.batches[batch_id] = {
+                'id': batch_id,
+                'object': 'batch',
+                'endpoint': payload['endpoint'],
+                'input_file_id': payload['input_file_id'],
+                'completion_window': payload['completion_window'],
+                'metadata': payload.get('metadata') or {},
+                'status': 'validating',
+                'output_file_id': None,
+                'error_file_id': None,
+                'request_counts': {'total': len(lines), 'completed': 0, 'failed': 0},
+                '_requests': lines,
+                '_polls': 0,
+            }
+            return self._public(self.batches[batch_id])
+
+        @app.get("/v1/batches/{batch_id}")
+        async def poll(batch_id: str):
+            self.calls.append('poll')
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                raise HTTPException(status_code=404, detail="unknown batch")
+            if batch['status'] in ('validating', 'in_progress'):
+                batch['_polls'] += 1
+                if batch['_polls'] > self.polls_until_done:
+                    self._finish(batch)
+                else:
+                    batch['status'] = 'in_progress'
+            return self._public(batch)
+
+        @app.get("/v1/files/{file_id}/content")
+        async def content(file_id: str):
+            self.calls.append('download')
+            if file_id not in self.files:
+                raise HTTPException(status_code=404, detail="unknown file")
+            return Response(self.files[file_id], media_type='application/jsonl')
+
+        return app
+
+    def _finish(self, batch: Dict[str, Any]) -> None:
+        requests = batch['_requests']
+        processed = requests if self.expire_after is None else requests[:self.expire_after]
+        outputs, errors = [], []
+        for request in processed:
+            custom_id = request['custom_id']
+            if custom_id in self.fail_ids:
+                errors.append({
+                    'id': f"resp-{custom_id}",
+                    'custom_id': custom_id,
+                    'response': {'status_code': 500, 'body': {'error': {'message': 'server error'}}},
+                    'error': None,
+                })
+            else:
+                outputs.append({
+                    'id': f"resp-{custom_id}",
+                    'custom_id': custom_id,
+                    'response': {
+                        'status_code': 200,
+                        'request_id': f"req-{custom_id}",
+                        'body': tool_call_completion(custom_id, self.respond(custom_id, request['body'])),
+                    },
+                    'error': None,
+                })
+        if outputs:
+            batch['output_file_id'] = self._store_file(self._jsonl(outputs))
+        if errors:
+            batch['error_file_id'] = self._store_file(self._jsonl(errors))
+        batch['request_counts'].update(completed=len(outputs), failed=len(errors))
+        batch['status'] = 'expired' if len(processed) < len(requests) else 'completed'
+
+    def _store_file(self, data: bytes) -> str:
+        file_id = f"file-{next(self._ids)}"
+        self.files[file_id] = data
+        return file_id
+
+    @staticmethod
+    def _jsonl(records: List[Dict[str, Any]]) -> bytes:
+        return b''.join(json.dumps(record).encode('utf-8') + b'\n' for record in records)
+
+    @staticmethod
+    def _public(batch: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in batch.items() if not key.startswith('_')}
+
+
+app = FakeOpenAIBatchServer().app
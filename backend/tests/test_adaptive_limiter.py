@@ -0,0 +1,260 @@
+"""
+Unit tests for the AIMD adaptive concurrency limiter and its header parsing.
+"""
+
+import asyncio
+import random
+import time
+from email.utils import formatdate
+
+import httpx
+import pytest
+
+from app.core import adaptive_limiter
+from app.core.adaptive_limiter import (
+    AdaptiveLimiter,
+    AdaptiveLimiterRegistry,
+    LimiterConfig,
+    _parse_duration,
+    _remaining_requests,
+    _reset_seconds,
+    _retry_after_seconds,
+)
+
+
+def _limiter(initial=10, **config):
+    return AdaptiveLimiter('test', LimiterConfig(initial=initial, **config))
+
+
+async def _hold(limiter, permits):
+    for _ in range(permits):
+        await limiter.acquire()
+
+
+class TestAIMD:
+    """Test additive increase and multiplicative decrease."""
+
+    @pytest.mark.asyncio
+    async def test_fast_successes_at_the_limit_grow_it_by_one(self):
+        limiter = _limiter(initial=4)
+        await _hold(limiter, 3)
+        for _ in range(5):
+            limiter.on_response(200, 0.1, {})
+        assert limiter.limit == 5
+
+    def test_idle_limiter_does_not_grow(self):
+        limiter = _limiter(initial=4)
+        for _ in range(50):
+            limiter.on_response(200, 0.1, {})
+        assert limiter.limit == 4
+
+    def test_throttling_decreases_once_per_window(self):
+        limiter = _limiter(initial=10)
+        limiter.on_response(429, 0.1, {})
+        limiter.on_response(429, 0.1, {})
+        assert limiter.limit == 7
+        assert limiter.snapshot()['throttled'] == 2
+        assert limiter.snapshot()['decreases'] == 1
+
+    def test_server_errors_and_timeouts_back_off_gently(self):
+        limiter = _limiter(initial=10)
+        limiter.on_response(502, 0.1, {})
+        assert limiter.limit == 9
+        limiter._last_decrease = 0.0
+        limiter.record_timeout()
+        assert limiter.limit == 8
+
+    def test_sustained_latency_growth_decreases(self):
+        limiter = _limiter(initial=20)
+        for _ in range(20):
+            limiter.on_response(200, 0.6, {})
+        for _ in range(20):
+            limiter.on_response(200, 3.0, {})
+        assert limiter.limit == 19
+        assert limiter.snapshot()['decreases'] == 1
+
+    def test_latency_is_ignored_where_it_follows_the_work_size(self):
+        limiter = AdaptiveLimiter('openai', AdaptiveLimiterRegistry._config('openai'))
+        for _ in range(20):
+            limiter.on_response(200, 0.6, {})
+        for _ in range(20):
+            limiter.on_response(200, 30.0, {})
+        assert limiter.limit == 50
+
+    def test_limit_stays_within_bounds(self):
+        limiter = _limiter(initial=2, min_limit=2)
+        for _ in range(5):
+            limiter._last_decrease = 0.0
+            limiter.on_response(429, 0.1, {})
+        assert limiter.limit == 2
+
+    def test_non_adaptive_limiter_keeps_its_limit(self):
+        limiter = AdaptiveLimiter('fixed', LimiterConfig(initial=10), adaptive=False)
+        limiter.on_response(429, 0.1, {})
+        assert limiter.limit == 10
+
+
+class TestLatencyVariance:
+    """Test that a wide but stable latency spread never throttles a healthy provider."""
+
+    @pytest.mark.parametrize('config', [
+        AdaptiveLimiterRegistry._config('openai'),
+        AdaptiveLimiterRegistry._config('scrapingbee'),
+        LimiterConfig(initial=15, max_limit=40),
+    ])
+    @pytest.mark.parametrize('sigma', [0.6, 0.9])
+    def test_high_variance_successes_do_not_lower_the_limit(self, monkeypatch, config, sigma):
+        clock = [1000.0]
+        monkeypatch.setattr(adaptive_limiter.time, 'monotonic', lambda: clock[0])
+        limiter = AdaptiveLimiter('test', config)
+        start = limiter.limit
+        rng = random.Random(42)
+
+        # ~85 minutes of saturated traffic, lognormal latency with a 6s median, all 200s
+        while clock[0] < 1000.0 + 85 * 60:
+            limiter._inflight = limiter.limit - 1
+            limiter.on_response(200, 6.0 * rng.lognormvariate(0, sigma), {})
+            assert limiter.limit >= start
+            clock[0] += 6.0 / limiter.limit
+        assert limiter.limit == config.max_limit
+        assert limiter.snapshot()['decreases'] == 0
+
+
+class TestHeaders:
+    """Test Retry-After and rate-limit header parsing."""
+
+    def test_durations(self):
+        assert _parse_duration('20') == 20.0
+        assert _parse_duration('1.5') == 1.5
+        assert _parse_duration('6m0s') == 360.0
+        assert _parse_duration('250ms') == 0.25
+        assert _parse_duration('1h2m') == 3720.0
+        assert _parse_duration('soon') is None
+
+    def test_retry_after(self):
+        assert _retry_after_seconds({}) is None
+        assert _retry_after_seconds({'retry-after': '3'}) == 3.0
+        assert _retry_after_seconds({'retry-after-ms': '1500', 'retry-after': '9'}) == 1.5
+        http_date = formatdate(time.time() + 30, usegmt=True)
+        assert 25 <= _retry_after_seconds({'retry-after': http_date}) <= 31
+        assert _retry_after_seconds({'retry-after': 'garbage'}) is None
+
+    def test_reset_and_remaining(self):
+        assert _reset_seconds({'x-ratelimit-reset-requests': '6m0s'}) == 360.0
+        assert 9 <= _reset_seconds({'x-ratelimit-reset': str(int(time.time()) + 10)}) <= 11
+        assert _remaining_requests({'x-ratelimit-remaining-requests': '0'}) == 0
+        assert _remaining_requests({'ratelimit-remaining': '12'}) == 12
+        assert _remaining_requests({}) is None
+
+
+class TestPause:
+    """Test that rate-limit resets hold new permits back."""
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_new_permits(self):
+        limiter = _limiter(initial=10)
+        limiter.on_response(429, 0.1, {'retry-after-ms': '100'})
+        started = time.monotonic()
+        await asyncio.wait_for(limiter.acquire(), timeout=2.0)
+        assert time.monotonic() - started >= 0.08
+
+    @pytest.mark.asyncio
+    async def test_exhausted_remaining_pauses_until_reset(self):
+        limiter = _limiter(initial=10)
+        limiter.on_response(200, 0.1, {'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '0.1'})
+        assert limiter.snapshot()['paused_for_s'] > 0
+        assert limiter.limit == 10
+        await asyncio.wait_for(limiter.acquire(), timeout=2.0)
+
+    @pytest.mark.asyncio
+    async def test_pause_is_capped(self):
+        limiter = _limiter(initial=10, max_pause=0.5)
+        limiter.on_response(429, 0.1, {'retry-after': '3600'})
+        assert limiter.snapshot()['paused_for_s'] <= 0.5
+
+
+class TestPermits:
+    """Test FIFO permits and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_waiters_are_admitted_in_order_on_release(self):
+        limiter = _limiter(initial=1)
+        await limiter.acquire()
+        order = []
+
+        async def wait(name):
+            await limiter.acquire()
+            order.append(name)
+
+        waiters = [asyncio.create_task(wait(n)) for n in ('first', 'second')]
+        await asyncio.sleep(0)
+        assert limiter.queued == 2
+        limiter.release()
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.gather(*waiters)
+        assert order == ['first', 'second']
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_the_queue(self):
+        limiter = _limiter(initial=1)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.queued == 0
+        assert limiter.inflight == 1
+
+
+class TestTimeouts:
+    """Test that timeouts reach the limiter from the shared HTTP clients."""
+
+    @pytest.mark.asyncio
+    async def test_swallowed_request_timeout_still_backs_off(self, monkeypatch):
+        from app.core.http_clients import HTTPClientRegistry, ProviderHTTPConfig
+
+        registry = AdaptiveLimiterRegistry()
+        monkeypatch.setattr('app.core.http_clients.adaptive_limits', registry)
+        limiter = registry.get('openai')
+
+        def timeout(request):
+            raise httpx.ReadTimeout('timed out', request=request)
+
+        clients = HTTPClientRegistry({'openai': ProviderHTTPConfig(10, 5, timeout=1.0)})
+        client = clients.get('openai')
+        client._transport._transport = httpx.MockTransport(timeout)
+
+        async with limiter:
+            try:
+                await client.get('https://api.example/v1/chat')
+            except Exception:
+                pass  # Callers log and move on; the limiter must still see the timeout
+
+        assert limiter.snapshot()['timeouts'] == 1
+        assert limiter.limit == 45
+        assert clients.metrics()['openai']['timeouts'] == 1
+        await client.aclose()
+
+    @pytest.mark.asyncio
+    async def test_body_read_timeout_is_reported(self, monkeypatch):
+        from app.core.http_clients import HTTPClientRegistry, ProviderHTTPConfig
+
+        registry = AdaptiveLimiterRegistry()
+        monkeypatch.setattr('app.core.http_clients.adaptive_limits', registry)
+        limiter = registry.get('openai')
+
+        class StalledBody(httpx.AsyncByteStream):
+            async def __aiter__(self):
+                yield b'{"partial": '
+                raise httpx.ReadTimeout('timed out')
+
+        clients = HTTPClientRegistry({'openai': ProviderHTTPConfig(10, 5, timeout=1.0)})
+        client = clients.get('openai')
+        client._transport._transport = httpx.MockTransport(lambda request: httpx.Response(200, stream=StalledBody()))
+
+        with pytest.raises(httpx.ReadTimeout):
+            await client.get('https://api.example/v1/chat')
+        assert limiter.snapshot()['timeouts'] == 1
+        await client.aclose()
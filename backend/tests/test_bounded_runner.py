@@ -0,0 +1,110 @@
+"""
+Unit tests for the bounded producer/consumer runner.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core import bounded_runner
+from app.core.bounded_runner import RunStats, run_bounded
+
+
+class TestRunBounded:
+    """Test counting, concurrency and queue bounds, error sampling and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_counts_successes_empties_and_failures(self):
+        async def worker(item):
+            if item % 5 == 0:
+                raise ValueError(f"bad {item}")
+            return item if item % 2 else None
+
+        stats = await run_bounded(range(1, 11), worker, concurrency=3)
+        assert (stats.processed, stats.succeeded, stats.empty, stats.failed) == (10, 4, 4, 2)
+        assert sorted(stats.errors) == ['10: bad 10', '5: bad 5']
+        assert stats.summary()['errors_total'] == 2
+
+    @pytest.mark.asyncio
+    async def test_inflight_never_exceeds_concurrency(self):
+        async def worker(item):
+            await asyncio.sleep(0.001)
+            return True
+
+        stats = await run_bounded(range(50), worker, concurrency=4)
+        assert stats.max_inflight == 4
+        assert stats.succeeded == 50
+
+    @pytest.mark.asyncio
+    async def test_producer_stays_within_the_queue_bound(self):
+        produced = []
+        release = asyncio.Event()
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        async def worker(item):
+            await release.wait()
+            return True
+
+        run = asyncio.create_task(run_bounded(source(), worker, concurrency=2, queue_size=3))
+        await asyncio.sleep(0.05)
+        # Two items in the workers, three queued, one pulled and waiting to be queued
+        assert len(produced) <= 2 + 3 + 1
+        release.set()
+        stats = await run
+        assert stats.processed == 100
+
+    @pytest.mark.asyncio
+    async def test_error_sample_is_capped(self, monkeypatch):
+        monkeypatch.setattr(bounded_runner, 'MAX_ERROR_SAMPLE', 5)
+
+        async def worker(item):
+            raise RuntimeError('boom')
+
+        stats = await run_bounded(range(20), worker, concurrency=4)
+        assert stats.failed == 20
+        assert stats.errors_total == 20
+        assert len(stats.errors) == 5
+
+    @pytest.mark.asyncio
+    async def test_async_source_and_results_streamed_to_on_result(self):
+        async def source():
+            for i in range(5):
+                yield i
+
+        async def worker(item):
+            return item * 10
+
+        seen = {}
+
+        async def on_result(item, result):
+            seen[item] = result
+
+        stats = RunStats()
+        returned = await run_bounded(source(), worker, concurrency=2, on_result=on_result, stats=stats)
+        assert returned is stats
+        assert seen == {0: 0, 1: 10, 2: 20, 3: 30, 4: 40}
+
+    @pytest.mark.asyncio
+    async def test_cancelling_the_caller_cancels_every_worker(self):
+        started = []
+        cancelled = []
+
+        async def worker(item):
+            started.append(item)
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+
+        run = asyncio.create_task(run_bounded(range(100), worker, concurrency=3))
+        await asyncio.sleep(0.02)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        assert len(started) == 3
+        assert sorted(cancelled) == sorted(started)
@@ -0,0 +1,55 @@
+"""
+Unit tests for analysis claim leases of the concurrent content analyzer (no database).
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.analysis import concurrent_content_analyzer as module
+from app.services.analysis.concurrent_content_analyzer import ConcurrentContentAnalyzer
+
+
+class FakeDB:
+    """Records executed statements"""
+
+    def __init__(self):
+        self.executed = []
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def execute(self, sql, *args):
+        self.executed.append((sql, args))
+
+
+class TestClaimRenewal:
+    """Test that a slow batch keeps its pending claims leased."""
+
+    @pytest.mark.asyncio
+    async def test_pending_pages_are_renewed_until_the_batch_finishes(self, monkeypatch):
+        monkeypatch.setattr(module, 'ANALYSIS_LEASE_RENEW_SECONDS', 0.01)
+        db = FakeDB()
+        analyzer = ConcurrentContentAnalyzer.__new__(ConcurrentContentAnalyzer)
+        analyzer.db = db
+        analyzer._limiter = asyncio.Semaphore(2)
+        analyzer._processed_count = 0
+
+        async def analyze(content_data):
+            await asyncio.sleep(0.01 if content_data['url'] == 'https://fast.example' else 0.08)
+            return {'url': content_data['url']}
+
+        analyzer._analyze_single_content = analyze
+        await analyzer._process_batch([{'url': 'https://fast.example'}, {'url': 'https://slow.example'}])
+
+        renewals = [args for sql, args in db.executed if 'analysis_lease_until = NOW()' in sql]
+        assert renewals
+        assert all(args[1] == module.ANALYSIS_LEASE_SECONDS for args in renewals)
+        assert renewals[-1][0] == ['https://slow.example']
+
+        # The release runs once after the renewer has stopped
+        sql, args = db.executed[-1]
+        assert "THEN 'done'" in sql
+        assert sorted(args[1]) == ['https://fast.example', 'https://slow.example']
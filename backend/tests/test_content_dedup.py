@@ -0,0 +1,81 @@
+"""
+Unit tests for content fingerprints (SHA-256 + SimHash) used by analysis dedup.
+"""
+
+import random
+
+from app.services.analysis.content_dedup import (
+    SIMHASH_BAND_BITS,
+    SIMHASH_BANDS,
+    fingerprint_content,
+    hamming_distance,
+    normalize_content,
+    simhash64,
+    simhash_bands,
+)
+
+
+def _article(seed: int, words: int = 400) -> str:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(300)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+
+class TestNormalize:
+    """Test content normalization before hashing."""
+
+    def test_case_punctuation_urls_and_whitespace(self):
+        text = "Hello,  World!\nRead more at https://example.com/page?x=1 today."
+        assert normalize_content(text) == 'hello world read more at today'
+
+    def test_formatting_only_changes_share_the_exact_hash(self):
+        a = fingerprint_content("Cloud Security, explained.\n\nwww.example.com")
+        b = fingerprint_content("cloud   security explained")
+        assert a.content_hash == b.content_hash
+        assert a.token_count == 3
+
+
+class TestSimhash:
+    """Test SimHash values and Hamming distance."""
+
+    def test_fits_a_signed_bigint(self):
+        for seed in range(20):
+            value = simhash64(_article(seed).split())
+            assert -(1 << 63) <= value < (1 << 63)
+
+    def test_empty_and_short_inputs(self):
+        assert simhash64([]) == 0
+        assert simhash64(['one', 'two']) == simhash64(['one', 'two'])
+
+    def test_near_duplicate_is_close_and_unrelated_text_is_far(self):
+        original = _article(1)
+        edited = original.replace('term7 ', 'term8 ', 1) + ' updated'
+        base = fingerprint_content(original)
+        assert hamming_distance(base.simhash, fingerprint_content(edited).simhash) <= 3
+        assert hamming_distance(base.simhash, fingerprint_content(_article(2)).simhash) > 10
+
+    def test_hamming_distance_handles_signed_values(self):
+        assert hamming_distance(-1, 0) == 64
+        assert hamming_distance(-1, -2) == 1
+        assert hamming_distance(5, 5) == 0
+
+
+class TestBands:
+    """Test the band index used to find near-duplicate candidates."""
+
+    def test_bands_are_tagged_by_index(self):
+        bands = simhash_bands(0)
+        assert len(bands) == SIMHASH_BANDS
+        assert bands == [band << SIMHASH_BAND_BITS for band in range(SIMHASH_BANDS)]
+        assert len(set(simhash_bands(-1))) == SIMHASH_BANDS
+
+    def test_hashes_within_distance_three_share_a_band(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            value = rng.getrandbits(64)
+            flipped = value
+            for bit in rng.sample(range(64), 3):
+                flipped ^= 1 << bit
+            signed = [v - (1 << 64) if v >= (1 << 63) else v for v in (value, flipped)]
+            assert hamming_distance(*signed) == 3
+            assert set(simhash_bands(signed[0])) & set(simhash_bands(signed[1]))
@@ -0,0 +1,140 @@
+"""
+Unit tests for token-budgeted content windowing.
+"""
+
+from app.services.analysis.content_window import ContentWindower, strip_boilerplate
+
+
+class _CharCounter:
+    """Deterministic stand-in for tiktoken (~4 characters per token)"""
+
+    def count(self, text: str) -> int:
+        return (len(text) + 3) // 4 if text else 0
+
+
+PAGE = """Home
+Products
+Solutions
+Pricing
+About Us
+Contact
+Acme Analytics helps revenue teams forecast pipeline with live CRM data.
+
+Pricing
+Starter
+$49 per user per month
+Up to 10 dashboards
+Growth
+$99 per user per month
+Unlimited dashboards
+
+Key features
+Forecasting
+Data sync
+Role-based access
+Audit logs
+Learn more
+Our forecasting model is retrained nightly on your own closed-won history.
+Learn more
+We use cookies to improve your experience. Accept all
+Privacy Policy
+Terms of Service
+Careers
+Blog
+Partners
+Press
+© 2024 Acme Inc. All rights reserved."""
+
+
+class TestStripBoilerplate:
+    """Test that page chrome goes and body content stays."""
+
+    def test_body_headings_lists_and_pricing_rows_are_kept(self):
+        cleaned, _ = strip_boilerplate(PAGE)
+        lines = cleaned.splitlines()
+        for expected in (
+            'Acme Analytics helps revenue teams forecast pipeline with live CRM data.',
+            'Pricing', 'Starter', '$49 per user per month', 'Up to 10 dashboards',
+            'Growth', '$99 per user per month', 'Unlimited dashboards',
+            'Key features', 'Forecasting', 'Data sync', 'Role-based access', 'Audit logs',
+            'Our forecasting model is retrained nightly on your own closed-won history.',
+        ):
+            assert expected in lines
+
+    def test_header_navigation_and_footer_are_removed(self):
+        cleaned, removed = strip_boilerplate(PAGE)
+        lines = cleaned.splitlines()
+        for dropped in ('Home', 'Products', 'Solutions', 'About Us', 'Contact', 'Careers', 'Press',
+                        'Privacy Policy', 'Terms of Service', '© 2024 Acme Inc. All rights reserved.'):
+            assert dropped not in lines
+        assert lines[0].startswith('Acme Analytics')
+        assert removed >= 12
+
+    def test_repeated_link_label_keeps_first_occurrence(self):
+        cleaned, _ = strip_boilerplate(PAGE)
+        assert cleaned.splitlines().count('Learn more') == 1
+
+    def test_words_containing_chrome_terms_are_kept(self):
+        text = (
+            "Design innovation for modern banks\n"
+            "Our platform connects core banking, payments and lending in one place.\n"
+            "Catalog integration\n"
+            "Sync your product catalog integration settings with every sales channel overnight.\n"
+            "Cookiecutter templates ship with every project.\n"
+            "Sign in\n"
+            "Contact our team to plan your rollout."
+        )
+        cleaned, removed = strip_boilerplate(text)
+        lines = cleaned.splitlines()
+        for expected in (
+            'Design innovation for modern banks',
+            'Catalog integration',
+            'Sync your product catalog integration settings with every sales channel overnight.',
+            'Cookiecutter templates ship with every project.',
+        ):
+            assert expected in lines
+        assert 'Sign in' not in lines
+        assert removed == 1
+
+    def test_chrome_wording_inside_the_body_is_kept(self):
+        text = (
+            "Acme helps hospitals share records securely.\n"
+            "Patients give consent before any record is shared.\n"
+            "Records are encrypted at rest and in transit."
+        )
+        assert strip_boilerplate(text) == (text, 0)
+
+    def test_plain_prose_is_untouched(self):
+        text = "First paragraph about cloud security.\n\nSecond paragraph about compliance."
+        assert strip_boilerplate(text) == (text, 0)
+
+
+class TestContentWindower:
+    """Test budget handling and dimension-aware passage selection."""
+
+    def _windower(self, budget: int) -> ContentWindower:
+        windower = ContentWindower(counter=_CharCounter())
+        windower.budget = budget
+        return windower
+
+    def test_page_within_budget_is_sent_whole(self):
+        window = self._windower(10000).window(PAGE)
+        assert window.truncated is False
+        assert '$49 per user per month' in window.text
+
+    def test_over_budget_keeps_lead_and_relevant_passages_in_order(self):
+        filler = [f"Paragraph {i} talks about office furniture and catering options." for i in range(100)]
+        relevant = "Our platform encrypts customer data and is certified for SOC 2 security compliance."
+        content = '\n\n'.join(["Intro to the company."] + filler[:60] + [relevant] + filler[60:])
+        window = self._windower(600).window(content, {'security': ['security', 'encrypts', 'soc']})
+
+        assert window.truncated is True
+        assert window.tokens_sent <= 600
+        assert window.text.startswith('Intro to the company.')
+        assert relevant in window.text
+        assert window.text.index('Intro') < window.text.index(relevant)
+
+    def test_all_boilerplate_page_falls_back_to_original(self):
+        content = "Home\nAbout\nBlog\nContact\nCareers"
+        window = self._windower(1000).window(content)
+        assert window.text == content
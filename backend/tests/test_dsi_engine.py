@@ -0,0 +1,111 @@
+"""
+Unit tests for the columnar DSI engine: CTR curve and the scoring frames.
+"""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.metrics import dsi_engine
+
+
+def _serp(rows):
+    frame = pd.DataFrame(rows, columns=['keyword_id', 'serp_type', 'position', 'url', 'domain', 'search_volume'])
+    return dsi_engine.prepare_frame(frame)
+
+
+SERP = [
+    ('k1', 'organic', 1, 'https://a.com/1', 'a.com', 1000),
+    ('k1', 'organic', 2, 'https://b.com/1', 'b.com', 1000),
+    ('k2', 'organic', 1, 'https://b.com/2', 'b.com', 100),
+    ('k2', 'organic', 3, 'https://a.com/1', 'a.com', 100),
+    ('k3', 'organic', 5, 'https://b.com/1', 'b.com', None),
+]
+
+
+class TestCtrCurve:
+    """Test the CTR lookup and its SQL rendering."""
+
+    def test_positions_bands_and_tail(self):
+        ctr = dsi_engine.ctr_for_positions([1, 10, 11, 20, 21, 30, 31, 250, np.nan])
+        assert ctr.tolist() == [0.2823, 0.0214, 0.0150, 0.0150, 0.0080, 0.0080, 0.0050, 0.0050, 0.0050]
+
+    def test_sql_case_matches_the_python_curve(self):
+        conn = sqlite3.connect(':memory:')
+        sql = f"SELECT {dsi_engine.ctr_case_sql('position')} FROM (SELECT ? AS position)"
+        for position in range(1, 41):
+            (value,) = conn.execute(sql, (position,)).fetchone()
+            assert value == pytest.approx(dsi_engine.ctr_for_positions([position])[0])
+
+    def test_prepare_frame_traffic_and_flags(self):
+        frame = _serp(SERP)
+        assert frame['estimated_traffic'].tolist() == pytest.approx([282.3, 157.2, 28.23, 10.73, 58.8])
+        assert frame['is_top_3'].tolist() == [True, True, True, True, False]
+
+
+class TestScoringFrames:
+    """Test entity metrics, DSI formulas and ranking."""
+
+    def test_organic_scores_coverage_share_and_relevance(self):
+        metrics = dsi_engine.entity_metrics(_serp(SERP), 'domain')
+        scored = dsi_engine.score(metrics, 'organic', pd.Series({'a.com': 8.0}), 'domain')
+        rows = {row['domain']: row for row in dsi_engine.to_records(scored)}
+
+        market_traffic = 282.3 + 157.2 + 28.23 + 10.73 + 58.8
+        b_share = (157.2 + 28.23 + 58.8) / market_traffic * 100
+        assert rows['b.com']['keyword_count'] == 3
+        assert rows['b.com']['keyword_coverage_pct'] == pytest.approx(100.0)
+        assert rows['b.com']['traffic_share_pct'] == pytest.approx(b_share)
+        # b.com has no persona score and falls back to the default relevance
+        assert rows['b.com']['relevance'] == dsi_engine.DEFAULT_RELEVANCE
+        assert rows['b.com']['dsi_score'] == round(100.0 * b_share * 0.5, 2)
+        assert rows['a.com']['keyword_coverage_pct'] == pytest.approx(200 / 3)
+        # a.com: lower coverage but a larger traffic share and higher relevance
+        assert [r['domain'] for r in dsi_engine.to_records(scored)] == ['a.com', 'b.com']
+        assert rows['a.com']['rank'] == 1 and rows['b.com']['total_entities'] == 2
+
+    def test_page_and_appearance_formulas(self):
+        metrics = dsi_engine.entity_metrics(_serp(SERP), 'url')
+        page = dsi_engine.score(metrics.copy(), 'page')
+        top = page.iloc[0]
+        assert top['dsi_score'] == round(top['traffic_share_pct'] * 0.5, 2)
+
+        appearance = dsi_engine.score(metrics.copy(), 'appearance')
+        row = appearance[appearance['url'] == 'https://b.com/1'].iloc[0]
+        assert row['appearance_share_pct'] == pytest.approx(40.0)
+        assert row['dsi_score'] == round(40.0 * row['keyword_coverage_pct'] * 0.5, 2)
+
+        with pytest.raises(ValueError):
+            dsi_engine.score(metrics.copy(), 'unknown')
+
+    def test_scoped_metrics_rank_within_each_landscape(self):
+        memberships = pd.DataFrame(
+            [('L1', 'k1'), ('L1', 'k2'), ('L2', 'k2'), ('L2', 'k3')], columns=['landscape_id', 'keyword_id']
+        )
+        frame = dsi_engine.explode_scopes(_serp(SERP), memberships)
+        metrics = dsi_engine.entity_metrics(
+            frame, 'domain', scope=['landscape_id'], total_keywords=pd.Series({'L1': 4})
+        )
+        scored = dsi_engine.score(metrics, 'organic', scope=['landscape_id'])
+        rows = {(r['landscape_id'], r['domain']): r for r in dsi_engine.to_records(scored)}
+
+        # L1 coverage uses the 4 assigned keywords; L2 falls back to the keywords seen in its SERPs
+        assert rows[('L1', 'a.com')]['keyword_coverage_pct'] == pytest.approx(50.0)
+        assert rows[('L2', 'b.com')]['keyword_coverage_pct'] == pytest.approx(100.0)
+        assert rows[('L2', 'a.com')]['keyword_coverage_pct'] == pytest.approx(50.0)
+        assert {r['rank'] for key, r in rows.items() if key[0] == 'L2'} == {1, 2}
+        assert all(r['total_entities'] == 2 for r in rows.values())
+
+    def test_rank_breaks_ties_by_keyword_count(self):
+        metrics = pd.DataFrame({'entity': ['x', 'y'], 'dsi_score': [1.0, 1.0], 'keyword_count': [2, 5]})
+        assert dsi_engine.rank(metrics)['entity'].tolist() == ['y', 'x']
+
+    def test_funnel_values_and_records(self):
+        sentiment = pd.Series(['positive', 'neutral', 'negative', 'mixed', None])
+        assert dsi_engine.funnel_values(sentiment).tolist() == [1.0, 0.7, 0.3, 0.6, 0.4]
+
+        records = dsi_engine.to_records(pd.DataFrame({'n': [np.int64(3)], 'x': [np.nan]}))
+        assert records == [{'n': 3, 'x': None}]
+        assert type(records[0]['n']) is int
@@ -0,0 +1,142 @@
+"""
+Unit tests for per-host scrape scheduling and the domain circuit breaker.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from app.services.scraping import host_scheduler as module
+from app.services.scraping.host_scheduler import DomainCircuitBreaker, HostScheduler, host_key
+
+
+class Recorder:
+    """Handler that records start order and peak concurrency per host"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.started = []
+        self.inflight = {}
+        self.peak = {}
+
+    async def __call__(self, url):
+        host = host_key(url)
+        self.started.append(url)
+        self.inflight[host] = self.inflight.get(host, 0) + 1
+        self.peak[host] = max(self.peak.get(host, 0), self.inflight[host])
+        await asyncio.sleep(self.delay)
+        self.inflight[host] -= 1
+
+
+class FakeBreaker:
+    """Circuit open for `hosts` until a fixed epoch"""
+
+    def __init__(self, hosts, seconds):
+        self.hosts = set(hosts)
+        self.until = time.time() + seconds
+
+    async def open_until(self, domain):
+        return self.until if domain in self.hosts and self.until > time.time() else 0.0
+
+
+class FailingRedis:
+    """Redis stand-in whose every call fails like an unreachable server"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        raise ConnectionError("connect timeout")
+
+    async def set(self, *args, **kwargs):
+        self.calls += 1
+        raise ConnectionError("connect timeout")
+
+    async def delete(self, *keys):
+        self.calls += 1
+        raise ConnectionError("connect timeout")
+
+
+class TestHostScheduler:
+    """Test round-robin dispatch, per-host caps, token buckets and breaker parking."""
+
+    @pytest.mark.asyncio
+    async def test_hosts_are_served_round_robin(self):
+        urls = ['https://a.example/1', 'https://a.example/2', 'https://a.example/3',
+                'https://b.example/1', 'https://b.example/2', 'https://www.c.example/1']
+        handler = Recorder()
+        await HostScheduler(per_host=4, rate=1000, burst=10).run(urls, handler, concurrency=1)
+        assert handler.started == [
+            'https://a.example/1', 'https://b.example/1', 'https://www.c.example/1',
+            'https://a.example/2', 'https://b.example/2', 'https://a.example/3',
+        ]
+
+    @pytest.mark.asyncio
+    async def test_per_host_concurrency_cap(self):
+        urls = [f"https://a.example/{i}" for i in range(6)] + ['https://b.example/1']
+        handler = Recorder(delay=0.02)
+        await HostScheduler(per_host=2, rate=1000, burst=10).run(urls, handler, concurrency=10)
+        assert handler.peak == {'a.example': 2, 'b.example': 1}
+        assert len(handler.started) == 7
+
+    @pytest.mark.asyncio
+    async def test_token_bucket_paces_a_host_after_its_burst(self):
+        urls = [f"https://a.example/{i}" for i in range(5)]
+        started = time.monotonic()
+        stats = await HostScheduler(per_host=5, rate=20, burst=2).run(urls, Recorder(), concurrency=5)
+        # 2 from the burst, then 3 more at 20/s
+        assert time.monotonic() - started >= 0.14
+        assert stats['urls'] == 5
+        assert stats['busiest_hosts'] == {'a.example': 5}
+
+    @pytest.mark.asyncio
+    async def test_open_circuit_parks_host_behind_healthy_ones(self):
+        urls = ['https://bad.example/1'] + [f"https://good.example/{i}" for i in range(3)]
+        handler = Recorder(delay=0.02)
+        scheduler = HostScheduler(FakeBreaker({'bad.example'}, 5.0), per_host=1, rate=1000, burst=10)
+        stats = await scheduler.run(urls, handler, concurrency=4)
+
+        # Parked while healthy work is in flight, released once nothing else is left
+        assert handler.started[-1] == 'https://bad.example/1'
+        assert stats['hosts_tripped'] == 1
+
+
+class TestDomainCircuitBreaker:
+    """Test breaker thresholds and the Redis fallback."""
+
+    @pytest.mark.asyncio
+    async def test_opens_at_threshold_and_success_closes(self):
+        breaker = DomainCircuitBreaker(threshold=3)
+        assert await breaker.record_failure('https://www.a.example/x') == 0.0
+        assert await breaker.record_failure('a.example') == 0.0
+        until = await breaker.record_failure('a.example')
+        assert until > time.time()
+        assert await breaker.open_until('a.example') == until
+
+        await breaker.record_success('a.example')
+        assert await breaker.open_until('a.example') == 0.0
+
+    @pytest.mark.asyncio
+    async def test_unreachable_redis_is_skipped_during_cool_down(self):
+        redis = FailingRedis()
+        breaker = DomainCircuitBreaker(redis, threshold=1)
+
+        assert await breaker.open_until('a.example') == 0.0
+        assert redis.calls == 1
+
+        # Further calls stay in process memory without touching Redis
+        until = await breaker.record_failure('a.example')
+        assert until > 0
+        await breaker.record_success('b.example')
+        breaker._cache.clear()
+        assert await breaker.open_until('a.example') == until
+        assert redis.calls == 1
+
+        # After the cool-down Redis is tried again
+        breaker._redis_retry_at = time.monotonic() - 1
+        breaker._cache.clear()
+        await breaker.open_until('a.example')
+        assert redis.calls == 2
+        assert breaker._redis_retry_at > time.monotonic() + module.BREAKER_REDIS_RETRY_SECONDS - 5
@@ -0,0 +1,110 @@
+"""
+Unit tests for the HTML extraction pool's failure handling (fake executors, no worker processes).
+"""
+
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from app.services.scraping.html_extractor import HTMLExtractionPool
+
+
+def _result(url):
+    return {'title': url, 'content': '', 'timings': {'total_ms': 1.0, 'html_bytes': 4}}
+
+
+class FakeExecutor:
+    """Hands out futures the test resolves; records shutdown calls"""
+
+    def __init__(self, outcome=None):
+        self.outcome = outcome  # None: leave pending, 'broken', 'cancel' or 'ok'
+        self.futures = []
+        self.shutdowns = []
+
+    def submit(self, fn, html, url, encoding):
+        future = Future()
+        self.futures.append(future)
+        if self.outcome == 'ok':
+            future.set_result(_result(url))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns.append(cancel_futures)
+
+
+def _pool(*executors, timeout=5.0):
+    pool = HTMLExtractionPool(workers=1, queue_depth=4, timeout=timeout)
+    pending = list(executors)
+
+    def get_executor():
+        if pool._executor is None:
+            pool._executor = pending.pop(0)
+        return pool._executor
+
+    pool._get_executor = get_executor
+    return pool
+
+
+class TestRestart:
+    """Test that concurrent failures replace the broken pool exactly once."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_broken_pages_restart_once_and_retry(self):
+        broken, fresh = FakeExecutor(), FakeExecutor(outcome='ok')
+        pool = _pool(broken, fresh)
+
+        pages = [asyncio.create_task(pool.extract(b'<p/>', f"https://x.example/{i}")) for i in range(2)]
+        await asyncio.sleep(0)
+        for future in broken.futures:
+            future.set_exception(BrokenProcessPool('worker died'))
+        results = await asyncio.gather(*pages)
+
+        assert [r['title'] for r in results] == ['https://x.example/0', 'https://x.example/1']
+        assert pool.snapshot()['restarts'] == 1
+        assert broken.shutdowns == [False]
+        assert fresh.shutdowns == []
+        assert pool._executor is fresh
+
+    @pytest.mark.asyncio
+    async def test_pool_cancellation_surfaces_as_a_normal_error(self):
+        pool = _pool(FakeExecutor())
+        page = asyncio.create_task(pool.extract(b'<p/>', 'https://x.example/'))
+        await asyncio.sleep(0)
+        pool._executor.futures[0].cancel()
+
+        with pytest.raises(RuntimeError):
+            await page
+        assert pool.snapshot()['failures'] == 1
+
+    @pytest.mark.asyncio
+    async def test_caller_cancellation_still_propagates(self):
+        pool = _pool(FakeExecutor())
+        page = asyncio.create_task(pool.extract(b'<p/>', 'https://x.example/'))
+        await asyncio.sleep(0)
+        page.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await page
+
+
+class TestTimeout:
+    """Test the per-page extraction timeout."""
+
+    @pytest.mark.asyncio
+    async def test_stuck_page_times_out_and_replaces_the_pool(self):
+        stuck, fresh = FakeExecutor(), FakeExecutor(outcome='ok')
+        pool = _pool(stuck, fresh, timeout=0.05)
+
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.extract(b'<p/>', 'https://slow.example/')
+        snapshot = pool.snapshot()
+        assert snapshot['timeouts'] == 1
+        assert snapshot['failures'] == 1
+        assert snapshot['restarts'] == 1
+        assert stuck.shutdowns == [False]
+
+        result = await pool.extract(b'<p/>', 'https://fast.example/')
+        assert result['title'] == 'https://fast.example/'
+        assert pool._executor is fresh
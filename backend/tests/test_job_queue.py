@@ -0,0 +1,40 @@
+"""
+Unit tests for the job queue worker loop (no database: claims are faked).
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.robustness.job_queue import JobQueue
+
+
+class TestRunWorkerWakeups:
+    """Test that enqueue notifications are not lost."""
+
+    @pytest.mark.asyncio
+    async def test_notify_during_claim_wakes_the_worker(self, monkeypatch):
+        queue = JobQueue("test_queue", db_pool=None, idle_poll_seconds=30.0)
+        claims = []
+
+        async def noop():
+            return None
+
+        async def fake_claim(limit):
+            claims.append(limit)
+            if len(claims) == 1:
+                # A job is enqueued while the (empty) claim query is still running
+                queue._on_notify(None, 0, "job_queue", "test_queue")
+            elif len(claims) == 2:
+                # Second claim proves the wakeup survived; stop like JobQueue.stop() does
+                queue._running = False
+                queue._wake.set()
+            return []
+
+        monkeypatch.setattr(queue, "_claim_jobs", fake_claim)
+        monkeypatch.setattr(queue, "_start_listener", noop)
+        monkeypatch.setattr(queue, "_stop_listener", noop)
+        monkeypatch.setattr(queue, "_reap_loop", noop)
+
+        await asyncio.wait_for(queue.run_worker(concurrency=2), timeout=2.0)
+        assert len(claims) == 2
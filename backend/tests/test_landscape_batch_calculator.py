@@ -0,0 +1,39 @@
+"""
+Unit tests for the landscape batch DSI summary.
+"""
+
+import time
+
+from app.services.landscape.landscape_batch_calculator import LandscapeBatchCalculator
+
+
+LANDSCAPES = [{'id': 'l-1', 'name': 'Cloud'}, {'id': 'l-2', 'name': 'Security'}]
+
+
+def _summary(per_landscape, rows_written):
+    calculator = LandscapeBatchCalculator.__new__(LandscapeBatchCalculator)
+    return calculator._summary(LANDSCAPES, per_landscape, rows_written, time.time())
+
+
+class TestSummary:
+    """Test that batch success is derived from what was actually calculated and written."""
+
+    def test_all_landscapes_written(self):
+        result = _summary({'l-1': {'pages': 3}, 'l-2': {'pages': 1}}, rows_written=12)
+        assert result['success'] is True
+        assert result['errors'] == []
+        assert result['success_rate'] == 1.0
+        assert result['total_pages_calculated'] == 4
+
+    def test_missing_landscape_is_reported(self):
+        result = _summary({'l-1': {'pages': 3}}, rows_written=5)
+        assert result['success'] is True
+        assert result['landscapes_calculated'] == 1
+        assert result['success_rate'] == 0.5
+        assert result['errors'] == ["No DSI calculated for landscape 'Security'"]
+
+    def test_nothing_written_is_a_failure(self):
+        result = _summary({'l-1': {'pages': 3}, 'l-2': {'pages': 1}}, rows_written=0)
+        assert result['success'] is False
+        assert result['success_rate'] == 0
+        assert "no metric rows were written" in result['errors'][-1]
@@ -0,0 +1,181 @@
+"""
+Tests for the OpenAI Batch API analysis path against the in-process fake
+batch server (tests/fake_openai_batch.py).
+"""
+
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict
+
+import httpx
+import pytest
+
+from app.core.http_clients import http_clients
+from app.services.analysis.openai_batch_analyzer import OpenAIBatchAnalyzer
+from app.services.analysis.optimized_unified_analyzer import OptimizedUnifiedAnalyzer, PreparedAnalysis
+from fake_openai_batch import FakeOpenAIBatchServer
+
+
+class FakeBatchDB:
+    """Just enough of the pool for openai_analysis_batches bookkeeping"""
+
+    def __init__(self):
+        self.batches: Dict[str, Dict[str, Any]] = {}
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self
+
+    async def execute(self, sql: str, *args):
+        if 'INSERT INTO openai_analysis_batches' in sql:
+            batch_id, status, project_id, pipeline_id, request_count, input_file_id, request_urls = args
+            self.batches[batch_id] = {
+                'status': status, 'project_id': project_id, 'pipeline_id': pipeline_id,
+                'request_count': request_count, 'input_file_id': input_file_id,
+                'request_urls': request_urls, 'completed_count': 0, 'failed_count': 0,
+            }
+        elif 'SET status' in sql:
+            batch_id, status, output_file_id, error_file_id = args
+            self.batches[batch_id].update(status=status, output_file_id=output_file_id, error_file_id=error_file_id)
+        elif 'SET completed_count' in sql:
+            batch_id, completed, failed = args
+            self.batches[batch_id].update(completed_count=completed, failed_count=failed)
+
+    async def fetchval(self, sql: str, batch_id: str):
+        return self.batches[batch_id]['request_urls']
+
+
+class FakeAnalyzer:
+    """Analyzer stand-in; request building and tool-call parsing are the real ones"""
+
+    openai_base_url = 'http://fake-openai/v1'
+    openai_api_key = 'sk-test'
+    openai_project_id = None
+    analysis_model = 'gpt-test'
+
+    build_chat_request = OptimizedUnifiedAnalyzer.build_chat_request
+    openai_headers = OptimizedUnifiedAnalyzer.openai_headers
+    extract_tool_arguments = OptimizedUnifiedAnalyzer.extract_tool_arguments
+
+    def __init__(self, db):
+        self.db = db
+        self.settings = None
+        self.stored: Dict[str, Dict[str, Any]] = {}
+
+    async def get_analysis_context(self, project_id=None):
+        return SimpleNamespace(response_schema={'type': 'object', 'properties': {'summary': {'type': 'string'}}})
+
+    async def prepare_analysis(self, url, content, title, project_id=None, metadata=None, context=None, pipeline_id=None):
+        if not content:
+            return {'error': 'No content to analyze'}
+        return PreparedAnalysis(
+            url=url, project_id=project_id, prompt=f"Analyze {title}: {content}",
+            context=context, window=SimpleNamespace(text=content)
+        )
+
+    async def finalize_analysis(self, item, ai_response):
+        self.stored[item.url] = ai_response
+        return {'url': item.url, **ai_response}
+
+
+PAGES = [
+    {'url': 'https://a.example/one', 'title': 'One', 'content': 'first page'},
+    {'url': 'https://b.example/two', 'title': 'Two', 'content': 'second page'},
+    {'url': 'https://c.example/three', 'title': 'Three', 'content': 'third page'},
+]
+
+
+@pytest.fixture
+def batch_env(monkeypatch):
+    """Build (server, db, analyzer, batch_analyzer) wired to a fake server"""
+
+    def build(**server_options):
+        server = FakeOpenAIBatchServer(**server_options)
+        # ASGITransport keeps everything in process: no sockets to clean up
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app))
+        monkeypatch.setitem(http_clients._clients, 'openai', client)
+        db = FakeBatchDB()
+        analyzer = FakeAnalyzer(db)
+        settings = SimpleNamespace(
+            OPENAI_BATCH_POLL_INTERVAL_S=0, OPENAI_BATCH_COMPLETION_WINDOW='24h',
+            OPENAI_BATCH_MAX_REQUESTS=50000, OPENAI_BATCH_MAX_FILE_MB=180,
+        )
+        return server, db, analyzer, OpenAIBatchAnalyzer(analyzer, settings=settings, db=db)
+
+    return build
+
+
+async def _run(batch_analyzer, pages):
+    results = {}
+
+    async def on_result(url, result):
+        results[url] = result
+
+    stats = await batch_analyzer.analyze_many(pages, project_id='proj-1', pipeline_id='pipe-1', on_result=on_result)
+    return stats, results
+
+
+class TestOpenAIBatchAnalyzer:
+    """Batch submission, polling and result collection."""
+
+    @pytest.mark.asyncio
+    async def test_completed_batch_stores_every_result(self, batch_env):
+        server, db, analyzer, batch_analyzer = batch_env(polls_until_done=2)
+        stats, results = await _run(batch_analyzer, PAGES + [{'url': 'https://d.example/empty', 'content': ''}])
+
+        assert stats['submitted'] == 3
+        assert stats['skipped'] == 1
+        assert stats['completed'] == 3
+        assert stats['failed'] == 0
+        assert len(stats['batches']) == 1
+        assert set(results) == {page['url'] for page in PAGES}
+        assert analyzer.stored['https://a.example/one'] == {'summary': 'analysis of page-0'}
+
+        batch_id = stats['batches'][0]
+        assert db.batches[batch_id]['status'] == 'completed'
+        assert db.batches[batch_id]['completed_count'] == 3
+        assert server.calls.count('poll') == 3
+        assert server.calls[:2] == ['upload', 'create']
+
+        # The uploaded JSONL carries one chat completions request per page
+        batch = server.batches[batch_id]
+        lines = [json.loads(line) for line in server.files[batch['input_file_id']].splitlines()]
+        assert [line['custom_id'] for line in lines] == ['page-0', 'page-1', 'page-2']
+        assert all(line['url'] == '/v1/chat/completions' for line in lines)
+        assert lines[0]['body']['model'] == 'gpt-test'
+        assert lines[0]['body']['tool_choice']['function']['name'] == 'analyze_content'
+        assert batch['metadata']['pipeline_id'] == 'pipe-1'
+
+    @pytest.mark.asyncio
+    async def test_partially_failed_batch_reports_failed_pages(self, batch_env):
+        server, db, analyzer, batch_analyzer = batch_env(fail_ids={'page-1'})
+        stats, results = await _run(batch_analyzer, PAGES)
+
+        assert stats['completed'] == 2
+        assert stats['failed'] == 1
+        assert stats['failed_urls'] == ['https://b.example/two']
+        assert 'https://b.example/two' not in results
+        assert db.batches[stats['batches'][0]]['failed_count'] == 1
+
+    @pytest.mark.asyncio
+    async def test_expired_batch_fails_requests_that_never_ran(self, batch_env):
+        server, db, analyzer, batch_analyzer = batch_env(expire_after=1)
+        stats, results = await _run(batch_analyzer, PAGES)
+
+        batch_id = stats['batches'][0]
+        assert db.batches[batch_id]['status'] == 'expired'
+        assert stats['completed'] == 1
+        assert set(results) == {'https://a.example/one'}
+        assert sorted(stats['failed_urls']) == ['https://b.example/two', 'https://c.example/three']
+
+    @pytest.mark.asyncio
+    async def test_requests_split_across_batches_at_the_request_limit(self, batch_env):
+        server, db, analyzer, batch_analyzer = batch_env(polls_until_done=0)
+        batch_analyzer.max_requests = 2
+        stats, results = await _run(batch_analyzer, PAGES)
+
+        assert len(stats['batches']) == 2
+        assert [db.batches[b]['request_count'] for b in stats['batches']] == [2, 1]
+        assert stats['completed'] == 3
+        assert len(results) == 3
@@ -0,0 +1,104 @@
+"""
+Unit tests for the incremental ScaleSERP result parsers.
+"""
+
+import json
+
+import pytest
+
+from app.services.serp.result_stream import _drain_array_items, iter_csv_rows, iter_json_array, iter_text_lines
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+async def _collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestDrainArrayItems:
+    """Test decoding of complete items from the head of the buffer."""
+
+    def setup_method(self):
+        self.decoder = json.JSONDecoder()
+
+    def test_complete_items_and_closing_bracket(self):
+        items, consumed, finished = _drain_array_items(self.decoder, '{"a": 1}, {"b": 2}]')
+        assert items == [{"a": 1}, {"b": 2}]
+        assert finished is True
+        assert consumed == len('{"a": 1}, {"b": 2}]')
+
+    def test_incomplete_object_waits(self):
+        items, consumed, finished = _drain_array_items(self.decoder, '{"a": 1}, {"b": ')
+        assert items == [{"a": 1}]
+        assert finished is False
+        assert consumed == len('{"a": 1}, ')
+
+    def test_number_at_buffer_end_waits(self):
+        items, consumed, finished = _drain_array_items(self.decoder, '1, 12')
+        assert items == [1]
+        assert consumed == len('1, ')
+        assert finished is False
+
+    def test_number_split_at_decimal_point_waits(self):
+        items, consumed, _ = _drain_array_items(self.decoder, '12.')
+        assert items == []
+        assert consumed == 0
+
+    def test_number_split_in_exponent_waits(self):
+        items, consumed, _ = _drain_array_items(self.decoder, '3e')
+        assert items == []
+        assert consumed == 0
+
+    def test_number_followed_by_delimiter_is_complete(self):
+        for buffer in ('12.5,', '12.5]', '12.5 '):
+            items, _, _ = _drain_array_items(self.decoder, buffer)
+            assert items == [12.5]
+
+    def test_final_accepts_trailing_scalar(self):
+        items, consumed, finished = _drain_array_items(self.decoder, '7', final=True)
+        assert items == [7]
+        assert consumed == 1
+        assert finished is False
+
+
+class TestIterJsonArray:
+    """Test streaming items across arbitrary chunk boundaries."""
+
+    @pytest.mark.asyncio
+    async def test_every_split_point_yields_the_same_items(self):
+        document = json.dumps([{"position": 1, "title": "é"}, 12.5, -3e2, True, None, "x, ]"]).encode()
+        expected = json.loads(document)
+        for cut in range(1, len(document)):
+            items = await _collect(iter_json_array(_chunks(document[:cut], document[cut:])))
+            assert items == expected, f"split at byte {cut}"
+
+    @pytest.mark.asyncio
+    async def test_single_byte_chunks(self):
+        document = b'[1.25, 2, {"k": [3, 4]}]'
+        parts = [document[i:i + 1] for i in range(len(document))]
+        assert await _collect(iter_json_array(_chunks(*parts))) == [1.25, 2, {"k": [3, 4]}]
+
+    @pytest.mark.asyncio
+    async def test_non_array_document_is_parsed_whole(self):
+        assert await _collect(iter_json_array(_chunks(b'{"result": ', b'1}'))) == [{"result": 1}]
+
+    @pytest.mark.asyncio
+    async def test_truncated_array_raises(self):
+        with pytest.raises(ValueError):
+            await _collect(iter_json_array(_chunks(b'[{"a": 1}, {"b"')))
+
+
+class TestCsvRows:
+    """Test line splitting and multi-line quoted fields."""
+
+    @pytest.mark.asyncio
+    async def test_rows_with_multiline_field(self):
+        raw = b'keyword,title\r\nfoo,"first\nsecond"\r\nbar,plain'
+        rows = await _collect(iter_csv_rows(iter_text_lines(_chunks(raw[:9], raw[9:]))))
+        assert rows == [
+            {"keyword": "foo", "title": "first\nsecond"},
+            {"keyword": "bar", "title": "plain"},
+        ]
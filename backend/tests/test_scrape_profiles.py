@@ -0,0 +1,154 @@
+"""
+Unit tests for ScrapingBee domain profiles (no database: a fake pool records writes).
+"""
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.services.scraping.scrape_profiles import (
+    DEFAULT_TIMEOUT,
+    ESCALATE_AFTER,
+    HEAVY_TIMEOUT,
+    PROTECTED_SITES,
+    ScrapeAttempt,
+    ScrapeProfileStore,
+    _matches,
+)
+
+
+class FakeDB:
+    """Records executed statements; fails while `down` is set"""
+
+    def __init__(self):
+        self.executed = []
+        self.down = False
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self.down:
+            raise ConnectionError("database unavailable")
+        yield self
+
+    async def execute(self, sql, *args):
+        self.executed.append((sql, args))
+
+
+@pytest.fixture
+def store():
+    store = ScrapeProfileStore(db=FakeDB())
+    store.enabled = True
+    store.probe_after = 3
+    store._loaded = True
+    return store
+
+
+def _shapes(attempts):
+    return [(a.proxy_tier, a.render_js) for a in attempts]
+
+
+class TestMatches:
+    """Test domain-suffix matching of the site priors."""
+
+    def test_exact_and_subdomain_match(self):
+        assert _matches('linkedin.com', PROTECTED_SITES)
+        assert _matches('uk.linkedin.com', PROTECTED_SITES)
+
+    def test_substring_does_not_match(self):
+        assert not _matches('x.com', ('box.com',))
+        assert not _matches('box.com', ('x.com',))
+        assert not _matches('notreddit.com', PROTECTED_SITES)
+
+
+class TestPlan:
+    """Test the request shapes planned for a domain."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_domain_walks_the_ladder(self, store):
+        attempts = await store.plan('www.example.com')
+        assert _shapes(attempts) == [('standard', True), ('premium', True), ('stealth', True)]
+        assert all(a.timeout == DEFAULT_TIMEOUT for a in attempts)
+
+    @pytest.mark.asyncio
+    async def test_protected_domain_starts_at_premium(self, store):
+        attempts = await store.plan('www.linkedin.com')
+        assert _shapes(attempts) == [('premium', True), ('stealth', True)]
+        assert attempts[0].timeout == HEAVY_TIMEOUT
+
+    @pytest.mark.asyncio
+    async def test_learned_profile_starts_at_its_rung(self, store):
+        await store.record_success('example.com', ScrapeAttempt('premium', False, 45.0), latency=2.0)
+        attempts = await store.plan('example.com')
+        assert _shapes(attempts) == [('premium', False), ('premium', True), ('stealth', True)]
+        # Learned timeout: twice the latency plus headroom, floored at MIN_TIMEOUT
+        assert attempts[0].timeout == 20.0
+
+
+class TestEscalationAndProbe:
+    """Test that failures escalate and long success streaks probe cheaper."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_failures_start_one_rung_higher(self, store):
+        attempt = ScrapeAttempt('standard', True, 45.0)
+        await store.record_success('example.com', attempt, latency=1.0)
+        for _ in range(ESCALATE_AFTER):
+            await store.record_failure('example.com', attempt)
+        assert _shapes(await store.plan('example.com'))[0] == ('premium', False)
+
+    @pytest.mark.asyncio
+    async def test_success_streak_probes_one_rung_cheaper(self, store):
+        attempt = ScrapeAttempt('premium', False, 45.0)
+        for _ in range(3):
+            await store.record_success('example.com', attempt, latency=1.0)
+        assert _shapes(await store.plan('example.com'))[:2] == [('standard', True), ('premium', False)]
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_resets_the_streak(self, store):
+        attempt = ScrapeAttempt('premium', False, 45.0)
+        for _ in range(3):
+            await store.record_success('example.com', attempt, latency=1.0)
+        await store.record_failure('example.com', ScrapeAttempt('standard', True, 45.0))
+        assert _shapes(await store.plan('example.com'))[0] == ('premium', False)
+        assert store.snapshot()['probe_misses'] == 1
+
+    @pytest.mark.asyncio
+    async def test_successful_probe_moves_the_profile_down(self, store):
+        for _ in range(3):
+            await store.record_success('example.com', ScrapeAttempt('premium', False, 45.0), latency=1.0)
+        await store.record_success('example.com', ScrapeAttempt('standard', True, 45.0), latency=1.0)
+        profile = await store.get('example.com')
+        assert (profile.proxy_tier, profile.render_js) == ('standard', True)
+        assert profile.successes == 4
+        assert store.snapshot()['probe_wins'] == 1
+
+
+class TestFlush:
+    """Test batched persistence of changed profiles."""
+
+    @pytest.mark.asyncio
+    async def test_updates_are_buffered_and_written_in_one_statement(self, store):
+        attempt = ScrapeAttempt('standard', False, 45.0)
+        for domain in ('a.example', 'b.example', 'a.example'):
+            await store.record_success(domain, attempt, latency=1.0)
+        assert store.db.executed == []
+
+        await store.flush()
+        assert len(store.db.executed) == 1
+        sql, args = store.db.executed[0]
+        assert 'unnest' in sql
+        assert sorted(args[0]) == ['a.example', 'b.example']
+
+        await store.flush()
+        assert len(store.db.executed) == 1
+        await store.stop()
+
+    @pytest.mark.asyncio
+    async def test_failed_write_keeps_profiles_dirty(self, store):
+        await store.record_success('a.example', ScrapeAttempt('standard', False, 45.0), latency=1.0)
+        store.db.down = True
+        with pytest.raises(ConnectionError):
+            await store.flush()
+
+        store.db.down = False
+        await store.stop()
+        assert store.db.executed[0][1][0] == ['a.example']